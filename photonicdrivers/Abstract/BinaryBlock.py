@@ -0,0 +1,74 @@
+"""
+Reader for IEEE 488.2 definite-length arbitrary blocks, e.g. the reply to LOGG? of the Santec MPM-220.
+
+A block is "#", one digit n, n digits giving the byte count, the payload, and usually a
+termination character. The payload is decoded with np.frombuffer, or received straight into a
+preallocated array when the source supports it, so no intermediate Python list is built.
+
+The source is anything with read_bytes(n), which covers PyVISA resources and
+ScpiSocketTransport. If it also has read_into(memoryview), as ScpiSocketTransport does, the
+payload is received directly into the output array.
+
+Example:
+
+    instrument.write("LOGG? 0,1")
+    power_dbm = read_binary_block(instrument, dtype="<f4")
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+
+def read_block_header(source: Any) -> int:
+    """Read the "#<n><count>" header of a definite-length block and return the payload size in bytes."""
+    start = source.read_bytes(1)
+    # Skip whitespace left over from a previous reply
+    while start in (b"\r", b"\n", b" "):
+        start = source.read_bytes(1)
+    if start != b"#":
+        raise ValueError(f"Expected a binary block starting with '#', received {start!r}")
+    n_digits = int(source.read_bytes(1))
+    if n_digits == 0:
+        raise ValueError("Indefinite-length blocks (#0) are not supported")
+    return int(source.read_bytes(n_digits))
+
+
+def read_binary_block(source: Any, dtype: str | np.dtype = "<f4", out: np.ndarray | None = None, termination: bytes = b"\n") -> np.ndarray:
+    """
+    Read one definite-length block and decode it as an array of dtype.
+
+    Parameters:
+        source: Object with read_bytes(n) (and optionally read_into(memoryview))
+        dtype: Element type of the payload; the MPM-220 sends little-endian float32
+        out: Optional contiguous array to receive the data, e.g. a row of a larger array. Must hold exactly the payload
+        termination: Bytes that follow the payload, consumed after it. Use b"" if the instrument sends none
+    """
+    dtype = np.dtype(dtype)
+    n_bytes = read_block_header(source)
+    if n_bytes % dtype.itemsize:
+        raise ValueError(f"Block of {n_bytes} bytes is not a whole number of {dtype} values")
+    n_values = n_bytes // dtype.itemsize
+    if out is None:
+        out = np.empty(n_values, dtype=dtype)
+    elif out.dtype != dtype or out.size != n_values or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a contiguous {dtype} array of {n_values} values")
+
+    if hasattr(source, "read_into"):
+        source.read_into(memoryview(out.reshape(-1)).cast("B"))
+    else:
+        out.reshape(-1)[:] = np.frombuffer(source.read_bytes(n_bytes), dtype=dtype)
+    if termination:
+        source.read_bytes(len(termination))
+    return out
+
+
+def parse_binary_block(data: bytes, dtype: str | np.dtype = "<f4") -> np.ndarray:
+    """Decode a complete block that has already been read into memory. The returned array is a read-only view of data."""
+    if data[:1] != b"#":
+        raise ValueError(f"Expected a binary block starting with '#', received {data[:1]!r}")
+    n_digits = int(data[1:2])
+    n_bytes = int(data[2:2 + n_digits])
+    return np.frombuffer(data, dtype=dtype, count=n_bytes // np.dtype(dtype).itemsize, offset=2 + n_digits)
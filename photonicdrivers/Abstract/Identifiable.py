@@ -0,0 +1,6 @@
+from typing import Protocol, runtime_checkable
+
+@runtime_checkable
+class Identifiable(Protocol):
+    def get_id(self) -> str:
+        ...
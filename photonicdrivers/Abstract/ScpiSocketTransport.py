@@ -0,0 +1,224 @@
+"""
+Shared raw-socket transport for SCPI-style instruments.
+
+The socket drivers used to do one sendall() and one fixed-size recv() per command, which costs a
+full network round trip per getter and can split or merge replies. ScpiSocketTransport reads
+replies framed by the termination character from an internal buffer, and offers two ways to get
+many values in one round trip:
+
+- query_batch(): the queries are joined with ";" into one program message, as allowed by
+  IEEE 488.2, and the single reply line is split at the ";" separators again.
+- query_pipelined(): every command is sent with its own terminator in one write, and the replies
+  are read back in order. This works for instruments that do not accept compound messages, as
+  long as they answer queries in the order they arrive.
+
+Example:
+
+    transport = ScpiSocketTransport("192.168.1.10", 7180, read_termination="\\n")
+    transport.connect()
+    field, target, state = transport.query_pipelined(["FIELD:MAGnet?", "FIELD:TARGet?", "STATE?"])
+"""
+
+from __future__ import annotations
+
+import socket
+
+# Bytes requested from the socket per recv() call
+RECEIVE_SIZE = 65536
+
+
+def is_query(command: str) -> bool:
+    """True if the command header ends with '?', i.e. the instrument will reply."""
+    header = command.strip().split(None, 1)
+    return bool(header) and header[0].endswith("?")
+
+
+def split_response_units(response: str, separator: str = ";") -> list[str]:
+    """Split a compound response at separators that are not inside a quoted string."""
+    units = []
+    current = []
+    quote = None
+    for character in response:
+        if quote is not None:
+            if character == quote:
+                quote = None
+        elif character in "\"'":
+            quote = character
+        elif character == separator:
+            units.append("".join(current).strip())
+            current = []
+            continue
+        current.append(character)
+    units.append("".join(current).strip())
+    return units
+
+
+class ScpiSocketTransport:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout_s: float = 2.0,
+        write_termination: str = "\n",
+        read_termination: str = "\n",
+        encoding: str = "utf-8",
+        max_outstanding: int = 32,
+    ) -> None:
+        """
+        Parameters:
+            host, port: Instrument address
+            timeout_s: Socket timeout for every blocking call
+            write_termination: Appended to every command
+            read_termination: Ends every reply line. A "\\r" in front of it is stripped as well
+            encoding: Text encoding of commands and replies
+            max_outstanding: Maximum number of queries query_pipelined() sends before reading replies
+        """
+        if max_outstanding < 1:
+            raise ValueError("max_outstanding must be >= 1")
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self.write_termination = write_termination
+        self.read_termination = read_termination
+        self.encoding = encoding
+        self.max_outstanding = int(max_outstanding)
+        self.sock: socket.socket | None = None
+        self.round_trips = 0
+        self._buffer = bytearray()
+
+    @classmethod
+    def from_socket(cls, sock: socket.socket, **kwargs) -> "ScpiSocketTransport":
+        """Wrap an already connected socket."""
+        peer = sock.getpeername() if sock.family in (socket.AF_INET, socket.AF_INET6) else ("", 0)
+        transport = cls(peer[0], peer[1], **kwargs)
+        transport.sock = sock
+        sock.settimeout(transport.timeout_s)
+        return transport
+
+    def connect(self) -> None:
+        self._buffer.clear()
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout_s)
+        self.sock.settimeout(self.timeout_s)
+        # Commands are small; without this, a write that follows an unacknowledged write waits for the delayed ACK
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self) -> None:
+        self._buffer.clear()
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def is_open(self) -> bool:
+        return self.sock is not None
+
+    def write(self, command: str) -> None:
+        self.write_raw((command + self.write_termination).encode(self.encoding))
+
+    def write_raw(self, data: bytes) -> None:
+        self._socket().sendall(data)
+
+    def read_line(self) -> str:
+        """Read one reply up to the read termination, without the termination."""
+        terminator = self.read_termination.encode(self.encoding)
+        start = 0
+        while True:
+            end = self._buffer.find(terminator, start)
+            if end >= 0:
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + len(terminator)]
+                return line.decode(self.encoding).rstrip("\r")
+            # The terminator may straddle two receives
+            start = max(len(self._buffer) - len(terminator) + 1, 0)
+            self._receive()
+
+    def read_bytes(self, n_bytes: int) -> bytes:
+        """Read exactly n_bytes (e.g. the payload of a binary block)."""
+        while len(self._buffer) < n_bytes:
+            self._receive()
+        data = bytes(self._buffer[:n_bytes])
+        del self._buffer[:n_bytes]
+        return data
+
+    def read_into(self, destination: memoryview) -> None:
+        """Fill destination completely, copying buffered bytes first and receiving the rest directly into it."""
+        n_buffered = min(len(self._buffer), len(destination))
+        destination[:n_buffered] = self._buffer[:n_buffered]
+        del self._buffer[:n_buffered]
+        filled = n_buffered
+        sock = self._socket()
+        while filled < len(destination):
+            n_received = sock.recv_into(destination[filled:])
+            if n_received == 0:
+                raise ConnectionError("Connection closed by the instrument")
+            filled += n_received
+
+    def clear_input(self) -> None:
+        """Discard buffered and pending input, e.g. after connecting or after an error."""
+        self._buffer.clear()
+        sock = self._socket()
+        sock.setblocking(False)
+        try:
+            while sock.recv(RECEIVE_SIZE):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        finally:
+            sock.setblocking(True)
+            sock.settimeout(self.timeout_s)
+
+    def query(self, command: str) -> str:
+        self.write(command)
+        self.round_trips += 1
+        return self.read_line()
+
+    def query_batch(self, queries: list[str], separator: str = ";") -> list[str]:
+        """
+        Send all queries as one compound program message and return one reply per query.
+        Commands without a reply may be included; they get None.
+        """
+        if not queries:
+            return []
+        self.write(separator.join(queries))
+        self.round_trips += 1
+        n_replies = sum(is_query(command) for command in queries)
+        if n_replies == 0:
+            return [None] * len(queries)
+        units = split_response_units(self.read_line(), separator)
+        if len(units) != n_replies:
+            raise ValueError(f"Expected {n_replies} replies to the batch, received {len(units)}: {units}")
+        replies = iter(units)
+        return [next(replies) if is_query(command) else None for command in queries]
+
+    def query_pipelined(self, commands: list[str]) -> list[str | None]:
+        """
+        Send the commands back to back, each with its own terminator, and read the replies in
+        order. At most max_outstanding queries are in flight. Commands without a reply get None.
+        """
+        replies: list[str | None] = [None] * len(commands)
+        start = 0
+        while start < len(commands):
+            window = []
+            n_queries = 0
+            end = start
+            while end < len(commands) and n_queries < self.max_outstanding:
+                window.append(commands[end])
+                n_queries += is_query(commands[end])
+                end += 1
+            self.write_raw("".join(command + self.write_termination for command in window).encode(self.encoding))
+            self.round_trips += 1
+            for index in range(start, end):
+                if is_query(commands[index]):
+                    replies[index] = self.read_line()
+            start = end
+        return replies
+
+    def _socket(self) -> socket.socket:
+        if self.sock is None:
+            raise ConnectionError("Not connected")
+        return self.sock
+
+    def _receive(self) -> None:
+        chunk = self._socket().recv(RECEIVE_SIZE)
+        if not chunk:
+            raise ConnectionError("Connection closed by the instrument")
+        self._buffer += chunk
@@ -0,0 +1,194 @@
+"""
+Station-level snapshot of the settings of many instruments at once.
+
+Every driver has its own get_settings / get_all_settings, which queries the instrument serially.
+StationSnapshotService calls them for all registered drivers concurrently on a thread pool, so a
+snapshot of a whole setup takes about as long as the slowest instrument. Each instrument is only
+ever queried by one thread at a time, so its own commands stay in order, and each has its own
+timeout.
+
+A call that times out keeps running on its worker thread (a blocking socket read cannot be
+interrupted). The instrument is reported as busy in later snapshots until that call returns.
+
+Example:
+
+    service = StationSnapshotService()
+    service.add("magnet", magnet)                        # uses get_all_settings
+    service.add("qdac", qdac, timeout_s=5.0)             # uses get_settings
+    service.add("camera", camera, method=lambda camera: camera.get_settings())
+    with service:
+        snapshot = service.snapshot()
+    metadata = snapshot.to_dict()
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import threading
+import time
+from typing import Any
+
+from photonicdrivers.Abstract.Connectable import Connectable
+
+# Methods tried, in order, when no method is given to add()
+SETTINGS_METHODS = ("get_all_settings", "get_settings")
+
+
+@dataclass(frozen=True)
+class InstrumentSnapshot:
+    """
+    Settings of one instrument, or the reason they are missing.
+
+    status is "ok", "error" (the call raised error), "timeout" (no reply within timeout_s) or
+    "busy" (a call from an earlier snapshot had not returned yet).
+    """
+    name: str
+    status: str
+    settings: Any
+    duration_s: float
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+@dataclass(frozen=True)
+class StationSnapshot:
+    timestamp: float
+    duration_s: float
+    instruments: dict[str, InstrumentSnapshot]
+
+    @property
+    def ok(self) -> bool:
+        return all(instrument.ok for instrument in self.instruments.values())
+
+    def __getitem__(self, name: str) -> Any:
+        return self.instruments[name].settings
+
+    def to_dict(self) -> dict:
+        """Plain dictionary, e.g. for storing next to measurement data."""
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+            "duration_s": self.duration_s,
+            "instruments": {
+                name: {"status": instrument.status, "settings": instrument.settings, "duration_s": instrument.duration_s,
+                       "error": repr(instrument.error) if instrument.error is not None else None}
+                for name, instrument in self.instruments.items()
+            },
+        }
+
+
+class _Instrument:
+    def __init__(self, name: str, driver: Connectable, method: Callable[[Any], Any], timeout_s: float, lock: threading.Lock) -> None:
+        self.name = name
+        self.driver = driver
+        self.method = method
+        self.timeout_s = timeout_s
+        self.lock = lock
+        self.pending: Future | None = None
+
+
+class StationSnapshotService:
+    def __init__(self, max_workers: int = 16, default_timeout_s: float = 10.0) -> None:
+        """
+        Parameters:
+            max_workers: Size of the thread pool; use at least the number of instruments
+            default_timeout_s: Timeout of instruments added without their own
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if default_timeout_s <= 0:
+            raise ValueError("default_timeout_s must be positive")
+        self.max_workers = int(max_workers)
+        self.default_timeout_s = default_timeout_s
+        self._instruments: dict[str, _Instrument] = {}
+        self._executor: ThreadPoolExecutor | None = None
+
+    def add(
+        self,
+        name: str,
+        driver: Connectable,
+        method: str | Callable[[Any], Any] | None = None,
+        timeout_s: float | None = None,
+        lock: threading.Lock | None = None,
+    ) -> None:
+        """
+        Parameters:
+            name: Key of the instrument in the snapshot
+            driver: Connected driver
+            method: Name of the settings method, or a function called with the driver. Default: get_all_settings or get_settings
+            timeout_s: Per-instrument timeout; default default_timeout_s
+            lock: Held while the instrument is queried. Pass the lock other code uses for this driver to keep their commands apart
+        """
+        if name in self._instruments:
+            raise ValueError(f"An instrument named {name!r} is already added")
+        if timeout_s is not None and timeout_s <= 0:
+            raise ValueError("timeout_s must be positive")
+        if method is None:
+            method = next((candidate for candidate in SETTINGS_METHODS if hasattr(driver, candidate)), None)
+            if method is None:
+                raise ValueError(f"{type(driver).__name__} has none of {SETTINGS_METHODS}; pass method")
+        if isinstance(method, str):
+            method_name = method
+            getattr(driver, method_name)
+            method = lambda driver: getattr(driver, method_name)()
+        self._instruments[name] = _Instrument(name, driver, method, timeout_s or self.default_timeout_s, lock or threading.Lock())
+
+    def remove(self, name: str) -> None:
+        del self._instruments[name]
+
+    def get_names(self) -> list[str]:
+        return list(self._instruments)
+
+    def snapshot(self, names: list[str] | None = None) -> StationSnapshot:
+        """Query the instruments (default: all) concurrently and wait for each up to its timeout."""
+        instruments = [self._instruments[name] for name in (names if names is not None else self._instruments)]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="StationSnapshot")
+        timestamp = time.time()
+        start_s = time.monotonic()
+
+        submitted = {}
+        results = {}
+        for instrument in instruments:
+            if instrument.pending is not None and not instrument.pending.done():
+                results[instrument.name] = InstrumentSnapshot(instrument.name, "busy", None, 0.0)
+                continue
+            instrument.pending = self._executor.submit(self._query, instrument)
+            submitted[instrument.name] = instrument
+
+        for name, instrument in submitted.items():
+            remaining_s = start_s + instrument.timeout_s - time.monotonic()
+            try:
+                settings, duration_s = instrument.pending.result(timeout=max(remaining_s, 0.0))
+                results[name] = InstrumentSnapshot(name, "ok", settings, duration_s)
+            except FutureTimeoutError:
+                results[name] = InstrumentSnapshot(name, "timeout", None, time.monotonic() - start_s)
+            except Exception as error:
+                results[name] = InstrumentSnapshot(name, "error", None, time.monotonic() - start_s, error)
+
+        ordered = {instrument.name: results[instrument.name] for instrument in instruments}
+        return StationSnapshot(timestamp, time.monotonic() - start_s, ordered)
+
+    def close(self) -> None:
+        """Shut down the thread pool without waiting for calls that timed out."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __enter__(self) -> "StationSnapshotService":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @staticmethod
+    def _query(instrument: _Instrument) -> tuple[Any, float]:
+        with instrument.lock:
+            start_s = time.monotonic()
+            settings = instrument.method(instrument.driver)
+            return settings, time.monotonic() - start_s
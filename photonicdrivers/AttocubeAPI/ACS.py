@@ -3,12 +3,14 @@
 import sys
 import socket
 import json
+import asyncio
+import itertools
 
-from time import time, sleep
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 from random import randint
 
-from threading import Thread, Lock
+from threading import Thread, Lock, current_thread
 try:
     import netifaces
 except:
@@ -43,17 +45,28 @@ class AttoResult():
 
 
 class Device(object):
+    """
+    JSON-RPC connection to an attocube device.
+
+    Every device has its own request ids and its own reader thread. The reader resolves a
+    Future per request as the replies arrive, so any number of threads can have requests in
+    flight without polling, and devices never see each other's replies.
+    """
     TCP_PORT        = 9090
-    is_open         = False
-    request_id      = randint(0, 1000000)
-    request_id_lock = Lock()
-    response_buffer = {}
+    RESPONSE_TIMEOUT = 10
 
     def __init__(self, address):
         self.address        = address
         self.language       = 0
         self.apiversion     = 2
-        self.response_lock  = Lock()
+        self.is_open        = False
+        self.request_id     = itertools.count(randint(0, 1000000))
+        self.write_lock     = Lock()
+        self.pending_lock   = Lock()
+        self.pending        = {}
+        self.unclaimed      = {}
+        self.reader_thread  = None
+        self.reader_error   = None
 
     def __del__(self):
         self.close()
@@ -73,12 +86,18 @@ class Device(object):
             tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             tcp.settimeout(10)
             tcp.connect((self.address, self.TCP_PORT))
+            # Requests time out through their futures; the reader thread blocks until data or close
+            tcp.settimeout(None)
+            tcp.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.tcp = tcp
             if sys.version_info[0] > 2:
                 self.bufferedSocket = tcp.makefile("rw", newline='\r\n')
             else:
                 self.bufferedSocket = tcp.makefile("rw")
             self.is_open = True
+            self.reader_error = None
+            self.reader_thread = Thread(target=self._readResponses, name="AttocubeReader-" + str(self.address), daemon=True)
+            self.reader_thread.start()
 
     def close(self):
         """
@@ -86,12 +105,19 @@ class Device(object):
         Returns
         -------
         """
-        if self.is_open:
+        if getattr(self, "is_open", False):
+            self.is_open = False
+            try:
+                self.tcp.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            if self.reader_thread is not None and self.reader_thread is not current_thread():
+                self.reader_thread.join()
+            self.reader_thread = None
             self.bufferedSocket.close()
             self.tcp.close()
-            self.is_open = False
 
-    def sendRequest(self, method, params=False):
+    def _buildRequest(self, method, params=False):
         req = {
                 "jsonrpc": "2.0",
                 "method": method,
@@ -99,47 +125,124 @@ class Device(object):
               }
         if params:
             req["params"] = params
-        with Device.request_id_lock:
-            req["id"] = Device.request_id
-            self.bufferedSocket.write(json.dumps(req))
-            self.bufferedSocket.flush()
-            Device.request_id = Device.request_id + 1
-            return req["id"]
+        req["id"] = next(self.request_id)
+        return req
+
+    def _register(self, request_ids):
+        futures = []
+        with self.pending_lock:
+            # Checked under the lock the reader takes when it exits, so no future is left unresolved
+            if self.reader_error is not None:
+                raise AttoException(self.reader_error)
+            for request_id in request_ids:
+                future = Future()
+                future.request_id = request_id
+                self.pending[request_id] = future
+                futures.append(future)
+        return futures
+
+    def _send(self, payload, request_ids):
+        if not self.is_open:
+            raise AttoException("not connected, use connect()")
+        futures = self._register(request_ids)
+        try:
+            with self.write_lock:
+                self.bufferedSocket.write(payload)
+                self.bufferedSocket.flush()
+        except Exception:
+            with self.pending_lock:
+                for request_id in request_ids:
+                    self.pending.pop(request_id, None)
+            raise
+        return futures
 
-    def getResponse(self, request_id):
-        start_time = time()
-        while True:
-            if request_id in self.response_buffer:
-                response = self.response_buffer[request_id]
-                del self.response_buffer[request_id]
-                return response
-            if time() - start_time > 10:
-                raise TimeoutError("No result")
-
-            # Only one thread is allowed to read buffer
-            # Otherwise, deadlock is possible
-            if self.response_lock.acquire(blocking=False):
-                try:
-                    response = self.bufferedSocket.readline()
-                    parsed = json.loads(response)
-                    if parsed["id"] == request_id:
-                        return AttoResult(parsed)
-                    else:
-                        self.response_buffer[parsed["id"]] = AttoResult(parsed)
-                finally:
-                    self.response_lock.release()
-            else:
-                # Sleep to unblock scheduler
-                sleep(0.01)
+    def sendRequest(self, method, params=False):
+        """ Sends a request without waiting; returns its id for getResponse.
+        """
+        future = self.submit(method, params)
+        with self.pending_lock:
+            self.unclaimed[future.request_id] = future
+        return future.request_id
 
+    def getResponse(self, request_id):
+        with self.pending_lock:
+            future = self.unclaimed.pop(request_id, None)
+        if future is None:
+            raise AttoException("Unknown request id %s" % request_id)
+        return self._result(future)
+
+    def submit(self, method, params=False):
+        """ Sends a request and returns a concurrent.futures.Future of its AttoResult.
+        """
+        req = self._buildRequest(method, params)
+        return self._send(json.dumps(req), [req["id"]])[0]
 
     def request(self,method,params=False):
         """ Synchronous request.
         """
         if not self.is_open:
             raise AttoException("not connected, use connect()");
-        request_id = self.sendRequest(method, params)
-        return self.getResponse(request_id)
+        return self._result(self.submit(method, params))
+
+    async def request_async(self, method, params=False):
+        """ Asynchronous request for use with asyncio.
+        """
+        future = self.submit(method, params)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            with self.pending_lock:
+                self.pending.pop(future.request_id, None)
+            raise TimeoutError("No result")
+
+    def request_batch(self, calls):
+        """ Sends several requests as one JSON-RPC batch and waits for all replies.
+        Parameters
+        ----------
+        calls : list of (method, params) tuples
+        Returns
+        -------
+        list of AttoResult, in the order of calls
+        """
+        requests = [self._buildRequest(method, params) for method, params in calls]
+        if not requests:
+            return []
+        futures = self._send(json.dumps(requests), [req["id"] for req in requests])
+        return [self._result(future) for future in futures]
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.RESPONSE_TIMEOUT)
+        except FutureTimeoutError:
+            with self.pending_lock:
+                self.pending.pop(future.request_id, None)
+            raise TimeoutError("No result")
+
+    def _readResponses(self):
+        error = None
+        try:
+            while self.is_open:
+                line = self.bufferedSocket.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                parsed = json.loads(line)
+                for response in (parsed if isinstance(parsed, list) else [parsed]):
+                    with self.pending_lock:
+                        future = self.pending.pop(response.get("id"), None)
+                    # Futures cancelled by the caller (or by asyncio.wait_for) take no result
+                    if future is not None and future.set_running_or_notify_cancel():
+                        future.set_result(AttoResult(response))
+        except Exception as exception:
+            error = exception
+        # Nothing more will arrive; release everyone who is still waiting and refuse new requests
+        with self.pending_lock:
+            self.reader_error = "Connection closed" if error is None else "Reading from the device failed: %s" % error
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if future.set_running_or_notify_cancel():
+                future.set_exception(AttoException(self.reader_error))
 
     def printError(self, errorNumber):
         """ Converts the errorNumber into an error string an prints it to the
@@ -0,0 +1,258 @@
+"""
+Frame pipeline for Thorlabs scientific cameras (TLCamera from thorlabs_tsi_sdk).
+
+A CameraFramePipeline polls the armed camera on its own thread. The poll blocks in the SDK for up
+to poll_timeout_ms instead of spinning. Every frame is copied once out of the SDK buffer into a
+preallocated NumPy ring of capacity frames, together with its metadata (camera frame count,
+camera timestamp, host receive time).
+
+Consumers do not take frames from each other:
+    - a FrameReader (create_reader) returns every frame in order, e.g. for recording at the full
+      frame rate; frames it falls more than capacity behind on are counted as dropped
+    - get_latest / get_latest_color return the newest frame, e.g. for a live view polling at its
+      own, lower rate; the colour conversion only happens here, once per frame
+
+Frames returned by a reader are read-only views into the ring. They stay valid until capacity
+newer frames have arrived (check with is_valid); copy them to keep them longer.
+
+Example:
+
+    camera.connect()  # Thorlabs_Camera_Driver; arms the camera and triggers continuous acquisition
+    with CameraFramePipeline(camera.get_driver(), capacity=64) as pipeline:
+        reader = pipeline.create_reader()
+        while recording:
+            frame, info = reader.read(timeout_s=1.0)
+            writer.write(frame)
+        print(pipeline.n_dropped, reader.n_dropped, pipeline.get_frame_rate_hz())
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FrameInfo:
+    """
+    sequence: Index of the frame in this pipeline, from 0
+    frame_count: Frame number assigned by the camera
+    timestamp_ns: Camera timestamp relative to its internal counter, or None if not supported
+    received_s: time.monotonic() when the frame was copied into the ring
+    """
+    sequence: int
+    frame_count: int
+    timestamp_ns: int | None
+    received_s: float
+
+
+class FrameReader:
+    """Every frame from the moment the reader was created, in order."""
+
+    def __init__(self, pipeline: CameraFramePipeline) -> None:
+        self.pipeline = pipeline
+        self.next_sequence = pipeline.n_frames
+        self.n_dropped = 0
+
+    def read(self, timeout_s: float | None = None) -> tuple[np.ndarray, FrameInfo] | None:
+        """The next frame as a read-only view and its FrameInfo, or None on timeout or when the pipeline stops."""
+        pipeline = self.pipeline
+        with pipeline._condition:
+            if not pipeline._condition.wait_for(lambda: pipeline.n_frames > self.next_sequence or not pipeline.is_running(), timeout_s):
+                return None
+            if pipeline.n_frames <= self.next_sequence:
+                return None
+            oldest = pipeline._oldest_sequence()
+            if self.next_sequence < oldest:
+                self.n_dropped += oldest - self.next_sequence
+                self.next_sequence = oldest
+            frame, info = pipeline._frame(self.next_sequence)
+            self.next_sequence += 1
+            return frame, info
+
+
+class CameraFramePipeline:
+    def __init__(
+        self,
+        camera: Any,
+        capacity: int = 32,
+        poll_timeout_ms: int = 100,
+        color_converter: Callable[[np.ndarray], np.ndarray] | None = None,
+    ) -> None:
+        """
+        Parameters:
+            camera: Armed TLCamera (Thorlabs_Camera_Driver.get_driver())
+            capacity: Number of frames in the ring
+            poll_timeout_ms: How long one poll blocks in the SDK waiting for a frame
+            color_converter: Function from a raw frame to an RGB image. Default: the SDK mono to colour
+                processor for Bayer sensors and no conversion for monochrome sensors, created on first use
+        """
+        if capacity < 2:
+            raise ValueError("capacity must be >= 2")
+        if poll_timeout_ms < 1:
+            raise ValueError("poll_timeout_ms must be >= 1")
+        self.camera = camera
+        self.capacity = int(capacity)
+        self.poll_timeout_ms = int(poll_timeout_ms)
+        self.n_frames = 0
+        self.n_dropped = 0
+        self.n_errors = 0
+        self.last_error: BaseException | None = None
+        self._color_converter = color_converter
+        # A converter created by the pipeline wraps the SDK processor and is released by stop()
+        self._owns_color_converter = color_converter is None
+        self._color_processor_resources: list = []
+        self._color_cache: tuple[int, np.ndarray] | None = None
+        self._frames: np.ndarray | None = None
+        self._frame_counts = np.zeros(self.capacity, dtype=np.int64)
+        self._timestamps_ns = np.full(self.capacity, -1, dtype=np.int64)
+        self._received_s = np.zeros(self.capacity)
+        self._ring_start = 0
+        self._last_frame_count: int | None = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self.camera.image_poll_timeout_ms = self.poll_timeout_ms
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="CameraFramePipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop polling and release the colour processor. The frames in the ring stay readable; a later
+        get_latest_color creates a new colour processor.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+        for resource in reversed(self._color_processor_resources):
+            resource.dispose()
+        self._color_processor_resources = []
+        if self._owns_color_converter:
+            self._color_converter = None
+            self._color_cache = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop_event.is_set()
+
+    def __enter__(self) -> "CameraFramePipeline":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def create_reader(self) -> FrameReader:
+        return FrameReader(self)
+
+    def is_valid(self, sequence: int) -> bool:
+        """Whether the frame with this sequence number is still in the ring."""
+        with self._condition:
+            return self._oldest_sequence() <= sequence < self.n_frames
+
+    def get_latest(self, copy: bool = True) -> tuple[np.ndarray, FrameInfo] | None:
+        """The newest frame (a copy unless copy=False) and its FrameInfo, or None before the first frame."""
+        with self._condition:
+            if self.n_frames == 0:
+                return None
+            frame, info = self._frame(self.n_frames - 1)
+            return (frame.copy() if copy else frame), info
+
+    def get_latest_color(self) -> tuple[np.ndarray, FrameInfo] | None:
+        """The newest frame converted to colour. Each frame is converted at most once, however often it is asked for."""
+        latest = self.get_latest(copy=True)
+        if latest is None:
+            return None
+        frame, info = latest
+        if self._color_cache is not None and self._color_cache[0] == info.sequence:
+            return self._color_cache[1], info
+        if self._color_converter is None:
+            self._color_converter = self._create_color_converter()
+        image = self._color_converter(frame)
+        self._color_cache = (info.sequence, image)
+        return image, info
+
+    def get_frame_rate_hz(self) -> float:
+        """Frame rate over the frames in the ring, from the host receive times."""
+        with self._condition:
+            oldest = self._oldest_sequence()
+            if self.n_frames - oldest < 2:
+                return 0.0
+            first_s = self._received_s[oldest % self.capacity]
+            last_s = self._received_s[(self.n_frames - 1) % self.capacity]
+            return (self.n_frames - 1 - oldest) / (last_s - first_s) if last_s > first_s else 0.0
+
+    def _oldest_sequence(self) -> int:
+        return max(self._ring_start, self.n_frames - self.capacity)
+
+    def _frame(self, sequence: int) -> tuple[np.ndarray, FrameInfo]:
+        slot = sequence % self.capacity
+        frame = self._frames[slot]
+        frame.flags.writeable = False
+        timestamp_ns = int(self._timestamps_ns[slot])
+        info = FrameInfo(sequence, int(self._frame_counts[slot]), None if timestamp_ns < 0 else timestamp_ns, float(self._received_s[slot]))
+        return frame, info
+
+    def _store(self, image_buffer: np.ndarray, frame_count: int, timestamp_ns: int | None) -> None:
+        with self._condition:
+            if self._frames is None or self._frames.shape[1:] != image_buffer.shape:
+                # First frame, or the ROI / binning changed: frames of the old size are no longer readable
+                self._frames = np.empty((self.capacity, *image_buffer.shape), dtype=image_buffer.dtype)
+                self._ring_start = self.n_frames
+            slot = self.n_frames % self.capacity
+            np.copyto(self._frames[slot], image_buffer)
+            self._frame_counts[slot] = frame_count
+            self._timestamps_ns[slot] = -1 if timestamp_ns is None else timestamp_ns
+            self._received_s[slot] = time.monotonic()
+            if self._last_frame_count is not None and frame_count > self._last_frame_count + 1:
+                self.n_dropped += frame_count - self._last_frame_count - 1
+            self._last_frame_count = frame_count
+            self.n_frames += 1
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                # Blocks in the SDK for up to image_poll_timeout_ms
+                frame = self.camera.get_pending_frame_or_null()
+            except Exception as error:
+                self.n_errors += 1
+                self.last_error = error
+                self._stop_event.wait(self.poll_timeout_ms / 1000)
+                continue
+            if frame is not None:
+                self._store(frame.image_buffer, frame.frame_count, frame.time_stamp_relative_ns_or_null)
+
+    def _create_color_converter(self) -> Callable[[np.ndarray], np.ndarray]:
+        from photonicdrivers.Cameras.Thorlabs.thorlabs_tsi_sdk.tl_camera_enums import SENSOR_TYPE
+        from photonicdrivers.Cameras.Thorlabs.thorlabs_tsi_sdk.tl_mono_to_color_processor import MonoToColorProcessorSDK
+
+        if self.camera.camera_sensor_type != SENSOR_TYPE.BAYER:
+            return lambda frame: frame
+        sdk = MonoToColorProcessorSDK()
+        processor = sdk.create_mono_to_color_processor(
+            SENSOR_TYPE.BAYER,
+            self.camera.color_filter_array_phase,
+            self.camera.get_color_correction_matrix(),
+            self.camera.get_default_white_balance_matrix(),
+            self.camera.bit_depth,
+        )
+        self._color_processor_resources = [sdk, processor]
+
+        def convert(frame: np.ndarray) -> np.ndarray:
+            height, width = frame.shape
+            return processor.transform_to_24(frame, width, height).reshape(height, width, 3)
+
+        return convert
@@ -1,4 +1,5 @@
 from photonicdrivers.Cameras.Thorlabs.thorlabs_tsi_sdk.tl_camera import TLCameraSDK
+from photonicdrivers.Cameras.Thorlabs.FramePipeline import CameraFramePipeline
 
 class Thorlabs_Camera_Driver():  # Developer: Magnus Linnet Madsen
 
@@ -7,7 +8,6 @@ class Thorlabs_Camera_Driver():  # Developer: Magnus Linnet Madsen
         :param resource_manager:
         :param serial_number:
         """
-        self.sdk = sdk
         self.driver = driver
         self.serial_number = serial_number
         self.is_connected = False
@@ -148,6 +148,15 @@ class Thorlabs_Camera_Driver():  # Developer: Magnus Linnet Madsen
         """
         return self.camera_driver
 
+    def create_frame_pipeline(self, capacity=32, poll_timeout_ms=100):
+        """
+        Create a frame pipeline for the connected (armed) camera. Start it with start() or use it as a context manager.
+        :param capacity: Number of frames kept in the ring buffer of type (int)
+        :param poll_timeout_ms: How long one poll blocks waiting for a frame of type (int) in units of milli seconds
+        :return: Pipeline of the type (CameraFramePipeline)
+        """
+        return CameraFramePipeline(self.camera_driver, capacity=capacity, poll_timeout_ms=poll_timeout_ms)
+
     def get_serial_number(self):
         """
         Returns the serial number of the camera connected.
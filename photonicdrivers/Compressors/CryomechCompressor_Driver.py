@@ -2,13 +2,139 @@
 import struct
 import socket
 import datetime
+import threading
+import time
 from photonicdrivers.Abstract.Connectable import Connectable
 
+# Number of 2 byte registers holding the status data, starting at register 1
+N_REGISTERS = 0x35
+# Modbus TCP header (MBAP): transaction id, protocol id, length, unit id
+MBAP_HEADER_SIZE = 7
+
+# Associations between keys and their location in rawData
+# Original data as transmitted is high byte first, low word first
+# We rearrange to do high byte first, high word first which is "big endian"
+KEY_LOCATIONS = {
+    "Operating State": [9, 10],
+    "Compressor State": [11, 12],
+    "Warning State": [15, 16, 13, 14],
+    "Alarm State": [19, 20, 17, 18],
+    "Coolant In Temp": [23, 24, 21, 22],
+    "Coolant Out Temp": [27, 28, 25, 26],
+    "Oil Temp": [31, 32, 29, 30],
+    "Helium Temp": [35, 36, 33, 34],
+    "Low Pressure": [39, 40, 37, 38],
+    "Low Pressure Average": [43, 44, 41, 42],
+    "High Pressure": [47, 48, 45, 46],
+    "High Pressure Average": [51, 52, 49, 50],
+    "Delta Pressure Average": [55, 56, 53, 54],
+    "Motor Current": [59, 60, 57, 58],
+    "Hours of Opperation": [63, 64, 61, 62],
+    "Pressure Unit": [65, 66],
+    "Temperature Unit": [67, 68],
+    "Serial Number": [69, 70],
+    "Model": [71, 72],
+    "Software Revision": [73, 74],
+}
+STATUS_CODES = dict()
+STATUS_CODES["Operating State"] = {
+    0: "Idling - ready to start",
+    2: "Starting",
+    3: "Running",
+    5: "Stopping",
+    6: "Error Lockout",
+    7: "Error",
+    8: "Helium Cool Down",
+    9: "Power Related Error",
+    15: "Recovered from Error",
+}
+STATUS_CODES["Compressor State"] = {0: "Off", 1: "On"}
+STATUS_CODES["Warning State"] = {
+    -0: "No warnings",
+    -1: "Coolant In Temp High",
+    -2: "Coolant In Temp Low",
+    -4: "Cooling Out Temp High",
+    -8: "Cooling Out Temp Low",
+    -16: "Oil Temp High",
+    -32: "Oil Temp Low",
+    -64: "Helium Temp High",
+    -128: "Helium Temp Low",
+    -256: "Low Pressure Low",
+    -512: "Low Pressure High",
+    -1024: "High Pressure High",
+    -2048: "High Pressure Low",
+    -4096: "Delta Pressure High",
+    -8192: "Delta Pressure Low",
+    -16384: "Motor Current Low",
+    -32768: "Three Phase Error",
+    -65536: "Power Supply Error",
+    -131072: "Static Pressure High",
+    -262144: "Static Pressure Low",
+    -524288: "Cold Head Motor Stall",
+    -1048576: "Coolant In Sensor Problem",
+    -2097152: "Coolant Out Sensor Problem",
+    -4194304: "Helium Sensor Problem",
+    -8388608: "Oil Sensor Problem",
+    -16777216: "High Pressure Sensor Problem",
+    -33554432: "Low Pressure Sensor Problem",
+    -67108864: "Motor Current Sensor Problem",
+    -134217728: "Motor Current High",
+    -268435456: "Inverter Error",
+    -536870912: "Driver Communication Loss",
+    -1073741824: "Inverter Communication Loss",
+}
+STATUS_CODES["Alarm State"] = STATUS_CODES["Warning State"]
+STATUS_CODES["Pressure Unit"] = {0: "psi", 1: "bar", 2: "kPa"}
+STATUS_CODES["Temperature Unit"] = {0: "F", 1: "C", 2: "K"}
+STATUS_CODES["Model Major"] = {1: "8", 2: "9", 3: "10", 4: "11", 5: "28"}
+STATUS_CODES["Model Minor"] = {
+    1: "A1",
+    2: "01",
+    3: "02",
+    4: "03",
+    5: "H3",
+    6: "I3",
+    7: "04",
+    8: "H4",
+    9: "05",
+    10: "H5",
+    11: "I6",
+    12: "06",
+    13: "07",
+    14: "H7",
+    15: "I7",
+    16: "08",
+    17: "09",
+    18: "9C",
+    19: "10",
+    20: "1I",
+    21: "11",
+    22: "12",
+    23: "13",
+    24: "14",
+}
+
+
+
 class CryomechCompressor_Driver(Connectable):
-    def __init__(self, _ip_address, _port=502, _timeout=10):
+    def __init__(self, _ip_address, _port=502, _timeout=10, _max_age_s=1.0):
+        """
+        All registers are read with one Modbus request and the decoded values are cached, so the
+        getters only talk to the compressor when the cached values are older than _max_age_s.
+        Use _max_age_s=0 to read the compressor on every call.
+        """
         self.ip_address = _ip_address
         self.port = _port
         self.timeout = _timeout
+        self.max_age_s = _max_age_s
+        self.n_register_reads = 0
+        self._snapshot = None
+        self._snapshot_time_s = None
+        self._lock = threading.RLock()
+        self._stream_thread = None
+        self._stream_stop_event = threading.Event()
+        # Last exception raised by a readout or the callback on the streaming thread
+        self.last_error = None
 
 
  ##################### HIGH LEVEL SOURCE METHODS ###########################
@@ -17,23 +143,76 @@ class CryomechCompressor_Driver(Connectable):
         """
         Returns list of specified values (coolant in/out temp, oil/helium temp, low/high pressure, delta pressure average, motor current)
         """
-        self.comm.sendall(self._buildRegistersQuery())
-        data = self.comm.recv(1024)
-        data_readout_failed, brd = self._breakdownReplyData(data)
-        if data_readout_failed:
+        brd = self.get_all()
+        if brd is None:
             return None
         else:
-            return data_readout_failed, brd['Coolant In Temp'],brd['Coolant Out Temp'],brd['Oil Temp'],brd['Helium Temp'], brd['Low Pressure'], brd['High Pressure'], brd['Delta Pressure Average'], brd['Motor Current']
+            return False, brd['Coolant In Temp'],brd['Coolant Out Temp'],brd['Oil Temp'],brd['Helium Temp'], brd['Low Pressure'], brd['High Pressure'], brd['Delta Pressure Average'], brd['Motor Current']
 
 
   ##################### LOW LEVEL SOURCE METHODS ###########################
 
+    def get_all(self, max_age_s=None) -> dict:
+        """
+        Returns all decoded values (the dictionary of _breakdownReplyData), or None if the readout failed.
+        A cached snapshot is returned if it is younger than max_age_s (default: the driver's max_age_s).
+        """
+        max_age_s = self.max_age_s if max_age_s is None else max_age_s
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._snapshot_time_s <= max_age_s:
+                return dict(self._snapshot)
+            return self.refresh()
+
+    def refresh(self) -> dict:
+        """
+        Reads all registers from the compressor and updates the cached snapshot.
+        Returns the decoded values, or None if the readout failed.
+        """
+        with self._lock:
+            rawdata = self._readRegisters()
+            data_readout_failed, data = self._breakdownReplyData(rawdata)
+            if data_readout_failed:
+                self._snapshot = None
+                return None
+            self._snapshot = data
+            self._snapshot_time_s = time.monotonic()
+            return dict(data)
+
+    def invalidate_cache(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def start_streaming(self, interval_s=1.0, callback=None) -> None:
+        """
+        Refreshes the snapshot every interval_s seconds on a background thread, so the getters
+        always find fresh values in the cache. callback is called with every new snapshot
+        (None if a readout failed). Exceptions of the readout or the callback do not stop the
+        streaming; the last one is kept in last_error.
+        """
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        self.stop_streaming()
+        self._stream_stop_event.clear()
+        self._stream_thread = threading.Thread(target=self._stream, args=(interval_s, callback), daemon=True)
+        self._stream_thread.start()
+
+    def stop_streaming(self) -> None:
+        self._stream_stop_event.set()
+        if self._stream_thread is not None:
+            self._stream_thread.join()
+            self._stream_thread = None
+
+    def is_streaming(self) -> bool:
+        return self._stream_thread is not None and self._stream_thread.is_alive()
+
     def connect(self):
         self.comm = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.comm.connect((self.ip_address, self.port))
         self.comm.settimeout(self.timeout)
 
     def disconnect(self):
+        self.stop_streaming()
+        self.invalidate_cache()
         self.comm.close()
 
     def is_connected(self) -> bool:
@@ -58,7 +237,7 @@ class CryomechCompressor_Driver(Connectable):
         return self._get_data('Coolant In Temp') 
     
     def get_coolant_out_temp(self) -> float: #in C
-        return self._get_data('Coolant In Temp')
+        return self._get_data('Coolant Out Temp')
     
     def get_oil_temp(self) -> float: #in C
         return self._get_data('Oil Temp')
@@ -76,7 +255,7 @@ class CryomechCompressor_Driver(Connectable):
         return self._get_data('High Pressure')
 
     def get_high_pressure_average(self) -> float: #in psi
-        return self._get_data('Low Pressure Average')
+        return self._get_data('High Pressure Average')
 
     def get_delta_pressure_average(self) -> float: #in psi
         return self._get_data('Delta Pressure Average')
@@ -93,17 +272,51 @@ class CryomechCompressor_Driver(Connectable):
 
     def _get_data(self,specific_data):
         """
-        Gets the raw data from the compressor and returns it in a usable format.
+        Returns one value of the (cached) snapshot in a usable format.
         """
-        self.comm.sendall(self._buildRegistersQuery())
-        data = self.comm.recv(1024)
-        data_readout_failed, brd = self._breakdownReplyData(data)
+        brd = self.get_all()
 
-        if data_readout_failed:
+        if brd is None:
             return None
         else:
             return brd[specific_data]
 
+    def _readRegisters(self):
+        """
+        Sends the register query and reads exactly one Modbus TCP reply, using the length field of its header.
+        """
+        self.comm.sendall(self._buildRegistersQuery())
+        header = self._recvExactly(MBAP_HEADER_SIZE)
+        length = struct.unpack(">H", header[4:6])[0]
+        self.n_register_reads += 1
+        # The length field counts the unit id, which is already part of the header
+        return header + self._recvExactly(length - 1)
+
+    def _recvExactly(self, n_bytes):
+        data = bytearray()
+        while len(data) < n_bytes:
+            chunk = self.comm.recv(n_bytes - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed by the compressor")
+            data += chunk
+        return bytes(data)
+
+    def _stream(self, interval_s, callback):
+        next_time_s = time.monotonic()
+        while not self._stream_stop_event.is_set():
+            try:
+                snapshot = self.refresh()
+            except Exception as error:
+                self.last_error = error
+                snapshot = None
+            if callback is not None:
+                try:
+                    callback(snapshot)
+                except Exception as error:
+                    self.last_error = error
+            next_time_s += interval_s
+            self._stream_stop_event.wait(max(next_time_s - time.monotonic(), 0.0))
+
 
     def _buildRegistersQuery(self):
         # ModBusTCP query code
@@ -120,7 +333,7 @@ class CryomechCompressor_Driver(Connectable):
                 0x00,
                 0x01,  # Starting Register
                 0x00,
-                0x35,  # Number of 2 byte registers to read
+                N_REGISTERS,  # Number of 2 byte registers to read
             ]
         )
         return query
@@ -132,117 +345,14 @@ class CryomechCompressor_Driver(Connectable):
         the dictionary values are the data in floats or ints.
         """
 
-        # Associations between keys and their location in rawData
-        # Original data as transmitted is high byte first, low word first
-        # We rearrange to do high byte first, high word first which is "big endian"
-        keyloc = {
-            "Operating State": [9, 10],
-            "Compressor State": [11, 12],
-            "Warning State": [15, 16, 13, 14],
-            "Alarm State": [19, 20, 17, 18],
-            "Coolant In Temp": [23, 24, 21, 22],
-            "Coolant Out Temp": [27, 28, 25, 26],
-            "Oil Temp": [31, 32, 29, 30],
-            "Helium Temp": [35, 36, 33, 34],
-            "Low Pressure": [39, 40, 37, 38],
-            "Low Pressure Average": [43, 44, 41, 42],
-            "High Pressure": [47, 48, 45, 46],
-            "High Pressure Average": [51, 52, 49, 50],
-            "Delta Pressure Average": [55, 56, 53, 54],
-            "Motor Current": [59, 60, 57, 58],
-            "Hours of Opperation": [63, 64, 61, 62],
-            "Pressure Unit": [65, 66],
-            "Temperature Unit": [67, 68],
-            "Serial Number": [69, 70],
-            "Model": [71, 72],
-            "Software Revision": [73, 74],
-        }
-        statuscodes = dict()
-        statuscodes["Operating State"] = {
-            0: "Idling - ready to start",
-            2: "Starting",
-            3: "Running",
-            5: "Stopping",
-            6: "Error Lockout",
-            7: "Error",
-            8: "Helium Cool Down",
-            9: "Power Related Error",
-            15: "Recovered from Error",
-        }
-        statuscodes["Compressor State"] = {0: "Off", 1: "On"}
-        statuscodes["Warning State"] = {
-            -0: "No warnings",
-            -1: "Coolant In Temp High",
-            -2: "Coolant In Temp Low",
-            -4: "Cooling Out Temp High",
-            -8: "Cooling Out Temp Low",
-            -16: "Oil Temp High",
-            -32: "Oil Temp Low",
-            -64: "Helium Temp High",
-            -128: "Helium Temp Low",
-            -256: "Low Pressure Low",
-            -512: "Low Pressure High",
-            -1024: "High Pressure High",
-            -2048: "High Pressure Low",
-            -4096: "Delta Pressure High",
-            -8192: "Delta Pressure Low",
-            -16384: "Motor Current Low",
-            -32768: "Three Phase Error",
-            -65536: "Power Supply Error",
-            -131072: "Static Pressure High",
-            -262144: "Static Pressure Low",
-            -524288: "Cold Head Motor Stall",
-            -1048576: "Coolant In Sensor Problem",
-            -2097152: "Coolant Out Sensor Problem",
-            -4194304: "Helium Sensor Problem",
-            -8388608: "Oil Sensor Problem",
-            -16777216: "High Pressure Sensor Problem",
-            -33554432: "Low Pressure Sensor Problem",
-            -67108864: "Motor Current Sensor Problem",
-            -134217728: "Motor Current High",
-            -268435456: "Inverter Error",
-            -536870912: "Driver Communication Loss",
-            -1073741824: "Inverter Communication Loss",
-        }
-        statuscodes["Alarm State"] = statuscodes["Warning State"]
-        statuscodes["Pressure Unit"] = {0: "psi", 1: "bar", 2: "kPa"}
-        statuscodes["Temperature Unit"] = {0: "F", 1: "C", 2: "K"}
-        statuscodes["Model Major"] = {1: "8", 2: "9", 3: "10", 4: "11", 5: "28"}
-        statuscodes["Model Minor"] = {
-            1: "A1",
-            2: "01",
-            3: "02",
-            4: "03",
-            5: "H3",
-            6: "I3",
-            7: "04",
-            8: "H4",
-            9: "05",
-            10: "H5",
-            11: "I6",
-            12: "06",
-            13: "07",
-            14: "H7",
-            15: "I7",
-            16: "08",
-            17: "09",
-            18: "9C",
-            19: "10",
-            20: "1I",
-            21: "11",
-            22: "12",
-            23: "13",
-            24: "14",
-        }
-
         # Iterate through all keys and return the data in a usable format.
         # If there is an error in the string format, print the
         # error to logs, return an empty dictionary, and flag the data as bad
         data = {}
         data["datetime"] = datetime.datetime.now().isoformat()
         try:
-            for key in keyloc.keys():
-                locs = keyloc[key]
+            for key in KEY_LOCATIONS.keys():
+                locs = KEY_LOCATIONS[key]
                 wkrBytes = bytes([rawdata[loc] for loc in locs])
 
                 # four different data formats to unpack
@@ -256,7 +366,7 @@ class CryomechCompressor_Driver(Connectable):
                 ]:
                     state = struct.unpack(">H", wkrBytes)[0]
                     try:
-                        data[key] = statuscodes[key][state]
+                        data[key] = STATUS_CODES[key][state]
                     except:
                         data[key] = state
                 # 32bit signed integer which is actually stored as a 32bit IEEE float (silly)
@@ -264,11 +374,11 @@ class CryomechCompressor_Driver(Connectable):
                     state = int(struct.unpack(">f", wkrBytes)[0])
                     try:
                         data[key] = ""
-                        for status in statuscodes[key].keys():
+                        for status in STATUS_CODES[key].keys():
                             if abs(state) & abs(status):
-                                data[key] += statuscodes[key][status] + ":"
+                                data[key] += STATUS_CODES[key][status] + ":"
                         if not data[key]:
-                            data[key] = statuscodes[key][-0.0]
+                            data[key] = STATUS_CODES[key][-0.0]
                         data[key] = data[key].rstrip(":")
                     except:
                         data[key] = state
@@ -278,8 +388,8 @@ class CryomechCompressor_Driver(Connectable):
                     model_minor = struct.unpack(">B", bytes([rawdata[locs[1]]]))[0]
                     try:
                         data[key] = (
-                            statuscodes["Model Major"][model_major]
-                            + statuscodes["Model Minor"][model_minor]
+                            STATUS_CODES["Model Major"][model_major]
+                            + STATUS_CODES["Model Minor"][model_minor]
                         )
                     except:
                         data[key] = str(model_major) + "_" + str(model_minor)
@@ -1,6 +1,6 @@
-import socket
 import time
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.Abstract.ScpiSocketTransport import ScpiSocketTransport
 
 
 class AMI430_PS_Driver(Connectable):
@@ -10,20 +10,33 @@ class AMI430_PS_Driver(Connectable):
 
     All commands are sent as a query. If the command ends with a '?', a response is expected.
     If the command does not end with a '?', the function returns 0 upon successful sending to avoid a timeout waiting for a response.
+    get_all_settings pipelines its queries, so the whole snapshot costs a single round trip.
     """
 
+    STATE_MAP = {
+        "1": "RAMPING to target",
+        "2": "HOLDING at target",
+        "3": "PAUSED",
+        "4": "MANUAL UP",
+        "5": "MANUAL DOWN",
+        "6": "ZEROING CURRENT",
+        "7": "QUENCH detected",
+        "8": "AT ZERO",
+        "9": "HEATING switch",
+        "10": "COOLING switch",
+        "11": "RAMPDOWN active",
+    }
+
     def __init__(self, ip_address: str, port: int = 7180) -> None:
         self.ip_address = ip_address
         self.port = port
         self.timeout = 10
         self.termination_char = "\n"
-        self._buffer = ""  # Buffer to store incomplete responses
+        self.transport = ScpiSocketTransport(self.ip_address, self.port, timeout_s=self.timeout, write_termination=self.termination_char, read_termination="\n")
 
     def connect(self) -> None:
-        self._buffer = ""  # Reset buffer on connect
-        self.connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.connection.settimeout(self.timeout)
-        self.connection.connect((self.ip_address, self.port))
+        self.transport.connect()
+        self.connection = self.transport.sock
 
         # Read and discard the "Hello" message using proper line reading
         # The AMI430 sends a welcome message upon connection
@@ -44,8 +57,7 @@ class AMI430_PS_Driver(Connectable):
         
 
     def disconnect(self) -> None:
-        self._buffer = ""  # Clear buffer on disconnect
-        self.connection.close()
+        self.transport.close()
 
     def is_connected(self) -> bool:
         try:
@@ -67,8 +79,9 @@ class AMI430_PS_Driver(Connectable):
         """
         Returns "kG" for kilogauss or "T" for tesla
         """
-        response = self.__query("FIELD:UNITS?")
+        return self.__parse_field_unit(self.__query("FIELD:UNITS?"))
 
+    def __parse_field_unit(self, response: str) -> str:
         if response == "0":
             return "kG"
         elif response == "1":
@@ -175,20 +188,7 @@ class AMI430_PS_Driver(Connectable):
         and its corresponding code
         """
         state_code = self.__query("STATE?")
-        state_map = {
-            "1": "RAMPING to target",
-            "2": "HOLDING at target",
-            "3": "PAUSED",
-            "4": "MANUAL UP",
-            "5": "MANUAL DOWN",
-            "6": "ZEROING CURRENT",
-            "7": "QUENCH detected",
-            "8": "AT ZERO",
-            "9": "HEATING switch",
-            "10": "COOLING switch",
-            "11": "RAMPDOWN active",
-        }
-        return state_map.get(state_code, f"Unknown state: {state_code}"), state_code
+        return self.STATE_MAP.get(state_code, f"Unknown state: {state_code}"), state_code
 
     def __wait_for_state(self, target_states: list, timeout: float = 1800):
         """
@@ -356,24 +356,29 @@ class AMI430_PS_Driver(Connectable):
         return self.__query(command)
 
     def get_all_settings(self) -> dict:
-        settings = {
-            "ID": self.get_id(),
-            "Unit": self.get_field_unit(),
-            "Limit": self.get_limit(),
-            "Current": self.get_current(),
-            "Current_Target": self.get_current_target(),
-            "Field": self.get_field(),
-            "Field_Target": self.get_field_target(),
-            "Magnet_Voltage_V": self.get_magnet_voltage(),
-            "Supply_Voltage_V": self.get_supply_voltage(),
-            "Coil_Constant": self.get_coil_constant(),
-            "Persistent_Switch_State": self.get_persistent_switch_state(),
-            "Quench_State": self.get_quench_state(),
-            "Sweep_Mode": self.get_sweep_mode(),
-            "RampRate_Current_Segment1": self.get_ramp_rate_current(1),
-            "RampRate_Field_Segment1": self.get_ramp_rate_field(1),
+        """
+        Reads all settings with one pipelined write, instead of one round trip per getter.
+        """
+        queries = {
+            "ID": ("*IDN?", str),
+            "Unit": ("FIELD:UNITS?", self.__parse_field_unit),
+            "Limit": ("CURRent:LIMit?", str),
+            "Current": ("CURRent:MAGnet?", float),
+            "Current_Target": ("CURRent:TARGet?", float),
+            "Field": ("FIELD:MAGnet?", float),
+            "Field_Target": ("FIELD:TARGet?", float),
+            "Magnet_Voltage_V": ("VOLTage:MAGnet?", float),
+            "Supply_Voltage_V": ("VOLTage:SUPPly?", float),
+            "Coil_Constant": ("COILconst?", float),
+            "Persistent_Switch_State": ("PSwitch?", str),
+            "Quench_State": ("QUench?", str),
+            "Sweep_Mode": ("STATE?", lambda code: (self.STATE_MAP.get(code, f"Unknown state: {code}"), code)),
+            "RampRate_Current_Segment1": ("RAMP:RATE:CURRent:1?", str),
+            "RampRate_Field_Segment1": ("RAMP:RATE:FIELD:1?", str),
         }
-        return settings
+        self.__clear_buffer()
+        responses = self.transport.query_pipelined([command for command, _ in queries.values()])
+        return {name: parse(response.strip()) for (name, (_, parse)), response in zip(queries.items(), responses)}
 
     ################################ PRIVATE METHODS ################################
 
@@ -385,51 +390,14 @@ class AMI430_PS_Driver(Connectable):
         Returns:
             str: A single line response with termination characters stripped.
         """
-        while True:
-            # Check if we already have a complete line in the buffer
-            if "\r\n" in self._buffer:
-                line, self._buffer = self._buffer.split("\r\n", 1)
-                return line.strip()
-            elif "\n" in self._buffer:
-                line, self._buffer = self._buffer.split("\n", 1)
-                return line.strip()
-            
-            # Need to read more data from socket
-            try:
-                chunk = self.connection.recv(1024).decode("utf-8")
-                if not chunk:
-                    # Connection closed
-                    if self._buffer:
-                        line = self._buffer.strip()
-                        self._buffer = ""
-                        return line
-                    return ""
-                self._buffer += chunk
-            except socket.timeout:
-                # Timeout - return whatever we have
-                if self._buffer:
-                    line = self._buffer.strip()
-                    self._buffer = ""
-                    return line
-                raise
+        return self.transport.read_line().strip()
 
     def __clear_buffer(self) -> None:
         """
         Clear any pending data in the receive buffer.
         Useful after connect or when recovering from errors.
         """
-        self.connection.setblocking(False)
-        try:
-            while True:
-                data = self.connection.recv(1024)
-                if not data:
-                    break
-        except BlockingIOError:
-            pass  # No more data available
-        finally:
-            self.connection.setblocking(True)
-            self.connection.settimeout(self.timeout)
-        self._buffer = ""
+        self.transport.clear_input()
 
     def __query(self, command_str: str) -> str:
         """
@@ -446,16 +414,12 @@ class AMI430_PS_Driver(Connectable):
         """
         # Clear any stale data before sending a new command
         self.__clear_buffer()
-        
-        command = f"{command_str}{self.termination_char}"
-        self.connection.sendall(command.encode("utf-8"))
 
         if not command_str.endswith("?"):
+            self.transport.write(command_str)
             # Small delay to allow command processing
             time.sleep(0.05)
             return 0
 
         # Read exactly one response line
-        response = self.__read_line()
-        
-        return response
+        return self.transport.query(command_str).strip()
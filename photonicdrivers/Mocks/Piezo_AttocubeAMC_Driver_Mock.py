@@ -2,6 +2,7 @@ from photonicdrivers.Abstract.Connectable import Connectable
 from photonicdrivers.Piezo_AttocubeAMC.Piezo_AttocubeAMC_Driver import axis_to_id
 from dataclasses import dataclass
 import numpy as np
+import threading
 import time
 
 
@@ -75,6 +76,8 @@ class Piezo_AttocubeAMC_Driver_Mock(Connectable):
         self.position_error_history: list[tuple[float, float, float]] = []
         self.control_move_enabled = [False, False, False]
         self.ground_enabled = [False, False, False]
+        # The motion state is advanced lazily on reads, which may come from a PositionStream thread
+        self._lock = threading.RLock()
 
     def connect(self) -> None:
         self.connected = True
@@ -89,8 +92,14 @@ class Piezo_AttocubeAMC_Driver_Mock(Connectable):
         return "Mock Piezo Attocube AMC"
 
     def get_position(self) -> tuple[float, float, float]:
-        self._advance_motion()
-        return self.position
+        with self._lock:
+            self._advance_motion()
+            return self.position
+
+    def get_position_and_moving(self) -> tuple[tuple[float, float, float], tuple[bool, bool, bool]]:
+        with self._lock:
+            self._advance_motion()
+            return self.position, self._moving_axes
 
     def get_x(self) -> float:
         return self.position[0]
@@ -109,55 +118,59 @@ class Piezo_AttocubeAMC_Driver_Mock(Connectable):
         move_x: bool = False,
         move_y: bool = False,
         move_z: bool = False,
+        enable_control_move: bool = True,
     ) -> None:
-        x0, y0, z0 = self.get_position()
-        requested_position = (
-            float(x_nm) if move_x else x0,
-            float(y_nm) if move_y else y0,
-            float(z_nm) if move_z else z0,
-        )
-        distance_error_std = self._distance_error_std_nm(
-            start=(x0, y0, z0),
-            target=requested_position,
-            moving_axes=(bool(move_x), bool(move_y), bool(move_z)),
-        )
-        x_std = self._combined_error_std_nm(self.x_position_error_std_nm, distance_error_std) if move_x else 0.0
-        y_std = self._combined_error_std_nm(self.y_position_error_std_nm, distance_error_std) if move_y else 0.0
-        x_error, y_error = self._sample_xy_error(x_std, y_std, move_x, move_y)
-        x = requested_position[0] + x_error if move_x else x0
-        y = requested_position[1] + y_error if move_y else y0
-        z = float(z_nm) if move_z else z0
-        self._check_limits(x, y, z, move_x, move_y, move_z)
-
-        target_position = (x, y, z)
-        if self.movement_speed_nm_per_s is None:
-            self.position = target_position
-            if self.honing is None:
-                self._clear_motion()
+        with self._lock:
+            x0, y0, z0 = self.get_position()
+            requested_position = (
+                float(x_nm) if move_x else x0,
+                float(y_nm) if move_y else y0,
+                float(z_nm) if move_z else z0,
+            )
+            distance_error_std = self._distance_error_std_nm(
+                start=(x0, y0, z0),
+                target=requested_position,
+                moving_axes=(bool(move_x), bool(move_y), bool(move_z)),
+            )
+            x_std = self._combined_error_std_nm(self.x_position_error_std_nm, distance_error_std) if move_x else 0.0
+            y_std = self._combined_error_std_nm(self.y_position_error_std_nm, distance_error_std) if move_y else 0.0
+            x_error, y_error = self._sample_xy_error(x_std, y_std, move_x, move_y)
+            x = requested_position[0] + x_error if move_x else x0
+            y = requested_position[1] + y_error if move_y else y0
+            z = float(z_nm) if move_z else z0
+            self._check_limits(x, y, z, move_x, move_y, move_z)
+
+            target_position = (x, y, z)
+            if self.movement_speed_nm_per_s is None:
+                self.position = target_position
+                if self.honing is None:
+                    self._clear_motion()
+                else:
+                    self._start_honing(requested_position, (bool(move_x), bool(move_y), bool(move_z)))
             else:
-                self._start_honing(requested_position, (bool(move_x), bool(move_y), bool(move_z)))
-        else:
-            self._start_motion(target_position, (bool(move_x), bool(move_y), bool(move_z)), requested_position)
+                self._start_motion(target_position, (bool(move_x), bool(move_y), bool(move_z)), requested_position)
 
-        self.command_history.append((float(x_nm), float(y_nm), float(z_nm), bool(move_x), bool(move_y), bool(move_z)))
-        self.actual_position_history.append(target_position)
-        self.position_error_history.append((x_error, y_error, 0.0))
+            self.command_history.append((float(x_nm), float(y_nm), float(z_nm), bool(move_x), bool(move_y), bool(move_z)))
+            self.actual_position_history.append(target_position)
+            self.position_error_history.append((x_error, y_error, 0.0))
 
     def is_axis_moving(self) -> tuple[bool, bool, bool]:
-        self._advance_motion()
-        return self._moving_axes
+        with self._lock:
+            self._advance_motion()
+            return self._moving_axes
 
     def set_control_move(self, axis: str | int, move: bool) -> None:
         self.control_move_enabled[axis_to_id(axis)] = bool(move)
 
     def set_ground(self, axis: str | int, ground: bool) -> None:
-        axis_id = axis_to_id(axis)
-        self._advance_motion()
-        self.ground_enabled[axis_id] = bool(ground)
-        if ground and self._moving_axes[axis_id]:
-            moving_axes = list(self._moving_axes)
-            moving_axes[axis_id] = False
-            self._restart_remaining_motion(tuple(moving_axes))
+        with self._lock:
+            axis_id = axis_to_id(axis)
+            self._advance_motion()
+            self.ground_enabled[axis_id] = bool(ground)
+            if ground and self._moving_axes[axis_id]:
+                moving_axes = list(self._moving_axes)
+                moving_axes[axis_id] = False
+                self._restart_remaining_motion(tuple(moving_axes))
 
     def _validate_honing(self, honing: PiezoHoningConfig | None) -> None:
         if honing is None:
@@ -0,0 +1,598 @@
+"""
+Software stand-in for Swabian_TimeTagger_Driver.
+
+Tags are generated from configurable sources (PulsedSource for a laser sync, PoissonSource for
+detector clicks, optionally synchronised to a pulsed source with a fluorescence lifetime) and then
+go through the same input stages as on the hardware: input delay, dead time, event divider and
+conditional filter. The initialise_* factories return the offline measurements of TimeTagAnalysis
+attached to the simulator, and get_time_tag_data / iterate_time_tag_data return simulated
+TimeTagStream data, so code written against the driver runs unchanged on CI machines.
+
+Simulated time only advances when it is asked to: run_for(duration_ps) feeds all measurements
+and running streams, and the time-tag streams advance the simulation themselves while they are
+being read.
+
+Example:
+
+    tagger = Swabian_TimeTagger_Driver_Mock(
+        sources=[PulsedSource(channel=1, frequency_hz=80e6),
+                 PoissonSource(channel=2, rate_hz=1e6, sync_channel=1, delay_ps=3000, lifetime_ps=1000, jitter_ps=50)],
+        random_seed=0,
+    )
+    histogram = tagger.initialise_histogram(start_channel=1, click_channel=2, bin_width_ps=10, num_bins=1000)
+    tagger.run_for(1e12)
+    counts = histogram.getData()
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.TimeTaggers import TimeTagAnalysis
+from photonicdrivers.TimeTaggers.MeasurementGraph import MeasurementGraph, MeasurementGraphInstance
+from photonicdrivers.TimeTaggers.TimeTagStreaming import TimeTagChunk, TimeTagRingBuffer, iterate_new_time_tag_stream
+
+# Rate of the built-in test signal enabled with setTestSignal
+TEST_SIGNAL_FREQUENCY_HZ = 800e3
+
+
+@dataclass(frozen=True)
+class PulsedSource:
+    """Periodic pulses on channel, e.g. the sync output of a pulsed laser."""
+    channel: int
+    frequency_hz: float
+    jitter_ps: float = 0.0
+    phase_ps: int = 0
+
+
+@dataclass(frozen=True)
+class PoissonSource:
+    """
+    Poissonian clicks on channel with mean rate rate_hz and Gaussian timing jitter.
+
+    If sync_channel is the channel of a PulsedSource, clicks are emitted per pulse instead, with
+    probability rate_hz / frequency_hz, delay_ps after the pulse plus an exponentially distributed
+    emission time with mean lifetime_ps.
+    """
+    channel: int
+    rate_hz: float
+    jitter_ps: float = 0.0
+    sync_channel: int | None = None
+    delay_ps: int = 0
+    lifetime_ps: float = 0.0
+
+
+def _dead_time_mask(timestamps: np.ndarray, dead_time_ps: int, previous_ps: int | None) -> np.ndarray:
+    """
+    Non-paralysable dead time: an event is kept if it is at least dead_time_ps after the previous
+    kept event. previous_ps is the last kept event before timestamps (None if there is none).
+    """
+    n_events = timestamps.shape[0]
+    if n_events == 0 or dead_time_ps <= 0:
+        return np.ones(n_events, dtype=bool)
+    if previous_ps is None:
+        previous_ps = int(timestamps[0]) - dead_time_ps
+    # An event at least dead_time_ps after its direct predecessor is always kept. Only inside the
+    # runs of closer events the chain of kept events has to be followed one by one.
+    always_kept = np.diff(timestamps, prepend=previous_ps) >= dead_time_ps
+    keep = always_kept.copy()
+    if np.all(always_kept):
+        return keep
+    next_allowed = np.searchsorted(timestamps, timestamps + dead_time_ps, side="left")
+    run_starts = np.flatnonzero(~always_kept & np.concatenate(([True], always_kept[:-1])))
+    for run_start in run_starts.tolist():
+        # The run is preceded by a kept event (or by previous_ps for the first one)
+        if run_start == 0:
+            event = int(np.searchsorted(timestamps, previous_ps + dead_time_ps, side="left"))
+        else:
+            event = int(next_allowed[run_start - 1])
+        while event < n_events and not always_kept[event]:
+            keep[event] = True
+            event = int(next_allowed[event])
+    return keep
+
+
+class SimulatedTimeTagStreamBuffer:
+    """Result of SimulatedTimeTagStream.getData(), with the TimeTagStreamBuffer accessors."""
+
+    def __init__(self, timestamps: np.ndarray, channels: np.ndarray) -> None:
+        self._timestamps = timestamps
+        self._channels = channels
+        self.size = int(timestamps.shape[0])
+        self.hasOverflows = False
+
+    def getTimestamps(self) -> np.ndarray:
+        return self._timestamps
+
+    def getChannels(self) -> np.ndarray:
+        return self._channels
+
+    def getEventTypes(self) -> np.ndarray:
+        return np.zeros(self.size, dtype=np.uint8)
+
+    def getMissedEvents(self) -> np.ndarray:
+        return np.zeros(self.size, dtype=np.uint16)
+
+
+class SimulatedTimeTagStream:
+    """
+    TimeTagStream on a Swabian_TimeTagger_Driver_Mock.
+
+    Collects the tags of its channels while the simulator runs, keeping at most n_max_events
+    between two getData() calls like the hardware stream. getData() on a running stream without
+    collected tags advances the simulation by chunk_duration_ps.
+    """
+
+    def __init__(self, tagger: "Swabian_TimeTagger_Driver_Mock", n_max_events: int, channels: list[int], chunk_duration_ps: int | None = None) -> None:
+        self.tagger = tagger
+        self.n_max_events = int(n_max_events)
+        self.channels = np.asarray(channels, dtype=np.int32)
+        self.chunk_duration_ps = int(tagger.block_duration_ps if chunk_duration_ps is None else chunk_duration_ps)
+        self._stop_time_ps: int | None = None
+        self._running = False
+        self._timestamps: list[np.ndarray] = []
+        self._channels: list[np.ndarray] = []
+        self._n_collected = 0
+
+    def start(self) -> None:
+        self._stop_time_ps = None
+        self._running = True
+        self.tagger._streams.append(self)
+
+    def startFor(self, capture_duration: int) -> None:
+        self.start()
+        self._stop_time_ps = self.tagger.time_ps + int(capture_duration)
+
+    def stop(self) -> None:
+        self._running = False
+        if self in self.tagger._streams:
+            self.tagger._streams.remove(self)
+
+    def isRunning(self) -> bool:
+        return self._running
+
+    def waitUntilFinished(self) -> None:
+        if self._stop_time_ps is None:
+            raise RuntimeError("waitUntilFinished requires a stream started with startFor")
+        while self._running:
+            self._advance()
+
+    def getData(self) -> SimulatedTimeTagStreamBuffer:
+        if self._running and self._n_collected == 0:
+            self._advance()
+        if self._timestamps:
+            timestamps, channels = np.concatenate(self._timestamps), np.concatenate(self._channels)
+        else:
+            timestamps, channels = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        self._timestamps, self._channels, self._n_collected = [], [], 0
+        return SimulatedTimeTagStreamBuffer(timestamps, channels)
+
+    def _advance(self) -> None:
+        duration_ps = self.chunk_duration_ps
+        if self._stop_time_ps is not None:
+            duration_ps = min(duration_ps, self._stop_time_ps - self.tagger.time_ps)
+            if duration_ps <= 0:
+                self.stop()
+                return
+        self.tagger.run_for(duration_ps)
+
+    def _collect(self, timestamps: np.ndarray, channels: np.ndarray, end_time_ps: int) -> None:
+        mask = np.isin(channels, self.channels)
+        if self._stop_time_ps is not None:
+            mask &= timestamps < self._stop_time_ps
+        n_free = self.n_max_events - self._n_collected
+        selected = np.flatnonzero(mask)[:n_free]
+        if selected.shape[0]:
+            self._timestamps.append(timestamps[selected])
+            self._channels.append(channels[selected])
+            self._n_collected += selected.shape[0]
+        if self._stop_time_ps is not None and end_time_ps >= self._stop_time_ps:
+            self.stop()
+
+
+class Swabian_TimeTagger_Driver_Mock(Connectable):
+    def __init__(
+        self,
+        sources: list[PulsedSource | PoissonSource] = (),
+        n_channels: int = 8,
+        block_duration_ps: int = 1_000_000_000,
+        serialNumber: str = "SIMULATED",
+        random_seed: int | None = None,
+    ) -> None:
+        if n_channels < 1:
+            raise ValueError("n_channels must be >= 1")
+        if block_duration_ps <= 0:
+            raise ValueError("block_duration_ps must be positive")
+        self.n_channels = int(n_channels)
+        self.block_duration_ps = int(block_duration_ps)
+        self.serialNumber = serialNumber
+        self.rng = np.random.default_rng(random_seed)
+        self.connected = False
+        self.reset()
+
+        self.sources: list[PulsedSource | PoissonSource] = []
+        for source in sources:
+            self.add_source(source)
+        self.connection = TimeTagAnalysis.OfflineTagger()
+        self.time_ps = 0
+        self._streams: list[SimulatedTimeTagStream] = []
+
+    def connect(self) -> None:
+        self.connected = True
+
+    def disconnect(self) -> None:
+        self.connected = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def add_source(self, source: PulsedSource | PoissonSource) -> None:
+        self._validate_channel(source.channel)
+        if isinstance(source, PulsedSource):
+            if source.frequency_hz <= 0:
+                raise ValueError("frequency_hz must be positive")
+        elif isinstance(source, PoissonSource):
+            if source.rate_hz < 0:
+                raise ValueError("rate_hz must be >= 0")
+            if source.sync_channel is not None:
+                sync = self._pulsed_source(source.sync_channel)
+                if source.rate_hz > sync.frequency_hz:
+                    raise ValueError("rate_hz of a synchronised source must not exceed the sync frequency")
+        else:
+            raise ValueError("source must be a PulsedSource or a PoissonSource")
+        if source.jitter_ps < 0:
+            raise ValueError("jitter_ps must be >= 0")
+        self.sources.append(source)
+
+    def clear_sources(self) -> None:
+        self.sources = []
+
+    def run_for(self, duration_ps: int) -> None:
+        """Advance the simulation by duration_ps, feeding all measurements and running streams."""
+        end_ps = self.time_ps + int(duration_ps)
+        while self.time_ps < end_ps:
+            block_end_ps = min(self.time_ps + self.block_duration_ps, end_ps)
+            timestamps, channels = self._generate(self.time_ps, block_end_ps)
+            self.time_ps = block_end_ps
+            self.connection.process(timestamps, channels)
+            for stream in list(self._streams):
+                stream._collect(timestamps, channels, block_end_ps)
+
+    def _pulsed_source(self, channel: int) -> PulsedSource:
+        for source in self.sources + self._test_sources():
+            if isinstance(source, PulsedSource) and source.channel == channel:
+                return source
+        raise ValueError(f"No PulsedSource on channel {channel}")
+
+    def _test_sources(self) -> list[PulsedSource]:
+        return [PulsedSource(channel=channel, frequency_hz=TEST_SIGNAL_FREQUENCY_HZ) for channel in sorted(self._test_signal_channels)]
+
+    def _validate_channel(self, channel: int) -> None:
+        if channel == 0 or abs(channel) > self.n_channels:
+            raise ValueError(f"channel must be one of +-1 .. +-{self.n_channels}")
+
+    def _pulse_times(self, source: PulsedSource, start_ps: int, stop_ps: int) -> np.ndarray:
+        period_ps = 1e12 / source.frequency_hz
+        first = int(np.ceil((start_ps - source.phase_ps) / period_ps))
+        last = int(np.ceil((stop_ps - source.phase_ps) / period_ps))
+        return np.round(source.phase_ps + np.arange(first, last) * period_ps).astype(np.int64)
+
+    def _generate(self, start_ps: int, stop_ps: int) -> tuple[np.ndarray, np.ndarray]:
+        pieces_t = [self._pending_timestamps]
+        pieces_c = [self._pending_channels]
+        pulses = {}
+        for source in self.sources + self._test_sources():
+            if isinstance(source, PulsedSource):
+                pulses[source.channel] = self._pulse_times(source, start_ps, stop_ps)
+        for source in self.sources + self._test_sources():
+            if isinstance(source, PulsedSource):
+                times = pulses[source.channel].astype(np.float64)
+            elif source.sync_channel is None:
+                n_events = self.rng.poisson(source.rate_hz * (stop_ps - start_ps) * 1e-12)
+                times = np.sort(self.rng.uniform(start_ps, stop_ps, n_events))
+            else:
+                sync = pulses[source.sync_channel]
+                probability = source.rate_hz / self._pulsed_source(source.sync_channel).frequency_hz
+                times = sync[self.rng.random(sync.shape[0]) < probability] + float(source.delay_ps)
+                if source.lifetime_ps > 0:
+                    times += self.rng.exponential(source.lifetime_ps, times.shape[0])
+            if source.jitter_ps > 0:
+                times += self.rng.normal(0.0, source.jitter_ps, times.shape[0])
+            times += self._input_delays.get(source.channel, 0)
+            pieces_t.append(np.round(times).astype(np.int64))
+            pieces_c.append(np.full(times.shape[0], source.channel, dtype=np.int32))
+
+        timestamps = np.concatenate(pieces_t)
+        channels = np.concatenate(pieces_c)
+        # Tags pushed past the block by delays and jitter are emitted with the next block, tags pulled
+        # before it are clamped to its start so the stream stays ordered
+        later = timestamps >= stop_ps
+        self._pending_timestamps, self._pending_channels = timestamps[later], channels[later]
+        timestamps, channels = np.maximum(timestamps[~later], start_ps), channels[~later]
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, channels = timestamps[order], channels[order]
+        for input_stage in (self._apply_dead_time, self._apply_event_dividers, self._apply_conditional_filter):
+            keep = input_stage(timestamps, channels)
+            timestamps, channels = timestamps[keep], channels[keep]
+        return timestamps, channels
+
+    def _apply_dead_time(self, timestamps: np.ndarray, channels: np.ndarray) -> np.ndarray:
+        keep = np.ones(timestamps.shape[0], dtype=bool)
+        for channel, dead_time_ps in self._dead_times.items():
+            events = np.flatnonzero(channels == channel)
+            if dead_time_ps <= 0 or events.shape[0] == 0:
+                continue
+            channel_keep = _dead_time_mask(timestamps[events], dead_time_ps, self._last_kept_ps.get(channel))
+            keep[events[~channel_keep]] = False
+            kept = events[channel_keep]
+            if kept.shape[0]:
+                self._last_kept_ps[channel] = int(timestamps[kept[-1]])
+        return keep
+
+    def _apply_event_dividers(self, timestamps: np.ndarray, channels: np.ndarray) -> np.ndarray:
+        keep = np.ones(channels.shape[0], dtype=bool)
+        for channel, divider in self._event_dividers.items():
+            if divider <= 1:
+                continue
+            events = np.flatnonzero(channels == channel)
+            phase = self._divider_phase.get(channel, 0)
+            keep[events[(phase + np.arange(events.shape[0])) % divider != 0]] = False
+            self._divider_phase[channel] = (phase + events.shape[0]) % divider
+        return keep
+
+    def _apply_conditional_filter(self, timestamps: np.ndarray, channels: np.ndarray) -> np.ndarray:
+        keep = np.ones(channels.shape[0], dtype=bool)
+        if not self._conditional_trigger or not self._conditional_filtered:
+            return keep
+        triggers = np.flatnonzero(np.isin(channels, self._conditional_trigger))
+        filtered = np.flatnonzero(np.isin(channels, self._conditional_filtered))
+        # A filtered event passes if a trigger event arrived since the previous filtered event
+        triggers_before = np.searchsorted(triggers, filtered)
+        previous = np.concatenate(([-1 if self._trigger_since_filtered else 0], triggers_before[:-1]))
+        keep[filtered[triggers_before <= previous]] = False
+        if filtered.shape[0]:
+            self._trigger_since_filtered = bool(triggers.shape[0] and triggers[-1] > filtered[-1])
+        else:
+            self._trigger_since_filtered = self._trigger_since_filtered or bool(triggers.shape[0])
+        return keep
+
+    def initialise_counter(self, channelList: list[int], bin_width_ps: int, num_bins: int) -> TimeTagAnalysis.Counter:
+        return TimeTagAnalysis.Counter(tagger=self.connection, channels=channelList, binwidth=bin_width_ps, n_values=num_bins)
+
+    def initialise_delayed_counter(self, channel, bin_width_ps: int, num_bins: int, delay_ps: int) -> TimeTagAnalysis.Counter:
+        self.delayed_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=channel, delay=delay_ps)
+        self.delayed_channel_number = self.delayed_channel.getChannel()
+        return TimeTagAnalysis.Counter(tagger=self.connection, channels=self.delayed_channel_number, binwidth=bin_width_ps, n_values=num_bins)
+
+    def initialise_correlation(self, channel_1: int, channel_2: int, bin_width_ps: int, num_bins: int) -> TimeTagAnalysis.Correlation:
+        return TimeTagAnalysis.Correlation(tagger=self.connection, channel_1=channel_1, channel_2=channel_2, binwidth=bin_width_ps, n_bins=num_bins)
+
+    def initialise_histogram(self, start_channel: int, click_channel: int, bin_width_ps: int, num_bins: int) -> TimeTagAnalysis.Histogram:
+        return TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=click_channel, start_channel=start_channel, binwidth=bin_width_ps, n_bins=num_bins)
+
+    def initialise_frequency_stability(self, channel: int, steps: list[int], average: int = 1000, trace_len: int = 1000) -> TimeTagAnalysis.FrequencyStability:
+        return TimeTagAnalysis.FrequencyStability(tagger=self.connection, channel=channel, steps=steps, average=average, trace_len=trace_len)
+
+    def initialise_frequency_counter(self, channels: list[int], sampling_interval_ps: int, fitting_window_ps: int, n_values: int = 0) -> TimeTagAnalysis.FrequencyCounter:
+        return TimeTagAnalysis.FrequencyCounter(tagger=self.connection, channels=channels, sampling_interval=sampling_interval_ps, fitting_window=fitting_window_ps, n_values=n_values)
+
+    def initialize_2d_histogram(self, stop_channel_1: int, stop_channel_2: int, start_channel: int, bin_width_1_ps: int, bin_width_2_ps: int, num_bins_1: int, num_bins_2: int) -> TimeTagAnalysis.Histogram2D:
+        return TimeTagAnalysis.Histogram2D(tagger=self.connection, start_channel=start_channel, stop_channel_1=stop_channel_1, stop_channel_2=stop_channel_2, binwidth_1=bin_width_1_ps, binwidth_2=bin_width_2_ps, n_bins_1=num_bins_1, n_bins_2=num_bins_2)
+
+    def initialise_delayed_histogram(self, start_channel: int, click_channel: int, bin_width_ps: int, num_bins: int, delay_ps: int) -> TimeTagAnalysis.Histogram:
+        self.delayed_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=start_channel, delay=delay_ps)
+        self.delayed_channel_number = self.delayed_channel.getChannel()
+        self.delayed_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=click_channel, start_channel=self.delayed_channel_number, binwidth=bin_width_ps, n_bins=num_bins)
+        return self.delayed_histogram
+
+    def initialise_gated_lifetime_histogram(self, trigger_channel_number, click_channel_number, trigger_gate_start_delay_ps, trigger_gate_stop_delay_ps, bin_width_ps, num_bins):
+        self.gate_start_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=trigger_gate_start_delay_ps)
+        self.gate_stop_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=trigger_gate_stop_delay_ps)
+        self.gate_start_channel_number = self.gate_start_channel.getChannel()
+        self.gate_stop_channel_number = self.gate_stop_channel.getChannel()
+        self.gated_channel = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_channel_number, gate_start_channel=self.gate_start_channel_number, gate_stop_channel=self.gate_stop_channel_number)
+        self.gated_channel_number = self.gated_channel.getChannel()
+        self.gated_life_time_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, start_channel=trigger_channel_number, click_channel=self.gated_channel_number, binwidth=bin_width_ps, n_bins=num_bins)
+        return self.gated_life_time_histogram
+
+    def initialise_gated_g2_correlation(self, trigger_channel_number, click_1_channel_number, click_2_channel_number, trigger_gate_start_delay_ps, trigger_gate_stop_delay_ps, bin_width_ps, num_bins, histogram_num_bins):
+        gate_start_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=trigger_gate_start_delay_ps)
+        gate_stop_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=trigger_gate_stop_delay_ps)
+        gated_channel_1 = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_1_channel_number, gate_start_channel=gate_start_channel.getChannel(), gate_stop_channel=gate_stop_channel.getChannel())
+        gated_channel_2 = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_2_channel_number, gate_start_channel=gate_start_channel.getChannel(), gate_stop_channel=gate_stop_channel.getChannel())
+        gated_g2_correlation = TimeTagAnalysis.Correlation(tagger=self.connection, channel_1=gated_channel_1.getChannel(), channel_2=gated_channel_2.getChannel(), binwidth=bin_width_ps, n_bins=num_bins)
+        histogram_1 = TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=click_1_channel_number, start_channel=trigger_channel_number, binwidth=bin_width_ps, n_bins=histogram_num_bins)
+        histogram_2 = TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=click_2_channel_number, start_channel=trigger_channel_number, binwidth=bin_width_ps, n_bins=histogram_num_bins)
+        gated_histogram_1 = TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=gated_channel_1.getChannel(), start_channel=trigger_channel_number, binwidth=bin_width_ps, n_bins=histogram_num_bins)
+        gated_histogram_2 = TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=gated_channel_2.getChannel(), start_channel=trigger_channel_number, binwidth=bin_width_ps, n_bins=histogram_num_bins)
+        return gated_g2_correlation, gate_start_channel, gate_stop_channel, gated_channel_1, gated_channel_2, histogram_1, histogram_2, gated_histogram_1, gated_histogram_2
+
+    def initialise_check_probe_correlation(self, trigger_channel_number, click_channel_number, global_delay_ps, probe_check_delay_ps, check_laser_width_ps, probe_laser_width_ps, check_collections_width_ps, probe_collections_width_ps, bin_width_ps, num_bins, histogram_num_bins):
+        def delayed(delay_ps):
+            return TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=delay_ps)
+
+        def gated(gate_start_channel, gate_stop_channel):
+            return TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_channel_number, gate_start_channel=gate_start_channel.getChannel(), gate_stop_channel=gate_stop_channel.getChannel())
+
+        def histogram(click_channel, start_channel):
+            return TimeTagAnalysis.Histogram(tagger=self.connection, click_channel=click_channel.getChannel(), start_channel=start_channel.getChannel(), binwidth=bin_width_ps, n_bins=histogram_num_bins)
+
+        gate_check_laser_start_channel = delayed(global_delay_ps)
+        gate_check_collection_start_channel = delayed(global_delay_ps + check_laser_width_ps)
+        gate_check_collection_stop_channel = delayed(global_delay_ps + check_laser_width_ps + check_collections_width_ps)
+        gate_probe_laser_start_channel = delayed(global_delay_ps + probe_check_delay_ps)
+        gate_probe_collection_start_channel = delayed(global_delay_ps + probe_check_delay_ps + probe_laser_width_ps)
+        gate_probe_collection_stop_channel = delayed(global_delay_ps + probe_check_delay_ps + probe_laser_width_ps + probe_collections_width_ps)
+
+        gated_check_channel = gated(gate_check_laser_start_channel, gate_check_collection_stop_channel)
+        gated_probe_channel = gated(gate_probe_laser_start_channel, gate_probe_collection_stop_channel)
+        gated_check_collection_channel = gated(gate_check_collection_start_channel, gate_check_collection_stop_channel)
+        gated_probe_collection_channel = gated(gate_probe_collection_start_channel, gate_probe_collection_stop_channel)
+
+        gated_check_histogram = histogram(gated_check_channel, gate_check_laser_start_channel)
+        gated_probe_histogram = histogram(gated_probe_channel, gate_probe_laser_start_channel)
+        gated_check_collection_histogram = histogram(gated_check_collection_channel, gate_check_collection_start_channel)
+        gated_probe_collection_histogram = histogram(gated_probe_collection_channel, gate_probe_collection_start_channel)
+        gated_check_probe_correlation = TimeTagAnalysis.Correlation(tagger=self.connection, channel_1=gated_check_collection_channel.getChannel(), channel_2=gated_probe_collection_channel.getChannel(), binwidth=bin_width_ps, n_bins=num_bins)
+
+        return gated_check_probe_correlation, gated_check_histogram, gated_probe_histogram, gated_check_collection_histogram, gated_probe_collection_histogram, gate_check_laser_start_channel, gate_check_collection_start_channel, gate_check_collection_stop_channel, gate_probe_laser_start_channel, gate_probe_collection_start_channel, gate_probe_collection_stop_channel, gated_check_channel, gated_probe_channel, gated_check_collection_channel, gated_probe_collection_channel
+
+    def initialize_delayed_histogram(self, trigger_channel_number, click_channel_number, delay_ps, bin_width_ps, num_bins):
+        delayed_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=delay_ps)
+        delayed_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, start_channel=delayed_channel.getChannel(), click_channel=click_channel_number, binwidth=bin_width_ps, n_bins=num_bins)
+        return delayed_histogram, delayed_channel
+
+    def initialize_gated_histogram(self, trigger_channel_number, click_channel_number, gate_start_delay_ps, gate_stop_delay_ps, bin_width_ps, num_bins):
+        gate_start_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=gate_start_delay_ps)
+        gate_stop_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=gate_stop_delay_ps)
+        gated_channel = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_channel_number, gate_start_channel=gate_start_channel.getChannel(), gate_stop_channel=gate_stop_channel.getChannel())
+        gated_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, start_channel=trigger_channel_number, click_channel=gated_channel.getChannel(), binwidth=bin_width_ps, n_bins=num_bins)
+        return gated_histogram, gate_start_channel, gate_stop_channel, gated_channel
+
+    def initialize_check_probe(self, trigger_channel_number: int, click_channel_number: int, check_gate_delay_ps: int, check_gate_width_ps: int, probe_gate_delay_ps: int, probe_gate_width_ps: int, bin_width_ps: int, num_bins: int):
+        """Same measurement graph and return value as Swabian_TimeTagger_Driver.initialize_check_probe."""
+        check_gate_start = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=check_gate_delay_ps)
+        check_gate_stop = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=check_gate_delay_ps + check_gate_width_ps)
+        probe_gate_start = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=probe_gate_delay_ps)
+        probe_gate_stop = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=probe_gate_delay_ps + probe_gate_width_ps)
+        check_detection = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_channel_number, gate_start_channel=check_gate_start.getChannel(), gate_stop_channel=check_gate_stop.getChannel())
+        probe_detection = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_channel_number, gate_start_channel=probe_gate_start.getChannel(), gate_stop_channel=probe_gate_stop.getChannel())
+        check_ch = check_detection.getChannel()
+        probe_ch = probe_detection.getChannel()
+
+        probe_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, start_channel=trigger_channel_number, click_channel=probe_ch, binwidth=bin_width_ps, n_bins=num_bins)
+        check_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, start_channel=trigger_channel_number, click_channel=check_ch, binwidth=bin_width_ps, n_bins=num_bins)
+        check_probe_correlation = TimeTagAnalysis.Correlation(tagger=self.connection, channel_1=check_ch, channel_2=probe_ch, binwidth=bin_width_ps, n_bins=num_bins*50)
+        raw_histogram = TimeTagAnalysis.Histogram(tagger=self.connection, start_channel=trigger_channel_number, click_channel=click_channel_number, binwidth=bin_width_ps, n_bins=num_bins)
+
+        return (
+            check_histogram,
+            probe_histogram,
+            check_probe_correlation,
+            raw_histogram,
+            check_gate_start, check_gate_stop,
+            probe_gate_start, probe_gate_stop,
+            check_detection, probe_detection,
+        )
+
+    def initialise_gated_g2_2D_histogram(self, trigger_channel_number, click_1_channel_number, click_2_channel_number, trigger_gate_start_delay_ps, trigger_gate_stop_delay_ps, bin_width_ps, num_bins):
+        gate_start_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=trigger_gate_start_delay_ps)
+        gate_stop_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=trigger_channel_number, delay=trigger_gate_stop_delay_ps)
+        gated_channel_1 = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_1_channel_number, gate_start_channel=gate_start_channel.getChannel(), gate_stop_channel=gate_stop_channel.getChannel())
+        gated_channel_2 = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=click_2_channel_number, gate_start_channel=gate_start_channel.getChannel(), gate_stop_channel=gate_stop_channel.getChannel())
+        gated_g2_2D_histogram = TimeTagAnalysis.Histogram2D(tagger=self.connection, start_channel=trigger_channel_number, stop_channel_1=gated_channel_1.getChannel(), stop_channel_2=gated_channel_2.getChannel(), binwidth_1=bin_width_ps, binwidth_2=bin_width_ps, n_bins_1=num_bins, n_bins_2=num_bins)
+        return gated_g2_2D_histogram, gate_start_channel, gate_stop_channel, gated_channel_1, gated_channel_2
+
+    def build_measurement_graph(self, graph: MeasurementGraph) -> MeasurementGraphInstance:
+        return graph.build(self.connection, TimeTagAnalysis)
+
+    def getSerial(self) -> str:
+        return self.serialNumber
+
+    def scanTimeTaggers(self) -> None:
+        print("Serial numbers of all available TimeTaggers:")
+        print([self.serialNumber])
+
+    def setTestSignal(self, channelNo: int, status: bool) -> None:
+        self._validate_channel(channelNo)
+        if status:
+            self._test_signal_channels.add(channelNo)
+        else:
+            self._test_signal_channels.discard(channelNo)
+
+    def reset(self) -> None:
+        """Reset all input settings to their start-up state. Sources and measurements are kept."""
+        self._trigger_levels: dict[int, float] = {}
+        self._dead_times: dict[int, int] = {}
+        self._input_delays: dict[int, int] = {}
+        self._event_dividers: dict[int, int] = {}
+        self._conditional_trigger: list[int] = []
+        self._conditional_filtered: list[int] = []
+        self._test_signal_channels: set[int] = set()
+        self._last_kept_ps: dict[int, int] = {}
+        self._divider_phase: dict[int, int] = {}
+        self._trigger_since_filtered = False
+        self._pending_timestamps = np.zeros(0, dtype=np.int64)
+        self._pending_channels = np.zeros(0, dtype=np.int32)
+
+    def set_trigger_level(self, channel: int, voltage: float) -> None:
+        self._validate_channel(channel)
+        self._trigger_levels[channel] = float(voltage)
+
+    def get_trigger_level(self, channel: int) -> float:
+        return self._trigger_levels.get(channel, 0.5)
+
+    def set_dead_time(self, channel: int, dead_time_ps: int) -> None:
+        self._validate_channel(channel)
+        if dead_time_ps < 0:
+            raise ValueError("dead_time_ps must be >= 0")
+        self._dead_times[channel] = int(dead_time_ps)
+
+    def get_dead_time(self, channel: int) -> int:
+        return self._dead_times.get(channel, 0)
+
+    def set_input_channel_delay(self, channel: int, delay_ps: int) -> None:
+        self._validate_channel(channel)
+        self._input_delays[channel] = int(delay_ps)
+
+    def get_input_channel_delay(self, channel: int) -> int:
+        return self._input_delays.get(channel, 0)
+
+    def set_event_divider(self, channel: int, divider: int) -> None:
+        """
+        Set the event divider for a channel. Only every Nth event will be recorded.
+
+        Parameters:
+            channel: Input channel number
+            divider: Divider value (1 = no division, 100 = every 100th event)
+        """
+        self._validate_channel(channel)
+        if divider < 1:
+            raise ValueError("divider must be >= 1")
+        self._event_dividers[channel] = int(divider)
+        self._divider_phase[channel] = 0
+
+    def get_event_divider(self, channel: int) -> int:
+        return self._event_dividers.get(channel, 1)
+
+    def set_conditional_channel(self, trigger_channel: int | list[int], filtered_channels_list: list[int]) -> None:
+        "Only transmit an event on the filtered channels if an event on a trigger channel arrived since the previous filtered event."
+        self._conditional_trigger = [int(channel) for channel in np.atleast_1d(trigger_channel)]
+        self._conditional_filtered = [int(channel) for channel in filtered_channels_list]
+        self._trigger_since_filtered = False
+
+    def get_conditional_filter_filtered(self) -> list[int]:
+        return list(self._conditional_filtered)
+
+    def get_conditional_filter_trigger(self) -> list[int]:
+        return list(self._conditional_trigger)
+
+    def get_time_tag_data(self, channels: list[int], acquisition_time_ps: int = 1e12, n_max_events: int = 10_000_000) -> SimulatedTimeTagStreamBuffer:
+        stream = SimulatedTimeTagStream(self, n_max_events=n_max_events, channels=channels)
+        stream.startFor(acquisition_time_ps)
+        stream.waitUntilFinished()
+        return stream.getData()
+
+    def iterate_time_tag_data(self, channels: list[int], acquisition_time_ps: int = None, chunk_events: int = 1_000_000, n_chunks: int = 4, buffer_events: int = None, poll_interval_s: float = 0.01) -> Iterator[TimeTagChunk]:
+        """Same as Swabian_TimeTagger_Driver.iterate_time_tag_data; every poll advances the simulation by block_duration_ps."""
+        if buffer_events is None:
+            buffer_events = chunk_events * n_chunks
+        if buffer_events > chunk_events * n_chunks:
+            raise ValueError("buffer_events must be <= chunk_events * n_chunks")
+        ring = TimeTagRingBuffer(chunk_events=chunk_events, n_slots=n_chunks)
+        return iterate_new_time_tag_stream(lambda: SimulatedTimeTagStream(self, n_max_events=buffer_events, channels=channels), ring, acquisition_time_ps=acquisition_time_ps, buffer_events=buffer_events, poll_interval_s=poll_interval_s)
+
+    def get_delayed_channel_number(self, channel: int, delay_ps: int) -> int:
+        self.delayed_channel = TimeTagAnalysis.DelayedChannel(tagger=self.connection, input_channel=channel, delay=delay_ps)
+        return self.delayed_channel.getChannel()
+
+    def get_gated_channel_number(self, channel: int, gate_start_channel: int, gate_stop_channel: int) -> int:
+        self.gated_channel = TimeTagAnalysis.GatedChannel(tagger=self.connection, input_channel=channel, gate_start_channel=gate_start_channel, gate_stop_channel=gate_stop_channel)
+        return self.gated_channel.getChannel()
+
+    def get_channel_list(self) -> list[int]:
+        return list(range(1, self.n_channels + 1)) + list(range(-1, -self.n_channels - 1, -1))
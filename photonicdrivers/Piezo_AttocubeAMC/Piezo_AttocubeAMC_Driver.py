@@ -56,6 +56,18 @@ class Piezo_AttocubeAMC_Driver(Connectable):
         x, y, z, v1, v2, v3 = self.amc.control.getPositionsAndVoltages()
         return x, y, z
 
+    def get_position_and_moving(self) -> tuple[tuple[float, float, float], tuple[bool, bool, bool]]:
+        '''
+        Positions and moving status of all axes, sent as one JSON-RPC batch (a single round trip)
+        '''
+        positions, moving = self.amc.request_batch([
+            (self.amc.control.interface_name + ".getPositionsAndVoltages", False),
+            (self.amc.control.interface_name + ".getStatusMovingAllAxes", False),
+        ])
+        self.amc.handleError(positions)
+        self.amc.handleError(moving)
+        return (positions[1], positions[2], positions[3]), (bool(moving[1]), bool(moving[2]), bool(moving[3]))
+
     def get_control_amplitude(self, axis: str | int) -> float:
         return self.amc.control.getControlAmplitude(axis_to_id(axis))
 
@@ -65,9 +77,10 @@ class Piezo_AttocubeAMC_Driver(Connectable):
     def get_control_dc_value(self, axis: str | int) -> float:
         return self.amc.control.getControlFixOutputVoltage(axis_to_id(axis))
 
-    def set_position(self, x_nm:int=0, y_nm:int=0, z_nm:int=0, move_x:bool=False, move_y:bool=False, move_z:bool=False) -> None:
+    def set_position(self, x_nm:int=0, y_nm:int=0, z_nm:int=0, move_x:bool=False, move_y:bool=False, move_z:bool=False, enable_control_move:bool=True) -> None:
         '''
         Moves the piezo to the position specified by x_nm, y_nm,z_nm
+        enable_control_move=False skips enabling closed-loop control of the moved axes, for callers that already did so once (e.g. a trajectory)
         '''
         if not self.__check_position_limits(x_nm, y_nm, z_nm, move_x, move_y, move_z):
             error_details = self.__position_limit_error_message(x_nm, y_nm, z_nm, move_x, move_y, move_z)
@@ -77,9 +90,10 @@ class Piezo_AttocubeAMC_Driver(Connectable):
                 + ". Did not execute the move command."
             )
 
-        for ax, mov in zip([0, 1, 2], [move_x, move_y, move_z]):
-            if mov:
-                self.set_control_move(ax, True)
+        if enable_control_move:
+            for ax, mov in zip([0, 1, 2], [move_x, move_y, move_z]):
+                if mov:
+                    self.set_control_move(ax, True)
         self.amc.control.MultiAxisPositioning(int(move_x), int(move_y), int(move_z), x_nm, y_nm, z_nm)
 
     def is_axis_moving(self) -> tuple[bool,  bool,  bool]:
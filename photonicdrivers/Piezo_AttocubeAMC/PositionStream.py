@@ -0,0 +1,178 @@
+"""
+Background position stream for Piezo_AttocubeAMC_Driver (and its mock).
+
+A PositionStream samples the position and moving status of all three axes at a fixed rate on
+its own thread. Each sample is one JSON-RPC batch via get_position_and_moving. The samples go
+into a timestamped ring buffer. Code that tracks a move waits on the stream instead of polling
+the controller, so control commands never compete with a tight polling loop.
+
+Example:
+
+    with PositionStream(piezo, rate_hz=500) as stream:
+        piezo.set_position(x_nm=2_000_000, move_x=True)
+        stream.wait_until_reached((2_000_000, 0, 0), tolerance_nm=50, axes=(True, False, False), timeout_s=2.0)
+        times_s, positions_nm, moving = stream.get_samples()
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+
+class PositionStream:
+    def __init__(self, piezo: Any, rate_hz: float = 200.0, capacity: int = 10_000, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Parameters:
+            piezo: Piezo_AttocubeAMC_Driver or Piezo_AttocubeAMC_Driver_Mock
+            rate_hz: Sampling rate; the achieved rate is limited by the round trip to the controller
+            capacity: Number of samples kept in the ring buffer
+            clock: Time source in seconds for the sample timestamps
+        """
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.piezo = piezo
+        self.interval_s = 1.0 / rate_hz
+        self.capacity = int(capacity)
+        self.clock = clock
+        self.n_samples = 0
+        self.n_errors = 0
+        self.last_error: BaseException | None = None
+        self._times_s = np.zeros(self.capacity)
+        self._positions_nm = np.zeros((self.capacity, 3))
+        self._moving = np.zeros((self.capacity, 3), dtype=bool)
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="PositionStream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self) -> "PositionStream":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def sample_once(self) -> None:
+        """Take one sample on the calling thread."""
+        position, moving = self.piezo.get_position_and_moving()
+        time_s = self.clock()
+        with self._condition:
+            index = self.n_samples % self.capacity
+            self._times_s[index] = time_s
+            self._positions_nm[index] = position
+            self._moving[index] = moving
+            self.n_samples += 1
+            self._condition.notify_all()
+
+    def get_latest(self) -> tuple[float, np.ndarray, np.ndarray] | None:
+        """(time_s, position_nm[3], moving[3]) of the newest sample, or None before the first one."""
+        with self._condition:
+            return self._latest()
+
+    def get_samples(self, since_s: float | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The buffered samples, oldest first, as copies: times_s (n,), positions_nm (n, 3) and moving (n, 3).
+
+        Parameters:
+            since_s: Only return samples taken after this time (same clock as the timestamps)
+        """
+        with self._condition:
+            n = min(self.n_samples, self.capacity)
+            order = (np.arange(n) + self.n_samples - n) % self.capacity
+            times_s = self._times_s[order]
+            positions_nm = self._positions_nm[order]
+            moving = self._moving[order]
+        if since_s is not None:
+            keep = times_s > since_s
+            times_s, positions_nm, moving = times_s[keep], positions_nm[keep], moving[keep]
+        return times_s, positions_nm, moving
+
+    def wait_for(self, condition: Callable[[np.ndarray, np.ndarray], bool], timeout_s: float | None = None) -> tuple[float, np.ndarray, np.ndarray] | None:
+        """
+        Block until a new sample satisfies condition(position_nm, moving).
+        Returns that sample, or None on timeout or when the stream stops.
+        """
+        deadline_s = None if timeout_s is None else time.monotonic() + timeout_s
+        with self._condition:
+            seen = self.n_samples
+            while True:
+                if self.n_samples > seen:
+                    # Check every sample that arrived, not only the newest one
+                    for sequence in range(max(seen, self.n_samples - self.capacity), self.n_samples):
+                        index = sequence % self.capacity
+                        if condition(self._positions_nm[index], self._moving[index]):
+                            return self._times_s[index], self._positions_nm[index].copy(), self._moving[index].copy()
+                    seen = self.n_samples
+                if self._stop_event.is_set():
+                    return None
+                remaining_s = None if deadline_s is None else deadline_s - time.monotonic()
+                if remaining_s is not None and remaining_s <= 0:
+                    return None
+                self._condition.wait(remaining_s)
+
+    def wait_until_reached(
+        self,
+        target_nm: tuple[float, float, float],
+        tolerance_nm: float,
+        axes: tuple[bool, bool, bool] = (True, True, True),
+        require_stopped: bool = False,
+        timeout_s: float | None = None,
+    ) -> tuple[float, np.ndarray, np.ndarray] | None:
+        """
+        Wait until every selected axis is within tolerance_nm of its target (and, if require_stopped, no longer moving).
+        Returns the first such sample, or None on timeout.
+        """
+        target = np.asarray(target_nm, dtype=float)
+        selected = np.asarray(axes, dtype=bool)
+
+        def reached(position: np.ndarray, moving: np.ndarray) -> bool:
+            if require_stopped and np.any(moving[selected]):
+                return False
+            return bool(np.all(np.abs(position[selected] - target[selected]) <= tolerance_nm))
+
+        return self.wait_for(reached, timeout_s)
+
+    def _latest(self) -> tuple[float, np.ndarray, np.ndarray] | None:
+        if self.n_samples == 0:
+            return None
+        index = (self.n_samples - 1) % self.capacity
+        return self._times_s[index], self._positions_nm[index].copy(), self._moving[index].copy()
+
+    def _run(self) -> None:
+        next_time_s = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.sample_once()
+            except Exception as error:
+                self.n_errors += 1
+                self.last_error = error
+            next_time_s += self.interval_s
+            now_s = time.monotonic()
+            if next_time_s < now_s:
+                # Do not try to catch up on samples the controller was too slow for
+                next_time_s = now_s
+            self._stop_event.wait(next_time_s - now_s)
@@ -0,0 +1,250 @@
+"""
+Trajectory executor for Piezo_AttocubeAMC_Driver (and its mock).
+
+A TrajectoryExecutor moves the stage through an (n, 3) array of waypoints in nm. All targets are
+checked against the stage limits before the first move. Closed-loop control is enabled once
+instead of once per point. The next target is sent as soon as the current one is reached,
+without fixed sleeps. Points without an acquisition are flown through: the next target is sent
+as soon as the stage is within lookahead_nm of the current one, so the stage settles while the
+next command is already on its way. With an on_point callback, every point is settled to
+tolerance_nm first and the callback is called there.
+
+Settling is watched either by polling get_position_and_moving (one round trip per check) or,
+when a PositionStream is given, by waiting on its samples.
+
+The helpers raster_waypoints, serpentine_waypoints and spiral_waypoints build common scan
+patterns.
+
+Example:
+
+    waypoints = serpentine_waypoints(np.linspace(1e6, 2e6, 200), np.linspace(1e6, 2e6, 200), z_nm=2e6)
+    executor = TrajectoryExecutor(piezo, tolerance_nm=50)
+    result = executor.run(waypoints, axes=(True, True, False), on_point=lambda index, position: counter.get_counts())
+    print(result.points_per_s, result.settle_durations_s.max())
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import time
+from typing import Any
+
+import numpy as np
+
+from photonicdrivers.Piezo_AttocubeAMC.PositionStream import PositionStream
+
+AXIS_NAMES = ("x", "y", "z")
+
+
+def raster_waypoints(x_nm: np.ndarray, y_nm: np.ndarray, z_nm: float = 0.0) -> np.ndarray:
+    """Grid scanned row by row along x, every row in the same direction. Returns (len(y) * len(x), 3)."""
+    x_nm = np.asarray(x_nm, dtype=float)
+    y_nm = np.asarray(y_nm, dtype=float)
+    grid_x, grid_y = np.meshgrid(x_nm, y_nm)
+    return np.column_stack([grid_x.ravel(), grid_y.ravel(), np.full(grid_x.size, float(z_nm))])
+
+
+def serpentine_waypoints(x_nm: np.ndarray, y_nm: np.ndarray, z_nm: float = 0.0) -> np.ndarray:
+    """Grid scanned row by row along x, reversing every other row to avoid the fly-back. Returns (len(y) * len(x), 3)."""
+    x_nm = np.asarray(x_nm, dtype=float)
+    y_nm = np.asarray(y_nm, dtype=float)
+    grid_x, grid_y = np.meshgrid(x_nm, y_nm)
+    grid_x[1::2] = grid_x[1::2, ::-1]
+    return np.column_stack([grid_x.ravel(), grid_y.ravel(), np.full(grid_x.size, float(z_nm))])
+
+
+def spiral_waypoints(center_nm: tuple[float, float, float], max_radius_nm: float, pitch_nm: float, step_nm: float) -> np.ndarray:
+    """
+    Archimedean spiral in the xy plane, from the center outwards, with about step_nm between points.
+
+    Parameters:
+        center_nm: Center (x, y, z) of the spiral; z is kept for all points
+        max_radius_nm: Radius of the outermost point
+        pitch_nm: Distance between neighbouring turns
+        step_nm: Distance between neighbouring points along the spiral
+    """
+    if max_radius_nm <= 0 or pitch_nm <= 0 or step_nm <= 0:
+        raise ValueError("max_radius_nm, pitch_nm and step_nm must be positive")
+    # r = b * theta has arc length ~ b * theta^2 / 2, so equal steps in arc length are at theta = sqrt(2 s / b)
+    b = pitch_nm / (2 * np.pi)
+    max_theta = max_radius_nm / b
+    n_points = int(b * max_theta ** 2 / 2 / step_nm) + 1
+    theta = np.sqrt(2 * step_nm * np.arange(n_points) / b)
+    radius = b * theta
+    x0, y0, z0 = (float(value) for value in center_nm)
+    return np.column_stack([x0 + radius * np.cos(theta), y0 + radius * np.sin(theta), np.full(n_points, z0)])
+
+
+@dataclass(frozen=True)
+class TrajectoryResult:
+    """
+    Per-point record of a trajectory run; times are in seconds since the start of the run.
+
+    reached is False where the stage did not get within the threshold before settle_timeout_s, or stopped
+    outside it. achieved_nm is the position at the moment the point counted as reached (or gave up).
+    """
+    targets_nm: np.ndarray
+    achieved_nm: np.ndarray
+    reached: np.ndarray
+    command_s: np.ndarray
+    settled_s: np.ndarray
+    acquisition_s: np.ndarray
+    acquisitions: list
+    duration_s: float
+
+    @property
+    def settle_durations_s(self) -> np.ndarray:
+        return self.settled_s - self.command_s
+
+    @property
+    def errors_nm(self) -> np.ndarray:
+        return self.achieved_nm - self.targets_nm
+
+    @property
+    def points_per_s(self) -> float:
+        return len(self.targets_nm) / self.duration_s if self.duration_s > 0 else float("inf")
+
+
+class TrajectoryExecutor:
+    def __init__(
+        self,
+        piezo: Any,
+        tolerance_nm: float = 50.0,
+        lookahead_nm: float | None = None,
+        settle_timeout_s: float = 1.0,
+        stream: PositionStream | None = None,
+        poll_interval_s: float = 0.0,
+    ) -> None:
+        """
+        Parameters:
+            piezo: Piezo_AttocubeAMC_Driver or Piezo_AttocubeAMC_Driver_Mock
+            tolerance_nm: A point with an acquisition (and the last point) is reached within this distance on every moved axis
+            lookahead_nm: Points without an acquisition are reached within this distance. Default: tolerance_nm
+            settle_timeout_s: Give up on a point after this long and continue with the next one
+            stream: Running or stopped PositionStream of the same piezo to wait on instead of polling; started for the run if needed
+            poll_interval_s: Pause between polls when no stream is given
+        """
+        if tolerance_nm <= 0:
+            raise ValueError("tolerance_nm must be positive")
+        if lookahead_nm is not None and lookahead_nm < tolerance_nm:
+            raise ValueError("lookahead_nm must be >= tolerance_nm")
+        if settle_timeout_s <= 0:
+            raise ValueError("settle_timeout_s must be positive")
+        if poll_interval_s < 0:
+            raise ValueError("poll_interval_s must be >= 0")
+        self.piezo = piezo
+        self.tolerance_nm = tolerance_nm
+        self.lookahead_nm = tolerance_nm if lookahead_nm is None else lookahead_nm
+        self.settle_timeout_s = settle_timeout_s
+        self.stream = stream
+        self.poll_interval_s = poll_interval_s
+
+    def check_limits(self, waypoints_nm: np.ndarray, axes: tuple[bool, bool, bool]) -> None:
+        """Raise a ValueError naming the first waypoint outside the stage limits on a moved axis."""
+        limits = [(self.piezo.x_min, self.piezo.x_max), (self.piezo.y_min, self.piezo.y_max), (self.piezo.z_min, self.piezo.z_max)]
+        for axis, (moved, (low, high)) in enumerate(zip(axes, limits)):
+            if not moved:
+                continue
+            outside = np.flatnonzero((waypoints_nm[:, axis] < low) | (waypoints_nm[:, axis] > high))
+            if len(outside):
+                index = outside[0]
+                raise ValueError(
+                    f"Waypoint {index} ({len(outside)} in total): {AXIS_NAMES[axis]} target {waypoints_nm[index, axis]} nm "
+                    f"is outside [{low}, {high}] nm. Did not start the trajectory."
+                )
+
+    def run(
+        self,
+        waypoints_nm: np.ndarray,
+        axes: tuple[bool, bool, bool] = (True, True, False),
+        on_point: Callable[[int, np.ndarray], Any] | None = None,
+    ) -> TrajectoryResult:
+        """
+        Move through the waypoints in order.
+
+        Parameters:
+            waypoints_nm: (n, 3) array of x, y, z targets; columns of axes that are not moved are ignored
+            axes: Which of x, y, z to move
+            on_point: Called as on_point(index, achieved_nm) at every point once it is settled; the return values are collected in the result
+        """
+        waypoints_nm = np.asarray(waypoints_nm, dtype=float)
+        if waypoints_nm.ndim != 2 or waypoints_nm.shape[1] != 3:
+            raise ValueError("waypoints_nm must have shape (n, 3)")
+        selected = np.asarray(axes, dtype=bool)
+        if not selected.any():
+            raise ValueError("axes must select at least one axis")
+        self.check_limits(waypoints_nm, axes)
+
+        n = len(waypoints_nm)
+        achieved_nm = np.zeros((n, 3))
+        reached = np.zeros(n, dtype=bool)
+        command_s = np.zeros(n)
+        settled_s = np.zeros(n)
+        acquisition_s = np.zeros(n)
+        acquisitions = []
+
+        for axis, moved in enumerate(axes):
+            if moved:
+                self.piezo.set_control_move(axis, True)
+
+        started_stream = self.stream is not None and not self.stream.is_running()
+        if started_stream:
+            self.stream.start()
+        try:
+            start_s = time.monotonic()
+            for index, target in enumerate(waypoints_nm):
+                threshold_nm = self.tolerance_nm if on_point is not None or index == n - 1 else self.lookahead_nm
+                command_s[index] = time.monotonic() - start_s
+                self.piezo.set_position(
+                    x_nm=int(round(target[0])), y_nm=int(round(target[1])), z_nm=int(round(target[2])),
+                    move_x=bool(axes[0]), move_y=bool(axes[1]), move_z=bool(axes[2]),
+                    enable_control_move=False,
+                )
+                achieved_nm[index], reached[index] = self._wait_for_point(target, selected, threshold_nm)
+                settled_s[index] = time.monotonic() - start_s
+                if on_point is not None:
+                    acquisitions.append(on_point(index, achieved_nm[index].copy()))
+                    acquisition_s[index] = time.monotonic() - start_s - settled_s[index]
+            duration_s = time.monotonic() - start_s
+        finally:
+            if started_stream:
+                self.stream.stop()
+
+        return TrajectoryResult(waypoints_nm.copy(), achieved_nm, reached, command_s, settled_s, acquisition_s, acquisitions, duration_s)
+
+    def _wait_for_point(self, target: np.ndarray, selected: np.ndarray, threshold_nm: float) -> tuple[np.ndarray, bool]:
+        # A stopped stage only counts as settled once it has been seen moving towards this target;
+        # earlier samples may still show the state before the command
+        seen_moving = False
+        last_position = None
+
+        def settled(position: np.ndarray, moving: np.ndarray) -> bool:
+            nonlocal seen_moving, last_position
+            last_position = np.array(position, dtype=float)
+            if np.all(np.abs(last_position[selected] - target[selected]) <= threshold_nm):
+                return True
+            if np.any(np.asarray(moving)[selected]):
+                seen_moving = True
+                return False
+            return seen_moving
+
+        if self.stream is not None:
+            sample = self.stream.wait_for(settled, self.settle_timeout_s)
+            if sample is not None:
+                last_position = sample[1]
+        else:
+            deadline_s = time.monotonic() + self.settle_timeout_s
+            while True:
+                position, moving = self.piezo.get_position_and_moving()
+                if settled(np.asarray(position, dtype=float), np.asarray(moving, dtype=bool)):
+                    break
+                if time.monotonic() >= deadline_s:
+                    break
+                if self.poll_interval_s:
+                    time.sleep(self.poll_interval_s)
+
+        if last_position is None:
+            last_position = np.asarray(self.piezo.get_position(), dtype=float)
+        within = bool(np.all(np.abs(last_position[selected] - target[selected]) <= threshold_nm))
+        return last_position, within
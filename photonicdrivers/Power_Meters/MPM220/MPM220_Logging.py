@@ -0,0 +1,70 @@
+"""
+Logging-data readout shared by the MPM-220 drivers (PyVISA, ethernet socket and mpm_instrument.MPM).
+
+LOGG? <module>,<channel> returns the logged power of one port as an IEEE 488.2 block of
+little-endian float32. read_logging_data() fetches several ports into one (n_ports, n_points)
+array, decoding each block straight into its row.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from photonicdrivers.Abstract.BinaryBlock import read_binary_block
+
+# Optical ports of each module type (MMVER? product code)
+CHANNELS_PER_MODULE = {
+    "MPM-211": 4,
+    "MPM-212": 2,
+    "MPM-213": 4,
+    "MPM-215": 1,
+}
+
+LOGGING_DTYPE = "<f4"
+
+
+def get_active_ports(modules_response: str, get_module_information: Callable[[int], str]) -> list[tuple[int, int]]:
+    """
+    List the (module, channel) pairs of all recognised modules.
+
+    Parameters:
+        modules_response: Reply to IDIS?, e.g. "1,1,0,0,0"
+        get_module_information: Returns the reply to MMVER? <module>, e.g. "Santec,MPM-211,00000000M211,Ver1.11"
+    """
+    ports = []
+    for module, recognised in enumerate(modules_response.strip().split(",")):
+        if recognised.strip() != "1":
+            continue
+        product_code = get_module_information(module).split(",")[1].strip()
+        if product_code not in CHANNELS_PER_MODULE:
+            raise ValueError(f"Unknown module type {product_code} in module {module}")
+        ports += [(module, channel) for channel in range(1, CHANNELS_PER_MODULE[product_code] + 1)]
+    return ports
+
+
+def read_logging_port(write: Callable[[str], Any], source: Any, module_no: int, channel_no: int, out: np.ndarray | None = None) -> np.ndarray:
+    """Send LOGG? for one port and decode the block read from source."""
+    write(f"LOGG? {module_no},{channel_no}")
+    return read_binary_block(source, LOGGING_DTYPE, out=out)
+
+
+def read_logging_data(write: Callable[[str], Any], source: Any, ports: list[tuple[int, int]]) -> np.ndarray:
+    """
+    Read the logged power of several ports into one array of shape (len(ports), n_points).
+
+    Parameters:
+        write: Sends a command to the power meter
+        source: Object with read_bytes(n), e.g. a PyVISA resource or ScpiSocketTransport
+        ports: (module, channel) pairs, e.g. from get_active_ports
+    """
+    if not ports:
+        raise ValueError("ports must not be empty")
+    first = read_logging_port(write, source, *ports[0])
+    data = np.empty((len(ports), first.size), dtype=LOGGING_DTYPE)
+    data[0] = first
+    for row, (module_no, channel_no) in enumerate(ports[1:], start=1):
+        read_logging_port(write, source, module_no, channel_no, out=data[row])
+    return data
@@ -1,10 +1,11 @@
-import math
 from enum import Enum
 
+import numpy as np
 import pyvisa
-from instruments.Abstract.Identifiable import Identifiable
 
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.Abstract.Identifiable import Identifiable
+from photonicdrivers.Power_Meters.MPM220.MPM220_Logging import get_active_ports, read_logging_data, read_logging_port
 
 # Methods taken from: https://github.com/santec-corporation/python-samples/tree/main/samples/mpm_instrument
 # for socket questions, see qdac2 instruments
@@ -436,12 +437,12 @@ class santec_MPM220_driver(Identifiable, Connectable):
 
         Example Response: 1,100
         """
-        status, count = self.connection.instrument.query("STAT?").split(",")
+        status, count = self.query("STAT?").split(",")
         return int(status), int(count)
 
     def get_logging_data_point(self):
         """Get the current measurement logging point in CONST1/CONST2/FREE-RUN measuring mode."""
-        response = self.connection.instrument.query("LOGN?")
+        response = self.query("LOGN?")
         return int(response)
 
     def set_logging_data_point(self, value: int):
@@ -463,23 +464,27 @@ class santec_MPM220_driver(Identifiable, Connectable):
             raise ValueError("Measurement data point must be between 1 and 1,000,000.")
         self.write(f"LOGN {value}")
 
-    def get_logging_data(self, module_no: int, channel_no: int):
+    def get_logging_data(self, module_no: int, channel_no: int, out: np.ndarray | None = None) -> np.ndarray:
         """
-        Read out the logging logg.
+        Read out the logging logg as float32 (dBm or mW, depending on the power unit).
         This command is not available for RS-232 communication.
 
         Example:    LOGG? 0,1`
         """
-        try:
-            count = self.get_logging_data_point()
+        return read_logging_port(self.write, self.instrument, module_no, channel_no, out=out)
 
-            expected_size = count * 4 + (2 + 1 + int(math.log10(count)))
-            return self.connection._query_binary_values(
-                f"LOGG? {module_no},{channel_no}", data_points=expected_size
-            )
+    def get_active_ports(self) -> list[tuple[int, int]]:
+        """(module, channel) pairs of all recognised modules."""
+        return get_active_ports(self.get_modules(), self.get_module_information)
 
-        except Exception as e:
-            print(f"Error while fetching logging data (query_binary_values): {e}")
+    def get_logging_data_all(self, ports: list[tuple[int, int]] | None = None) -> np.ndarray:
+        """
+        Read out the logging data of several ports (default: all active ports) in one call.
+        Returns an array of shape (len(ports), n_points); row i belongs to ports[i].
+        """
+        if ports is None:
+            ports = self.get_active_ports()
+        return read_logging_data(self.write, self.instrument, ports)
 
     def query(self, command: str) -> str:
         """Sends a query command to the instrument and returns the response."""
@@ -1,9 +1,10 @@
-import socket
-from instruments.Abstract.Identifiable import Identifiable
+import numpy as np
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.Abstract.Identifiable import Identifiable
+from photonicdrivers.Abstract.ScpiSocketTransport import ScpiSocketTransport
+from photonicdrivers.Power_Meters.MPM220.MPM220_Logging import get_active_ports, read_logging_data, read_logging_port
 #import Santec_FTDI as ftdi
 from enum import Enum
-import math
 
 # Methods taken from: https://github.com/santec-corporation/python-samples/tree/main/samples/mpm_instrument
 # for socket questions, see qdac2 instruments
@@ -20,6 +21,7 @@ class santec_MPM220_driver(Identifiable, Connectable):
         self.ip_adress = ip_adress
         self.timeout = timeout
         self.socket = None
+        self.transport = ScpiSocketTransport(self.ip_adress, self.port, timeout_s=self.timeout, encoding="ascii")
     
 
     #========== Identifiable ==========
@@ -29,18 +31,26 @@ class santec_MPM220_driver(Identifiable, Connectable):
     #========== Connectable ==========
     def connect(self):
 
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.settimeout(self.timeout)
-        self.socket.connect((self.ip_adress, self.port))
+        self.transport.connect()
+        self.socket = self.transport.sock
 
     def disconnect(self):
 
         if self.socket:
-            self.socket.close()
+            self.transport.close()
+            self.socket = None
 
     def is_connected(self) -> bool:
         return self.socket is not None
     
+    def query(self, cmd: str) -> str:
+        """Sends a query command to the instrument and returns the response."""
+        return self._query(cmd)
+
+    def write(self, cmd: str) -> None:
+        """Sends a write command to the instrument."""
+        self._write(cmd)
+
     #========== Private methods ==========
 
     def _query(self,cmd: str) -> str:
@@ -53,14 +63,14 @@ class santec_MPM220_driver(Identifiable, Connectable):
         
         if not self.socket:
             raise ConnectionError("Not connected. Can't send command")
-        self.socket.sendall((cmd + "\n").encode("ascii"))
+        self.transport.write(cmd)
         # self.socket.sendall(b"*IDN?\n")
 
     def _read(self) -> str:
         
         if not self.socket:
             raise ConnectionError("Not connected. Can't read response")
-        response = self.socket.recv(4096).decode("ascii").strip()
+        response = self.transport.read_line().strip()
         #response = self.socket.recv(1024).decode()
         return response
 
@@ -510,7 +520,7 @@ class santec_MPM220_driver(Identifiable, Connectable):
 
         Example Response: 1,100
         """
-        status, count = self.connection._query('STAT?').split(',')
+        status, count = self._query('STAT?').split(',')
         return int(status), int(count)
 
     def get_logging_data_point(self):
@@ -537,22 +547,27 @@ class santec_MPM220_driver(Identifiable, Connectable):
             raise ValueError("Measurement data point must be between 1 and 1,000,000.")
         self._write(f'LOGN {value}')
 
-    def get_logging_data(self, module_no: int, channel_no: int):
+    def get_logging_data(self, module_no: int, channel_no: int, out: np.ndarray | None = None) -> np.ndarray:
         """
-        Read out the logging logg.
+        Read out the logging logg as float32 (dBm or mW, depending on the power unit).
         This command is not available for RS-232 communication.
 
         Example:    LOGG? 0,1`
         """
-        try:
-            count = self.get_logging_data_point()
+        return read_logging_port(self._write, self.transport, module_no, channel_no, out=out)
 
-            expected_size = count * 4 + (2 + 1 + int(math.log10(count)))
-            return self.connection._query_binary_values(f'LOGG? {module_no},{channel_no}',
-                                                    data_points=expected_size)
+    def get_active_ports(self) -> list[tuple[int, int]]:
+        """(module, channel) pairs of all recognised modules."""
+        return get_active_ports(self.get_modules(), self.get_module_information)
 
-        except Exception as e:
-            print(f"Error while fetching logging data (query_binary_values): {e}")
+    def get_logging_data_all(self, ports: list[tuple[int, int]] | None = None) -> np.ndarray:
+        """
+        Read out the logging data of several ports (default: all active ports) in one call.
+        Returns an array of shape (len(ports), n_points); row i belongs to ports[i].
+        """
+        if ports is None:
+            ports = self.get_active_ports()
+        return read_logging_data(self._write, self.transport, ports)
 
 
 
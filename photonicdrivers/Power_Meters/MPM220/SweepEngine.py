@@ -0,0 +1,217 @@
+"""
+Swept-wavelength measurements (SME mode) with a Santec TSL-570 laser and an MPM-220 power meter.
+
+The laser sweeps and sends a trigger per wavelength step to the power meter, which logs one
+sample per trigger on every port. SweepEngine arms the power meter, starts the sweep, checks that the
+laser is sweeping, sleeps through most of the expected sweep time and then polls STAT? with a
+growing interval until logging has finished. The sweep is stopped again (:WAV:SWE 0) also when
+waiting fails. It reads back every active port with get_logging_data_all and returns the
+samples together with the matching wavelength axis.
+
+run_sequence runs sweeps back to back. The download of sweep N runs on a worker thread while
+sweep N+1 is prepared (e.g. the polarisation is changed and the laser is reconfigured), so a
+series of sweeps is limited by the sweep time rather than by the readout.
+
+Example:
+
+    engine = SweepEngine(laser, power_meter)
+    settings = SweepSettings(start_nm=1500, stop_nm=1600, step_nm=0.01, speed_nm_per_s=50)
+    result = engine.run(settings)
+    plt.plot(result.wavelength_nm, result.power[0])
+
+    results = engine.run_sequence([settings] * 3, prepare=lambda index: polariser.set_state(index))
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import time
+from typing import Any
+
+import numpy as np
+
+# Sweep speeds supported by the TSL-570 in nm/s
+SWEEP_SPEEDS_NM_PER_S = (1, 2, 4, 10, 20, 50, 100, 200)
+
+
+@dataclass(frozen=True)
+class SweepSettings:
+    start_nm: float
+    stop_nm: float
+    step_nm: float
+    speed_nm_per_s: float
+    power_dBm: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.stop_nm <= self.start_nm:
+            raise ValueError("stop_nm must be larger than start_nm")
+        if self.step_nm <= 0:
+            raise ValueError("step_nm must be positive")
+        if self.speed_nm_per_s not in SWEEP_SPEEDS_NM_PER_S:
+            raise ValueError(f"speed_nm_per_s must be one of {SWEEP_SPEEDS_NM_PER_S}")
+
+    @property
+    def n_points(self) -> int:
+        return int(round((self.stop_nm - self.start_nm) / self.step_nm)) + 1
+
+    @property
+    def duration_s(self) -> float:
+        return (self.stop_nm - self.start_nm) / self.speed_nm_per_s
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """
+    One sweep. power[i] is the logged power (in the power unit of the MPM) of ports[i] at wavelength_nm.
+    """
+    settings: SweepSettings
+    ports: list[tuple[int, int]]
+    wavelength_nm: np.ndarray
+    power: np.ndarray
+    sweep_time_s: float
+    index: int = 0
+
+    def get_port(self, module: int, channel: int) -> np.ndarray:
+        return self.power[self.ports.index((module, channel))]
+
+
+class SweepEngine:
+    def __init__(
+        self,
+        laser: Any,
+        power_meter: Any,
+        ports: list[tuple[int, int]] | None = None,
+        min_poll_interval_s: float = 0.01,
+        max_poll_interval_s: float = 0.2,
+        timeout_margin_s: float = 10.0,
+    ) -> None:
+        """
+        Parameters:
+            laser: Santec_TSL570_driver from Santec_TSL570_Ethernet_Driver (or anything with write/query); the USB driver has no write/query
+            power_meter: One of the MPM220 drivers (write, query, get_active_ports, get_logging_data_all)
+            ports: (module, channel) pairs to read; default all active ports
+            min_poll_interval_s, max_poll_interval_s: Range of the STAT? polling interval once the sweep should be over
+            timeout_margin_s: Time allowed on top of the expected sweep time before giving up
+        """
+        if not 0 < min_poll_interval_s <= max_poll_interval_s:
+            raise ValueError("Poll intervals must satisfy 0 < min_poll_interval_s <= max_poll_interval_s")
+        self.laser = laser
+        self.power_meter = power_meter
+        self.ports = ports
+        self.min_poll_interval_s = min_poll_interval_s
+        self.max_poll_interval_s = max_poll_interval_s
+        self.timeout_margin_s = timeout_margin_s
+        self._laser_settings: SweepSettings | None = None
+        self._power_meter_settings: SweepSettings | None = None
+        self._laser_initialised = False
+
+    def run(self, settings: SweepSettings) -> SweepResult:
+        """Configure (if needed), sweep and read back all ports."""
+        self.configure_laser(settings)
+        sweep_time_s = self._sweep(settings)
+        return self._download(settings, sweep_time_s, 0)
+
+    def run_sequence(self, settings: list[SweepSettings], prepare: Callable[[int], None] | None = None) -> list[SweepResult]:
+        """
+        Run sweeps back to back. The download of sweep i overlaps with preparing sweep i + 1.
+
+        Parameters:
+            settings: Settings of each sweep
+            prepare: Called with the sweep index before that sweep, e.g. to set a polarisation state
+        """
+        futures: list[Future] = []
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="SweepDownload") as executor:
+            for index, sweep_settings in enumerate(settings):
+                if prepare is not None:
+                    prepare(index)
+                self.configure_laser(sweep_settings)
+                # The power meter can only be re-armed once the previous log has been read out
+                if futures:
+                    futures[-1].result()
+                sweep_time_s = self._sweep(sweep_settings)
+                futures.append(executor.submit(self._download, sweep_settings, sweep_time_s, index))
+            return [future.result() for future in futures]
+
+    def configure_laser(self, settings: SweepSettings) -> None:
+        if not self._laser_initialised:
+            self.laser.write("SYST:COMM:COD 0")  # Legacy command set
+            self.laser.write("POW:UNIT 0")  # dBm
+            self.laser.write("WAV:UNIT 0")  # nm
+            self.laser.write("POW:ATT:AUT 1")
+            self.laser.write("POW:SHUT 0")
+            self.laser.write("POW:STAT 1")
+            self._laser_initialised = True
+        if settings == self._laser_settings:
+            return
+        self.laser.write(f"POW {settings.power_dBm}")
+        self.laser.write(f"WAV:SWE:STAR {settings.start_nm}")
+        self.laser.write(f"WAV:SWE:STOP {settings.stop_nm}")
+        self.laser.write(f"WAV:SWE:SPE {settings.speed_nm_per_s}")
+        self.laser.write(f"TRIG:OUTP:STEP {settings.step_nm}")
+        self._laser_settings = settings
+
+    def configure_power_meter(self, settings: SweepSettings) -> None:
+        if settings == self._power_meter_settings:
+            return
+        self.power_meter.write("STOP")
+        self.power_meter.write("UNIT 0")  # dBm
+        self.power_meter.write("AUTO 1")
+        self.power_meter.write("TRIG 1")  # External trigger from the laser
+        self.power_meter.write("WMOD SWEEP2")
+        self.power_meter.write(f"WSET {settings.start_nm},{settings.stop_nm},{settings.step_nm}")
+        self.power_meter.write(f"SPE {settings.speed_nm_per_s}")
+        self.power_meter.write(f"LOGN {settings.n_points}")
+        self._power_meter_settings = settings
+
+    def wait_for_power_meter(self, settings: SweepSettings, start_s: float) -> int:
+        """Wait until the power meter has finished logging; returns the number of logged points."""
+        # Nothing can finish before the laser has swept the range, so sleep through most of it
+        time.sleep(max(0.9 * settings.duration_s - (time.monotonic() - start_s), 0.0))
+        deadline_s = start_s + settings.duration_s + self.timeout_margin_s
+        interval_s = self.min_poll_interval_s
+        while True:
+            status, count = self.power_meter.query("STAT?").split(",")
+            if int(status) == 1:
+                return int(count)
+            if int(status) == -1:
+                raise RuntimeError("The power meter measurement was stopped before the sweep finished")
+            if time.monotonic() > deadline_s:
+                raise TimeoutError(f"Sweep did not finish within {settings.duration_s + self.timeout_margin_s:.1f} s")
+            time.sleep(interval_s)
+            interval_s = min(2 * interval_s, self.max_poll_interval_s)
+
+    def wait_for_laser(self, sweep_count: int, start_s: float) -> None:
+        """Wait until the laser reports a running sweep, or one more completed sweep than sweep_count."""
+        deadline_s = start_s + self.timeout_margin_s
+        while True:
+            # 0: stopped; 1: running, 3: waiting for a trigger, 4: preparing the sweep
+            if int(self.laser.query(":WAV:SWE?")) != 0 or int(self.laser.query(":WAV:SWE:COUN?")) > sweep_count:
+                return
+            if time.monotonic() > deadline_s:
+                raise RuntimeError("The laser did not start sweeping")
+            time.sleep(self.min_poll_interval_s)
+
+    def _sweep(self, settings: SweepSettings) -> float:
+        if self.ports is None:
+            self.ports = self.power_meter.get_active_ports()
+        self.configure_power_meter(settings)
+        sweep_count = int(self.laser.query(":WAV:SWE:COUN?"))
+        self.power_meter.write("MEAS")
+        start_s = time.monotonic()
+        self.laser.write(":WAV:SWE 1")
+        try:
+            self.wait_for_laser(sweep_count, start_s)
+            self.wait_for_power_meter(settings, start_s)
+        except BaseException:
+            self.power_meter.write("STOP")
+            raise
+        finally:
+            self.laser.write(":WAV:SWE 0")
+        return time.monotonic() - start_s
+
+    def _download(self, settings: SweepSettings, sweep_time_s: float, index: int) -> SweepResult:
+        power = self.power_meter.get_logging_data_all(self.ports)
+        wavelength_nm = settings.start_nm + settings.step_nm * np.arange(power.shape[1])
+        return SweepResult(settings, list(self.ports), wavelength_nm, power, sweep_time_s, index)
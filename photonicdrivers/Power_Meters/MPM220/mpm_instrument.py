@@ -6,9 +6,12 @@ Communication: GPIB | LAN (PyVISA)
 Last Updated: Tue Feb 04, 2025 11:00
 """
 
-import math
 from enum import Enum
 
+import numpy as np
+
+from photonicdrivers.Power_Meters.MPM220.MPM220_Logging import get_active_ports, read_logging_data, read_logging_port
+
 
 class MPM:
     def __init__(self, connection):
@@ -497,7 +500,7 @@ class MPM:
 
         Example Response: 1,100
         """
-        status, count = self.connection.query('STAT?').split(',')
+        status, count = self.query('STAT?').split(',')
         return int(status), int(count)
 
     def get_logging_data_point(self):
@@ -524,22 +527,27 @@ class MPM:
             raise ValueError("Measurement data point must be between 1 and 1,000,000.")
         self.write(f'LOGN {value}')
 
-    def get_logging_data(self, module_no: int, channel_no: int):
+    def get_logging_data(self, module_no: int, channel_no: int, out: np.ndarray | None = None) -> np.ndarray:
         """
-        Read out the logging logg.
+        Read out the logging logg as float32 (dBm or mW, depending on the power unit).
         This command is not available for RS-232 communication.
 
         Example:    LOGG? 0,1`
         """
-        try:
-            count = self.get_logging_data_point()
+        return read_logging_port(self.write, self.connection, module_no, channel_no, out=out)
 
-            expected_size = count * 4 + (2 + 1 + int(math.log10(count)))
-            return self.connection.query_binary_values(f'LOGG? {module_no},{channel_no}',
-                                                       data_points=expected_size)
+    def get_active_ports(self) -> list[tuple[int, int]]:
+        """(module, channel) pairs of all recognised modules."""
+        return get_active_ports(self.get_get_modules(), self.get_module_information)
 
-        except Exception as e:
-            print(f"Error while fetching logging data (query_binary_values): {e}")
+    def get_logging_data_all(self, ports: list[tuple[int, int]] | None = None) -> np.ndarray:
+        """
+        Read out the logging data of several ports (default: all active ports) in one call.
+        Returns an array of shape (len(ports), n_points); row i belongs to ports[i].
+        """
+        if ports is None:
+            ports = self.get_active_ports()
+        return read_logging_data(self.write, self.connection, ports)
 
 
 class ErrorCode(Enum):
@@ -6,10 +6,11 @@ GPIB and TCPIP.
 """
 
 # Basic Imports
-import struct
 import time
 import logging
 
+from photonicdrivers.Abstract.BinaryBlock import read_binary_block
+
 # Initialize the logger
 logger = logging.getLogger("SME Operation")
 logging.basicConfig(
@@ -186,24 +187,9 @@ class SME:
         # Stop logging first if necessary
         #self.power_meter.write("LOGS 0")
 
-        # Request log data
+        # Request log data and decode the binary block straight into float32
         self.power_meter.write("LOGG? 0, 4")
-
-        # Step 1: Read header
-        header_start = self.power_meter.read_bytes(1)      # should be b'#'
-        num_digits_byte = self.power_meter.read_bytes(1)   # ASCII digit
-        num_digits = int(num_digits_byte.decode('ascii'))
-        byte_count_ascii = self.power_meter.read_bytes(num_digits)  # total binary byte count
-        byte_count = int(byte_count_ascii.decode('ascii'))
-
-        print(f"Expecting {byte_count} bytes of binary data...")
-
-        # Step 2: Read binary data
-        binary_data = self.power_meter.read_bytes(byte_count)
-
-        # Step 3: Convert to floats (little endian)
-        num_floats = byte_count // 4
-        log_values = list(struct.unpack('<' + 'f'*num_floats, binary_data))
+        log_values = read_binary_block(self.power_meter, "<f4")
 
         print(f"Received {len(log_values)} points") 
-        return log_values
\ No newline at end of file
+        return log_values
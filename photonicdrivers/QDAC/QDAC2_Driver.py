@@ -6,11 +6,21 @@
 # qdac = qdac2.QDAC2(device)
 # print(qdac.status())
 
-import socket
+from collections import deque
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from typing import Any, Iterator
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.Abstract.ScpiSocketTransport import ScpiSocketTransport
+
+# Error check modes:
+# "command": query the error queue after every command (the original behaviour, two extra round trips per command)
+# "deferred": only remember the commands; the error queue is read by check_errors(), e.g. once per sweep
+# "off": never read the error queue automatically
+ERROR_CHECK_MODES = ("command", "deferred", "off")
 
 class QDAC2_Driver(Connectable):
-    def __init__(self,_ip_string: str,_port_number: int) -> None:
+    def __init__(self,_ip_string: str,_port_number: int, error_check_mode: str = "command") -> None:
         self.ipAddress = _ip_string
         self.port = _port_number
         self.timeout = 2 # seconds
@@ -18,6 +28,11 @@ class QDAC2_Driver(Connectable):
         self.server_address = (self.ipAddress, self.port)
         
         self.terminationChar = "\n"
+        self.transport = ScpiSocketTransport(self.ipAddress, self.port, timeout_s=self.timeout, write_termination=self.terminationChar, read_termination=self.terminationChar)
+        self.set_error_check_mode(error_check_mode)
+        # Commands sent since the error queue was last read, for the error message
+        self._unchecked_commands = deque(maxlen=20)
+        self._n_unchecked_commands = 0
 
     # High level methods are methods that consist of multiple low level methods
     # A low level method sends a single (or very few) command string
@@ -40,6 +55,72 @@ class QDAC2_Driver(Connectable):
         print("DHCP [on/off]:")
         print(self.get_DHCP_status())
 
+    def sweep_voltage(self, chNumberString: str, voltageStrings: Iterable[str], on_point: Callable[[str], Any] | None = None) -> list:
+        """
+        Steps the channel through the voltages at the command rate of the device.
+        The error queue is read once at the end of the sweep instead of after every point.
+
+        Parameters:
+            chNumberString: Channel number
+            voltageStrings: Voltages to set, in order
+            on_point: Called with each voltage after it has been set, e.g. to trigger a measurement
+        Returns:
+            The return values of on_point
+        """
+        results = []
+        with self.deferred_error_checks():
+            for voltageString in voltageStrings:
+                self.set_voltage(chNumberString, voltageString)
+                if on_point is not None:
+                    results.append(on_point(voltageString))
+        return results
+
+    def set_voltages(self, voltageStrings: dict[str, str]) -> None:
+        """Sets several channels ({channel: voltage}) with one write and one error check."""
+        self.transport.query_pipelined(["sour" + ch + ":volt " + voltage for ch, voltage in voltageStrings.items()])
+        self._checkForErrors("set_voltages " + str(voltageStrings))
+
+    ##################### ERROR CHECKING ###########################
+
+    def set_error_check_mode(self, mode: str) -> None:
+        if mode not in ERROR_CHECK_MODES:
+            raise ValueError(f"mode must be one of {ERROR_CHECK_MODES}")
+        self.error_check_mode = mode
+
+    @contextmanager
+    def deferred_error_checks(self) -> Iterator[None]:
+        """Defers error checks inside the block and reads the error queue once when it ends."""
+        previous_mode = self.error_check_mode
+        self.error_check_mode = "deferred"
+        try:
+            yield
+        finally:
+            self.error_check_mode = previous_mode
+            self.check_errors()
+
+    def check_errors(self) -> str:
+        """
+        Reads the error queue of the device and prints any errors together with the commands sent since the last check.
+        Returns the errors, or an empty string if there were none.
+        """
+        commands = list(self._unchecked_commands)
+        n_commands = self._n_unchecked_commands
+        self._unchecked_commands.clear()
+        self._n_unchecked_commands = 0
+        # To avoid recursion, the commands are typed in directly rather than calling the class methods
+        errorCount = self.transport.query("syst:err:coun?")
+        try:
+            if float(errorCount) <= 0:
+                return ""
+        except ValueError:
+            print("Could not interpret the error count returned by the QDAC: " + errorCount)
+            return ""
+        errors = self.transport.query("syst:err:all?")
+        if n_commands > len(commands):
+            commands.insert(0, f"... ({n_commands - len(commands)} earlier commands)")
+        print("The QDAC returned the error(s): " + errors + " when executing the command(s): " + "; ".join(commands))
+        return errors
+
     ##################### LOW LEVEL SYSTEM METHODS ###########################
 
     def get_product_ID(self) -> str:
@@ -147,28 +228,32 @@ class QDAC2_Driver(Connectable):
     ##################### CONNECTABLE ###########################
     
     def disconnect(self) -> None:
-        self.sock.close()
+        self.transport.close()
 
     def connect(self) -> None:
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.settimeout(self.timeout) # sets the timeout of the receive command in seconds. 
-        self.sock.connect(self.server_address) 
+        self.transport.timeout_s = self.timeout # sets the timeout of the receive command in seconds.
+        self.transport.connect()
+        self.sock = self.transport.sock
 
     def is_connected(self) -> bool:
         return bool(self.get_product_ID())
 
     def get_settings(self):
+        # All 30 queries are pipelined in one write, followed by a single error check
+        channels = [str(channel) for channel in range(1, 11)]
+        queries = []
+        for channel_str in channels:
+            queries += ["sour" + channel_str + ":volt?", "sour" + channel_str + ":rang? ", "sour" + channel_str + ":mode?"]
+        responses = self.transport.query_pipelined(queries)
+        self._checkForErrors("get_settings")
+
         channels_dict = {}
-        # Loop over channels 1 through 10
-        for channel in range(1, 11):
-            # Convert channel number to string for usage in method calls
-            channel_str = str(channel)
-            
-            # Collect settings for each channel
-            channels_dict[str(channel_str)] = {
-                "voltage": self.get_voltage(channel_str),
-                "range": self.get_voltage_range(channel_str, ""),
-                "mode": self.get_voltage_mode(channel_str)
+        for index, channel_str in enumerate(channels):
+            voltage, voltage_range, mode = responses[3 * index:3 * index + 3]
+            channels_dict[channel_str] = {
+                "voltage": voltage,
+                "range": voltage_range,
+                "mode": mode
             }
         settings = {"channels": channels_dict}
         return settings
@@ -176,8 +261,7 @@ class QDAC2_Driver(Connectable):
     ##################### PRIVATE METHODS ###########################
 
     def _query(self,commandString: str) -> str:
-        self._write(commandString)
-        response = self._read()    
+        response = self.transport.query(commandString)
 
         # check is the system responded with an error:     
         self._checkForErrors(commandString)
@@ -185,25 +269,14 @@ class QDAC2_Driver(Connectable):
         return response
 
     def _write(self, commandString: str) -> None:
-        command = commandString + self.terminationChar
-        self.sock.sendall(command.encode("utf-8"))
-        # command = bytes(commandString + self.terminationChar, "utf-8")
-        # self.sock.sendall(command)
-
-    def _read(self, bytesToReceive: int = 1024) -> str:
-        byteString = self.sock.recv(bytesToReceive)
-        response = byteString.decode("utf-8")
-        return response
+        self.transport.write(commandString)
+
+    def _read(self) -> str:
+        # One reply up to the termination character; replies split over or merged into TCP packets are handled by the transport
+        return self.transport.read_line()
 
     def _checkForErrors(self, commandString: str) -> None: 
-        # To avoid recursion, the commands are typed in directly rather than calling the class methods
-        self._write("syst:err:coun?")
-        errorCount = self._read()
-        try:
-            if float(errorCount) > 0:            
-                self._write("syst:err:all?")
-                errors = self._read()
-                print("The QDAC returned the error(s): " + errors + "when executing the command: " + commandString)
-        except:
-            pass     #if float(errorCount) > 0: 
-                        #ValueError: could not convert string to float: '0\n0\n'
\ No newline at end of file
+        self._unchecked_commands.append(commandString)
+        self._n_unchecked_commands += 1
+        if self.error_check_mode == "command":
+            self.check_errors()
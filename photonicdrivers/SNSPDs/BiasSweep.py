@@ -0,0 +1,183 @@
+"""
+Bias current sweeps of SNSPDs and choice of the operating bias per channel.
+
+A BiasSweep holds the counts of all channels at a series of bias currents. It is recorded by
+SNSPD_SQ_Driver.sweep_bias, read from a WebSQ "IV Curve" export with read_websq_sweep_file, and
+stored as a single compressed .npz file with save / load_bias_sweep.
+
+find_operating_points analyses all channels at once. Under illumination the count rate of an
+SNSPD rises with the bias and flattens onto a plateau (saturated detection efficiency). Close to
+the switching current Ic the dark counts rise steeply, and above it the detector latches and stops
+counting. The knee is the start of the plateau. The operating bias is placed a chosen fraction
+into the plateau and stays below a safety fraction of Ic. Channels without a plateau (e.g. a dark
+sweep) fall back to fallback_fraction * Ic.
+
+Example:
+
+    sweep = snspd.sweep_bias(np.arange(5.0, 30.0, 0.2), n_measurements=5)
+    sweep.save("bias_sweep_2024-05-17.npz")
+    points = find_operating_points(sweep)
+    snspd.set_bias_currents(points.optimal_bias_uA)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class BiasSweep:
+    """
+    bias_uA and counts have shape (n_steps, n_channels); counts are mean counts per measurement period.
+    voltage_V has the same shape, or is None when the bias voltages were not read.
+    """
+    bias_uA: np.ndarray
+    counts: np.ndarray
+    integration_time_ms: float
+    voltage_V: np.ndarray | None = None
+    timestamp: float = 0.0
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def n_channels(self) -> int:
+        return self.counts.shape[1]
+
+    @property
+    def count_rate_hz(self) -> np.ndarray:
+        return self.counts / (self.integration_time_ms * 1e-3)
+
+    def save(self, path: str) -> None:
+        """Store the sweep in one compressed .npz file (float32 counts and voltages)."""
+        arrays = {
+            "bias_uA": self.bias_uA.astype(np.float32),
+            "counts": self.counts.astype(np.float32),
+            "header": np.array(json.dumps({
+                "format_version": FORMAT_VERSION,
+                "integration_time_ms": self.integration_time_ms,
+                "timestamp": self.timestamp,
+                "metadata": self.metadata,
+            })),
+        }
+        if self.voltage_V is not None:
+            arrays["voltage_V"] = self.voltage_V.astype(np.float32)
+        with open(path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+
+
+def load_bias_sweep(path: str) -> BiasSweep:
+    with np.load(path) as data:
+        header = json.loads(str(data["header"]))
+        if header["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bias sweep format version {header['format_version']}")
+        voltage_V = data["voltage_V"].astype(float) if "voltage_V" in data else None
+        return BiasSweep(
+            data["bias_uA"].astype(float), data["counts"].astype(float), header["integration_time_ms"],
+            voltage_V, header["timestamp"], header["metadata"],
+        )
+
+
+def read_websq_sweep_file(path: str) -> BiasSweep:
+    """Read the tab separated IV/counts export of the WebSQ interface (columns BC, BV1.., C1.., IT)."""
+    with open(path) as file:
+        lines = file.read().splitlines()
+    header_index = next(index for index, line in enumerate(lines) if line.startswith("BC\t"))
+    columns = lines[header_index].split("\t")
+    data = np.loadtxt(lines[header_index + 1:], delimiter="\t", ndmin=2)
+    voltage_columns = [index for index, name in enumerate(columns) if name.startswith("BV")]
+    count_columns = [index for index, name in enumerate(columns) if name.startswith("C")]
+    counts = data[:, count_columns]
+    bias_uA = np.repeat(data[:, [columns.index("BC")]], counts.shape[1], axis=1)
+    return BiasSweep(bias_uA, counts, float(data[0, columns.index("IT")]), data[:, voltage_columns], metadata={"source": path})
+
+
+@dataclass(frozen=True)
+class OperatingPoints:
+    """Per-channel results of find_operating_points; every field has shape (n_channels,)."""
+    optimal_bias_uA: np.ndarray
+    switching_current_uA: np.ndarray
+    knee_uA: np.ndarray
+    plateau_end_uA: np.ndarray
+    plateau_counts: np.ndarray
+    has_plateau: np.ndarray
+
+
+def find_operating_points(
+    sweep: BiasSweep,
+    max_relative_slope_per_uA: float = 0.05,
+    min_counts: float = 1.0,
+    plateau_position: float = 0.5,
+    safety_fraction: float = 0.95,
+    fallback_fraction: float = 0.9,
+    smoothing_steps: int = 3,
+    min_plateau_steps: int = 5,
+) -> OperatingPoints:
+    """
+    Parameters:
+        sweep: Sweep with the bias increasing along axis 0
+        max_relative_slope_per_uA: A step is on the plateau where (dC/dI) / C is below this
+        min_counts: Steps with fewer (smoothed) counts are never on the plateau
+        plateau_position: Where to bias within the plateau, 0 = knee, 1 = end of the plateau
+        safety_fraction: The operating bias is at most this fraction of the switching current
+        fallback_fraction: Operating bias as a fraction of the switching current for channels without a plateau
+        smoothing_steps: Width of the moving average applied before taking the slope
+        min_plateau_steps: The plateau starts at the first run of at least this many steps on it
+    """
+    if not 0 <= plateau_position <= 1:
+        raise ValueError("plateau_position must be in [0, 1]")
+    if smoothing_steps < 1 or min_plateau_steps < 1:
+        raise ValueError("smoothing_steps and min_plateau_steps must be >= 1")
+    bias_uA = np.asarray(sweep.bias_uA, dtype=float)
+    counts = np.asarray(sweep.counts, dtype=float)
+    n_steps, n_channels = counts.shape
+    if n_steps < max(3, min_plateau_steps):
+        raise ValueError("A bias sweep needs at least 3 and at least min_plateau_steps steps")
+    channels = np.arange(n_channels)
+    steps = np.arange(n_steps)[:, None]
+
+    # The detector latches above the switching current, taken as the bias with the most counts
+    switching_index = np.argmax(counts, axis=0)
+    switching_current_uA = bias_uA[switching_index, channels]
+
+    # Moving average along the bias axis; the edges average over fewer steps
+    kernel = np.ones(smoothing_steps)
+    norm = np.convolve(np.ones(n_steps), kernel, mode="same")[:, None]
+    smoothed = np.apply_along_axis(np.convolve, 0, counts, kernel, mode="same") / norm
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative_slope = np.gradient(smoothed, axis=0) / np.gradient(bias_uA, axis=0) / smoothed
+    on_plateau = (smoothed >= min_counts) & (np.abs(relative_slope) <= max_relative_slope_per_uA) & (steps < switching_index)
+
+    # Isolated steps that happen to be flat (e.g. single dark counts) do not start a plateau
+    run_starts = np.lib.stride_tricks.sliding_window_view(on_plateau, min_plateau_steps, axis=0).all(axis=-1)
+    has_plateau = run_starts.any(axis=0)
+    knee_index = np.argmax(run_starts, axis=0)
+    # The plateau ends at the first step after the knee that is off it
+    off_after_knee = (steps > knee_index) & ~on_plateau
+    plateau_end_index = np.where(off_after_knee.any(axis=0), np.argmax(off_after_knee, axis=0) - 1, n_steps - 1)
+
+    knee_uA = bias_uA[knee_index, channels]
+    plateau_end_uA = bias_uA[plateau_end_index, channels]
+    in_plateau = (steps >= knee_index) & (steps <= plateau_end_index)
+    plateau_counts = np.where(in_plateau, counts, np.nan)
+    with np.errstate(invalid="ignore"):
+        plateau_counts = np.nanmedian(np.where(has_plateau, plateau_counts, 0.0), axis=0)
+
+    optimal_bias_uA = np.where(
+        has_plateau,
+        np.minimum(knee_uA + plateau_position * (plateau_end_uA - knee_uA), safety_fraction * switching_current_uA),
+        fallback_fraction * switching_current_uA,
+    )
+    nan = np.full(n_channels, np.nan)
+    return OperatingPoints(
+        optimal_bias_uA,
+        switching_current_uA,
+        np.where(has_plateau, knee_uA, nan),
+        np.where(has_plateau, plateau_end_uA, nan),
+        np.where(has_plateau, plateau_counts, nan),
+        has_plateau,
+    )
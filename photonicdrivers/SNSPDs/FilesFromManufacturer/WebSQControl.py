@@ -187,10 +187,23 @@ class SQTalk(threading.Thread):
 
 
 class SQCounts(threading.Thread):
-    def __init__(self, TCP_IP_ADR='localhost', TCP_IP_PORT=12345, CNTS_BUFFER=100, TIME_OUT=10):
+    """
+    Reads the newline framed counts stream ("timestamp,count1,...,countN\n" every measurement period).
+
+    Every complete line is parsed, also when several arrive in one read or a line is split over
+    reads, and stored in a preallocated ring buffer of CNTS_BUFFER rows. The buffer is allocated
+    when the first line shows the number of columns. Consumers block on a condition variable
+    instead of polling.
+
+    n: number of samples received so far
+    n_dropped: samples that were overwritten before read_new returned them
+    n_malformed: lines that could not be parsed or had the wrong number of columns
+    """
+    def __init__(self, TCP_IP_ADR='localhost', TCP_IP_PORT=12345, CNTS_BUFFER=10000, TIME_OUT=10):
         threading.Thread.__init__(self)
         self.lock = threading.Lock()
         self.rlock = threading.RLock()
+        self.condition = threading.Condition(self.lock)
         self.TCP_IP_ADR = TCP_IP_ADR
         self.TCP_IP_PORT = TCP_IP_PORT
 
@@ -200,53 +213,104 @@ class SQCounts(threading.Thread):
         # self.socket.settimeout(.1)
         self.BUFFER = 1000000
         self.shutdown = False
+        self.closed = False
 
-        self.cnts = []
+        self.cnts = None
         self.CNTS_BUFFER = CNTS_BUFFER
         self.n = 0
+        self.n_read = 0
+        self.n_dropped = 0
+        self.n_malformed = 0
 
     @synchronized_method
     def close(self):
         #print("Closing Socket")
-        self.socket.close()
         self.shutdown = True
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            None  # Not connected anymore
+        self.socket.close()
 
-    @synchronized_method
-    def get_n(self, n):
-        n0 = self.n
-        while self.n < n0 + n:
-            time.sleep(0.001)
-        cnts = self.cnts
-        return cnts[-n:]
+    def get_n(self, n, timeout=None):
+        """
+        Wait for n new samples and return the last n, shape (n, Nchannels + 1).
+        Raises IOError on timeout or when the stream closes first.
+        """
+        if n > self.CNTS_BUFFER:
+            raise ValueError("n must be <= CNTS_BUFFER")
+        with self.condition:
+            n0 = self.n
+            if not self.condition.wait_for(lambda: self.n >= n0 + n or self.closed, timeout):
+                raise IOError("Timed out waiting for counts")
+            if self.n < n0 + n:
+                raise IOError("Counts stream closed")
+            return self._last(n)
+
+    def read_new(self, timeout=None):
+        """
+        All samples received since the previous call, shape (m, Nchannels + 1), oldest first.
+        Waits up to timeout for at least one; returns an empty array on timeout or when closed.
+        Samples overwritten in between are counted in n_dropped.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.n > self.n_read or self.closed, timeout)
+            m = self.n - self.n_read
+            if m > self.CNTS_BUFFER:
+                self.n_dropped += m - self.CNTS_BUFFER
+                m = self.CNTS_BUFFER
+            self.n_read = self.n
+            if self.cnts is None:
+                return np.zeros((0, 0))
+            return self._last(m)
+
+    def _last(self, n):
+        order = (np.arange(self.n - n, self.n)) % self.CNTS_BUFFER
+        return self.cnts[order]
+
+    def _parse_line(self, line):
+        try:
+            values = [float(d) for d in line.split(b',')]
+        except ValueError:
+            return None
+        if self.cnts is not None and len(values) != self.cnts.shape[1]:
+            return None
+        return values
 
     def run(self):
-        data = []
+        pending = b""
         while self.shutdown == False:
-            if sys.version_info.major == 3:
-                try:
-                    data_raw = str(self.socket.recv(self.BUFFER), 'utf-8')
-                except:
-                    data_raw = ""
-                    None  # Happens while closing
-            elif sys.version_info.major == 2:
+            try:
                 data_raw = self.socket.recv(self.BUFFER)
-
-            data_newline = data_raw.split('\n')
-
-            v = []
-            for d in data_newline[0].split(','):
-                try:
-                    v.append(float(d))
-                except:
-                    None
-
-            with self.lock:
-                self.cnts.append(v)
-                # Keep Size of self.cnts
-                l = len(self.cnts)
-                if l > self.CNTS_BUFFER:
-                    self.cnts = self.cnts[l-self.CNTS_BUFFER:]
-                self.n += 1
+            except socket.timeout:
+                continue
+            except OSError:
+                break  # Happens while closing
+            if not data_raw:
+                break  # Connection closed by the driver
+
+            lines = (pending + data_raw).split(b'\n')
+            # The last element is an incomplete line (or empty after a trailing newline)
+            pending = lines.pop()
+
+            with self.condition:
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    values = self._parse_line(line)
+                    if values is None:
+                        self.n_malformed += 1
+                        continue
+                    if self.cnts is None:
+                        self.cnts = np.zeros((self.CNTS_BUFFER, len(values)))
+                    self.cnts[self.n % self.CNTS_BUFFER] = values
+                    self.n += 1
+                self.condition.notify_all()
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
 
 
 class WebSQControl(object):
@@ -299,6 +363,8 @@ class WebSQControl(object):
             self.connected = False
             self.talk.close()
             self.talk.join()
+            self.cnts.close()
+            self.cnts.join()
 
     def error(self, error_msg):
         """Called in case of an error"""
@@ -313,11 +379,24 @@ class WebSQControl(object):
         :type n: int
 
         :return counts: Acquired counts for each channel with timestamp in first column.
-        :rtype counts: numpy array of length (Nchannels + 1, n)
+        :rtype counts: numpy array of shape (n, Nchannels + 1)
 
         """
         return self.cnts.get_n(n)
 
+    def read_cnts(self, timeout=None):
+        """
+        Every count measurement received since the previous call, for logging without gaps.
+
+        :param timeout: time in seconds to wait for at least one measurement. Defaults to waiting forever
+        :type timeout: float
+
+        :return counts: Counts for each channel with timestamp in first column. Empty on timeout.
+        :rtype counts: numpy array of shape (m, Nchannels + 1)
+
+        """
+        return self.cnts.read_new(timeout)
+
     def set_measurement_periode(self, t_in_ms):
         """
         Sets the integration time in ms, also called measurement period.
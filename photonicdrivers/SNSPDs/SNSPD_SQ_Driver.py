@@ -1,5 +1,8 @@
 from photonicdrivers.SNSPDs.FilesFromManufacturer.WebSQControl import WebSQControl
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.SNSPDs.BiasSweep import BiasSweep, OperatingPoints, find_operating_points
+import numpy as np
+import time
 
 class SNSPD_SQ_Driver(Connectable):
     def __init__(self, ip_address: str, control_port: int, counts_port: int) -> None:
@@ -46,10 +49,17 @@ class SNSPD_SQ_Driver(Connectable):
     def get_number_of_detectors(self) -> int:
         return self.websq.get_number_of_detectors()
     
-    def getCounts(self, numberOfMeasurements: int):
-        data = self.websq.acquire_cnts(numberOfMeasurements)
-        print(data)
-        return data
+    def getCounts(self, numberOfMeasurements: int) -> np.ndarray:
+        # Waits for numberOfMeasurements new measurements; rows are [unix time, counts of channel 1, ..., counts of channel N]
+        return self.websq.acquire_cnts(numberOfMeasurements)
+
+    def get_new_counts(self, timeout_s: float | None = None) -> np.ndarray:
+        # Every measurement since the previous call (same rows as getCounts), for logging at the 10 ms period without gaps
+        return self.websq.read_cnts(timeout_s)
+
+    def get_number_of_dropped_counts(self) -> int:
+        # Measurements that were overwritten in the counts buffer before get_new_counts returned them
+        return self.websq.cnts.n_dropped
     
     def set_measurement_period(self, integrationtime_ms:int) -> None:
         self.websq.set_measurement_periode(integrationtime_ms)
@@ -68,6 +78,58 @@ class SNSPD_SQ_Driver(Connectable):
         # in ms
         return self.websq.get_measurement_periode()
 
+    def set_bias_currents(self, currents_uA) -> None:
+        # One value per detector, all set with a single command
+        self.websq.set_bias_current([float(current) for current in currents_uA])
+
+    def sweep_bias(self, bias_uA: np.ndarray, n_measurements: int = 5, settle_measurements: int = 1, read_voltages: bool = False, restore: bool = True) -> BiasSweep:
+        """
+        Steps the bias of all detectors together and records the mean counts per measurement period at every step.
+
+        Parameters:
+            bias_uA: Bias steps, shape (n_steps,) for the same bias on every detector or (n_steps, n_detectors)
+            n_measurements: Measurements averaged per step
+            settle_measurements: Measurements discarded after every step (the first one overlaps the change)
+            read_voltages: Also read the bias voltages at every step (one extra request per step)
+            restore: Set the bias currents from before the sweep again afterwards
+        """
+        n_detectors = self.get_number_of_detectors()
+        bias_uA = np.asarray(bias_uA, dtype=float)
+        if bias_uA.ndim == 1:
+            bias_uA = np.repeat(bias_uA[:, None], n_detectors, axis=1)
+        if bias_uA.ndim != 2 or bias_uA.shape[1] != n_detectors:
+            raise ValueError(f"bias_uA must have shape (n_steps,) or (n_steps, {n_detectors})")
+        if n_measurements < 1 or settle_measurements < 0:
+            raise ValueError("n_measurements must be >= 1 and settle_measurements >= 0")
+
+        previous_bias_uA = self.get_bias_currents()
+        counts = np.zeros(bias_uA.shape)
+        voltage_V = np.zeros(bias_uA.shape) if read_voltages else None
+        try:
+            for step, currents_uA in enumerate(bias_uA):
+                self.set_bias_currents(currents_uA)
+                data = self.getCounts(settle_measurements + n_measurements)
+                counts[step] = data[settle_measurements:, 1:n_detectors + 1].mean(axis=0)
+                if read_voltages:
+                    voltage_V[step] = self.get_bias_voltages()
+        finally:
+            if restore:
+                self.set_bias_currents(previous_bias_uA)
+        return BiasSweep(bias_uA, counts, float(self.get_measurement_period()), voltage_V, time.time(),
+                         {"ip_address": self.ip_address, "n_measurements": n_measurements})
+
+    def optimize_bias(self, bias_uA: np.ndarray, path: str | None = None, n_measurements: int = 5, **analysis) -> OperatingPoints:
+        """
+        Sweeps the bias, picks the operating bias of every detector with find_operating_points (keyword arguments are passed on) and sets it.
+        The sweep is stored in path (.npz) if given.
+        """
+        sweep = self.sweep_bias(bias_uA, n_measurements=n_measurements, restore=False)
+        if path is not None:
+            sweep.save(path)
+        points = find_operating_points(sweep, **analysis)
+        self.set_bias_currents(points.optimal_bias_uA)
+        return points
+
 
 
 
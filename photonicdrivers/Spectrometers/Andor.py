@@ -5,6 +5,7 @@ import time
 
 from photonicdrivers.utils.Range import Range
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.Spectrometers.AndorTracks import random_track_areas, set_random_tracks, software_bin, spectra_from_tracks, validate_tracks
 import numpy as np
 
 try:
@@ -27,6 +28,10 @@ class Andor(Connectable):
         self.spectrograph = None
         self.verbose=verbose
         self.device_index = 0
+        # Read out used by get_spectrum, see set_spectrum_tracks; None reads the full image
+        self.spectrum_read_mode = None
+        self.tracks = None
+        self.track_order = None
 
     def connect(self):
         self.spectrograph = ATSpectrograph(userPath="C:\\Program Files\\Andor SDK\\Python\\pyAndorSpectrograph\\pyAndorSpectrograph\\libs\\Windows\\64")
@@ -73,10 +78,51 @@ class Andor(Connectable):
         return np.sum(image[roi[0]:roi[1]], axis=0)/(roi[1] - roi[0])
 
     def get_trace(self):
-        image = self.get_image()
-        trace = np.sum(image, axis=0)
+        trace = np.sum(self.get_spectrum(), axis=0)
         return trace.tolist()
 
+    def set_spectrum_tracks(self, tracks=None):
+        '''Read out only the binned rows for get_spectrum. tracks are (start, stop) rows of get_image (stop exclusive), None bins the
+        whole sensor. Falls back to the full image, binned in software, if the camera refuses. Returns whether the sensor bins.'''
+        self.tracks = None if tracks is None else validate_tracks(tracks, self.num_pixel_y)
+        self.track_order = None
+        if self.tracks is None:
+            read_mode = codes.Read_Mode.FULL_VERTICAL_BINNING
+            ret = self.camera.SetReadMode(read_mode)
+        else:
+            areas, order = random_track_areas(self.tracks, self.num_pixel_y)
+            read_mode = codes.Read_Mode.RANDOM_TRACK
+            ret = self.camera.SetReadMode(read_mode)
+            if ret == errors.DRV_SUCCESS:
+                ret = set_random_tracks(self.camera, areas)
+                self.track_order = order
+        if ret == errors.DRV_SUCCESS:
+            self.spectrum_read_mode = read_mode
+            return True
+        print("Binning on the sensor not possible: ", errors(ret).name, ", binning the full image in software")
+        self.track_order = None
+        self.spectrum_read_mode = None
+        self.camera.SetReadMode(codes.Read_Mode.IMAGE)
+        self.camera.SetImage(1, 1, 1, self.num_pixel_x, 1, self.num_pixel_y)
+        return False
+
+    def get_spectrum(self):
+        '''One acquisition binned into the tracks of set_spectrum_tracks, shape (n_tracks, num_pixel_x), columns as in get_image'''
+        if self.spectrum_read_mode == codes.Read_Mode.FULL_VERTICAL_BINNING:
+            return self._acquire_single(self.num_pixel_x)[::-1].reshape(1, -1)
+        if self.spectrum_read_mode == codes.Read_Mode.RANDOM_TRACK:
+            return spectra_from_tracks(self._acquire_single(len(self.tracks) * self.num_pixel_x), self.track_order)
+        image = self.get_image()
+        tracks = np.array([[0, image.shape[0]]]) if self.tracks is None else self.tracks
+        return software_bin(image, tracks)
+
+    def _acquire_single(self, size):
+        self.camera.PrepareAcquisition()
+        self.camera.StartAcquisition()
+        self.camera.WaitForAcquisition()
+        (ret, arr, validfirst, validlast) = self.camera.GetImages(1,1, size=size)
+        return np.asarray(arr)
+
     def cooler_on(self):
         ret=self.camera.CoolerON()
         if self.verbose:
@@ -147,6 +193,7 @@ class Andor(Connectable):
 
     def set_read_mode(self, readmode):
         ret=self.camera.SetReadMode(readmode)
+        self.spectrum_read_mode = None
         if self.verbose:
             print("set_read_mode returned: ",errors(ret).name)
 
@@ -0,0 +1,247 @@
+"""
+Kinetic series / run-till-abort streaming for Andor_Camera_Driver.
+
+get_image arms the camera, acquires and disarms it again for every frame. An AndorFrameStream
+instead arms the camera once, in kinetic series mode (n_frames given) or run-till-abort mode,
+and drains the SDK circular buffer on its own thread. The thread sleeps in
+WaitForAcquisitionTimeOut until the SDK signals a new frame. All frames that arrived since the
+last drain are fetched with one GetImages call and copied into a preallocated NumPy ring.
+
+Frames are stored as read out. The orientation get_image applies (both axes flipped) is a view
+(frames[..., ::-1, ::-1]), not a copy.
+
+Frames lost because the SDK circular buffer was overwritten before they were drained are counted
+in n_dropped. Frames read_new skips because it fell more than capacity behind are counted in
+n_reader_dropped.
+
+Example:
+
+    camera.set_exposure_time(0.001)
+    with AndorFrameStream(camera, n_frames=10_000, capacity=1024) as stream:
+        while (frames := stream.read_new(timeout_s=1.0)) is not None:
+            trace.append(frames.sum(axis=(1, 2)))
+    print(stream.get_frame_rate_hz(), stream.n_dropped)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+# Values of atmcd_codes.Acquisition_Mode
+KINETICS = 3
+RUN_TILL_ABORT = 5
+
+
+def orient(frames: np.ndarray) -> np.ndarray:
+    """View of frame(s) with both image axes flipped, the orientation of Andor_Camera_Driver.get_image."""
+    return frames[..., ::-1, ::-1]
+
+
+class AndorFrameStream:
+    def __init__(
+        self,
+        camera: Any,
+        n_frames: int | None = None,
+        capacity: int = 256,
+        kinetic_cycle_time_s: float = 0.0,
+        wait_timeout_ms: int = 100,
+        flip: bool = True,
+    ) -> None:
+        """
+        Parameters:
+            camera: Connected Andor_Camera_Driver, with exposure time and read mode already set
+            n_frames: Length of a kinetic series; None streams until stop() (run till abort)
+            capacity: Number of frames kept in the ring buffer
+            kinetic_cycle_time_s: Time between frames; 0 gives the shortest cycle the readout allows
+            wait_timeout_ms: Longest sleep in WaitForAcquisitionTimeOut before checking whether to stop
+            flip: Return frames in the orientation of get_image (a view)
+        """
+        if n_frames is not None and n_frames < 1:
+            raise ValueError("n_frames must be >= 1 or None")
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        if kinetic_cycle_time_s < 0:
+            raise ValueError("kinetic_cycle_time_s must be >= 0")
+        self.camera = camera
+        self.n_frames_requested = n_frames
+        self.capacity = int(capacity)
+        self.kinetic_cycle_time_s = kinetic_cycle_time_s
+        self.wait_timeout_ms = int(wait_timeout_ms)
+        self.flip = flip
+        self.frame_shape = tuple(camera.get_frame_shape())
+        self.frame_size = int(np.prod(self.frame_shape))
+        self.n_frames = 0
+        self.n_dropped = 0
+        self.n_batches = 0
+        self.last_error: BaseException | None = None
+        self._frames = np.zeros((self.capacity, *self.frame_shape), dtype=np.int32)
+        self._received_s = np.zeros(self.capacity)
+        self._n_read = 0
+        self._n_read_dropped = 0
+        self._sdk_buffer_size = 0
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_s = 0.0
+        self._previous_acquisition_mode: int | None = None
+
+    @property
+    def n_reader_dropped(self) -> int:
+        """Frames read_new skipped because they had been overwritten in the ring."""
+        return self._n_read_dropped
+
+    def start(self) -> None:
+        """Configure the series, arm the camera and start draining frames."""
+        if self.is_running():
+            return
+        self._previous_acquisition_mode = self.camera.get_acquisition_mode()
+        if self.n_frames_requested is None:
+            self.camera.set_acquisition_mode(RUN_TILL_ABORT)
+        else:
+            self.camera.set_acquisition_mode(KINETICS)
+            self.camera.set_number_accumulations(1)
+            self.camera.set_number_kinetics(self.n_frames_requested)
+        self.camera.set_kinetic_cycle_time(self.kinetic_cycle_time_s)
+        self._sdk_buffer_size = self.camera.get_size_of_circular_buffer()
+        try:
+            self.camera.start_acquisition()
+        except Exception:
+            self._restore_acquisition_mode()
+            raise
+        self._start_s = time.monotonic()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="AndorFrameStream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Abort the acquisition (if still running), drain what is left in the SDK buffer and restore the acquisition mode."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._restore_acquisition_mode()
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait(self, timeout_s: float | None = None) -> bool:
+        """Wait for a kinetic series to finish. Returns False on timeout."""
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+        return not self.is_running()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self) -> "AndorFrameStream":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def get_frame_rate_hz(self) -> float:
+        """Frame rate over the frames in the ring, from the time they were drained."""
+        with self._condition:
+            n = min(self.n_frames, self.capacity)
+            if n < 2:
+                return 0.0
+            first_s = self._received_s[(self.n_frames - n) % self.capacity]
+            last_s = self._received_s[(self.n_frames - 1) % self.capacity]
+            if last_s <= first_s:
+                # All in one batch: use the time since the start instead
+                return self.n_frames / (last_s - self._start_s) if last_s > self._start_s else 0.0
+            return (n - 1) / (last_s - first_s)
+
+    def get_latest(self) -> np.ndarray | None:
+        """Copy of the newest frame, or None before the first one."""
+        with self._condition:
+            if self.n_frames == 0:
+                return None
+            return self._view(self._frames[(self.n_frames - 1) % self.capacity]).copy()
+
+    def read_new(self, timeout_s: float | None = None) -> np.ndarray | None:
+        """
+        Copy of all frames since the previous call, shape (m, rows, columns), oldest first.
+        Waits up to timeout_s for at least one. Returns None on timeout or once the stream has ended and everything was read.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.n_frames > self._n_read or not self.is_running(), timeout_s)
+            m = self.n_frames - self._n_read
+            if m == 0:
+                return None
+            if m > self.capacity:
+                self._n_read_dropped += m - self.capacity
+                m = self.capacity
+            order = np.arange(self.n_frames - m, self.n_frames) % self.capacity
+            self._n_read = self.n_frames
+            return self._view(self._frames[order])
+
+    def _view(self, frames: np.ndarray) -> np.ndarray:
+        return orient(frames) if self.flip else frames
+
+    def _store(self, data: np.ndarray) -> None:
+        frames = data.reshape(-1, *self.frame_shape)
+        received_s = time.monotonic()
+        with self._condition:
+            if len(frames) > self.capacity:
+                # More frames in one drain than the ring holds
+                self.n_dropped += len(frames) - self.capacity
+                frames = frames[-self.capacity:]
+            start = self.n_frames % self.capacity
+            first_part = min(len(frames), self.capacity - start)
+            self._frames[start:start + first_part] = frames[:first_part]
+            self._frames[:len(frames) - first_part] = frames[first_part:]
+            slots = np.arange(self.n_frames, self.n_frames + len(frames)) % self.capacity
+            self._received_s[slots] = received_s
+            self.n_frames += len(frames)
+            self.n_batches += 1
+            self._condition.notify_all()
+
+    def _drain(self, next_image: int) -> int:
+        """Fetch images next_image..latest (1-based SDK indices) in one call; returns the next index to fetch."""
+        last = self.camera.get_total_number_images_acquired()
+        if last < next_image:
+            return next_image
+        if self._sdk_buffer_size and last - next_image + 1 > self._sdk_buffer_size:
+            # Older images were overwritten in the SDK circular buffer before they were drained
+            lost = last - next_image + 1 - self._sdk_buffer_size
+            with self._condition:
+                self.n_dropped += lost
+            next_image += lost
+        data = self.camera.get_images(next_image, last, (last - next_image + 1) * self.frame_size)
+        self._store(np.asarray(data))
+        return last + 1
+
+    def _restore_acquisition_mode(self) -> None:
+        # Back to the mode the camera was in before start(), once per stream
+        mode, self._previous_acquisition_mode = self._previous_acquisition_mode, None
+        if mode is not None:
+            self.camera.set_acquisition_mode(mode)
+
+    def _run(self) -> None:
+        next_image = 1
+        try:
+            while True:
+                if self._stop_event.is_set():
+                    self.camera.abort_acquisition()
+                    self._drain(next_image)
+                    break
+                self.camera.wait_for_acquisition(self.wait_timeout_ms)
+                drained = self._drain(next_image)
+                if drained == next_image and not self.camera.is_acquiring():
+                    # Kinetic series complete (or aborted elsewhere); pick up anything that arrived meanwhile
+                    self._drain(next_image)
+                    break
+                next_image = drained
+        except Exception as error:
+            self.last_error = error
+            self.camera.abort_acquisition()
+        finally:
+            # Also after a completed kinetic series, which ends without stop()
+            self._restore_acquisition_mode()
+            with self._condition:
+                self._condition.notify_all()
@@ -8,6 +8,8 @@ from photonicdrivers.Abstract.Connectable import Connectable
 from labserver.Server.remote_logger import RemoteLogger, RemoteLoggerDummy
 
 from .Kymera328i.pyAndorSDK2.pyAndorSDK2 import atmcd, atmcd_codes, atmcd_errors
+from .AndorFrameStream import AndorFrameStream, orient
+from .AndorTracks import multi_track_tracks, random_track_areas, set_random_tracks, software_bin, spectra_from_tracks, validate_tracks
 codes = atmcd_codes
 errors = atmcd_errors.Error_Codes
 
@@ -38,6 +40,11 @@ class Andor_Camera_Driver(Connectable):
         self.num_accumulations: int | None = None
         self.acquisition_mode: int = acquisition_mode
         self.read_mode: int = read_mode
+        # Tracks (get_image rows) of the multi / random track read modes, and their read-out order
+        self.tracks: np.ndarray | None = None
+        self.track_order: np.ndarray | None = None
+        # (rows, columns) of a frame in image read mode, after set_image; None is the full sensor
+        self.image_shape: tuple[int, int] | None = None
 
     # Basic configuration methods
 
@@ -248,23 +255,145 @@ class Andor_Camera_Driver(Connectable):
     def get_number_accumulations(self):
         return self.num_accumulations
 
+    def get_frame_shape(self):
+        """(rows, columns) of one frame as read out in the current read mode."""
+        if self.read_mode in (codes.Read_Mode.FULL_VERTICAL_BINNING.value, codes.Read_Mode.SINGLE_TRACK.value):
+            return 1, self.num_pixel_x
+        if self.read_mode in (codes.Read_Mode.MULTI_TRACK.value, codes.Read_Mode.RANDOM_TRACK.value) and self.tracks is not None:
+            return len(self.tracks), self.num_pixel_x
+        if self.image_shape is not None:
+            return self.image_shape
+        return self.num_pixel_y, self.num_pixel_x
+
     def get_image(self):
+        self._acquire()
+        return self._read_image()
+
+    def _acquire(self):
         self.camera.PrepareAcquisition()
         self.camera.StartAcquisition()
         self.camera.WaitForAcquisition()
-        (ret, arr, validfirst, validlast) = self.camera.GetImages(1,1, size=self.num_pixel_x*self.num_pixel_y)
+
+    def _read_single(self, size: int) -> np.ndarray:
+        (ret, arr, validfirst, validlast) = self.camera.GetImages(1,1, size=size)
+        self.handle_return(ret_value=ret)
+        return np.asarray(arr)
+
+    def _read_image(self) -> np.ndarray:
+        shape = self.get_frame_shape()
+        return orient(np.reshape(self._read_single(shape[0] * shape[1]), shape))
+
+    # Spectra: rows binned into tracks on the sensor (see AndorTracks)
+
+    def set_spectrum_tracks(self, tracks: list[tuple[int, int]] | None = None) -> bool:
+        """
+        Configure the read out for get_spectrum. Only the binned rows are transferred.
+
+        Parameters:
+            tracks: (start, stop) row ranges of get_image (stop exclusive); None bins the whole sensor (full vertical binning)
+
+        If the camera refuses the read mode, it falls back to image read mode and get_spectrum bins in software.
+        Returns whether the binning is done on the sensor.
+        """
+        if tracks is not None:
+            tracks = validate_tracks(tracks, self.num_pixel_y)
+        try:
+            if tracks is None:
+                self.set_read_mode(codes.Read_Mode.FULL_VERTICAL_BINNING.value)
+                self.tracks, self.track_order = None, None
+            else:
+                areas, order = random_track_areas(tracks, self.num_pixel_y)
+                self.set_read_mode(codes.Read_Mode.RANDOM_TRACK.value)
+                self.handle_return(ret_value=set_random_tracks(self.camera, areas))
+                self.tracks, self.track_order = tracks, order
+            return True
+        except AndorException as error:
+            self.logger.warning(f"Binning on the sensor not possible ({error.error_text}); binning the full image in software")
+            self.set_read_mode(codes.Read_Mode.IMAGE.value)
+            self.set_image(1, 1, 1, self.num_pixel_x, 1, self.num_pixel_y)
+            self.tracks, self.track_order = tracks, None
+            return False
+
+    def set_multi_track(self, number: int, height: int, offset: int = 0) -> list[tuple[int, int]]:
+        """
+        number tracks of height rows spread evenly over the sensor (SetMultiTrack); offset shifts them in rows.
+        Returns the tracks as (start, stop) rows of get_image.
+        """
+        (ret, bottom, gap) = self.camera.SetMultiTrack(number, height, offset)
+        self.handle_return(ret_value=ret)
+        self.set_read_mode(codes.Read_Mode.MULTI_TRACK.value)
+        self.tracks = multi_track_tracks(number, height, bottom, gap, self.num_pixel_y)
+        _, self.track_order = random_track_areas(self.tracks, self.num_pixel_y)
+        return [(int(start), int(stop)) for start, stop in self.tracks]
+
+    def get_spectrum(self) -> np.ndarray:
+        """
+        One acquisition binned into the tracks of set_spectrum_tracks / set_multi_track: shape (n_tracks, num_pixel_x),
+        summed counts, tracks in the order given and columns in the orientation of get_image.
+        In image read mode the full image is read and binned in software (all rows if no tracks are set).
+        """
+        self._acquire()
+        return self.read_spectrum()
+
+    def read_spectrum(self) -> np.ndarray:
+        """
+        get_spectrum for an acquisition that was started (start_acquisition) and has finished (wait_for_acquisition).
+        Only transfers and bins the data, so the spectrograph may already move while this runs.
+        """
+        if self.read_mode == codes.Read_Mode.FULL_VERTICAL_BINNING.value:
+            return self._read_single(self.num_pixel_x)[::-1].reshape(1, -1)
+        if self.read_mode in (codes.Read_Mode.MULTI_TRACK.value, codes.Read_Mode.RANDOM_TRACK.value) and self.track_order is not None:
+            return spectra_from_tracks(self._read_single(len(self.tracks) * self.num_pixel_x), self.track_order)
+        image = self._read_image()
+        tracks = np.array([[0, image.shape[0]]]) if self.tracks is None else validate_tracks(self.tracks, image.shape[0])
+        return software_bin(image, tracks)
+
+    def create_frame_stream(self, n_frames: int | None = None, capacity: int = 256, kinetic_cycle_time_s: float = 0.0) -> AndorFrameStream:
+        """
+        Kinetic series of n_frames (or run till abort if None) that keeps the camera armed and drains frames into a ring buffer.
+        Start it with start() or use it as a context manager; see AndorFrameStream.
+        """
+        return AndorFrameStream(self, n_frames=n_frames, capacity=capacity, kinetic_cycle_time_s=kinetic_cycle_time_s)
+
+    # Low-level acquisition methods used by AndorFrameStream
+
+    def start_acquisition(self):
+        ret = self.camera.PrepareAcquisition()
+        self.handle_return(ret_value=ret)
+        ret = self.camera.StartAcquisition()
+        self.handle_return(ret_value=ret)
+
+    def wait_for_acquisition(self, timeout_ms: int) -> bool:
+        # True if a new frame arrived, False on time out (DRV_NO_NEW_DATA) or when nothing is acquiring
+        return self.camera.WaitForAcquisitionTimeOut(int(timeout_ms)) == errors.DRV_SUCCESS
+
+    def get_total_number_images_acquired(self) -> int:
+        (ret, index) = self.camera.GetTotalNumberImagesAcquired()
+        self.handle_return(ret_value=ret)
+        return index
+
+    def get_size_of_circular_buffer(self) -> int:
+        (ret, index) = self.camera.GetSizeOfCircularBuffer()
+        self.handle_return(ret_value=ret)
+        return index
+
+    def get_images(self, first: int, last: int, size: int) -> np.ndarray:
+        # Images first..last (1-based, since the start of the acquisition) from the circular buffer, flat
+        (ret, arr, validfirst, validlast) = self.camera.GetImages(first, last, size)
         self.handle_return(ret_value=ret)
-        image = np.flip(np.flip(np.reshape(arr, (self.num_pixel_y, self.num_pixel_x)), axis=1),axis=0)
-        return image
+        return arr
 
     def get_ROI_counts(self,roi):
-        '''return an array of counts from the image where we sum all rows within the region of interest (ROI)'''
+        '''return an array of counts from the image where we sum all rows within the region of interest (ROI).
+        Binned on the sensor if set_spectrum_tracks([roi]) was called before, otherwise from the full image.'''
+        if self.track_order is not None and self.tracks is not None and len(self.tracks) == 1 and tuple(self.tracks[0]) == tuple(roi):
+            return self.get_spectrum()[0]/(roi[1] - roi[0])
         image = self.get_image()
         return np.sum(image[roi[0]:roi[1]], axis=0)/(roi[1] - roi[0])
 
     def get_trace(self):
-        image = self.get_image()
-        trace = np.sum(image, axis=0)
+        '''Sum of all rows read out: the whole sensor in image and full vertical binning mode, the tracks in track modes.'''
+        trace = np.sum(self.get_spectrum(), axis=0)
         return trace
 
     def get_temperature_range(self):
@@ -354,6 +483,7 @@ class Andor_Camera_Driver(Connectable):
     def set_image(self,hbin, vbin, hstart, hend, vstart, vend):
         ret=self.camera.SetImage(hbin, vbin, hstart, hend, vstart, vend)
         self.handle_return(ret_value=ret)
+        self.image_shape = ((vend - vstart + 1) // vbin, (hend - hstart + 1) // hbin)
         if self.verbose:
             self.logger.info(f"set_image returned: {errors(ret).name}")
 
@@ -369,6 +499,14 @@ class Andor_Camera_Driver(Connectable):
         if self.verbose:
             self.logger.info(f"set_acquisition_mode returned: {errors(value=ret).name}")
 
+    def set_number_kinetics(self, number):
+        ret = self.camera.SetNumberKinetics(number)
+        self.handle_return(ret_value=ret)
+
+    def set_kinetic_cycle_time(self, cycle_time):
+        ret = self.camera.SetKineticCycleTime(cycle_time)
+        self.handle_return(ret_value=ret)
+
     def set_number_accumulations(self, num_accumulations):
         if self.acquisition_mode not in (codes.Acquisition_Mode.ACCUMULATE.value, codes.Acquisition_Mode.KINETICS.value, codes.Acquisition_Mode.FAST_KINETICS.value):
             self.logger.warning(f"Number of accumulations can only be set in ACCUMULATE or KINETIC_SERIES acquisition modes, not in {self.acquisition_mode}.")
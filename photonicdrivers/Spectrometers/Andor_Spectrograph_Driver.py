@@ -5,6 +5,7 @@ from enum import IntEnum
 from photonicdrivers.Abstract.Connectable import Connectable
 
 from .Kymera328i.pyAndorSpectrograph.pyAndorSpectrograph import ATSpectrograph
+from .CalibrationCache import CalibrationCache, CalibrationKey
 
 
 class Error_Codes (IntEnum):
@@ -37,9 +38,20 @@ class Andor_Spectrograph_Driver(Connectable):
         Connectable (class): abstract class that defines the connect, disconnect and is_connected methods that all drivers should have.
     """
 
-    def __init__(self, verbose = False) -> None:
+    def __init__(self, verbose = False, calibration_cache: CalibrationCache | None = None) -> None:
+        """
+        Parameters:
+            calibration_cache: Where wavelength calibrations are kept between calls and runs. Default: a
+                CalibrationCache in the user's home directory
+        """
         self.device_index = 0
         self.verbose = verbose
+        self.calibration_cache = CalibrationCache() if calibration_cache is None else calibration_cache
+        # Last known spectrograph state, so the calibration key needs no queries; None = ask the spectrograph
+        self._serial_number: str | None = None
+        self._grating: int | None = None
+        self._center_wavelength: float | None = None
+        self._pixel_geometry: tuple[int, float] | None = None
 
 
     # Basic methods for connecting to the spectrograph and error handling. These are used by the getter and setter methods below.
@@ -59,6 +71,7 @@ class Andor_Spectrograph_Driver(Connectable):
         self.spectrograph = ATSpectrograph(userPath=os.path.join(os.path.dirname(__file__), r"Kymera328i/pyAndorSpectrograph/pyAndorSpectrograph/libs/Windows/64"))
         ret = self.spectrograph.Initialize(IniPath="")
         self.handle_return(ret_value=ret)
+        self._serial_number = self._grating = self._center_wavelength = self._pixel_geometry = None
         if self.verbose:
             print("Function Initialize returned {}".format(self.get_function_return_description(ret)))
 
@@ -99,6 +112,7 @@ class Andor_Spectrograph_Driver(Connectable):
     def get_grating(self):
         (ret, grating) = self.spectrograph.GetGrating(self.device_index)
         self.handle_return(ret_value=ret)
+        self._grating = grating
         return grating
 
     def get_grating_info(self, grating):
@@ -114,6 +128,7 @@ class Andor_Spectrograph_Driver(Connectable):
     def get_center_wavelength(self):
         (ret, wavelength) = self.spectrograph.GetWavelength(self.device_index)
         self.handle_return(ret_value=ret)
+        self._center_wavelength = wavelength
         return wavelength
 
     def get_focus_mirror_max_steps(self):
@@ -126,23 +141,45 @@ class Andor_Spectrograph_Driver(Connectable):
         self.handle_return(ret_value=ret)
         return position
 
+    def get_calibration_key(self, xpixels, xsize) -> CalibrationKey:
+        # Setting the calibration belongs to; grating and centre wavelength are only queried after they were changed
+        if self._serial_number is None:
+            self._serial_number = self.get_serial_number()
+        grating = self.get_grating() if self._grating is None else self._grating
+        center_wavelength = self.get_center_wavelength() if self._center_wavelength is None else self._center_wavelength
+        return CalibrationKey(self._serial_number, grating, center_wavelength, xpixels, xsize)
+
+    def read_calibration_coefficients(self, xpixels, xsize):
+        # Asks the spectrograph for the calibration of the current setting, bypassing the cache
+        if self._pixel_geometry != (xpixels, xsize):
+            ret = self.spectrograph.SetNumberPixels(self.device_index, xpixels)
+            self.handle_return(ret_value=ret)
+            ret = self.spectrograph.SetPixelWidth(self.device_index, xsize)
+            self.handle_return(ret_value=ret)
+            self._pixel_geometry = (xpixels, xsize)
+        (ret, c0, c1, c2, c3) = self.spectrograph.GetPixelCalibrationCoefficients(self.device_index)
+        self.handle_return(ret_value=ret)
+        return (c0,c1,c2,c3)
+
     def get_calibration_coefficients(self,xpixels,xsize):
         # Returns a tuple of the 4 coefficients for the third order polynomial in the function:
         # lambda = c0+c1*pixel+c2*pixel**2+c3pixel**3
-        # Where lambda is the wavelength in nm for a corresponding pixel
-        ret = self.spectrograph.SetNumberPixels(0, xpixels)
-        self.handle_return(ret_value=ret)
-        ret = self.spectrograph.SetPixelWidth(0, xsize)
-        self.handle_return(ret_value=ret)
-        (shm, c0, c1, c2, c3) = self.spectrograph.GetPixelCalibrationCoefficients(self.device_index)
-        return (c0,c1,c2,c3)
+        # Where lambda is the wavelength in nm for a corresponding pixel.
+        # Read from the spectrograph once per grating, centre wavelength and detector geometry, then from calibration_cache
+        key = self.get_calibration_key(xpixels, xsize)
+        coeffs = self.calibration_cache.get_coefficients(key)
+        if coeffs is None:
+            coeffs = self.read_calibration_coefficients(xpixels, xsize)
+            self.calibration_cache.put_coefficients(key, coeffs)
+        return coeffs
 
     def get_calibration_array(self,xpixels,xsize):
-        #Returns an np.array of length xpixels with the wavelength corresponding to each pixel
-        coeffs = self.get_calibration_coefficients(xpixels,xsize)
-        pixels=np.arange(0,xpixels,1)
-        wavelengths=coeffs[0]+coeffs[1]*pixels+coeffs[2]*pixels**2+coeffs[3]*pixels**3
-        return wavelengths
+        #Returns an np.array of length xpixels with the wavelength corresponding to each pixel.
+        #The array is shared between calls with the same setting and read-only; copy it to modify it
+        key = self.get_calibration_key(xpixels, xsize)
+        if key not in self.calibration_cache:
+            self.calibration_cache.put_coefficients(key, self.read_calibration_coefficients(xpixels, xsize))
+        return self.calibration_cache.get_wavelengths(key)
 
 
     # Setter methods for the spectrograph
@@ -153,8 +190,12 @@ class Andor_Spectrograph_Driver(Connectable):
 
     def set_grating(self, grating):
         ret = self.spectrograph.SetGrating(self.device_index, grating)
+        # Invalidate the known state first: the grating (and with it the wavelength) may have moved even if the call failed
+        self._grating = None
+        self._center_wavelength = None
         self.handle_return(ret_value=ret)
 
     def set_center_wavelength(self, wavelength):
         ret = self.spectrograph.SetWavelength(self.device_index, wavelength=wavelength)
+        self._center_wavelength = None
         self.handle_return(ret_value=ret)
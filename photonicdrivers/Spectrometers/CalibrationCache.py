@@ -0,0 +1,122 @@
+"""
+Cache of spectrograph wavelength calibrations.
+
+The pixel to wavelength calibration of an Andor spectrograph only depends on the spectrograph,
+the grating, the centre wavelength and the detector geometry (number of pixels and pixel width).
+A CalibrationCache keeps the polynomial coefficients for every such CalibrationKey, and the
+wavelength axis computed from them, so the spectrograph is asked once per setting. The
+coefficients are stored in a small JSON file and loaded again on the next start. Stepping back and
+forth between centre wavelengths, e.g. for stitched spectra, then reuses the stored axes.
+
+Example:
+
+    spectrograph = Andor_Spectrograph_Driver(calibration_cache=CalibrationCache("andor_calibration_cache.json"))
+    spectrograph.connect()
+    for center_nm in (700, 750, 800):
+        spectrograph.set_center_wavelength(center_nm)
+        wavelengths_nm = spectrograph.get_calibration_array(1024, 26.0)  # only asks the Kymera the first time
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+DEFAULT_CALIBRATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".photonicdrivers", "andor_calibration_cache.json")
+
+
+@dataclass(frozen=True)
+class CalibrationKey:
+    """Setting a calibration belongs to. The centre wavelength is rounded to 1 pm and the pixel width to 1 nm."""
+    serial_number: str
+    grating: int
+    center_wavelength_nm: float
+    n_pixels: int
+    pixel_width_um: float
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "serial_number", str(self.serial_number))
+        object.__setattr__(self, "grating", int(self.grating))
+        object.__setattr__(self, "center_wavelength_nm", round(float(self.center_wavelength_nm), 3))
+        object.__setattr__(self, "n_pixels", int(self.n_pixels))
+        object.__setattr__(self, "pixel_width_um", round(float(self.pixel_width_um), 3))
+
+
+def wavelength_axis(coefficients: tuple[float, ...], n_pixels: int) -> np.ndarray:
+    """Wavelength in nm of every pixel, c0 + c1 * pixel + c2 * pixel**2 + c3 * pixel**3."""
+    return np.polynomial.polynomial.polyval(np.arange(n_pixels, dtype=float), coefficients)
+
+
+class CalibrationCache:
+    def __init__(self, path: str | None = DEFAULT_CALIBRATION_CACHE_PATH) -> None:
+        """
+        Parameters:
+            path: JSON file the calibrations are loaded from (if it exists) and saved to; None keeps them in memory only
+        """
+        self.path = path
+        self._coefficients: dict[CalibrationKey, tuple[float, ...]] = {}
+        self._wavelengths: dict[CalibrationKey, np.ndarray] = {}
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._coefficients)
+
+    def __contains__(self, key: CalibrationKey) -> bool:
+        return key in self._coefficients
+
+    def get_coefficients(self, key: CalibrationKey) -> tuple[float, ...] | None:
+        return self._coefficients.get(key)
+
+    def put_coefficients(self, key: CalibrationKey, coefficients: tuple[float, ...]) -> None:
+        """Store the calibration of key, and save the file if it is new or changed."""
+        coefficients = tuple(float(value) for value in coefficients)
+        if self._coefficients.get(key) == coefficients:
+            return
+        self._coefficients[key] = coefficients
+        self._wavelengths.pop(key, None)
+        if self.path is not None:
+            self.save()
+
+    def get_wavelengths(self, key: CalibrationKey) -> np.ndarray | None:
+        """Read-only wavelength axis in nm of key, computed once; None if key is not cached."""
+        wavelengths = self._wavelengths.get(key)
+        if wavelengths is None:
+            coefficients = self._coefficients.get(key)
+            if coefficients is None:
+                return None
+            wavelengths = wavelength_axis(coefficients, key.n_pixels)
+            wavelengths.flags.writeable = False
+            self._wavelengths[key] = wavelengths
+        return wavelengths
+
+    def clear(self) -> None:
+        """Forget all calibrations, e.g. after the spectrograph was recalibrated. Also empties the file."""
+        self._coefficients.clear()
+        self._wavelengths.clear()
+        if self.path is not None:
+            self.save()
+
+    def save(self) -> None:
+        """Write the file in one go, so an interrupted save leaves the previous version."""
+        entries = [{**asdict(key), "coefficients": list(coefficients)} for key, coefficients in self._coefficients.items()]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"format_version": FORMAT_VERSION, "calibrations": entries}, file, indent=1)
+        os.replace(temporary_path, self.path)
+
+    def load(self) -> None:
+        with open(self.path) as file:
+            data = json.load(file)
+        if data["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported calibration cache format version {data['format_version']}")
+        for entry in data["calibrations"]:
+            coefficients = tuple(entry.pop("coefficients"))
+            self._coefficients[CalibrationKey(**entry)] = coefficients
+        self._wavelengths.clear()
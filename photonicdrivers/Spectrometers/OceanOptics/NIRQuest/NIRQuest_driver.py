@@ -16,6 +16,8 @@ from oceandirect.od_logger import od_logger
 from oceandirect.OceanDirectAPI import OceanDirectAPI, OceanDirectError
 import numpy as np
 
+from photonicdrivers.Spectrometers.OceanOptics.NIRQuest.SpectrumAcquisition import SpectrumAcquisition
+
 class NIRQuest_driver():
     
     def __init__(self, integration_time_in_s = 1, num_averages = 1):
@@ -25,6 +27,8 @@ class NIRQuest_driver():
         self.device_count = 0
         self.num_averages = num_averages 
         self.integration_time_in_s = integration_time_in_s 
+        # SpectrumAcquisition per device id, configured once for integration_time_in_s
+        self.acquisitions = {}
 
     def initialize_api(self):
         self.device_count = self.od_api.find_usb_devices()
@@ -52,27 +56,26 @@ class NIRQuest_driver():
             self.logger.error(e.get_error_details())
             return None, None
 
+    def create_acquisition(self, device, correct_nonlinearity = True, capacity = 64):
+        """SpectrumAcquisition of the device with integration_time_in_s; reused by get_average_spectrum_formatted."""
+        acquisition = self.acquisitions.get(device.device_id)
+        if acquisition is None or acquisition.integration_time_s != self.integration_time_in_s:
+            print(f"Configuring device s/n = {device.get_serial_number()}", flush=True)
+            acquisition = SpectrumAcquisition(device, self.integration_time_in_s, correct_nonlinearity, capacity)
+            self.acquisitions[device.device_id] = acquisition
+        return acquisition
+
     def get_average_spectrum_formatted(self, device):
-        """New version: Retrieves an averaged spectrum over `num_averages` readings."""
+        """Retrieves an averaged spectrum over `num_averages` readings, averaged on the device where it supports it."""
         try:
-            device.set_electric_dark_correction_usage(False)
-            integration_time = self.integration_time_in_s 
-            device.set_integration_time(int(integration_time * 1e6))
-
-            print(f"Averaging spectra for device s/n = {device.get_serial_number()}", flush=True)
-            spectra = None
-            for i in range(self.num_averages):  # Average over `num_averages` readings
-                current_spectrum = device.get_formatted_spectrum()
-                if spectra is None:
-                    spectra = current_spectrum
-                else:
-                    spectra = [x + y for x, y in zip(spectra, current_spectrum)]
-            # Average the accumulated spectra
-            spectra = np.array(spectra)/ self.num_averages 
-            return spectra
+            return self.create_acquisition(device).get_average_spectrum(self.num_averages)
         except OceanDirectError as e:
             self.logger.error(e.get_error_details())
             return None
+
+    def stream_spectra(self, device, num_spectra = None):
+        """Generator of corrected single spectra at the integration time limit; endless if num_spectra is None."""
+        return self.create_acquisition(device).stream(num_spectra)
         
     def run(self, use_averaging=False):
         self.initialize_api()
@@ -93,6 +96,7 @@ class NIRQuest_driver():
             
             print(f'Max counts: {np.max(spectra)}')
             print("Closing device.")
+            self.acquisitions.pop(device_id, None)
             self.od_api.close_device(device_id)
             
             return wavelengths, spectra
@@ -0,0 +1,206 @@
+"""
+Spectrum acquisition for OceanDirect spectrometers (NIRQuest) into preallocated NumPy arrays.
+
+A SpectrumAcquisition configures the device once (integration time, scans to average) instead of
+before every spectrum. Averages are taken on the device with its scans-to-average setting when
+the device supports it, so one transfer returns the average. Otherwise the single scans are
+copied into a preallocated block and averaged there. Blocks of individual scans use the data
+buffer and back-to-back scans of devices that have them.
+
+The dark spectrum and the nonlinearity coefficients are read once and cached. The corrections are
+applied to whole blocks in NumPy, the way OceanView does: the dark is subtracted, then the counts
+are divided by the nonlinearity polynomial evaluated at the dark corrected counts. The correction
+of the device itself is switched off, so it is not applied twice.
+
+Example:
+
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01)
+    acquisition.measure_dark(n_averages=50)  # with the shutter closed
+    average = acquisition.get_average_spectrum(100)
+    for spectrum in acquisition.stream():
+        monitor.update(acquisition.wavelengths_nm, spectrum)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import time
+from typing import Any
+
+import numpy as np
+
+try:
+    from oceandirect.OceanDirectAPI import OceanDirectError
+except (ImportError, OSError):
+    # The SDK is only importable next to its DLL (see NIRQuest_driver); any error then counts as unsupported
+    OceanDirectError = Exception
+
+# get_raw_spectrum_with_metadata reads at most this many spectra per call
+MAX_BUFFER_READ = 15
+# Wait after an empty data buffer read, as a fraction of the integration time
+EMPTY_BUFFER_WAIT = 0.5
+
+
+def correct_spectra(spectra: np.ndarray, dark: np.ndarray | None = None, nonlinearity_coefficients: np.ndarray | None = None, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Dark and nonlinearity corrected spectra (..., n_pixels).
+
+    Parameters:
+        dark: Dark spectrum subtracted from every spectrum
+        nonlinearity_coefficients: c0, c1, ...; the dark corrected counts are divided by c0 + c1 * counts + c2 * counts**2 + ...
+        out: Array to write the result to, may be spectra itself
+    """
+    if dark is not None:
+        out = np.subtract(spectra, dark, out=out)
+    elif out is None:
+        out = np.array(spectra, dtype=float)
+    elif out is not spectra:
+        np.copyto(out, spectra)
+    if nonlinearity_coefficients is not None and len(nonlinearity_coefficients):
+        out /= np.polynomial.polynomial.polyval(out, nonlinearity_coefficients)
+    return out
+
+
+class SpectrumAcquisition:
+    def __init__(self, device: Any, integration_time_s: float, correct_nonlinearity: bool = True, capacity: int = 64) -> None:
+        """
+        Parameters:
+            device: Open OceanDirect Spectrometer (OceanDirectAPI.open_device)
+            integration_time_s: Integration time of a single scan
+            correct_nonlinearity: Apply the nonlinearity coefficients stored in the device
+            capacity: Number of spectra in the ring stream() yields from
+        """
+        if integration_time_s <= 0:
+            raise ValueError("integration_time_s must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.device = device
+        self.capacity = int(capacity)
+        self.n_pixels = int(device.get_formatted_spectrum_length())
+        self.wavelengths_nm = np.asarray(device.get_wavelengths(), dtype=float)
+        self.dark: np.ndarray | None = None
+        self.nonlinearity_coefficients: np.ndarray | None = None
+        self._scans_to_average: int | None = None
+        self._onboard_averaging = True
+        self._buffering: bool | None = None
+
+        device.set_electric_dark_correction_usage(False)
+        device.set_integration_time(int(round(integration_time_s * 1e6)))
+        self.integration_time_s = integration_time_s
+        if correct_nonlinearity:
+            try:
+                self.nonlinearity_coefficients = np.asarray(device.Advanced.get_nonlinearity_coeffs(), dtype=float)
+                device.set_nonlinearity_correction_usage(False)
+            except OceanDirectError:
+                # Not stored in this device: leave the correction to the device, if it does one
+                self.nonlinearity_coefficients = None
+
+    def get_spectrum(self, out: np.ndarray | None = None) -> np.ndarray:
+        """One corrected single scan, written to out if given."""
+        self._set_scans_to_average(1)
+        return self._correct(self._read(), out)
+
+    def get_average_spectrum(self, n_averages: int, out: np.ndarray | None = None) -> np.ndarray:
+        """Corrected average of n_averages scans, on the device where possible."""
+        return self._correct(self._average_raw(n_averages), out)
+
+    def acquire_block(self, n_spectra: int, out: np.ndarray | None = None, corrected: bool = True) -> np.ndarray:
+        """n_spectra consecutive single scans, (n_spectra, n_pixels), from the device data buffer where available."""
+        if out is None:
+            out = np.empty((n_spectra, self.n_pixels))
+        elif out.shape != (n_spectra, self.n_pixels):
+            raise ValueError(f"out must have shape ({n_spectra}, {self.n_pixels})")
+        self._set_scans_to_average(1)
+        if self._use_buffer(n_spectra):
+            self._read_buffer(out)
+        else:
+            for row in out:
+                row[:] = self._read()
+        if corrected:
+            self._correct(out, out)
+        return out
+
+    def stream(self, n_spectra: int | None = None, block_size: int = 1) -> Iterator[np.ndarray]:
+        """
+        Corrected single scans as fast as the device delivers them; endless if n_spectra is None.
+        Every spectrum is a view into a ring of capacity spectra and stays valid until capacity more were yielded.
+        """
+        if not 1 <= block_size <= self.capacity:
+            raise ValueError("block_size must be between 1 and capacity")
+        ring = np.empty((self.capacity, self.n_pixels))
+        n_blocks = self.capacity // block_size
+        produced = 0
+        block = 0
+        while n_spectra is None or produced < n_spectra:
+            size = block_size if n_spectra is None else min(block_size, n_spectra - produced)
+            start = (block % n_blocks) * block_size
+            rows = self.acquire_block(size, out=ring[start:start + size])
+            for spectrum in rows:
+                yield spectrum
+            produced += size
+            block += 1
+
+    def measure_dark(self, n_averages: int = 10) -> np.ndarray:
+        """Average n_averages scans (light blocked) and subtract them from all following spectra."""
+        self.dark = self._average_raw(n_averages)
+        return self.dark
+
+    def set_dark(self, dark: np.ndarray | None) -> None:
+        self.dark = None if dark is None else np.asarray(dark, dtype=float)
+
+    def _correct(self, spectra: np.ndarray, out: np.ndarray | None) -> np.ndarray:
+        return correct_spectra(spectra, self.dark, self.nonlinearity_coefficients, out)
+
+    def _average_raw(self, n_averages: int) -> np.ndarray:
+        if n_averages < 1:
+            raise ValueError("n_averages must be >= 1")
+        if self._set_scans_to_average(n_averages):
+            return self._read()
+        return self.acquire_block(n_averages, corrected=False).mean(axis=0)
+
+    def _read(self) -> np.ndarray:
+        spectrum = np.asarray(self.device.get_formatted_spectrum(), dtype=float)
+        if spectrum.shape != (self.n_pixels,):
+            raise OceanDirectError(0, f"Expected a spectrum of {self.n_pixels} pixels, got {spectrum.shape}")
+        return spectrum
+
+    def _set_scans_to_average(self, n_scans: int) -> bool:
+        # True if the device averages n_scans itself; the setting is only sent when it changes
+        if n_scans == self._scans_to_average:
+            return True
+        if not self._onboard_averaging and n_scans > 1:
+            return False
+        try:
+            self.device.set_scans_to_average(n_scans)
+            self._scans_to_average = n_scans
+            return True
+        except OceanDirectError:
+            self._onboard_averaging = False
+            return n_scans == 1
+
+    def _use_buffer(self, n_spectra: int) -> bool:
+        if n_spectra < 2 or self._buffering is False:
+            return False
+        try:
+            self.device.Advanced.set_data_buffer_enable(True)
+            self.device.Advanced.set_number_of_backtoback_scans(n_spectra)
+            self._buffering = True
+        except OceanDirectError:
+            self._buffering = False
+        return self._buffering
+
+    def _read_buffer(self, out: np.ndarray) -> None:
+        filled = 0
+        deadline_s = time.monotonic() + 2 * len(out) * self.integration_time_s + 1.0
+        while filled < len(out):
+            if time.monotonic() > deadline_s:
+                raise OceanDirectError(0, f"Data buffer delivered {filled} of {len(out)} spectra")
+            spectra: list = []
+            timestamps: list = []
+            n_read = self.device.Advanced.get_raw_spectrum_with_metadata(spectra, timestamps, min(MAX_BUFFER_READ, len(out) - filled))
+            if n_read:
+                out[filled:filled + n_read] = spectra[:n_read]
+                filled += n_read
+            else:
+                # Nothing buffered yet: the next scan is at most one integration time away
+                time.sleep(EMPTY_BUFFER_WAIT * self.integration_time_s)
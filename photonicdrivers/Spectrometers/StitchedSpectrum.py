@@ -0,0 +1,216 @@
+"""
+Wide range spectra stitched from several centre wavelengths of an Andor spectrograph and camera.
+
+plan_center_wavelengths spreads centre wavelengths evenly over a range, so that neighbouring
+windows overlap by at least a given fraction. StitchedAcquisition steps the spectrograph
+(Andor_Spectrograph_Driver) through them and takes one spectrum per step with the camera
+(Andor_Camera_Driver, read out as set with set_spectrum_tracks). The grating must not move
+while the camera exposes, but it may move while the finished spectrum is transferred and binned.
+The move to step N + 1 is therefore started on a second thread as soon as the exposure of step N
+has finished. The wavelength axis of every step comes from the spectrograph's calibration cache.
+
+stitch_spectra merges the segments onto one evenly spaced wavelength axis. In an overlap region
+each segment is weighted with a linear ramp from its edge, so neighbouring segments cross-fade
+instead of stepping at a seam.
+
+Example:
+
+    camera.set_spectrum_tracks(None)  # full vertical binning
+    acquisition = StitchedAcquisition(spectrograph, camera, overlap=0.1)
+    result = acquisition.run(600.0, 950.0)
+    plt.plot(result.wavelengths_nm, result.counts[0])
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+
+def plan_center_wavelengths(start_nm: float, stop_nm: float, span_nm: float, overlap: float = 0.1) -> np.ndarray:
+    """
+    Centre wavelengths covering [start_nm, stop_nm] with windows of span_nm that overlap by at least overlap * span_nm.
+
+    Parameters:
+        start_nm, stop_nm: Range to cover
+        span_nm: Wavelength range of the detector at one centre wavelength
+        overlap: Minimum overlap of neighbouring windows as a fraction of span_nm, in [0, 1)
+    """
+    if stop_nm <= start_nm:
+        raise ValueError("stop_nm must be larger than start_nm")
+    if span_nm <= 0:
+        raise ValueError("span_nm must be positive")
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    if stop_nm - start_nm <= span_nm:
+        return np.array([(start_nm + stop_nm) / 2])
+    n_steps = int(np.ceil((stop_nm - start_nm - span_nm) / (span_nm * (1 - overlap)) - 1e-9)) + 1
+    return np.linspace(start_nm + span_nm / 2, stop_nm - span_nm / 2, n_steps)
+
+
+def _interpolate(wavelengths_nm: np.ndarray, counts: np.ndarray, axis_nm: np.ndarray) -> np.ndarray:
+    # Linear interpolation of counts (..., n_pixels) at axis_nm, for all leading dimensions at once
+    index = np.clip(np.searchsorted(wavelengths_nm, axis_nm), 1, len(wavelengths_nm) - 1)
+    left = wavelengths_nm[index - 1]
+    fraction = (axis_nm - left) / (wavelengths_nm[index] - left)
+    return counts[..., index - 1] * (1 - fraction) + counts[..., index] * fraction
+
+
+def stitch_spectra(
+    segment_wavelengths_nm: np.ndarray,
+    segment_counts: np.ndarray,
+    axis_nm: np.ndarray | None = None,
+    ramp_nm: float | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge overlapping segments onto one axis. Returns (axis_nm, counts) with counts of shape (..., len(axis_nm)); NaN where no segment covers the axis.
+
+    Parameters:
+        segment_wavelengths_nm: (n_segments, n_pixels) wavelength of every pixel; ascending or descending per segment
+        segment_counts: (n_segments, ..., n_pixels), e.g. (n_segments, n_tracks, n_pixels)
+        axis_nm: Axis to merge onto. Default: evenly spaced over all segments at the finest pixel spacing
+        ramp_nm: Width of the weight ramp at the inner edges of the segments. Default: the widest overlap of neighbouring segments
+    """
+    segment_wavelengths_nm = np.asarray(segment_wavelengths_nm, dtype=float)
+    segment_counts = np.asarray(segment_counts, dtype=float)
+    if segment_wavelengths_nm.ndim != 2 or segment_counts.shape[0] != segment_wavelengths_nm.shape[0] or segment_counts.shape[-1] != segment_wavelengths_nm.shape[1]:
+        raise ValueError("segment_counts must have shape (n_segments, ..., n_pixels) matching segment_wavelengths_nm (n_segments, n_pixels)")
+    # Every segment ascending, segments ordered by wavelength
+    descending = segment_wavelengths_nm[:, -1] < segment_wavelengths_nm[:, 0]
+    segment_wavelengths_nm = np.where(descending[:, None], segment_wavelengths_nm[:, ::-1], segment_wavelengths_nm)
+    segment_counts = np.where(descending.reshape(-1, *[1] * (segment_counts.ndim - 1)), segment_counts[..., ::-1], segment_counts)
+    order = np.argsort(segment_wavelengths_nm[:, 0])
+    segment_wavelengths_nm = segment_wavelengths_nm[order]
+    segment_counts = segment_counts[order]
+    low_nm = segment_wavelengths_nm[:, 0]
+    high_nm = segment_wavelengths_nm[:, -1]
+
+    if axis_nm is None:
+        step_nm = np.min(np.median(np.diff(segment_wavelengths_nm, axis=1), axis=1))
+        axis_nm = low_nm[0] + step_nm * np.arange(int(np.floor((high_nm.max() - low_nm[0]) / step_nm + 1e-9)) + 1)
+    axis_nm = np.asarray(axis_nm, dtype=float)
+    if ramp_nm is None:
+        overlaps_nm = high_nm[:-1] - low_nm[1:]
+        ramp_nm = max(overlaps_nm.max(), 0.0) if len(overlaps_nm) else 0.0
+
+    # Weight ramps from 0 at a segment edge to 1 ramp_nm inside it; the outer edges of the range are not ramped
+    ramp_low_nm = np.concatenate([[-np.inf], low_nm[1:]])
+    ramp_high_nm = np.concatenate([high_nm[:-1], [np.inf]])
+    distance_nm = np.minimum(axis_nm - ramp_low_nm[:, None], ramp_high_nm[:, None] - axis_nm)
+    inside = (axis_nm >= low_nm[:, None]) & (axis_nm <= high_nm[:, None])
+    weights = np.where(inside, np.clip(distance_nm / ramp_nm, 1e-9, 1.0) if ramp_nm > 0 else 1.0, 0.0)
+
+    interpolated = np.stack([_interpolate(wavelengths, counts, axis_nm) for wavelengths, counts in zip(segment_wavelengths_nm, segment_counts)])
+    weights = weights.reshape(len(weights), *[1] * (interpolated.ndim - 2), -1)
+    total_weight = weights.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        counts = np.where(total_weight > 0, (weights * interpolated).sum(axis=0) / total_weight, np.nan)
+    return axis_nm, counts
+
+
+@dataclass(frozen=True)
+class StitchedSpectrum:
+    """
+    wavelengths_nm, counts: The merged spectrum, counts (n_tracks, n_points)
+    center_wavelengths_nm: Centre wavelength of every step
+    segment_wavelengths_nm, segment_counts: The spectrum of every step, (n_steps, n_pixels) and (n_steps, n_tracks, n_pixels)
+    duration_s: Wall-clock time of the acquisition, including the grating moves
+    """
+    wavelengths_nm: np.ndarray
+    counts: np.ndarray
+    center_wavelengths_nm: np.ndarray
+    segment_wavelengths_nm: np.ndarray
+    segment_counts: np.ndarray
+    duration_s: float
+
+
+class StitchedAcquisition:
+    def __init__(
+        self,
+        spectrograph: Any,
+        camera: Any,
+        overlap: float = 0.1,
+        pixel_width_um: float | None = None,
+        overlap_moves: bool = True,
+        wait_timeout_ms: int = 100,
+    ) -> None:
+        """
+        Parameters:
+            spectrograph: Connected Andor_Spectrograph_Driver
+            camera: Connected Andor_Camera_Driver, with exposure time and spectrum read out set
+            overlap: Minimum overlap of neighbouring steps as a fraction of the detector span
+            pixel_width_um: Pixel width for the calibration. Default: the camera's size_pixel_x
+            overlap_moves: Move the grating to the next step while the current spectrum is read out
+            wait_timeout_ms: Longest single wait in WaitForAcquisitionTimeOut before checking whether the camera still acquires
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError("overlap must be in [0, 1)")
+        self.spectrograph = spectrograph
+        self.camera = camera
+        self.overlap = overlap
+        self.n_pixels = int(camera.num_pixel_x)
+        self.pixel_width_um = camera.size_pixel_x if pixel_width_um is None else pixel_width_um
+        self.overlap_moves = overlap_moves
+        self.wait_timeout_ms = int(wait_timeout_ms)
+
+    def get_wavelengths(self) -> np.ndarray:
+        """Wavelength of every column of camera.get_spectrum at the current centre wavelength."""
+        # The calibration is per SDK pixel; get_spectrum returns the columns reversed, like get_image
+        return self.spectrograph.get_calibration_array(self.n_pixels, self.pixel_width_um)[::-1]
+
+    def plan(self, start_nm: float, stop_nm: float) -> np.ndarray:
+        """Centre wavelengths for [start_nm, stop_nm], with the detector span at the current centre wavelength."""
+        wavelengths = self.get_wavelengths()
+        return plan_center_wavelengths(start_nm, stop_nm, abs(wavelengths[-1] - wavelengths[0]), self.overlap)
+
+    def run(self, start_nm: float | None = None, stop_nm: float | None = None, center_wavelengths_nm: np.ndarray | None = None) -> StitchedSpectrum:
+        """Acquire and merge the spectrum over [start_nm, stop_nm], or at the given centre wavelengths."""
+        if center_wavelengths_nm is None:
+            if start_nm is None or stop_nm is None:
+                raise ValueError("Give start_nm and stop_nm, or center_wavelengths_nm")
+            center_wavelengths_nm = self.plan(start_nm, stop_nm)
+        center_wavelengths_nm = np.asarray(center_wavelengths_nm, dtype=float)
+        n_steps = len(center_wavelengths_nm)
+        segment_wavelengths_nm = np.empty((n_steps, self.n_pixels))
+        segments = []
+
+        move_errors: list[BaseException] = []
+
+        def move_to(center_wavelength_nm: float) -> None:
+            try:
+                self.spectrograph.set_center_wavelength(center_wavelength_nm)
+            except BaseException as error:
+                move_errors.append(error)
+
+        start_s = time.monotonic()
+        self.spectrograph.set_center_wavelength(center_wavelengths_nm[0])
+        for index in range(n_steps):
+            # Query the calibration while the grating stands still at this step
+            segment_wavelengths_nm[index] = self.get_wavelengths()
+            self.camera.start_acquisition()
+            self._wait_for_exposure()
+            move = None
+            if index + 1 < n_steps:
+                move = threading.Thread(target=move_to, args=(center_wavelengths_nm[index + 1],), name="StitchedAcquisition move")
+                move.start()
+                if not self.overlap_moves:
+                    move.join()
+            try:
+                segments.append(np.asarray(self.camera.read_spectrum()))
+            finally:
+                if move is not None:
+                    move.join()
+            if move_errors:
+                raise move_errors[0]
+        segment_counts = np.stack(segments)
+        wavelengths_nm, counts = stitch_spectra(segment_wavelengths_nm, segment_counts)
+        return StitchedSpectrum(wavelengths_nm, counts, center_wavelengths_nm, segment_wavelengths_nm, segment_counts, time.monotonic() - start_s)
+
+    def _wait_for_exposure(self) -> None:
+        # In accumulate and kinetic modes the SDK signals every scan, so wait for the whole acquisition
+        while self.camera.is_acquiring():
+            self.camera.wait_for_acquisition(self.wait_timeout_ms)
@@ -2,6 +2,8 @@
 Python wrapper for the Time Tagger X fast feedback coincidence logic.
 """
 
+from contextlib import contextmanager
+import time
 from Swabian.TimeTagger import Countrate, TimeTagger
 import numpy as np
 
@@ -11,7 +13,9 @@ class FastFeedbackCoincidences():
 
     The output is generated when a user-defined coincidence condition on the input channels is met. The length of the coincidence window as well as the output pulse length can be configured. The coincidence window ends with the event on the trigger channel. In total, two coincidence patterns, one for each output channel, can be configured. They run simultaneously but on the same trigger channel and same coincidence window size. For each output channel the user has to define a list of input channels which are considered by the module and another list of input channels which defines the coincidence pattern. A boolean is set to discriminate between exclusive or inclusive coincidences within the considered (active) channels. An exclusive coincidence only triggers an output pulse if there are only events on the coincidence channels but no events on all other active channels.
      
-    The output can be used to trigger other devices, e.g. an Pulse Streamer, with a trigger to output latency below 90 ns."""
+    The output can be used to trigger other devices, e.g. an Pulse Streamer, with a trigger to output latency below 90 ns.
+
+    Register writes go through a shadow cache, so a register is only written when its value changes. Several settings can be changed together with transaction(): all register values are computed and validated first, the input activity is checked once, and only then the changed registers are written."""
 
     def __init__(self, tagger: TimeTagger, triggerChannel: int, outputChannel1: int, activeChannels1: list, coincidenceGroup1: list, exclusiveCoincidence1: bool = False, outputChannel2: int = None, activeChannels2: list = None, coincidenceGroup2: list = None, exclusiveCoincidence2: bool = False, coincidenceWindow: int = 1000, outputPulseLength1: int = 10000, outputPulseLength2: int = 10000):
         """
@@ -46,6 +50,16 @@ class FastFeedbackCoincidences():
         """
         # Set class parameters. Channel numbers are in official TT format (-20 to 20).
         self.tagger = tagger
+        self.countrate = None
+        self._countrateChannels = None
+        self._countBaseline = None  # (counts, capture duration in ps) the input rates are measured from
+        self._inputRates = None
+        self.inputCheckTime = 0.1  # s, shortest integration of the input rates checked by checkInputChannels
+        self.registerWrites = 0  # number of factoryAccess calls issued
+        self._registers = {}  # shadow copy of the written FPGA registers
+        self._pendingRegisters = None  # registers staged by an open transaction
+        self._transactionDepth = 0
+        self._inputCheckPending = False
         self.availableChannels = self.tagger.getChannelList()
         self.triggerChannel = triggerChannel
         self.outputChannel1 = outputChannel1
@@ -62,21 +76,104 @@ class FastFeedbackCoincidences():
         
         # Perform checks
         self.checkLicense()
-        self.checkInputChannels()
-
-        # Set FPGA parameters
-        self._writeParams(0x0, 1) # Set muxer to coincidence logic
-        self._writeParams(0x1, 1) # Set muxer to coincidence logic
-        self.setTriggerChannel(triggerChannel)
-        self.setCoincidenceWindow(coincidenceWindow)
-        self.setOutputPulseLength(outputChannel1, outputPulseLength1)
-        self.setOutputPulseLength(outputChannel2, outputPulseLength2)
-        self.setCoincidenceGroup(outputChannel1, activeChannels1, coincidenceGroup1, exclusiveCoincidence1)
-        if coincidenceGroup2:
-            self.setCoincidenceGroup(outputChannel2, activeChannels2, coincidenceGroup2, exclusiveCoincidence2)
+
+        # Set FPGA parameters. The input channels are checked once when the transaction is committed.
+        with self.transaction():
+            self._writeParams(0x0, 1) # Set muxer to coincidence logic
+            self._writeParams(0x1, 1) # Set muxer to coincidence logic
+            self.setTriggerChannel(triggerChannel)
+            self.setCoincidenceWindow(coincidenceWindow)
+            self.setOutputPulseLength(outputChannel1, outputPulseLength1)
+            self.setOutputPulseLength(outputChannel2, outputPulseLength2)
+            self.setCoincidenceGroup(outputChannel1, activeChannels1, coincidenceGroup1, exclusiveCoincidence1)
+            if coincidenceGroup2:
+                self.setCoincidenceGroup(outputChannel2, activeChannels2, coincidenceGroup2, exclusiveCoincidence2)
 
     def _writeParams(self, addr: int, data: int):
+        if self._pendingRegisters is not None:
+            self._pendingRegisters[addr] = data
+            return
+        if self._registers.get(addr) == data:
+            return
         self.tagger.factoryAccess(0xAF4321FE, 0xF0070000 + 0x2000 + 4*(addr), data , 2**32-1, use_wb=True)
+        self._registers[addr] = data
+        self.registerWrites += 1
+
+    _SETTINGS = ("triggerChannel", "outputChannel1", "outputChannel2", "activeChannels1", "activeChannels2", "coincidenceGroup1", "coincidenceGroup2", "exclusiveCoincidence1", "exclusiveCoincidence2", "coincidenceWindow", "outputPulseLength1", "outputPulseLength2")
+
+    @contextmanager
+    def transaction(self, validate: bool = True):
+        """
+        Change several settings at once, e.g.
+
+            with coincidences.transaction():
+                coincidences.setTriggerChannel(3)
+                coincidences.setCoincidenceGroup(1, [1, 2, 4], [1, 2], exclusive=True)
+                coincidences.setCoincidenceWindow(2000)
+
+        The setters inside the block only compute and validate their register values. When the block
+        ends, the input channels are checked once and only the registers whose value changed are
+        written. If the block or the input check raises, nothing is written and the settings are
+        restored. If a register write fails, the registers already written are set back to their
+        previous values, so the hardware and the shadow cache match the restored settings again.
+        Transactions may be nested; the outermost one commits. validate=False skips the input check,
+        e.g. between the steps of a scan whose inputs were checked before.
+        """
+        if self._transactionDepth > 0:
+            self._transactionDepth += 1
+            try:
+                yield self
+            finally:
+                self._transactionDepth -= 1
+            return
+        settings = {name: getattr(self, name, None) for name in self._SETTINGS}
+        self._pendingRegisters = {}
+        self._inputCheckPending = False
+        self._transactionDepth = 1
+        try:
+            yield self
+            pending = self._pendingRegisters
+            self._pendingRegisters = None
+            self._transactionDepth = 0
+            if self._inputCheckPending and validate:
+                self.checkInputChannels()
+            self._commitRegisters(pending)
+        except BaseException:
+            for name, value in settings.items():
+                setattr(self, name, value)
+            raise
+        finally:
+            self._pendingRegisters = None
+            self._transactionDepth = 0
+            self._inputCheckPending = False
+
+    def _commitRegisters(self, pending: dict):
+        previous = dict(self._registers)
+        written = []
+        for addr in sorted(pending):
+            try:
+                self._writeParams(addr, pending[addr])
+            except BaseException:
+                # The failed register is in an unknown state: forget it, so it is written again next time
+                self._registers.pop(addr, None)
+                self._rollbackRegisters(written, previous)
+                raise
+            written.append(addr)
+
+    def _rollbackRegisters(self, written: list, previous: dict):
+        try:
+            for addr in reversed(written):
+                if addr in previous:
+                    self._writeParams(addr, previous[addr])
+        except Exception:
+            # The register contents are unknown now; write all of them again on the next change
+            self.invalidateRegisterCache()
+
+    def invalidateRegisterCache(self):
+        """
+        Forget the shadow copy of the registers, so the next setters write all their registers again. Use this after the Time Tagger was reset or reconfigured by other software.
+        """
+        self._registers = {}
 
     def _convertChannelNumber(self, channel: int):
         if channel in self.availableChannels:
@@ -97,17 +194,48 @@ class FastFeedbackCoincidences():
     def checkInputChannels(self):
         """
         Check if there are input signals on the trigger as well as active channels. The method also enables the LEDs of the respective channels.
+
+        The Countrate keeps running, and the rates are the counts since an earlier check at least inputCheckTime ago, so the
+        check does not block. Only when the channel set changes does a new Countrate integrate for inputCheckTime once.
         """
         channels = [self.triggerChannel] + self.activeChannels1
         if self.activeChannels2 is not None:
             channels += self.activeChannels2
-        channels = list(set(channels))  # remove duplicates
-        self.countrate = Countrate(self.tagger, channels)
-        self.countrate.start()
-        rates = self.countrate.getData()
+        channels = sorted(set(channels))  # remove duplicates
+        if self._transactionDepth > 0:
+            self._inputCheckPending = True
+            return
+        # A Countrate keeps its channels, so it is only rebuilt when the channel set changes
+        if self.countrate is None or self._countrateChannels != channels:
+            if self.countrate is not None:
+                self.countrate.stop()
+            self.countrate = Countrate(self.tagger, channels)
+            self._countrateChannels = channels
+            self._countBaseline = (np.zeros(len(channels)), 0)
+            self._inputRates = None
+        if not self.countrate.isRunning():
+            self.countrate.start()
+        rates = self._readInputRates()
         if not any(rates):
             raise ValueError("No input signals on trigger and active channels.")
 
+    def _readInputRates(self):
+        # getData averages over everything since the start, so the rates come from differences of the total counts
+        minimum_ps = self.inputCheckTime * 1e12
+        counts, duration_ps = self._readCounts()
+        if self._inputRates is None and duration_ps - self._countBaseline[1] < minimum_ps:
+            time.sleep(max(minimum_ps - (duration_ps - self._countBaseline[1]), 0) * 1e-12)
+            counts, duration_ps = self._readCounts()
+        baseline_counts, baseline_ps = self._countBaseline
+        if self._inputRates is None or duration_ps - baseline_ps >= minimum_ps:
+            window_s = max(duration_ps - baseline_ps, 1) * 1e-12
+            self._inputRates = (counts - baseline_counts) / window_s
+            self._countBaseline = (counts, duration_ps)
+        return self._inputRates
+
+    def _readCounts(self):
+        return np.asarray(self.countrate.getCountsTotal(), dtype=float), self.countrate.getCaptureDuration()
+
     def setTriggerChannel(self, channel: int):
         """
         Parameters
@@ -117,8 +245,8 @@ class FastFeedbackCoincidences():
         """
         ch = self._convertChannelNumber(channel)
         self._writeParams(0x10, ch)
-        self.checkInputChannels()  # update LEDs
         self.triggerChannel = channel
+        self.checkInputChannels()  # update LEDs
 
     def setCoincidenceWindow(self, window: int):
         """
@@ -234,7 +362,8 @@ class FastFeedbackCoincidences():
         Disable the output channels and reset the fast feedback module.
         """
         # Stop countrate measurement (initialize LEDs)
-        self.countrate.stop()
+        if self.countrate is not None:
+            self.countrate.stop()
 
         # Stop coincidence logic by enabling only trigger channel with low state mask
         trigger_mask = 0
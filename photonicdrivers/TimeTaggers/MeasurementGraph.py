@@ -0,0 +1,235 @@
+"""
+Declarative set-up of Time Tagger measurements with shared virtual channels.
+
+Every initialise_gated_* call of Swabian_TimeTagger_Driver creates its own DelayedChannel and
+GatedChannel objects, even if an identical one already exists, and each of them costs tagger CPU.
+A MeasurementGraph instead collects the measurements first. Virtual channels are described by
+hashable specs, so identical ones (same input, same delay, same gates) collapse into a single
+node, and only the unique nodes are instantiated by build().
+
+Example, ten lifetime histograms in different gate windows sharing the trigger delays:
+
+    graph = MeasurementGraph()
+    for k in range(10):
+        graph.gated_histogram(f"window_{k}", trigger_channel=1, click_channel=2,
+                              gate_start_delay_ps=k * 1000, gate_stop_delay_ps=(k + 1) * 1000,
+                              bin_width_ps=10, num_bins=1000)
+    print(graph.cost())  # 10 delayed + 10 gated channels instead of 20 + 10
+    measurements = tagger.build_measurement_graph(graph)
+    data = measurements["window_3"].getData()
+
+build() takes the tagger object and the module that provides the measurement classes, i.e.
+(connection, TimeTagger) for the hardware and (OfflineTagger, TimeTagAnalysis) offline.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import numbers
+from typing import Any, Union
+
+
+@dataclass(frozen=True)
+class DelayedChannelSpec:
+    input_channel: "ChannelSpec"
+    delay_ps: int
+
+
+@dataclass(frozen=True)
+class GatedChannelSpec:
+    input_channel: "ChannelSpec"
+    gate_start_channel: "ChannelSpec"
+    gate_stop_channel: "ChannelSpec"
+
+
+# A physical input channel number or a virtual channel declared on the graph
+ChannelSpec = Union[int, DelayedChannelSpec, GatedChannelSpec]
+
+
+@dataclass(frozen=True)
+class MeasurementSpec:
+    """Vendor measurement class name and its keyword arguments (channels given as ChannelSpec)."""
+    kind: str
+    arguments: tuple[tuple[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class MeasurementGraphCost:
+    """Size of a graph after sharing, and what the same declarations would cost without it."""
+    delayed_channels: int
+    gated_channels: int
+    measurements: int
+    declared_virtual_channels: int
+    declared_measurements: int
+
+    @property
+    def virtual_channels(self) -> int:
+        return self.delayed_channels + self.gated_channels
+
+    @property
+    def sharing_factor(self) -> float:
+        """(virtual channels + measurements) without sharing divided by the same with sharing."""
+        shared = self.virtual_channels + self.measurements
+        return (self.declared_virtual_channels + self.declared_measurements) / shared if shared else 1.0
+
+
+class MeasurementGraphInstance:
+    """Measurements built from a MeasurementGraph. Holds the virtual channel objects so they stay alive."""
+
+    def __init__(self, measurements: dict[str, Any], virtual_channels: dict[ChannelSpec, Any]) -> None:
+        self.measurements = measurements
+        self.virtual_channels = virtual_channels
+
+    def __getitem__(self, name: str) -> Any:
+        return self.measurements[name]
+
+    def channel_number(self, channel: ChannelSpec) -> int:
+        if isinstance(channel, int):
+            return channel
+        return self.virtual_channels[channel].getChannel()
+
+    def get_data(self) -> dict[str, Any]:
+        return {name: measurement.getData() for name, measurement in self.measurements.items()}
+
+
+class MeasurementGraph:
+    def __init__(self) -> None:
+        # dicts keep insertion order, so every virtual channel comes after the ones it depends on
+        self._virtual_channels: dict[ChannelSpec, None] = {}
+        self._measurements: dict[str, MeasurementSpec] = {}
+        self._declared_virtual_channels = 0
+
+    def delayed(self, input_channel: ChannelSpec, delay_ps: int) -> ChannelSpec:
+        """Declare input_channel delayed by delay_ps. A zero delay returns input_channel itself."""
+        input_channel = self._check_channel(input_channel)
+        if int(delay_ps) == 0:
+            self._declared_virtual_channels += 1
+            return input_channel
+        return self._add_virtual_channel(DelayedChannelSpec(input_channel, int(delay_ps)))
+
+    def gated(self, input_channel: ChannelSpec, gate_start_channel: ChannelSpec, gate_stop_channel: ChannelSpec) -> ChannelSpec:
+        return self._add_virtual_channel(GatedChannelSpec(
+            self._check_channel(input_channel), self._check_channel(gate_start_channel), self._check_channel(gate_stop_channel),
+        ))
+
+    def histogram(self, name: str, start_channel: ChannelSpec, click_channel: ChannelSpec, bin_width_ps: int, num_bins: int) -> str:
+        return self._add_measurement(name, "Histogram", click_channel=click_channel, start_channel=start_channel, binwidth=int(bin_width_ps), n_bins=int(num_bins))
+
+    def correlation(self, name: str, channel_1: ChannelSpec, channel_2: ChannelSpec, bin_width_ps: int, num_bins: int) -> str:
+        return self._add_measurement(name, "Correlation", channel_1=channel_1, channel_2=channel_2, binwidth=int(bin_width_ps), n_bins=int(num_bins))
+
+    def histogram_2d(self, name: str, start_channel: ChannelSpec, stop_channel_1: ChannelSpec, stop_channel_2: ChannelSpec, bin_width_1_ps: int, bin_width_2_ps: int, num_bins_1: int, num_bins_2: int) -> str:
+        return self._add_measurement(
+            name, "Histogram2D", start_channel=start_channel, stop_channel_1=stop_channel_1, stop_channel_2=stop_channel_2,
+            binwidth_1=int(bin_width_1_ps), binwidth_2=int(bin_width_2_ps), n_bins_1=int(num_bins_1), n_bins_2=int(num_bins_2),
+        )
+
+    def counter(self, name: str, channels: list[ChannelSpec], bin_width_ps: int, num_bins: int) -> str:
+        return self._add_measurement(name, "Counter", channels=tuple(self._check_channel(channel) for channel in channels), binwidth=int(bin_width_ps), n_values=int(num_bins))
+
+    def gate(self, trigger_channel: ChannelSpec, click_channel: ChannelSpec, gate_start_delay_ps: int, gate_stop_delay_ps: int) -> ChannelSpec:
+        """Clicks arriving between gate_start_delay_ps and gate_stop_delay_ps after a trigger."""
+        return self.gated(click_channel, self.delayed(trigger_channel, gate_start_delay_ps), self.delayed(trigger_channel, gate_stop_delay_ps))
+
+    def gated_histogram(self, name: str, trigger_channel: ChannelSpec, click_channel: ChannelSpec, gate_start_delay_ps: int, gate_stop_delay_ps: int, bin_width_ps: int, num_bins: int) -> str:
+        """Graph counterpart of Swabian_TimeTagger_Driver.initialize_gated_histogram."""
+        gated = self.gate(trigger_channel, click_channel, gate_start_delay_ps, gate_stop_delay_ps)
+        return self.histogram(name, start_channel=trigger_channel, click_channel=gated, bin_width_ps=bin_width_ps, num_bins=num_bins)
+
+    def gated_g2_correlation(self, name: str, trigger_channel: ChannelSpec, click_1_channel: ChannelSpec, click_2_channel: ChannelSpec, gate_start_delay_ps: int, gate_stop_delay_ps: int, bin_width_ps: int, num_bins: int, histogram_num_bins: int) -> list[str]:
+        """
+        Graph counterpart of Swabian_TimeTagger_Driver.initialise_gated_g2_correlation. Declares
+        name (the correlation) and name + "_histogram_1", "_histogram_2", "_gated_histogram_1",
+        "_gated_histogram_2"; returns the names.
+        """
+        gated_1 = self.gate(trigger_channel, click_1_channel, gate_start_delay_ps, gate_stop_delay_ps)
+        gated_2 = self.gate(trigger_channel, click_2_channel, gate_start_delay_ps, gate_stop_delay_ps)
+        return [
+            self.correlation(name, gated_1, gated_2, bin_width_ps, num_bins),
+            self.histogram(f"{name}_histogram_1", trigger_channel, click_1_channel, bin_width_ps, histogram_num_bins),
+            self.histogram(f"{name}_histogram_2", trigger_channel, click_2_channel, bin_width_ps, histogram_num_bins),
+            self.histogram(f"{name}_gated_histogram_1", trigger_channel, gated_1, bin_width_ps, histogram_num_bins),
+            self.histogram(f"{name}_gated_histogram_2", trigger_channel, gated_2, bin_width_ps, histogram_num_bins),
+        ]
+
+    def check_probe(self, name: str, trigger_channel: ChannelSpec, click_channel: ChannelSpec, check_gate_delay_ps: int, check_gate_width_ps: int, probe_gate_delay_ps: int, probe_gate_width_ps: int, bin_width_ps: int, num_bins: int) -> list[str]:
+        """
+        Graph counterpart of Swabian_TimeTagger_Driver.initialize_check_probe. Declares
+        name + "_check", "_probe", "_correlation" and "_raw"; returns the names.
+        """
+        check = self.gate(trigger_channel, click_channel, check_gate_delay_ps, check_gate_delay_ps + check_gate_width_ps)
+        probe = self.gate(trigger_channel, click_channel, probe_gate_delay_ps, probe_gate_delay_ps + probe_gate_width_ps)
+        return [
+            self.histogram(f"{name}_check", trigger_channel, check, bin_width_ps, num_bins),
+            self.histogram(f"{name}_probe", trigger_channel, probe, bin_width_ps, num_bins),
+            self.correlation(f"{name}_correlation", check, probe, bin_width_ps, num_bins * 50),
+            self.histogram(f"{name}_raw", trigger_channel, click_channel, bin_width_ps, num_bins),
+        ]
+
+    def cost(self) -> MeasurementGraphCost:
+        delayed = sum(isinstance(channel, DelayedChannelSpec) for channel in self._virtual_channels)
+        return MeasurementGraphCost(
+            delayed_channels=delayed,
+            gated_channels=len(self._virtual_channels) - delayed,
+            measurements=len(set(self._measurements.values())),
+            declared_virtual_channels=self._declared_virtual_channels,
+            declared_measurements=len(self._measurements),
+        )
+
+    def build(self, tagger: Any, api: Any) -> MeasurementGraphInstance:
+        """
+        Instantiate the unique virtual channels and measurements.
+
+        Parameters:
+            tagger: Tagger the objects attach to (TimeTagger connection or OfflineTagger)
+            api: Module providing DelayedChannel, GatedChannel and the measurement classes
+                (Swabian.TimeTagger or photonicdrivers.TimeTaggers.TimeTagAnalysis)
+        """
+        virtual_channels: dict[ChannelSpec, Any] = {}
+
+        def number(channel):
+            if isinstance(channel, tuple):
+                return [number(item) for item in channel]
+            return channel if isinstance(channel, int) else virtual_channels[channel].getChannel()
+
+        for spec in self._virtual_channels:
+            if isinstance(spec, DelayedChannelSpec):
+                virtual_channels[spec] = api.DelayedChannel(tagger=tagger, input_channel=number(spec.input_channel), delay=spec.delay_ps)
+            else:
+                virtual_channels[spec] = api.GatedChannel(
+                    tagger=tagger, input_channel=number(spec.input_channel),
+                    gate_start_channel=number(spec.gate_start_channel), gate_stop_channel=number(spec.gate_stop_channel),
+                )
+
+        # Identically configured measurements are created once and shared between their names
+        instances: dict[MeasurementSpec, Any] = {}
+        measurements = {}
+        for name, spec in self._measurements.items():
+            if spec not in instances:
+                arguments = {key: number(value) if key.endswith(("channel", "channel_1", "channel_2", "channels")) else value for key, value in spec.arguments}
+                instances[spec] = getattr(api, spec.kind)(tagger=tagger, **arguments)
+            measurements[name] = instances[spec]
+        return MeasurementGraphInstance(measurements, virtual_channels)
+
+    def _add_virtual_channel(self, spec: ChannelSpec) -> ChannelSpec:
+        self._declared_virtual_channels += 1
+        self._virtual_channels.setdefault(spec, None)
+        return spec
+
+    def _add_measurement(self, name: str, kind: str, **arguments) -> str:
+        if name in self._measurements:
+            raise ValueError(f"A measurement named {name!r} is already declared")
+        for key, value in arguments.items():
+            if key.endswith(("channel", "channel_1", "channel_2")):
+                arguments[key] = self._check_channel(value)
+        self._measurements[name] = MeasurementSpec(kind, tuple(arguments.items()))
+        return name
+
+    def _check_channel(self, channel: ChannelSpec) -> ChannelSpec:
+        if isinstance(channel, (DelayedChannelSpec, GatedChannelSpec)):
+            if channel not in self._virtual_channels:
+                raise ValueError("Virtual channels must be declared on this graph before they are used")
+            return channel
+        if not isinstance(channel, numbers.Integral) or isinstance(channel, bool):
+            raise ValueError("channel must be an input channel number or a virtual channel declared on this graph")
+        return int(channel)
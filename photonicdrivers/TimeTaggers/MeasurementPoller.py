@@ -0,0 +1,257 @@
+"""
+Background refresh of Time Tagger measurements at independent rates.
+
+A MeasurementPoller owns a scheduler thread and a small thread pool. Every registered
+measurement (anything with getData(), e.g. the objects returned by the initialise_* factories of
+Swabian_TimeTagger_Driver or its mock) is read on a worker thread at its own interval, so a large
+Histogram2D copy never delays a fast counter or the GUI thread.
+
+Every refresh publishes the array returned by getData() as a new read-only snapshot and keeps the
+snapshot before it as the previous one. Snapshots are not double buffers that get reused: each
+refresh allocates a new array, and publishing only swaps references under a lock, so readers
+never see a half-written array and a snapshot they hold is never modified.
+
+Example:
+
+    poller = MeasurementPoller()
+    poller.add("counter", counter, interval_s=0.05)
+    poller.add("g2", g2_histogram_2d, interval_s=1.0)
+    with poller:
+        ...
+        snapshot = poller.get_snapshot("counter")  # MeasurementSnapshot or None before the first read
+        print(poller.get_statistics("g2").mean_latency_s)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class MeasurementSnapshot:
+    name: str
+    data: np.ndarray
+    sequence: int
+    time_s: float
+    latency_s: float
+
+
+_NO_SNAPSHOT = MeasurementSnapshot("", np.zeros(0), 0, 0.0, 0.0)
+
+
+@dataclass(frozen=True)
+class PollerStatistics:
+    """
+    Refresh statistics of one measurement.
+
+    n_skipped counts refreshes that were due while the previous getData() was still running.
+    n_errors and last_error cover both failed getData() calls and exceptions raised by the callback.
+    """
+    n_refreshes: int
+    n_skipped: int
+    n_errors: int
+    last_latency_s: float
+    mean_latency_s: float
+    max_latency_s: float
+    last_error: BaseException | None
+
+
+class _PolledMeasurement:
+    def __init__(self, name: str, measurement: Any, interval_s: float, callback: Callable[[MeasurementSnapshot], None] | None) -> None:
+        self.name = name
+        self.measurement = measurement
+        self.interval_s = interval_s
+        self.callback = callback
+        self.next_due_s = time.monotonic()
+        self.in_flight = False
+        self.current: MeasurementSnapshot | None = None
+        self.previous: MeasurementSnapshot | None = None
+        self.n_refreshes = 0
+        self.n_skipped = 0
+        self.n_errors = 0
+        self.total_latency_s = 0.0
+        self.max_latency_s = 0.0
+        self.last_error: BaseException | None = None
+
+
+class MeasurementPoller:
+    def __init__(self, max_workers: int = 4) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.max_workers = int(max_workers)
+        self._entries: dict[str, _PolledMeasurement] = {}
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def add(self, name: str, measurement: Any, interval_s: float, callback: Callable[[MeasurementSnapshot], None] | None = None) -> None:
+        """
+        Poll measurement.getData() every interval_s seconds.
+
+        Parameters:
+            name: Key for get_snapshot and get_statistics
+            measurement: Object with a getData() method
+            interval_s: Refresh interval
+            callback: Called on the worker thread with every new snapshot
+        """
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        with self._condition:
+            if name in self._entries:
+                raise ValueError(f"A measurement named {name!r} is already polled")
+            self._entries[name] = _PolledMeasurement(name, measurement, float(interval_s), callback)
+        self._wake_event.set()
+
+    def remove(self, name: str) -> None:
+        with self._condition:
+            del self._entries[name]
+            # Wake wait_for_snapshot and poll_once calls waiting for this measurement
+            self._condition.notify_all()
+
+    def set_interval(self, name: str, interval_s: float) -> None:
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        with self._condition:
+            entry = self._entries[name]
+            entry.interval_s = float(interval_s)
+            entry.next_due_s = time.monotonic()
+        self._wake_event.set()
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="MeasurementPoller")
+        self._thread = threading.Thread(target=self._run, name="MeasurementPollerScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float | None = None) -> None:
+        """Stop scheduling and wait for reads that are still running."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self) -> "MeasurementPoller":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def poll_once(self, name: str) -> MeasurementSnapshot | None:
+        """
+        Read one measurement synchronously on the calling thread. If a read of it is already running,
+        wait for that read instead of starting another one.
+        """
+        with self._condition:
+            entry = self._entries[name]
+            if entry.in_flight:
+                self._condition.wait_for(lambda: not entry.in_flight or self._entries.get(name) is not entry)
+                return entry.current
+            entry.in_flight = True
+        self._refresh(entry)
+        return entry.current
+
+    def get_snapshot(self, name: str) -> MeasurementSnapshot | None:
+        with self._condition:
+            return self._entries[name].current
+
+    def get_previous_snapshot(self, name: str) -> MeasurementSnapshot | None:
+        with self._condition:
+            return self._entries[name].previous
+
+    def get_snapshots(self) -> dict[str, MeasurementSnapshot]:
+        with self._condition:
+            return {name: entry.current for name, entry in self._entries.items() if entry.current is not None}
+
+    def wait_for_snapshot(self, name: str, after_sequence: int = 0, timeout_s: float | None = None) -> MeasurementSnapshot | None:
+        """Block until name has a snapshot with sequence > after_sequence. Returns None on timeout or once name is removed."""
+        with self._condition:
+            entry = self._entries[name]
+            self._condition.wait_for(lambda: (entry.current or _NO_SNAPSHOT).sequence > after_sequence or self._entries.get(name) is not entry, timeout=timeout_s)
+            snapshot = entry.current
+        return snapshot if snapshot is not None and snapshot.sequence > after_sequence else None
+
+    def get_statistics(self, name: str) -> PollerStatistics:
+        with self._condition:
+            entry = self._entries[name]
+            return PollerStatistics(
+                n_refreshes=entry.n_refreshes,
+                n_skipped=entry.n_skipped,
+                n_errors=entry.n_errors,
+                last_latency_s=entry.current.latency_s if entry.current is not None else 0.0,
+                mean_latency_s=entry.total_latency_s / entry.n_refreshes if entry.n_refreshes else 0.0,
+                max_latency_s=entry.max_latency_s,
+                last_error=entry.last_error,
+            )
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            now = time.monotonic()
+            next_wake_s = now + 1.0
+            with self._condition:
+                for entry in self._entries.values():
+                    if now >= entry.next_due_s:
+                        if entry.in_flight:
+                            entry.n_skipped += 1
+                        else:
+                            entry.in_flight = True
+                            self._executor.submit(self._refresh, entry)
+                        # Keep the cadence, but do not try to catch up on missed refreshes
+                        entry.next_due_s += entry.interval_s
+                        if entry.next_due_s <= now:
+                            entry.next_due_s = now + entry.interval_s
+                    next_wake_s = min(next_wake_s, entry.next_due_s)
+            self._wake_event.wait(max(next_wake_s - time.monotonic(), 0.0))
+
+    def _refresh(self, entry: _PolledMeasurement) -> None:
+        start_s = time.monotonic()
+        try:
+            data = np.asarray(entry.measurement.getData())
+        except Exception as error:
+            with self._condition:
+                entry.in_flight = False
+                entry.n_errors += 1
+                entry.last_error = error
+                self._condition.notify_all()
+            return
+        end_s = time.monotonic()
+        # A read-only view, so the array returned by getData itself is left untouched
+        data = data.view()
+        data.flags.writeable = False
+        with self._condition:
+            sequence = entry.current.sequence + 1 if entry.current is not None else 1
+            snapshot = MeasurementSnapshot(entry.name, data, sequence, end_s, end_s - start_s)
+            entry.previous, entry.current = entry.current, snapshot
+            entry.in_flight = False
+            entry.n_refreshes += 1
+            entry.total_latency_s += snapshot.latency_s
+            entry.max_latency_s = max(entry.max_latency_s, snapshot.latency_s)
+            self._condition.notify_all()
+        if entry.callback is not None:
+            try:
+                entry.callback(snapshot)
+            except Exception as error:
+                # The executor drops the future of this task, so record the failure like a failed read
+                with self._condition:
+                    entry.n_errors += 1
+                    entry.last_error = error
+
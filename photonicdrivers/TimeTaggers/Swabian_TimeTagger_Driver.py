@@ -1,7 +1,11 @@
 from Swabian import TimeTagger
 from Swabian.TimeTagger import TimeTagStreamBuffer
+from collections.abc import Iterator
 import time
 from photonicdrivers.Abstract.Connectable import Connectable
+from photonicdrivers.TimeTaggers.MeasurementGraph import MeasurementGraph, MeasurementGraphInstance
+from photonicdrivers.TimeTaggers.TimeTagArchive import TimeTagArchiveReader, TimeTagArchiveWriter
+from photonicdrivers.TimeTaggers.TimeTagStreaming import TimeTagChunk, TimeTagRingBuffer, iterate_new_time_tag_stream
 
 # https://www.swabianinstruments.com/static/documentation/TimeTagger/tutorials/TimeTaggerRPC.html
 # If the "Time Tagger Lab" software is installed, code example can be found here C:\Program Files\Swabian Instruments\Time Tagger\examples
@@ -288,6 +292,10 @@ class Swabian_TimeTagger_Driver(Connectable):
         return gated_g2_2D_histogram, gate_start_channel, gate_stop_channel, gated_channel_1, gated_channel_2
     
 
+    def build_measurement_graph(self, graph: MeasurementGraph) -> MeasurementGraphInstance:
+        """Create the measurements declared on graph, sharing identical virtual channels between them."""
+        return graph.build(self.connection, TimeTagger)
+
     def getSerial(self) -> str:
         return self.connection.getSerial()
     
@@ -365,6 +373,44 @@ class Swabian_TimeTagger_Driver(Connectable):
         stream.waitUntilFinished()
         return stream.getData()
 
+    def iterate_time_tag_data(self, channels: list[int], acquisition_time_ps: int = None, chunk_events: int = 1_000_000, n_chunks: int = 4, buffer_events: int = None, poll_interval_s: float = 0.01) -> Iterator[TimeTagChunk]:
+        """
+        Stream raw time tags in fixed-size chunks instead of one buffer holding the whole acquisition.
+
+        The tags are copied once into a preallocated ring of n_chunks NumPy arrays and every yielded
+        TimeTagChunk holds views into that ring. A chunk stays valid until n_chunks further chunks have
+        been yielded; use chunk.copy() to keep it longer. The TimeTagStream is started by the first
+        next() call and stopped when the generator finishes or is closed.
+
+        Parameters:
+            channels: Channels to record
+            acquisition_time_ps: Stop after this duration. If None, record until the generator is closed
+            chunk_events: Maximum number of events per yielded chunk
+            n_chunks: Number of chunks in the ring
+            buffer_events: Size of the TimeTagStream buffer between two polls, at most chunk_events * n_chunks (the default)
+            poll_interval_s: Sleep between polls that returned no events
+        """
+        if buffer_events is None:
+            buffer_events = chunk_events * n_chunks
+        if buffer_events > chunk_events * n_chunks:
+            raise ValueError("buffer_events must be <= chunk_events * n_chunks")
+        ring = TimeTagRingBuffer(chunk_events=chunk_events, n_slots=n_chunks)
+        return iterate_new_time_tag_stream(lambda: TimeTagger.TimeTagStream(tagger=self.connection, n_max_events=buffer_events, channels=channels), ring, acquisition_time_ps=acquisition_time_ps, buffer_events=buffer_events, poll_interval_s=poll_interval_s)
+
+    def record_time_tag_archive(self, path: str, channels: list[int], acquisition_time_ps: int, chunk_events: int = 1_000_000, block_duration_ps: int = 1_000_000_000, metadata: dict = None, overwrite: bool = False) -> TimeTagArchiveReader:
+        """
+        Stream raw time tags straight to a memory-mappable archive on disk (see TimeTagArchive).
+
+        Returns a reader for the finished archive.
+        """
+        archive_metadata = {"serial": self.getSerial(), "channels": list(channels), "acquisition_time_ps": int(acquisition_time_ps)}
+        if metadata is not None:
+            archive_metadata.update(metadata)
+        with TimeTagArchiveWriter(path, block_duration_ps=block_duration_ps, metadata=archive_metadata, overwrite=overwrite) as writer:
+            for chunk in self.iterate_time_tag_data(channels, acquisition_time_ps=acquisition_time_ps, chunk_events=chunk_events):
+                writer.write_chunk(chunk)
+        return TimeTagArchiveReader(path)
+
     def set_conditional_channel(self, trigger_channel: int, filtered_channels_list: list[int]) -> None:
         "Set a conditional filter on the Time Tagger. Only events on the trigger channel that coincide with events on the filtered channels will be recorded."
         self.connection.setConditionalFilter(trigger=trigger_channel, filtered=filtered_channels_list)
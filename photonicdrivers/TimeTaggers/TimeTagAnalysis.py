@@ -0,0 +1,738 @@
+"""
+Offline re-implementation of the Time Tagger virtual channels and measurements used by
+Swabian_TimeTagger_Driver, operating on raw (timestamps, channels) arrays.
+
+The classes mirror the vendor API (DelayedChannel, GatedChannel, Histogram, Correlation,
+Histogram2D, Counter, FrequencyCounter, FrequencyStability with getChannel/getData/getIndex/clear)
+but are attached to an OfflineTagger instead of a hardware connection. Data is fed in chunks, e.g. from
+TimeTagArchiveReader.iter_chunks() or Swabian_TimeTagger_Driver.iterate_time_tag_data(), and all
+state that crosses chunk boundaries (last start click, open gates, delayed events, correlation
+tails) is carried over, so the result does not depend on the chunking.
+
+Everything is vectorised with NumPy: channels are selected with masks, clicks are matched to
+starts and gates by their position in the stream with np.searchsorted (so ties in time keep the
+stream order) and the histograms are filled with np.bincount.
+
+Example, recomputing a gated g2 from an archive:
+
+    reader = TimeTagArchiveReader("run_042")
+    tagger = OfflineTagger()
+    start = DelayedChannel(tagger, input_channel=1, delay=1000)
+    stop = DelayedChannel(tagger, input_channel=1, delay=3000)
+    gated_2 = GatedChannel(tagger, 2, start.getChannel(), stop.getChannel())
+    gated_3 = GatedChannel(tagger, 3, start.getChannel(), stop.getChannel())
+    g2 = Correlation(tagger, gated_2.getChannel(), gated_3.getChannel(), binwidth=10, n_bins=2000)
+    tagger.run(reader.iter_chunks())
+    counts = g2.getData()
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+INT64_MAX = np.iinfo(np.int64).max
+INT64_MIN = np.iinfo(np.int64).min
+
+# Upper bound on the number of (start, stop) pairs expanded at once by the correlation kernels
+MAX_PAIRS_PER_BLOCK = 10_000_000
+
+
+def _merge(timestamps: np.ndarray, channels: np.ndarray, new_timestamps: np.ndarray, new_channel: int) -> tuple[np.ndarray, np.ndarray]:
+    """Merge sorted new_timestamps on new_channel into the sorted stream, after equal timestamps."""
+    if new_timestamps.shape[0] == 0:
+        return timestamps, channels
+    positions = np.searchsorted(timestamps, new_timestamps, side="right") + np.arange(new_timestamps.shape[0])
+    n_events = timestamps.shape[0] + new_timestamps.shape[0]
+    old = np.ones(n_events, dtype=bool)
+    old[positions] = False
+    merged_timestamps = np.empty(n_events, dtype=np.int64)
+    merged_channels = np.empty(n_events, dtype=np.int32)
+    merged_timestamps[positions] = new_timestamps
+    merged_timestamps[old] = timestamps
+    merged_channels[positions] = new_channel
+    merged_channels[old] = channels
+    return merged_timestamps, merged_channels
+
+
+def _pair_blocks(lo: np.ndarray, hi: np.ndarray, max_pairs: int = MAX_PAIRS_PER_BLOCK) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    For every i, pair i with all j in [lo[i], hi[i]). Yields (i, j) index arrays holding at most
+    about max_pairs pairs each, so memory stays bounded for dense data.
+    """
+    counts = np.maximum(hi - lo, 0)
+    cumulative = np.cumsum(counts)
+    total = int(cumulative[-1]) if cumulative.shape[0] else 0
+    begin = 0
+    while begin < lo.shape[0] and total > 0:
+        already = int(cumulative[begin - 1]) if begin > 0 else 0
+        end = int(np.searchsorted(cumulative, already + max_pairs, side="right"))
+        end = min(max(end, begin + 1), lo.shape[0])
+        block_counts = counts[begin:end]
+        n_pairs = int(block_counts.sum())
+        if n_pairs > 0:
+            i = np.repeat(np.arange(begin, end), block_counts)
+            offsets = np.cumsum(block_counts) - block_counts
+            j = np.arange(n_pairs) - np.repeat(offsets - lo[begin:end], block_counts)
+            yield i, j
+        begin = end
+
+
+def correlation_histogram(timestamps_1: np.ndarray, timestamps_2: np.ndarray, binwidth: int, n_bins: int, exclude_self_pairs: bool = False) -> np.ndarray:
+    """
+    Histogram of t2 - t1 over all pairs of sorted click arrays, for delays in
+    [-n_bins * binwidth / 2, n_bins * binwidth / 2). Bin k starts at k * binwidth - n_bins * binwidth // 2.
+    """
+    half_range = (n_bins * binwidth) // 2
+    lo = np.searchsorted(timestamps_2, timestamps_1 - half_range, side="left")
+    hi = np.searchsorted(timestamps_2, timestamps_1 - half_range + n_bins * binwidth, side="left")
+    data = np.zeros(n_bins, dtype=np.int64)
+    for i, j in _pair_blocks(lo, hi):
+        if exclude_self_pairs:
+            keep = i != j
+            i, j = i[keep], j[keep]
+        bins = (timestamps_2[j] - timestamps_1[i] + half_range) // binwidth
+        data += np.bincount(bins, minlength=n_bins)[:n_bins]
+    return data
+
+
+class OfflineTagger:
+    """
+    Stand-in for the tagger object that offline virtual channels and measurements attach to.
+
+    Virtual channels are evaluated in creation order, so a virtual channel may use the output of
+    any previously created one. Measurements see the merged stream of input and virtual channels.
+    """
+
+    def __init__(self, first_virtual_channel: int = 1000) -> None:
+        self._next_virtual_channel = int(first_virtual_channel)
+        self._virtual_channels: list[_OfflineVirtualChannel] = []
+        self._measurements: list[_OfflineMeasurement] = []
+        self.events_processed = 0
+
+    def _register_virtual_channel(self, virtual_channel: "_OfflineVirtualChannel") -> int:
+        self._virtual_channels.append(virtual_channel)
+        channel = self._next_virtual_channel
+        self._next_virtual_channel += 1
+        return channel
+
+    def _register_measurement(self, measurement: "_OfflineMeasurement") -> None:
+        self._measurements.append(measurement)
+
+    def process(self, timestamps: np.ndarray, channels: np.ndarray) -> None:
+        """Feed the next chunk of time-ordered tags."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        channels = np.asarray(channels, dtype=np.int32)
+        if timestamps.shape[0] == 0:
+            return
+        self.events_processed += timestamps.shape[0]
+        self._process(timestamps, channels, int(timestamps[-1]))
+
+    def flush(self) -> None:
+        """Release events that virtual channels are still holding back. Call once after the last chunk."""
+        self._process(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), INT64_MAX)
+
+    def run(self, chunks: Iterable[tuple[np.ndarray, np.ndarray]]) -> "OfflineTagger":
+        """Process all (timestamps, channels) chunks and flush."""
+        for timestamps, channels in chunks:
+            self.process(timestamps, channels)
+        self.flush()
+        return self
+
+    def _process(self, timestamps: np.ndarray, channels: np.ndarray, horizon: int) -> None:
+        # horizon: no later chunk contains a tag before this time
+        for virtual_channel in self._virtual_channels:
+            timestamps, channels = virtual_channel._process(timestamps, channels, horizon)
+        for measurement in self._measurements:
+            if measurement.running:
+                measurement._process(timestamps, channels, horizon)
+
+
+class _OfflineVirtualChannel:
+    def __init__(self, tagger: OfflineTagger) -> None:
+        self.tagger = tagger
+        self.channel = tagger._register_virtual_channel(self)
+
+    def getChannel(self) -> int:
+        return self.channel
+
+    def _process(self, timestamps: np.ndarray, channels: np.ndarray, horizon: int) -> tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+
+class DelayedChannel(_OfflineVirtualChannel):
+    """Copy of input_channel delayed by delay ps."""
+
+    def __init__(self, tagger: OfflineTagger, input_channel: int, delay: int) -> None:
+        if delay < 0:
+            raise ValueError("delay must be >= 0")
+        self.input_channel = int(input_channel)
+        self.delay = int(delay)
+        self._pending = np.zeros(0, dtype=np.int64)
+        super().__init__(tagger)
+
+    def _process(self, timestamps, channels, horizon):
+        delayed = timestamps[channels == self.input_channel] + self.delay
+        if self._pending.shape[0]:
+            delayed = np.concatenate((self._pending, delayed))
+        n_ready = int(np.searchsorted(delayed, horizon, side="right"))
+        self._pending = delayed[n_ready:]
+        return _merge(timestamps, channels, delayed[:n_ready], self.channel)
+
+
+class GatedChannel(_OfflineVirtualChannel):
+    """Events of input_channel that arrive while the gate opened by gate_start_channel and closed by gate_stop_channel is open."""
+
+    def __init__(self, tagger: OfflineTagger, input_channel: int, gate_start_channel: int, gate_stop_channel: int, initially_open: bool = False) -> None:
+        self.input_channel = int(input_channel)
+        self.gate_start_channel = int(gate_start_channel)
+        self.gate_stop_channel = int(gate_stop_channel)
+        self._gate_open = bool(initially_open)
+        super().__init__(tagger)
+
+    def _process(self, timestamps, channels, horizon):
+        clicks = np.flatnonzero(channels == self.input_channel)
+        opens = np.flatnonzero(channels == self.gate_start_channel)
+        closes = np.flatnonzero(channels == self.gate_stop_channel)
+        # The carried gate state acts as an open/close event just before the chunk
+        carried_open, carried_close = (-1, -2) if self._gate_open else (-2, -1)
+        last_open = np.concatenate(([carried_open], opens))[np.searchsorted(opens, clicks, side="right")]
+        last_close = np.concatenate(([carried_close], closes))[np.searchsorted(closes, clicks, side="right")]
+        passed = timestamps[clicks[last_open > last_close]]
+        if opens.shape[0] or closes.shape[0]:
+            self._gate_open = bool((opens[-1] if opens.shape[0] else carried_open) > (closes[-1] if closes.shape[0] else carried_close))
+        return _merge(timestamps, channels, passed, self.channel)
+
+
+class _OfflineMeasurement:
+    def __init__(self, tagger: OfflineTagger) -> None:
+        self.tagger = tagger
+        self.running = True
+        tagger._register_measurement(self)
+
+    def start(self) -> None:
+        self.running = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def isRunning(self) -> bool:
+        return self.running
+
+    def getData(self) -> np.ndarray:
+        return self._data.copy()
+
+    def clear(self) -> None:
+        self._data[...] = 0
+
+    def _process(self, timestamps: np.ndarray, channels: np.ndarray, horizon: int) -> None:
+        raise NotImplementedError
+
+
+class Histogram(_OfflineMeasurement):
+    """Start-multiple-stop histogram: every click is histogrammed against the most recent start."""
+
+    def __init__(self, tagger: OfflineTagger, click_channel: int, start_channel: int, binwidth: int, n_bins: int) -> None:
+        self.click_channel = int(click_channel)
+        self.start_channel = int(start_channel)
+        self.binwidth = int(binwidth)
+        self.n_bins = int(n_bins)
+        self._data = np.zeros(self.n_bins, dtype=np.int64)
+        self._last_start: int | None = None
+        super().__init__(tagger)
+
+    def getIndex(self) -> np.ndarray:
+        return np.arange(self.n_bins, dtype=np.int64) * self.binwidth
+
+    def _process(self, timestamps, channels, horizon):
+        start_positions = np.flatnonzero(channels == self.start_channel)
+        click_positions = np.flatnonzero(channels == self.click_channel)
+        starts = timestamps[start_positions]
+        if click_positions.shape[0]:
+            carried = INT64_MIN if self._last_start is None else self._last_start
+            last_start = np.concatenate(([carried], starts))[np.searchsorted(start_positions, click_positions, side="right")]
+            valid = last_start != INT64_MIN
+            bins = (timestamps[click_positions[valid]] - last_start[valid]) // self.binwidth
+            bins = bins[bins < self.n_bins]
+            self._data += np.bincount(bins, minlength=self.n_bins)
+        if starts.shape[0]:
+            self._last_start = int(starts[-1])
+
+
+class ConditionalHistogram(_OfflineMeasurement):
+    """
+    Histogram of click_channel against the most recent start, counting only start cycles
+    (start to next start) that also contain an event on condition_channel. Used for heralded
+    check/probe analysis.
+    """
+
+    def __init__(self, tagger: OfflineTagger, click_channel: int, start_channel: int, condition_channel: int, binwidth: int, n_bins: int) -> None:
+        self.click_channel = int(click_channel)
+        self.start_channel = int(start_channel)
+        self.condition_channel = int(condition_channel)
+        self.binwidth = int(binwidth)
+        self.n_bins = int(n_bins)
+        self._data = np.zeros(self.n_bins, dtype=np.int64)
+        self._open_cycle_start: int | None = None
+        self._open_cycle_bins = np.zeros(0, dtype=np.int64)
+        self._open_cycle_condition = False
+        super().__init__(tagger)
+
+    def getIndex(self) -> np.ndarray:
+        return np.arange(self.n_bins, dtype=np.int64) * self.binwidth
+
+    def _process(self, timestamps, channels, horizon):
+        start_positions = np.flatnonzero(channels == self.start_channel)
+        click_positions = np.flatnonzero(channels == self.click_channel)
+        condition_positions = np.flatnonzero(channels == self.condition_channel)
+        starts = timestamps[start_positions]
+        n_starts = starts.shape[0]
+
+        # Cycle 0 is the cycle left open by the previous chunk, cycle k the one opened by starts[k - 1]
+        click_cycles = np.searchsorted(start_positions, click_positions, side="right")
+        cycle_starts = np.concatenate(([INT64_MIN if self._open_cycle_start is None else self._open_cycle_start], starts))
+        click_bins = (timestamps[click_positions] - cycle_starts[click_cycles]) // self.binwidth
+        in_range = (cycle_starts[click_cycles] != INT64_MIN) & (click_bins < self.n_bins)
+        click_cycles, click_bins = click_cycles[in_range], click_bins[in_range]
+        has_condition = np.zeros(n_starts + 1, dtype=bool)
+        has_condition[np.searchsorted(start_positions, condition_positions, side="right")] = True
+        has_condition[0] |= self._open_cycle_condition
+
+        if horizon == INT64_MAX:
+            # End of data: the open cycle is complete as well
+            complete = np.ones(click_cycles.shape[0], dtype=bool)
+            closed_cycles = n_starts + 1
+        else:
+            complete = click_cycles < n_starts
+            closed_cycles = n_starts
+        if closed_cycles > 0 and has_condition[0]:
+            self._data += np.bincount(self._open_cycle_bins, minlength=self.n_bins)
+        counted = complete & has_condition[click_cycles]
+        self._data += np.bincount(click_bins[counted], minlength=self.n_bins)
+
+        open_bins = click_bins[~complete]
+        if closed_cycles > 0:
+            self._open_cycle_bins = open_bins
+            self._open_cycle_condition = n_starts > 0 and bool(has_condition[-1])
+        else:
+            self._open_cycle_bins = np.concatenate((self._open_cycle_bins, open_bins))
+            self._open_cycle_condition = bool(has_condition[0])
+        if n_starts:
+            self._open_cycle_start = int(starts[-1])
+
+    def clear(self) -> None:
+        super().clear()
+        self._open_cycle_bins = np.zeros(0, dtype=np.int64)
+        self._open_cycle_condition = False
+
+
+class Correlation(_OfflineMeasurement):
+    """Histogram of t(channel_2) - t(channel_1) over all click pairs, centred on zero delay."""
+
+    def __init__(self, tagger: OfflineTagger, channel_1: int, channel_2: int, binwidth: int, n_bins: int) -> None:
+        self.channel_1 = int(channel_1)
+        self.channel_2 = int(channel_2)
+        self.binwidth = int(binwidth)
+        self.n_bins = int(n_bins)
+        self._data = np.zeros(self.n_bins, dtype=np.int64)
+        self._tail_1 = np.zeros(0, dtype=np.int64)
+        self._tail_2 = np.zeros(0, dtype=np.int64)
+        super().__init__(tagger)
+
+    def getIndex(self) -> np.ndarray:
+        return np.arange(self.n_bins, dtype=np.int64) * self.binwidth - (self.n_bins * self.binwidth) // 2
+
+    def _histogram(self, timestamps_1, timestamps_2):
+        return correlation_histogram(timestamps_1, timestamps_2, self.binwidth, self.n_bins, exclude_self_pairs=self.channel_1 == self.channel_2)
+
+    def _process(self, timestamps, channels, horizon):
+        clicks_1 = np.concatenate((self._tail_1, timestamps[channels == self.channel_1]))
+        clicks_2 = clicks_1 if self.channel_1 == self.channel_2 else np.concatenate((self._tail_2, timestamps[channels == self.channel_2]))
+        # Pairs within the carried tails were counted with the previous chunk
+        self._data += self._histogram(clicks_1, clicks_2) - self._histogram(self._tail_1, self._tail_2)
+        if horizon != INT64_MAX:
+            oldest_partner = horizon - self.n_bins * self.binwidth - self.binwidth
+            self._tail_1 = clicks_1[np.searchsorted(clicks_1, oldest_partner, side="left"):]
+            self._tail_2 = clicks_2[np.searchsorted(clicks_2, oldest_partner, side="left"):]
+
+
+class Histogram2D(_OfflineMeasurement):
+    """
+    Two-dimensional start-stop histogram: every combination of a stop_channel_1 and a
+    stop_channel_2 click following the same start is counted at (t1 - start, t2 - start).
+    """
+
+    def __init__(self, tagger: OfflineTagger, start_channel: int, stop_channel_1: int, stop_channel_2: int, binwidth_1: int, binwidth_2: int, n_bins_1: int, n_bins_2: int) -> None:
+        self.start_channel = int(start_channel)
+        self.stop_channel_1 = int(stop_channel_1)
+        self.stop_channel_2 = int(stop_channel_2)
+        self.binwidth_1 = int(binwidth_1)
+        self.binwidth_2 = int(binwidth_2)
+        self.n_bins_1 = int(n_bins_1)
+        self.n_bins_2 = int(n_bins_2)
+        self._data = np.zeros((self.n_bins_1, self.n_bins_2), dtype=np.int64)
+        self._last_start: int | None = None
+        self._pending_bins_1 = np.zeros(0, dtype=np.int64)
+        self._pending_bins_2 = np.zeros(0, dtype=np.int64)
+        super().__init__(tagger)
+
+    def getIndex_1(self) -> np.ndarray:
+        return np.arange(self.n_bins_1, dtype=np.int64) * self.binwidth_1
+
+    def getIndex_2(self) -> np.ndarray:
+        return np.arange(self.n_bins_2, dtype=np.int64) * self.binwidth_2
+
+    def getIndex(self) -> np.ndarray:
+        return np.stack(np.meshgrid(self.getIndex_1(), self.getIndex_2(), indexing="ij"), axis=-1)
+
+    def _assign(self, timestamps, start_positions, stop_positions, binwidth, n_bins, pending_bins):
+        # Group 0 is the start carried over from the previous chunk, group k is the (k - 1)th start
+        groups = np.searchsorted(start_positions, stop_positions, side="right")
+        group_starts = np.concatenate(([INT64_MIN if self._last_start is None else self._last_start], timestamps[start_positions]))
+        bins = (timestamps[stop_positions] - group_starts[groups]) // binwidth
+        valid = (group_starts[groups] != INT64_MIN) & (bins < n_bins)
+        groups = np.concatenate((np.zeros(pending_bins.shape[0], dtype=np.int64), groups[valid]))
+        return groups, np.concatenate((pending_bins, bins[valid]))
+
+    def _process(self, timestamps, channels, horizon):
+        start_positions = np.flatnonzero(channels == self.start_channel)
+        starts = timestamps[start_positions]
+        groups_1, bins_1 = self._assign(timestamps, start_positions, np.flatnonzero(channels == self.stop_channel_1), self.binwidth_1, self.n_bins_1, self._pending_bins_1)
+        groups_2, bins_2 = self._assign(timestamps, start_positions, np.flatnonzero(channels == self.stop_channel_2), self.binwidth_2, self.n_bins_2, self._pending_bins_2)
+        n_pending_1 = self._pending_bins_1.shape[0]
+        n_pending_2 = self._pending_bins_2.shape[0]
+
+        lo = np.searchsorted(groups_2, groups_1, side="left")
+        hi = np.searchsorted(groups_2, groups_1, side="right")
+        n_cells = self.n_bins_1 * self.n_bins_2
+        for i, j in _pair_blocks(lo, hi):
+            # Pairs of two carried-over stops were counted with the previous chunk
+            new = (i >= n_pending_1) | (j >= n_pending_2)
+            cells = bins_1[i[new]] * self.n_bins_2 + bins_2[j[new]]
+            self._data += np.bincount(cells, minlength=n_cells).reshape(self.n_bins_1, self.n_bins_2)
+
+        last_group = starts.shape[0]
+        self._pending_bins_1 = bins_1[groups_1 == last_group]
+        self._pending_bins_2 = bins_2[groups_2 == last_group]
+        if starts.shape[0]:
+            self._last_start = int(starts[-1])
+
+
+class Counter(_OfflineMeasurement):
+    """
+    Rolling count trace of n_values bins per channel, measured from the first processed tag.
+    getData() has shape (len(channels), n_values) with the most recent bin last.
+    """
+
+    def __init__(self, tagger: OfflineTagger, channels: list[int] | int, binwidth: int, n_values: int) -> None:
+        self.channels = [int(channel) for channel in np.atleast_1d(channels)]
+        self.binwidth = int(binwidth)
+        self.n_values = int(n_values)
+        self._data = np.zeros((len(self.channels), self.n_values), dtype=np.int64)
+        self._t0: int | None = None
+        self._current_bin = self.n_values - 1
+        super().__init__(tagger)
+
+    def getIndex(self) -> np.ndarray:
+        return np.arange(self.n_values, dtype=np.int64) * self.binwidth
+
+    def _process(self, timestamps, channels, horizon):
+        if self._t0 is None:
+            if timestamps.shape[0] == 0:
+                return
+            self._t0 = int(timestamps[0])
+        mask = np.isin(channels, self.channels)
+        if not np.any(mask):
+            return
+        rows = np.searchsorted(np.sort(self.channels), channels[mask])
+        rows = np.argsort(self.channels)[rows]
+        bins = (timestamps[mask] - self._t0) // self.binwidth
+        newest = int(bins[-1])
+        if newest > self._current_bin:
+            shift = min(newest - self._current_bin, self.n_values)
+            self._data[:, :-shift] = self._data[:, shift:].copy()
+            self._data[:, -shift:] = 0
+            self._current_bin = newest
+        columns = bins - (self._current_bin - self.n_values + 1)
+        keep = columns >= 0
+        cells = rows[keep] * self.n_values + columns[keep]
+        self._data += np.bincount(cells, minlength=self._data.size).reshape(self._data.shape)
+
+
+class FrequencyCounterData:
+    """Samples of a FrequencyCounter, shaped (len(channels), n_samples) with the oldest sample first."""
+
+    def __init__(self, index: np.ndarray, periods_count: np.ndarray, sampling_interval: int) -> None:
+        self.index = index
+        self.periods_count = periods_count
+        self.sampling_interval = sampling_interval
+        self.size = index.shape[0]
+
+    def getIndex(self) -> np.ndarray:
+        return self.index
+
+    def getTime(self) -> np.ndarray:
+        """Time of every sample point in ps."""
+        return self.index * self.sampling_interval
+
+    def getPeriodsCount(self) -> np.ndarray:
+        """Periods counted since the first edge, with a fractional part; NaN where the fitting window held fewer than two edges."""
+        return self.periods_count
+
+    def getFrequency(self, time_scale: float = 1e12) -> np.ndarray:
+        """Periods per time_scale ps (Hz by default) between a sample and the one before it; NaN for the first sample."""
+        frequency = np.full(self.periods_count.shape, np.nan)
+        frequency[:, 1:] = np.diff(self.periods_count, axis=1) * time_scale / self.sampling_interval
+        return frequency
+
+    def getPhase(self, reference_frequency: float = 0.0) -> np.ndarray:
+        """Periods count minus the periods of a reference_frequency (Hz) clock."""
+        return self.periods_count - reference_frequency * self.getTime() * 1e-12
+
+
+class FrequencyCounter(_OfflineMeasurement):
+    """
+    Periods of every channel sampled every sampling_interval ps, at multiples of sampling_interval.
+    At a sample point the periods count is read off a line through the edges within fitting_window
+    around it (through their mean, with the slope from the first to the last edge), so it has a
+    fractional part. n_values > 0 keeps only the newest n_values samples.
+    """
+
+    def __init__(self, tagger: OfflineTagger, channels: list[int] | int, sampling_interval: int, fitting_window: int, n_values: int = 0) -> None:
+        if sampling_interval <= 0 or fitting_window <= 0:
+            raise ValueError("sampling_interval and fitting_window must be positive")
+        self.channels = [int(channel) for channel in np.atleast_1d(channels)]
+        self.sampling_interval = int(sampling_interval)
+        self.fitting_window = int(fitting_window)
+        self.n_values = int(n_values)
+        # Edges still inside the window of an unfinished sample point, and the periods count of the first one
+        self._edges = [np.zeros(0, dtype=np.int64) for _ in self.channels]
+        self._first_edge = [0] * len(self.channels)
+        self._next_sample: int | None = None
+        self._latest = INT64_MIN
+        self._index: list[np.ndarray] = []
+        self._periods: list[np.ndarray] = []
+        super().__init__(tagger)
+
+    def getDataObject(self, remove: bool = False) -> FrequencyCounterData:
+        """The finished samples; remove=True also drops them from the measurement."""
+        if self._index:
+            index = np.concatenate(self._index)
+            periods = np.concatenate(self._periods, axis=1)
+        else:
+            index = np.zeros(0, dtype=np.int64)
+            periods = np.zeros((len(self.channels), 0))
+        if remove:
+            self.clear()
+        return FrequencyCounterData(index, periods, self.sampling_interval)
+
+    def getData(self) -> np.ndarray:
+        return self.getDataObject().getFrequency()
+
+    def clear(self) -> None:
+        self._index = []
+        self._periods = []
+
+    def _process(self, timestamps, channels, horizon):
+        half_window = self.fitting_window // 2
+        if timestamps.shape[0]:
+            if self._next_sample is None:
+                self._next_sample = -(-(int(timestamps[0]) + half_window) // self.sampling_interval)
+            self._latest = int(timestamps[-1])
+            for row, channel in enumerate(self.channels):
+                self._edges[row] = np.concatenate((self._edges[row], timestamps[channels == channel]))
+        if self._next_sample is None:
+            return
+        # A window is complete once no later tag can fall into it
+        last_sample = (min(horizon - 1, self._latest) - half_window) // self.sampling_interval
+        if last_sample >= self._next_sample:
+            samples = np.arange(self._next_sample, last_sample + 1, dtype=np.int64)
+            self._store(samples, self._sample(samples * self.sampling_interval, half_window))
+            self._next_sample = last_sample + 1
+        keep_from = self._next_sample * self.sampling_interval - half_window
+        for row, edges in enumerate(self._edges):
+            drop = int(np.searchsorted(edges, keep_from, side="left"))
+            self._edges[row] = edges[drop:]
+            self._first_edge[row] += drop
+
+    def _sample(self, times: np.ndarray, half_window: int) -> np.ndarray:
+        periods = np.full((len(self.channels), times.shape[0]), np.nan)
+        for row, edges in enumerate(self._edges):
+            lo = np.searchsorted(edges, times - half_window, side="left")
+            hi = np.searchsorted(edges, times + half_window, side="right")
+            valid = hi - lo >= 2
+            valid[valid] = edges[hi[valid] - 1] > edges[lo[valid]]
+            if not np.any(valid):
+                continue
+            lo, hi = lo[valid], hi[valid]
+            # Exact integer sums of the edge times relative to the first buffered edge
+            cumulative = np.concatenate(([0], np.cumsum(edges - edges[0])))
+            n_edges = hi - lo
+            mean_time = edges[0] + (cumulative[hi] - cumulative[lo]) / n_edges
+            mean_count = self._first_edge[row] + (lo + hi - 1) / 2
+            slope = (n_edges - 1) / (edges[hi - 1] - edges[lo])
+            periods[row, valid] = mean_count + slope * (times[valid] - mean_time)
+        return periods
+
+    def _store(self, samples: np.ndarray, periods: np.ndarray) -> None:
+        self._index.append(samples)
+        self._periods.append(periods)
+        if self.n_values > 0:
+            index = np.concatenate(self._index)[-self.n_values:]
+            self._index = [index]
+            self._periods = [np.concatenate(self._periods, axis=1)[:, -index.shape[0]:]]
+
+
+class FrequencyStabilityData:
+    """Deviations of a FrequencyStability for every step, and its trace of the newest phase samples."""
+
+    def __init__(self, phase_ps: np.ndarray, steps: np.ndarray, trace_len: int) -> None:
+        n_samples = phase_ps.shape[0]
+        self._tau0_ps = (phase_ps[-1] - phase_ps[0]) / (n_samples - 1) if n_samples > 1 else np.nan
+        # Time error with respect to the mean frequency
+        self._error_ps = phase_ps - phase_ps[:1].sum() - self._tau0_ps * np.arange(n_samples)
+        self._steps = steps
+        self._trace_len = trace_len
+
+    def getTau(self) -> np.ndarray:
+        """Averaging times in s."""
+        return self._steps * self._tau0_ps * 1e-12
+
+    def getSTDD(self) -> np.ndarray:
+        """Standard deviation of the fractional frequency averaged over tau."""
+        return self._deviation(1, lambda x, m: x[m:] - x[:-m], lambda y, m: np.std(y))
+
+    def getADEV(self) -> np.ndarray:
+        """Overlapping Allan deviation."""
+        return self._deviation(2, lambda x, m: x[2 * m:] - 2 * x[m:-m] + x[:-2 * m], lambda d, m: np.sqrt(np.mean(d ** 2) / 2))
+
+    def getMDEV(self) -> np.ndarray:
+        """Modified Allan deviation."""
+        def mdev(d, m):
+            cumulative = np.concatenate(([0.0], np.cumsum(d)))
+            return np.sqrt(np.mean((cumulative[m:] - cumulative[:-m]) ** 2) / (2 * m ** 2))
+        return self._deviation(3, lambda x, m: x[2 * m:] - 2 * x[m:-m] + x[:-2 * m], mdev)
+
+    def getTDEV(self) -> np.ndarray:
+        """Time deviation in s."""
+        return self.getTau() * self.getMDEV() / np.sqrt(3)
+
+    def getHDEV(self) -> np.ndarray:
+        """Overlapping Hadamard deviation."""
+        return self._deviation(3, lambda x, m: x[3 * m:] - 3 * x[2 * m:-m] + 3 * x[m:-2 * m] - x[:-3 * m], lambda d, m: np.sqrt(np.mean(d ** 2) / 6))
+
+    def getTraceIndex(self) -> np.ndarray:
+        """Time of the trace samples in s since the first phase sample."""
+        return (np.arange(self._error_ps.shape[0]) * self._tau0_ps * 1e-12)[-self._trace_len:]
+
+    def getTracePhase(self) -> np.ndarray:
+        """Time error of the trace samples in s."""
+        return self._error_ps[-self._trace_len:] * 1e-12
+
+    def getTraceFrequency(self) -> np.ndarray:
+        """Fractional frequency deviation of the trace samples from the one before; NaN for the first phase sample."""
+        frequency = np.concatenate(([np.nan], -np.diff(self._error_ps) / self._tau0_ps))
+        return frequency[-self._trace_len:]
+
+    def _deviation(self, order: int, difference, statistic) -> np.ndarray:
+        # difference(x, m) of the time error in ps, normalised by tau = m * tau0 to a fractional frequency;
+        # NaN for steps without at least two differences
+        deviations = np.full(self._steps.shape[0], np.nan)
+        for i, m in enumerate(self._steps):
+            if 0 < m and self._error_ps.shape[0] > order * m + 1:
+                deviations[i] = statistic(difference(self._error_ps, m) / (m * self._tau0_ps), m)
+        return deviations
+
+
+class FrequencyStability(_OfflineMeasurement):
+    """
+    Frequency stability of a clock on channel. The timestamps of every average consecutive edges are
+    averaged into one phase sample; getDataObject() evaluates the deviations for averaging times of
+    steps phase samples over all samples so far.
+    """
+
+    def __init__(self, tagger: OfflineTagger, channel: int, steps: list[int], average: int = 1000, trace_len: int = 1000) -> None:
+        if average < 1 or trace_len < 1:
+            raise ValueError("average and trace_len must be >= 1")
+        self.channel = int(channel)
+        self.steps = np.asarray(steps, dtype=np.int64)
+        self.average = int(average)
+        self.trace_len = int(trace_len)
+        self._reference: int | None = None
+        self._open = np.zeros(0, dtype=np.int64)
+        self._phase: list[np.ndarray] = []
+        super().__init__(tagger)
+
+    def getDataObject(self) -> FrequencyStabilityData:
+        phase = np.concatenate(self._phase) if self._phase else np.zeros(0)
+        return FrequencyStabilityData(phase, self.steps, self.trace_len)
+
+    def getData(self) -> np.ndarray:
+        return self.getDataObject().getADEV()
+
+    def clear(self) -> None:
+        self._open = np.zeros(0, dtype=np.int64)
+        self._phase = []
+
+    def _process(self, timestamps, channels, horizon):
+        edges = timestamps[channels == self.channel]
+        if edges.shape[0] == 0:
+            return
+        if self._reference is None:
+            self._reference = int(edges[0])
+        edges = np.concatenate((self._open, edges - self._reference))
+        n_complete = edges.shape[0] // self.average * self.average
+        if n_complete:
+            self._phase.append(edges[:n_complete].reshape(-1, self.average).mean(axis=1))
+        self._open = edges[n_complete:]
+
+
+def gated_g2_correlation(chunks: Iterable[tuple[np.ndarray, np.ndarray]], trigger_channel_number: int, click_1_channel_number: int, click_2_channel_number: int, trigger_gate_start_delay_ps: int, trigger_gate_stop_delay_ps: int, bin_width_ps: int, num_bins: int, histogram_num_bins: int) -> tuple[Correlation, Histogram, Histogram, Histogram, Histogram]:
+    """
+    Offline counterpart of Swabian_TimeTagger_Driver.initialise_gated_g2_correlation.
+
+    Returns the finished (gated_g2_correlation, histogram_1, histogram_2, gated_histogram_1, gated_histogram_2).
+    """
+    tagger = OfflineTagger()
+    gate_start = DelayedChannel(tagger, trigger_channel_number, trigger_gate_start_delay_ps)
+    gate_stop = DelayedChannel(tagger, trigger_channel_number, trigger_gate_stop_delay_ps)
+    gated_1 = GatedChannel(tagger, click_1_channel_number, gate_start.getChannel(), gate_stop.getChannel())
+    gated_2 = GatedChannel(tagger, click_2_channel_number, gate_start.getChannel(), gate_stop.getChannel())
+    measurements = (
+        Correlation(tagger, gated_1.getChannel(), gated_2.getChannel(), bin_width_ps, num_bins),
+        Histogram(tagger, click_1_channel_number, trigger_channel_number, bin_width_ps, histogram_num_bins),
+        Histogram(tagger, click_2_channel_number, trigger_channel_number, bin_width_ps, histogram_num_bins),
+        Histogram(tagger, gated_1.getChannel(), trigger_channel_number, bin_width_ps, histogram_num_bins),
+        Histogram(tagger, gated_2.getChannel(), trigger_channel_number, bin_width_ps, histogram_num_bins),
+    )
+    tagger.run(chunks)
+    return measurements
+
+
+def check_probe(chunks: Iterable[tuple[np.ndarray, np.ndarray]], trigger_channel_number: int, click_channel_number: int, check_gate_delay_ps: int, check_gate_width_ps: int, probe_gate_delay_ps: int, probe_gate_width_ps: int, bin_width_ps: int, num_bins: int) -> tuple[Histogram, Histogram, Correlation, Histogram, ConditionalHistogram]:
+    """
+    Offline counterpart of Swabian_TimeTagger_Driver.initialize_check_probe.
+
+    Returns the finished (check_histogram, probe_histogram, check_probe_correlation, raw_histogram,
+    probe_histogram_conditional), where the last one only counts probe-window detections of laser
+    cycles that also had a check-window detection.
+    """
+    tagger = OfflineTagger()
+    check_gate_start = DelayedChannel(tagger, trigger_channel_number, check_gate_delay_ps)
+    check_gate_stop = DelayedChannel(tagger, trigger_channel_number, check_gate_delay_ps + check_gate_width_ps)
+    probe_gate_start = DelayedChannel(tagger, trigger_channel_number, probe_gate_delay_ps)
+    probe_gate_stop = DelayedChannel(tagger, trigger_channel_number, probe_gate_delay_ps + probe_gate_width_ps)
+    check_detection = GatedChannel(tagger, click_channel_number, check_gate_start.getChannel(), check_gate_stop.getChannel())
+    probe_detection = GatedChannel(tagger, click_channel_number, probe_gate_start.getChannel(), probe_gate_stop.getChannel())
+    check_ch = check_detection.getChannel()
+    probe_ch = probe_detection.getChannel()
+    measurements = (
+        Histogram(tagger, check_ch, trigger_channel_number, bin_width_ps, num_bins),
+        Histogram(tagger, probe_ch, trigger_channel_number, bin_width_ps, num_bins),
+        Correlation(tagger, check_ch, probe_ch, bin_width_ps, num_bins * 50),
+        Histogram(tagger, click_channel_number, trigger_channel_number, bin_width_ps, num_bins),
+        ConditionalHistogram(tagger, probe_ch, trigger_channel_number, check_ch, bin_width_ps, num_bins),
+    )
+    tagger.run(chunks)
+    return measurements
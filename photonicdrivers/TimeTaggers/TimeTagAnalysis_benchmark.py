@@ -0,0 +1,79 @@
+"""
+Throughput of the offline TimeTagAnalysis.Histogram compared to the numba start-stop kernel of the
+vendor example examples/python/4-Custom-Measurements/CustomStartStop.py (fast_process).
+
+Runs on synthetic data, no Time Tagger needed. numba is optional; without it only the NumPy
+implementation is timed.
+"""
+
+import time
+
+import numpy as np
+
+from photonicdrivers.TimeTaggers.TimeTagAnalysis import Histogram, OfflineTagger
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+START_CHANNEL = 1
+CLICK_CHANNEL = 2
+BINWIDTH_PS = 10
+N_BINS = 1250
+
+
+def synthetic_tags(n_events: int, sync_period_ps: int = 12_500, click_probability: float = 0.2, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    n_pulses = int(n_events / (1 + click_probability))
+    syncs = np.arange(n_pulses, dtype=np.int64) * sync_period_ps
+    emitting = syncs[rng.random(n_pulses) < click_probability]
+    clicks = emitting + rng.exponential(1000, emitting.shape[0]).astype(np.int64) + 1
+    timestamps = np.concatenate((syncs, clicks))
+    channels = np.concatenate((np.full(syncs.shape[0], START_CHANNEL, dtype=np.int32), np.full(clicks.shape[0], CLICK_CHANNEL, dtype=np.int32)))
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], channels[order]
+
+
+if numba is not None:
+    @numba.jit(nopython=True, nogil=True)
+    def fast_process(timestamps, channels, data, click_channel, start_channel, binwidth, last_start_timestamp):
+        # Same algorithm as CustomStartMultipleStop.fast_process, on plain arrays instead of the tag struct
+        for k in range(timestamps.shape[0]):
+            if channels[k] == click_channel and last_start_timestamp != 0:
+                index = (timestamps[k] - last_start_timestamp) // binwidth
+                if index < data.shape[0]:
+                    data[index] += 1
+            if channels[k] == start_channel:
+                last_start_timestamp = timestamps[k]
+        return last_start_timestamp
+
+
+def benchmark(n_events: int = 20_000_000, chunk_events: int = 1_000_000) -> None:
+    timestamps, channels = synthetic_tags(n_events)
+    timestamps += 1  # fast_process uses 0 as "no start yet"
+    chunks = [(timestamps[k:k + chunk_events], channels[k:k + chunk_events]) for k in range(0, timestamps.shape[0], chunk_events)]
+
+    tagger = OfflineTagger()
+    histogram = Histogram(tagger, CLICK_CHANNEL, START_CHANNEL, BINWIDTH_PS, N_BINS)
+    t0 = time.perf_counter()
+    tagger.run(chunks)
+    numpy_s = time.perf_counter() - t0
+    print(f"NumPy Histogram:     {timestamps.shape[0] / numpy_s / 1e6:8.1f} Mtags/s")
+
+    if numba is None:
+        print("numba is not installed, skipping fast_process")
+        return
+    data = np.zeros(N_BINS, dtype=np.uint64)
+    fast_process(timestamps[:10], channels[:10], data.copy(), CLICK_CHANNEL, START_CHANNEL, BINWIDTH_PS, 0)  # compile
+    t0 = time.perf_counter()
+    last_start = 0
+    for chunk_timestamps, chunk_channels in chunks:
+        last_start = fast_process(chunk_timestamps, chunk_channels, data, CLICK_CHANNEL, START_CHANNEL, BINWIDTH_PS, last_start)
+    numba_s = time.perf_counter() - t0
+    print(f"numba fast_process:  {timestamps.shape[0] / numba_s / 1e6:8.1f} Mtags/s")
+    print("Results identical:", bool(np.array_equal(histogram.getData(), data.astype(np.int64))))
+
+
+if __name__ == "__main__":
+    benchmark()
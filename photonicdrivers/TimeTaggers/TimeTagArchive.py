@@ -0,0 +1,286 @@
+"""
+Columnar on-disk archive for raw time tags.
+
+An archive is a directory containing
+    timestamps.bin   int64 timestamps in ps, little endian, monotonically increasing
+    channels.bin     int32 channel numbers, one per timestamp
+    index.npz        sparse index: for every non-empty time block of block_duration_ps its id
+                     (timestamp // block_duration_ps), the offset of its first tag and the number
+                     of tags per channel
+    metadata.json    format version, block duration, event count and user metadata
+
+The data files are plain arrays, so the reader maps them with np.memmap and a time window or a
+single channel can be read from a run of any size without scanning the whole file.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import json
+import os
+
+import numpy as np
+
+from photonicdrivers.TimeTaggers.TimeTagStreaming import TAG_TYPE_MISSED_EVENTS, TAG_TYPE_TIME_TAG, TimeTagChunk
+
+FORMAT_VERSION = 1
+TIMESTAMPS_FILE = "timestamps.bin"
+CHANNELS_FILE = "channels.bin"
+INDEX_FILE = "index.npz"
+METADATA_FILE = "metadata.json"
+
+TIMESTAMP_DTYPE = np.dtype("<i8")
+CHANNEL_DTYPE = np.dtype("<i4")
+
+
+class TimeTagArchiveWriter:
+    """
+    Append time tags to a new archive. Use as a context manager or call close() to write the index.
+
+    Parameters:
+        path: Directory of the archive. It is created if it does not exist
+        block_duration_ps: Time resolution of the index. Smaller blocks give finer seeking at the
+            cost of a larger index
+        metadata: JSON serialisable user metadata stored with the archive
+        overwrite: Replace an existing archive in path
+    """
+
+    def __init__(self, path: str, block_duration_ps: int = 1_000_000_000, metadata: dict | None = None, overwrite: bool = False) -> None:
+        if block_duration_ps <= 0:
+            raise ValueError("block_duration_ps must be positive")
+        os.makedirs(path, exist_ok=True)
+        if not overwrite and os.path.exists(os.path.join(path, METADATA_FILE)):
+            raise FileExistsError(f"{path} already contains a time tag archive")
+
+        self.path = path
+        self.block_duration_ps = int(block_duration_ps)
+        self.metadata = dict(metadata) if metadata is not None else {}
+        self.n_events = 0
+        self.missed_events = 0
+        self.overflow_chunks = 0
+        self.closed = False
+
+        self._timestamp_file = open(os.path.join(path, TIMESTAMPS_FILE), "wb")
+        self._channel_file = open(os.path.join(path, CHANNELS_FILE), "wb")
+        self._last_timestamp: int | None = None
+        self._channel_columns: dict[int, int] = {}
+        self._block_ids: list[np.ndarray] = []
+        self._block_offsets: list[np.ndarray] = []
+        self._block_counts: list[np.ndarray] = []
+        self._open_block_id: int | None = None
+        self._open_block_offset = 0
+        self._open_block_counts = np.zeros(0, dtype=np.int64)
+
+    def __enter__(self) -> "TimeTagArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, timestamps: np.ndarray, channels: np.ndarray) -> None:
+        """Append time tags. Timestamps must continue monotonically from the previous write."""
+        if self.closed:
+            raise ValueError("Cannot write to a closed archive")
+        timestamps = np.asarray(timestamps, dtype=TIMESTAMP_DTYPE)
+        channels = np.asarray(channels, dtype=CHANNEL_DTYPE)
+        if timestamps.shape != channels.shape:
+            raise ValueError("timestamps and channels must have the same length")
+        n_events = timestamps.shape[0]
+        if n_events == 0:
+            return
+        if (self._last_timestamp is not None and timestamps[0] < self._last_timestamp) or np.any(np.diff(timestamps) < 0):
+            raise ValueError("timestamps must be monotonically increasing")
+
+        blocks = timestamps // self.block_duration_ps
+        block_starts = np.flatnonzero(np.concatenate(([True], blocks[1:] != blocks[:-1])))
+        block_ids = blocks[block_starts]
+        block_lengths = np.diff(np.append(block_starts, n_events))
+
+        unique_channels, channel_positions = np.unique(channels, return_inverse=True)
+        for channel in unique_channels.tolist():
+            self._channel_columns.setdefault(channel, len(self._channel_columns))
+        n_columns = len(self._channel_columns)
+        columns = np.array([self._channel_columns[channel] for channel in unique_channels.tolist()], dtype=np.int64)[channel_positions]
+        rows = np.repeat(np.arange(block_ids.shape[0]), block_lengths)
+        counts = np.bincount(rows * n_columns + columns, minlength=block_ids.shape[0] * n_columns).reshape(-1, n_columns)
+
+        first_row = 0
+        if self._open_block_id == int(block_ids[0]):
+            self._open_block_counts = self._padded(self._open_block_counts, n_columns) + counts[0]
+            first_row = 1
+        if first_row < block_ids.shape[0]:
+            self._close_open_block()
+            self._block_ids.append(block_ids[first_row:-1])
+            self._block_offsets.append(block_starts[first_row:-1] + self.n_events)
+            self._block_counts.append(counts[first_row:-1])
+            self._open_block_id = int(block_ids[-1])
+            self._open_block_offset = int(block_starts[-1]) + self.n_events
+            self._open_block_counts = counts[-1].copy()
+
+        timestamps.tofile(self._timestamp_file)
+        channels.tofile(self._channel_file)
+        self.n_events += n_events
+        self._last_timestamp = int(timestamps[-1])
+
+    def write_chunk(self, chunk: TimeTagChunk) -> None:
+        """Append a TimeTagChunk. Overflow markers are not stored but counted in the metadata."""
+        if chunk.has_overflows:
+            self.overflow_chunks += 1
+            missed = chunk.event_types == TAG_TYPE_MISSED_EVENTS
+            self.missed_events += int(np.sum(chunk.missed_events[missed], dtype=np.int64))
+            mask = chunk.event_types == TAG_TYPE_TIME_TAG
+            self.write(chunk.timestamps[mask], chunk.channels[mask])
+        else:
+            self.write(chunk.timestamps, chunk.channels)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._close_open_block()
+        self._timestamp_file.close()
+        self._channel_file.close()
+
+        n_columns = len(self._channel_columns)
+        channel_ids = np.array(sorted(self._channel_columns), dtype=CHANNEL_DTYPE)
+        column_order = np.array([self._channel_columns[int(channel)] for channel in channel_ids], dtype=np.int64)
+        if self._block_ids:
+            block_ids = np.concatenate(self._block_ids).astype(np.int64)
+            block_offsets = np.concatenate(self._block_offsets).astype(np.int64)
+            block_counts = np.concatenate([self._padded(counts, n_columns) for counts in self._block_counts])
+        else:
+            block_ids = np.zeros(0, dtype=np.int64)
+            block_offsets = np.zeros(0, dtype=np.int64)
+            block_counts = np.zeros((0, n_columns), dtype=np.int64)
+        np.savez(
+            os.path.join(self.path, INDEX_FILE),
+            block_ids=block_ids,
+            block_offsets=block_offsets,
+            channels=channel_ids,
+            block_channel_counts=block_counts[:, column_order].astype(np.int64),
+        )
+        with open(os.path.join(self.path, METADATA_FILE), "w") as file:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "block_duration_ps": self.block_duration_ps,
+                "n_events": self.n_events,
+                "missed_events": self.missed_events,
+                "overflow_chunks": self.overflow_chunks,
+                "user": self.metadata,
+            }, file, indent=2)
+        self.closed = True
+
+    def _close_open_block(self) -> None:
+        if self._open_block_id is None:
+            return
+        self._block_ids.append(np.array([self._open_block_id], dtype=np.int64))
+        self._block_offsets.append(np.array([self._open_block_offset], dtype=np.int64))
+        self._block_counts.append(self._open_block_counts[np.newaxis, :])
+        self._open_block_id = None
+
+    @staticmethod
+    def _padded(counts: np.ndarray, n_columns: int) -> np.ndarray:
+        missing = n_columns - counts.shape[-1]
+        if missing == 0:
+            return counts
+        pad_width = [(0, 0)] * (counts.ndim - 1) + [(0, missing)]
+        return np.pad(counts, pad_width)
+
+
+class TimeTagArchiveReader:
+    """
+    Read an archive written by TimeTagArchiveWriter.
+
+    timestamps and channels are read-only np.memmap arrays over the whole run; time_window() and
+    iter_chunks() return slices of them without reading the rest of the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, METADATA_FILE)) as file:
+            self.metadata = json.load(file)
+        if self.metadata["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported time tag archive version {self.metadata['format_version']}")
+        self.block_duration_ps = int(self.metadata["block_duration_ps"])
+        self.n_events = int(self.metadata["n_events"])
+
+        with np.load(os.path.join(path, INDEX_FILE)) as index:
+            self.block_ids = index["block_ids"]
+            self.block_offsets = index["block_offsets"]
+            self.channels_in_archive = index["channels"]
+            self.block_channel_counts = index["block_channel_counts"]
+        self._block_ends = np.append(self.block_offsets[1:], self.n_events)
+
+        self.timestamps = self._map(TIMESTAMPS_FILE, TIMESTAMP_DTYPE)
+        self.channels = self._map(CHANNELS_FILE, CHANNEL_DTYPE)
+
+    def _map(self, file_name: str, dtype: np.dtype) -> np.ndarray:
+        if self.n_events == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, file_name), dtype=dtype, mode="r", shape=(self.n_events,))
+
+    def get_channel_counts(self) -> dict[int, int]:
+        """Total number of tags per channel, read from the index."""
+        totals = self.block_channel_counts.sum(axis=0)
+        return {int(channel): int(count) for channel, count in zip(self.channels_in_archive, totals)}
+
+    def get_time_range(self) -> tuple[int, int]:
+        if self.n_events == 0:
+            raise ValueError("The archive is empty")
+        return int(self.timestamps[0]), int(self.timestamps[-1])
+
+    def _event_range(self, start_ps: int | None, stop_ps: int | None) -> tuple[int, int]:
+        """First and one-past-last event index with start_ps <= timestamp < stop_ps."""
+        first, last = 0, self.n_events
+        if start_ps is not None:
+            block = np.searchsorted(self.block_ids, start_ps // self.block_duration_ps, side="left")
+            if block < self.block_ids.shape[0]:
+                lo, hi = int(self.block_offsets[block]), int(self._block_ends[block])
+                first = lo + int(np.searchsorted(self.timestamps[lo:hi], start_ps, side="left"))
+            else:
+                first = self.n_events
+        if stop_ps is not None:
+            block = np.searchsorted(self.block_ids, stop_ps // self.block_duration_ps, side="left")
+            if block < self.block_ids.shape[0]:
+                lo, hi = int(self.block_offsets[block]), int(self._block_ends[block])
+                last = lo + int(np.searchsorted(self.timestamps[lo:hi], stop_ps, side="left"))
+        return first, max(first, last)
+
+    def time_window(self, start_ps: int | None = None, stop_ps: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Memory-mapped (timestamps, channels) of all tags with start_ps <= timestamp < stop_ps."""
+        first, last = self._event_range(start_ps, stop_ps)
+        return self.timestamps[first:last], self.channels[first:last]
+
+    def channel_timestamps(self, channel: int, start_ps: int | None = None, stop_ps: int | None = None) -> np.ndarray:
+        """
+        Timestamps of a single channel. Only the index blocks that contain the channel are read.
+        """
+        matches = np.flatnonzero(self.channels_in_archive == channel)
+        if matches.shape[0] == 0:
+            return np.zeros(0, dtype=TIMESTAMP_DTYPE)
+        first, last = self._event_range(start_ps, stop_ps)
+        blocks = np.flatnonzero(
+            (self.block_channel_counts[:, matches[0]] > 0)
+            & (self._block_ends > first)
+            & (self.block_offsets < last)
+        )
+        if blocks.shape[0] == 0:
+            return np.zeros(0, dtype=TIMESTAMP_DTYPE)
+        # Merge runs of adjacent blocks into one contiguous read each
+        run_starts = np.flatnonzero(np.concatenate(([True], np.diff(blocks) != 1)))
+        run_ends = np.append(run_starts[1:], blocks.shape[0]) - 1
+        pieces = []
+        for run_start, run_end in zip(blocks[run_starts], blocks[run_ends]):
+            lo = max(first, int(self.block_offsets[run_start]))
+            hi = min(last, int(self._block_ends[run_end]))
+            timestamps = self.timestamps[lo:hi]
+            pieces.append(np.asarray(timestamps[self.channels[lo:hi] == channel]))
+        return np.concatenate(pieces)
+
+    def iter_chunks(self, chunk_events: int = 10_000_000, start_ps: int | None = None, stop_ps: int | None = None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Yield memory-mapped (timestamps, channels) slices of at most chunk_events tags."""
+        if chunk_events <= 0:
+            raise ValueError("chunk_events must be positive")
+        first, last = self._event_range(start_ps, stop_ps)
+        for begin in range(first, last, chunk_events):
+            end = min(begin + chunk_events, last)
+            yield self.timestamps[begin:end], self.channels[begin:end]
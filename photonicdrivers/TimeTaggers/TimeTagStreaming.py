@@ -0,0 +1,204 @@
+"""
+Chunked, bounded-memory access to the raw time-tag stream of a Swabian Time Tagger.
+
+The vendor TimeTagStream hands out a fresh TimeTagStreamBuffer on every getData() call. The
+helpers in this module copy each buffer once into a preallocated ring of NumPy arrays and
+yield views into that ring, so an acquisition of arbitrary length runs in constant memory and
+analysis can start while the tagger is still acquiring.
+
+Only the stream methods getData(), isRunning() and stop() are used, so any object with the
+same interface (e.g. a simulated stream) can be drained as well.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+import time
+from typing import Any
+
+import numpy as np
+
+# Event types as reported by TimeTagStreamBuffer.getEventTypes() (TimeTagger.TagType)
+TAG_TYPE_TIME_TAG = 0
+TAG_TYPE_ERROR = 1
+TAG_TYPE_OVERFLOW_BEGIN = 2
+TAG_TYPE_OVERFLOW_END = 3
+TAG_TYPE_MISSED_EVENTS = 4
+
+
+@dataclass(frozen=True)
+class TimeTagChunk:
+    """
+    One chunk of the time-tag stream.
+
+    The arrays are views into a TimeTagRingBuffer slot and are overwritten once the ring
+    wraps around. Call copy() to keep a chunk beyond that point.
+    """
+    timestamps: np.ndarray
+    channels: np.ndarray
+    event_types: np.ndarray
+    missed_events: np.ndarray
+    index: int
+    buffer_filled: bool = False
+
+    @property
+    def size(self) -> int:
+        return int(self.timestamps.shape[0])
+
+    @property
+    def has_overflows(self) -> bool:
+        return bool(np.any(self.event_types != TAG_TYPE_TIME_TAG))
+
+    def time_tags(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, channels) of the regular time tags only, without overflow markers."""
+        if not self.has_overflows:
+            return self.timestamps, self.channels
+        mask = self.event_types == TAG_TYPE_TIME_TAG
+        return self.timestamps[mask], self.channels[mask]
+
+    def copy(self) -> "TimeTagChunk":
+        return TimeTagChunk(
+            timestamps=self.timestamps.copy(),
+            channels=self.channels.copy(),
+            event_types=self.event_types.copy(),
+            missed_events=self.missed_events.copy(),
+            index=self.index,
+            buffer_filled=self.buffer_filled,
+        )
+
+
+class TimeTagRingBuffer:
+    """
+    Preallocated ring of n_slots chunks with room for chunk_events tags each.
+
+    A chunk yielded by write() stays valid until n_slots further chunks have been written.
+    """
+
+    def __init__(self, chunk_events: int = 1_000_000, n_slots: int = 4) -> None:
+        if chunk_events <= 0:
+            raise ValueError("chunk_events must be positive")
+        if n_slots < 2:
+            raise ValueError("n_slots must be at least 2")
+        self.chunk_events = int(chunk_events)
+        self.n_slots = int(n_slots)
+        self._timestamps = np.zeros((self.n_slots, self.chunk_events), dtype=np.int64)
+        self._channels = np.zeros((self.n_slots, self.chunk_events), dtype=np.int32)
+        self._event_types = np.zeros((self.n_slots, self.chunk_events), dtype=np.uint8)
+        self._missed_events = np.zeros((self.n_slots, self.chunk_events), dtype=np.uint16)
+        self.chunks_written = 0
+        self.events_written = 0
+
+    def write(
+        self,
+        timestamps: np.ndarray,
+        channels: np.ndarray,
+        event_types: np.ndarray | None = None,
+        missed_events: np.ndarray | None = None,
+        buffer_filled: bool = False,
+    ) -> Iterator[TimeTagChunk]:
+        """
+        Copy the given arrays into the ring, splitting them over as many slots as needed, and
+        yield one chunk view per slot used. A slot is only filled when the next chunk is requested,
+        so batches larger than the ring do not overwrite chunks that were not yet consumed.
+        """
+        n_events = int(np.shape(timestamps)[0])
+        for begin in range(0, n_events, self.chunk_events):
+            end = min(begin + self.chunk_events, n_events)
+            n = end - begin
+            slot = self.chunks_written % self.n_slots
+            timestamp_view = self._timestamps[slot, :n]
+            channel_view = self._channels[slot, :n]
+            event_type_view = self._event_types[slot, :n]
+            missed_events_view = self._missed_events[slot, :n]
+            np.copyto(timestamp_view, timestamps[begin:end], casting="unsafe")
+            np.copyto(channel_view, channels[begin:end], casting="unsafe")
+            if event_types is None:
+                event_type_view.fill(TAG_TYPE_TIME_TAG)
+            else:
+                np.copyto(event_type_view, event_types[begin:end], casting="unsafe")
+            if missed_events is None:
+                missed_events_view.fill(0)
+            else:
+                np.copyto(missed_events_view, missed_events[begin:end], casting="unsafe")
+            chunk = TimeTagChunk(
+                timestamps=timestamp_view,
+                channels=channel_view,
+                event_types=event_type_view,
+                missed_events=missed_events_view,
+                index=self.chunks_written,
+                buffer_filled=buffer_filled and end == n_events,
+            )
+            self.chunks_written += 1
+            self.events_written += n
+            yield chunk
+
+
+def iterate_time_tag_stream(
+    stream,
+    ring: TimeTagRingBuffer,
+    buffer_events: int | None = None,
+    poll_interval_s: float = 0.01,
+    stop_when_finished: bool = True,
+) -> Iterator[TimeTagChunk]:
+    """
+    Drain a started TimeTagStream into the ring and yield one TimeTagChunk per filled slot.
+
+    Iteration ends once the stream is no longer running (e.g. after startFor) and its remaining
+    data has been collected, or when the generator is closed. The stream is stopped on exit.
+
+    Parameters:
+        stream: A started TimeTagStream (or an object with getData, isRunning and stop)
+        ring: Ring buffer that receives the data
+        buffer_events: n_max_events of the stream. When a getData() call returns exactly this
+            many events the stream buffer ran full and later events were discarded; the
+            affected chunk is flagged with buffer_filled=True
+        poll_interval_s: Sleep between getData() calls that returned no events
+        stop_when_finished: Stop iterating when stream.isRunning() turns False
+    """
+    try:
+        while True:
+            running = stream.isRunning()
+            data = stream.getData()
+            n_events = int(data.size)
+            if n_events > 0:
+                yield from ring.write(
+                    data.getTimestamps(),
+                    data.getChannels(),
+                    data.getEventTypes(),
+                    data.getMissedEvents(),
+                    buffer_filled=buffer_events is not None and n_events >= buffer_events,
+                )
+            elif not running and stop_when_finished:
+                return
+            else:
+                time.sleep(poll_interval_s)
+    finally:
+        stream.stop()
+
+
+def iterate_new_time_tag_stream(
+    create_stream: Callable[[], Any],
+    ring: TimeTagRingBuffer,
+    acquisition_time_ps: int | None = None,
+    buffer_events: int | None = None,
+    poll_interval_s: float = 0.01,
+) -> Iterator[TimeTagChunk]:
+    """
+    Like iterate_time_tag_stream, but the stream is only created and started when iteration begins,
+    so a generator that is never iterated leaves no running stream behind.
+
+    Parameters:
+        create_stream: Returns a new, stopped TimeTagStream
+        ring: Ring buffer that receives the data
+        acquisition_time_ps: Start the stream with startFor(acquisition_time_ps) and stop iterating
+            once it has finished. If None, the stream runs until the generator is closed
+        buffer_events: n_max_events of the stream
+        poll_interval_s: Sleep between getData() calls that returned no events
+    """
+    stream = create_stream()
+    if acquisition_time_ps is None:
+        stream.start()
+    else:
+        stream.startFor(int(acquisition_time_ps))
+    yield from iterate_time_tag_stream(stream, ring, buffer_events=buffer_events, poll_interval_s=poll_interval_s, stop_when_finished=acquisition_time_ps is not None)
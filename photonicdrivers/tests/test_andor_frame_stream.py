@@ -0,0 +1,155 @@
+import threading
+import time
+
+import numpy as np
+
+from photonicdrivers.Spectrometers.AndorFrameStream import KINETICS, RUN_TILL_ABORT, AndorFrameStream
+
+
+class _FakeAndorCamera:
+    """Andor_Camera_Driver stand-in: a frame every cycle_time_s into an SDK circular buffer of sdk_buffer_size images."""
+
+    def __init__(self, shape=(4, 16), cycle_time_s=0.002, sdk_buffer_size=1000):
+        self.shape = shape
+        self.cycle_time_s = cycle_time_s
+        self.sdk_buffer_size = sdk_buffer_size
+        self.settings = {}
+        # Single scan, the mode get_image leaves the camera in
+        self.acquisition_mode = 1
+        self.acquisition_modes = []
+        self.acquired = 0
+        self.acquiring = False
+        self.get_images_calls = []
+        self.n_prepare = 0
+        self.condition = threading.Condition()
+
+    def get_frame_shape(self):
+        return self.shape
+
+    def get_acquisition_mode(self):
+        return self.acquisition_mode
+
+    def set_acquisition_mode(self, mode):
+        self.acquisition_mode = mode
+        self.acquisition_modes.append(mode)
+        self.settings["acquisition_mode"] = mode
+
+    def set_number_accumulations(self, number):
+        self.settings["accumulations"] = number
+
+    def set_number_kinetics(self, number):
+        self.settings["kinetics"] = number
+
+    def set_kinetic_cycle_time(self, cycle_time):
+        self.settings["cycle_time"] = cycle_time
+
+    def get_size_of_circular_buffer(self):
+        return self.sdk_buffer_size
+
+    def start_acquisition(self):
+        self.n_prepare += 1
+        self.acquiring = True
+        threading.Thread(target=self._produce, daemon=True).start()
+
+    def _produce(self):
+        while self.acquiring:
+            time.sleep(self.cycle_time_s)
+            with self.condition:
+                if not self.acquiring:
+                    break
+                self.acquired += 1
+                self.condition.notify_all()
+                if self.settings["acquisition_mode"] == KINETICS and self.acquired == self.settings["kinetics"]:
+                    self.acquiring = False
+
+    def wait_for_acquisition(self, timeout_ms):
+        with self.condition:
+            acquired = self.acquired
+            return self.condition.wait_for(lambda: self.acquired > acquired or not self.acquiring, timeout_ms / 1000)
+
+    def get_total_number_images_acquired(self):
+        return self.acquired
+
+    def is_acquiring(self):
+        return self.acquiring
+
+    def abort_acquisition(self):
+        self.acquiring = False
+
+    def get_images(self, first, last, size):
+        assert last - first + 1 <= self.sdk_buffer_size
+        assert size == (last - first + 1) * self.shape[0] * self.shape[1]
+        self.get_images_calls.append((first, last))
+        # Pixel value = image index, and the first column marks the row so the orientation can be checked
+        frames = np.repeat(np.arange(first, last + 1), self.shape[0] * self.shape[1]).reshape(-1, *self.shape)
+        frames[:, :, 0] = -np.arange(self.shape[0])
+        return frames.ravel().astype(np.int32)
+
+
+def test_kinetic_series_is_drained_in_batches_into_the_ring():
+    camera = _FakeAndorCamera()
+    stream = AndorFrameStream(camera, n_frames=200, capacity=512)
+
+    stream.start()
+    batches = []
+    while (frames := stream.read_new(timeout_s=1.0)) is not None:
+        batches.append(frames)
+    assert stream.wait(1.0)
+    frames = np.concatenate(batches)
+
+    assert camera.acquisition_modes == [KINETICS, 1]
+    assert camera.settings == {"acquisition_mode": 1, "accumulations": 1, "kinetics": 200, "cycle_time": 0.0}
+    assert camera.n_prepare == 1
+    assert stream.n_frames == 200 and frames.shape == (200, 4, 16)
+    assert frames[:, 0, 0].tolist() == list(range(1, 201))
+    # Flipped as a view: the last read out row and column come first
+    assert frames[0, :, -1].tolist() == [-3, -2, -1, 0]
+    assert stream.n_batches <= len(camera.get_images_calls) <= 200
+    assert stream.n_dropped == 0 and stream.last_error is None
+    assert 150 < stream.get_frame_rate_hz() < 700
+
+
+def test_run_till_abort_counts_sdk_and_ring_overruns():
+    camera = _FakeAndorCamera(cycle_time_s=0.001, sdk_buffer_size=20)
+    stream = AndorFrameStream(camera, capacity=50, flip=False)
+    original_wait = camera.wait_for_acquisition
+
+    def slow_wait(timeout_ms):
+        # The drain falls behind once, while the camera keeps acquiring
+        if camera.acquired == 5:
+            time.sleep(0.15)
+        return original_wait(timeout_ms)
+
+    camera.wait_for_acquisition = slow_wait
+    with stream:
+        while stream.n_frames < 150:
+            time.sleep(0.01)
+    assert not camera.acquiring
+    assert camera.acquisition_modes == [RUN_TILL_ABORT, 1]
+
+    frames = stream.read_new(timeout_s=0.1)
+    assert len(frames) == 50
+    assert np.all(np.diff(frames[:, 0, 1]) == 1)
+    assert frames[-1, 0, 1] == camera.acquired
+    assert stream.n_dropped == camera.acquired - stream.n_frames
+    assert stream.n_reader_dropped == stream.n_frames - 50
+    assert stream.read_new(timeout_s=0.01) is None
+
+
+def test_acquisition_mode_is_restored_after_an_error():
+    camera = _FakeAndorCamera()
+    camera.acquisition_mode = KINETICS
+
+    def failing_get_images(first, last, size):
+        raise RuntimeError("DRV_P1INVALID")
+
+    camera.get_images = failing_get_images
+    stream = AndorFrameStream(camera)
+    stream.start()
+    assert stream.wait(1.0)
+
+    assert isinstance(stream.last_error, RuntimeError)
+    assert not camera.acquiring
+    assert camera.acquisition_modes == [RUN_TILL_ABORT, KINETICS]
+    stream.stop()
+    assert camera.acquisition_modes == [RUN_TILL_ABORT, KINETICS]
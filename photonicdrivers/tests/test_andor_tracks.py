@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.Spectrometers.AndorFrameStream import orient
+from photonicdrivers.Spectrometers.AndorTracks import (
+    multi_track_tracks,
+    random_track_areas,
+    set_random_tracks,
+    software_bin,
+    spectra_from_tracks,
+    validate_tracks,
+)
+
+N_ROWS = 32
+N_COLUMNS = 8
+
+
+def _sensor():
+    """Raw sensor frame as the SDK reads it: row 0 is sensor row 1."""
+    return np.random.default_rng(1).integers(0, 1000, size=(N_ROWS, N_COLUMNS))
+
+
+def _random_track_read_out(sensor, areas):
+    """What the camera transfers in random track mode: one summed row per area, in area order."""
+    pairs = np.reshape(areas, (-1, 2))
+    return np.concatenate([sensor[bottom - 1:top].sum(axis=0) for bottom, top in pairs])
+
+
+def test_software_bin_sums_the_rows_of_every_track():
+    image = orient(_sensor())
+    tracks = validate_tracks([(20, 25), (0, 3), (31, 32)], N_ROWS)
+
+    spectra = software_bin(image, tracks)
+
+    expected = np.stack([image[start:stop].sum(axis=0) for start, stop in tracks])
+    np.testing.assert_array_equal(spectra, expected)
+
+
+def test_on_chip_random_tracks_match_software_binning():
+    sensor = _sensor()
+    tracks = validate_tracks([(20, 25), (0, 3), (10, 11)], N_ROWS)
+
+    areas, order = random_track_areas(tracks, N_ROWS)
+    spectra = spectra_from_tracks(_random_track_read_out(sensor, areas), order)
+
+    assert areas == sorted(areas)
+    assert areas[0] >= 1 and areas[-1] <= N_ROWS
+    np.testing.assert_array_equal(spectra, software_bin(orient(sensor), tracks))
+
+
+def test_multi_track_layout_in_image_rows():
+    sensor = _sensor()
+    # SetMultiTrack(3, 4, 0) on 32 rows: first track from sensor row 3, 6 rows between tracks
+    tracks = multi_track_tracks(3, 4, bottom=3, gap=6, n_rows=N_ROWS)
+
+    assert tracks.tolist() == [[6, 10], [16, 20], [26, 30]]
+    areas, order = random_track_areas(tracks, N_ROWS)
+    assert areas == [3, 6, 13, 16, 23, 26]
+    read_out = np.concatenate([sensor[bottom - 1:bottom + 3].sum(axis=0) for bottom in (3, 13, 23)])
+    np.testing.assert_array_equal(spectra_from_tracks(read_out, order), software_bin(orient(sensor), tracks))
+
+
+@pytest.mark.parametrize("tracks", [[], [(0, 0)], [(-1, 3)], [(30, 33)], [(0, 5), (4, 8)]])
+def test_invalid_tracks_are_rejected(tracks):
+    with pytest.raises(ValueError):
+        validate_tracks(tracks, N_ROWS)
+
+
+def test_set_random_tracks_passes_all_areas_to_the_dll():
+    calls = []
+
+    class _Dll:
+        def SetRandomTracks(self, number, areas):
+            calls.append((number.value, list(areas)))
+            return 20002
+
+    class _Sdk:
+        dll = _Dll()
+
+    assert set_random_tracks(_Sdk(), [3, 6, 13, 16]) == 20002
+    assert calls == [(2, [3, 6, 13, 16])]
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from photonicdrivers.AttocubeAPI.ACS import AttoException, Device
+
+
+class _FakeJsonRpcServer:
+    """Replies [0, params..., address tag]; "slow" requests are answered after later ones."""
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.n_batches = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _answer(self, request):
+        return {"jsonrpc": "2.0", "id": request["id"], "result": [0, *request.get("params", []), self.tag]}
+
+    def _serve(self):
+        connection, _ = self.listener.accept()
+        decoder = json.JSONDecoder()
+        buffer = ""
+        delayed = []
+        lock = threading.Lock()
+
+        def send(message):
+            with lock:
+                connection.sendall((json.dumps(message) + "\r\n").encode())
+
+        with connection:
+            while chunk := connection.recv(65536):
+                buffer += chunk.decode()
+                while buffer:
+                    try:
+                        request, end = decoder.raw_decode(buffer)
+                    except json.JSONDecodeError:
+                        break
+                    buffer = buffer[end:].lstrip()
+                    if isinstance(request, list):
+                        self.n_batches += 1
+                        send([self._answer(item) for item in reversed(request)])
+                    elif request["method"] == "slow":
+                        timer = threading.Timer(0.05, send, args=(self._answer(request),))
+                        delayed.append(timer)
+                        timer.start()
+                    elif request["method"] != "never":
+                        send(self._answer(request))
+
+
+def _device(tag):
+    server = _FakeJsonRpcServer(tag)
+    device = Device("127.0.0.1")
+    device.TCP_PORT = server.port
+    device.connect()
+    return server, device
+
+
+def test_concurrent_requests_on_several_devices():
+    devices = [_device(tag)[1] for tag in ("amc1", "amc2")]
+
+    def call(index):
+        device = devices[index % 2]
+        method = "slow" if index % 5 == 0 else "fast"
+        return device.request(method, [index])
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(call, range(200)))
+
+    for index, result in enumerate(results):
+        assert result[1] == index and result[2] == ("amc1", "amc2")[index % 2]
+    for device in devices:
+        assert not device.pending
+        device.close()
+
+
+def test_batch_async_and_legacy_requests():
+    server, device = _device("amc")
+
+    batch = device.request_batch([("a", [1]), ("b", [2]), ("c", False)])
+    request_id = device.sendRequest("slow", [7])
+    fast = device.request("fast", [8])
+
+    async def gather():
+        return await asyncio.gather(*(device.request_async("slow", [n]) for n in range(10)))
+
+    start_s = time.monotonic()
+    async_results = asyncio.run(gather())
+
+    assert [result[1] for result in batch[:2]] == [1, 2] and batch[2][1] == "amc"
+    assert server.n_batches == 1
+    assert fast[1] == 8 and device.getResponse(request_id)[1] == 7
+    assert [result[1] for result in async_results] == list(range(10))
+    assert time.monotonic() - start_s < 0.4
+    device.close()
+
+
+def test_close_fails_waiting_requests():
+    _, device = _device("amc")
+    future = device.submit("never")
+
+    device.close()
+
+    with pytest.raises(AttoException):
+        future.result(timeout=1.0)
+    with pytest.raises(AttoException):
+        device.request("fast")
+
+
+def test_cancelled_requests_do_not_stop_the_reader():
+    _, device = _device("amc")
+
+    device.submit("slow", [1]).cancel()
+
+    async def timed_out():
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(device.request_async("slow", [2]), 0.01)
+
+    asyncio.run(timed_out())
+    time.sleep(0.1)
+
+    assert device.reader_thread.is_alive()
+    assert device.request("fast", [3])[1] == 3
+    device.close()
+
+
+def test_requests_fail_at_once_after_the_reader_stopped():
+    server, device = _device("amc")
+    device.tcp.shutdown(socket.SHUT_RD)
+    device.reader_thread.join(1.0)
+
+    start_s = time.monotonic()
+    with pytest.raises(AttoException, match="Connection closed"):
+        device.request("fast")
+    assert time.monotonic() - start_s < 1.0
+    device.close()
@@ -0,0 +1,83 @@
+import io
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from photonicdrivers.Abstract.BinaryBlock import parse_binary_block, read_binary_block
+from photonicdrivers.Power_Meters.MPM220.Santec_MPM220_ethernet_driver import santec_MPM220_driver
+
+
+def _block(values):
+    payload = np.asarray(values, dtype="<f4").tobytes()
+    size = str(len(payload)).encode()
+    return b"#" + str(len(size)).encode() + size + payload + b"\n"
+
+
+class _BytesSource:
+    """Only read_bytes(n), like a PyVISA resource."""
+
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def read_bytes(self, n):
+        return self.stream.read(n)
+
+
+class _FakeMPM220:
+    def __init__(self, n_points):
+        self.logs = {(module, channel): np.arange(n_points, dtype=np.float32) * -0.5 - 10 * module - channel
+                     for module in (0, 1) for channel in range(1, 5)}
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _reply(self, command):
+        if command == "IDIS?":
+            return b"1,1,0,0,0\n"
+        if command.startswith("MMVER?"):
+            return b"Santec,MPM-212,00000000M212,Ver1.11\n" if command.endswith("1") else b"Santec,MPM-211,00000000M211,Ver1.11\n"
+        module, channel = command[5:].split(",")
+        return _block(self.logs[int(module), int(channel)])
+
+    def _serve(self):
+        connection, _ = self.listener.accept()
+        buffer = b""
+        with connection:
+            while chunk := connection.recv(4096):
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    connection.sendall(self._reply(line.decode()))
+
+
+def test_read_bytes_source_and_preallocated_output():
+    source = _BytesSource(b"\n" + _block([1.5, -2.25, 3.0]) + _block([4.0, 5.0]))
+
+    first = read_binary_block(source)
+    out = np.zeros((2, 2), dtype="<f4")
+    read_binary_block(source, out=out[1])
+
+    assert first.tolist() == [1.5, -2.25, 3.0]
+    assert out[1].tolist() == [4.0, 5.0] and out[0].tolist() == [0.0, 0.0]
+    assert parse_binary_block(_block([7.0])).tolist() == [7.0]
+    with pytest.raises(ValueError):
+        read_binary_block(_BytesSource(b"1.0,2.0\n"))
+
+
+def test_mpm220_ethernet_reads_all_active_ports_in_one_call():
+    server = _FakeMPM220(n_points=100_000)
+    power_meter = santec_MPM220_driver("127.0.0.1", server.port)
+    power_meter.connect()
+
+    ports = power_meter.get_active_ports()
+    data = power_meter.get_logging_data_all()
+
+    assert ports == [(0, 1), (0, 2), (0, 3), (0, 4), (1, 1), (1, 2)]
+    assert data.shape == (6, 100_000) and data.dtype == np.float32
+    for row, port in enumerate(ports):
+        np.testing.assert_array_equal(data[row], server.logs[port])
+    # The socket is left at a reply boundary
+    assert power_meter.get_modules() == "1,1,0,0,0"
+    power_meter.disconnect()
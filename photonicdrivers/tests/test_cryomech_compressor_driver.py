@@ -0,0 +1,102 @@
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from photonicdrivers.Compressors.CryomechCompressor_Driver import CryomechCompressor_Driver
+
+FLOAT_REGISTERS = {"Coolant In Temp": 6, "Coolant Out Temp": 8, "Oil Temp": 10, "Helium Temp": 12, "Low Pressure": 14,
+                   "Low Pressure Average": 16, "High Pressure": 18, "High Pressure Average": 20}
+
+
+class _FakeCompressor:
+    """Modbus TCP server answering the register query; the reply is sent in two pieces."""
+
+    def __init__(self):
+        self.values = {name: 10.0 + index for index, name in enumerate(FLOAT_REGISTERS)}
+        self.n_requests = 0
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _reply(self):
+        registers = [0] * 0x35
+        registers[0] = 3  # Running
+        registers[1] = 1  # Compressor on
+        for name, register in FLOAT_REGISTERS.items():
+            high, low = struct.unpack(">HH", struct.pack(">f", self.values[name]))
+            # Low word first
+            registers[register], registers[register + 1] = low, high
+        payload = bytes([0x04, 2 * len(registers)]) + struct.pack(f">{len(registers)}H", *registers)
+        return struct.pack(">HHHB", 0x0999, 0, len(payload) + 1, 1) + payload
+
+    def _serve(self):
+        connection, _ = self.listener.accept()
+        with connection:
+            while connection.recv(12):
+                self.n_requests += 1
+                reply = self._reply()
+                connection.sendall(reply[:20])
+                time.sleep(0.001)
+                connection.sendall(reply[20:])
+
+
+def _connected(**kwargs):
+    compressor = _FakeCompressor()
+    driver = CryomechCompressor_Driver("127.0.0.1", compressor.port, **kwargs)
+    driver.connect()
+    return compressor, driver
+
+
+def test_getters_share_one_register_read():
+    compressor, driver = _connected(_max_age_s=10.0)
+
+    values = [driver.get_operating_state(), driver.get_compressor_state(), driver.get_coolant_in_temp(), driver.get_coolant_out_temp(),
+              driver.get_oil_temp(), driver.get_helium_temp(), driver.get_low_pressure(), driver.get_high_pressure(),
+              driver.get_high_pressure_average()]
+
+    assert compressor.n_requests == 1
+    assert values[:2] == ["Running", "On"]
+    assert values[2:] == pytest.approx([10.0, 11.0, 12.0, 13.0, 14.0, 16.0, 17.0])
+    assert driver.get_all()["Oil Temp"] == pytest.approx(12.0)
+
+    compressor.values["Oil Temp"] = 42.0
+    assert driver.get_all(max_age_s=0)["Oil Temp"] == pytest.approx(42.0)
+    assert compressor.n_requests == 2
+    driver.disconnect()
+
+
+def test_streaming_keeps_the_cache_fresh():
+    compressor, driver = _connected(_max_age_s=0.5)
+    snapshots = []
+
+    driver.start_streaming(interval_s=0.02, callback=snapshots.append)
+    time.sleep(0.15)
+    temperature = driver.get_helium_temp()
+    driver.stop_streaming()
+
+    assert len(snapshots) >= 4 and not driver.is_streaming()
+    assert temperature == pytest.approx(13.0)
+    # Every request came from the streaming thread, none from the getter
+    assert compressor.n_requests == len(snapshots)
+    driver.disconnect()
+
+
+def test_streaming_survives_callback_errors():
+    compressor, driver = _connected()
+    snapshots = []
+
+    def callback(snapshot):
+        snapshots.append(snapshot)
+        raise KeyError("Helium Temp")
+
+    driver.start_streaming(interval_s=0.02, callback=callback)
+    time.sleep(0.1)
+    assert driver.is_streaming()
+    driver.stop_streaming()
+
+    assert len(snapshots) >= 3
+    assert isinstance(driver.last_error, KeyError)
+    driver.disconnect()
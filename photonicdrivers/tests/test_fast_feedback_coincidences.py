@@ -0,0 +1,193 @@
+import importlib
+import sys
+import time
+import types
+
+import numpy as np
+import pytest
+
+MODULE = "photonicdrivers.TimeTaggers.FastForward.FastFeedbackCoincidences"
+REGISTER_BASE = 0xF0070000 + 0x2000
+
+
+class _FakeCountrate:
+    """Swabian Countrate stand-in; counts the rates of the fake tagger in real time while running."""
+
+    def __init__(self, tagger, channels):
+        self.tagger = tagger
+        self.channels = channels
+        self.running = False
+        self.counts = np.zeros(len(channels))
+        self.duration_ps = 0.0
+        self.last_s = None
+        tagger.countrates.append(self)
+
+    def _advance(self):
+        now = time.monotonic()
+        if self.running:
+            elapsed_s = now - self.last_s
+            self.counts += [self.tagger.rates.get(channel, 0) * elapsed_s for channel in self.channels]
+            self.duration_ps += elapsed_s * 1e12
+        self.last_s = now
+
+    def isRunning(self):
+        return self.running
+
+    def start(self):
+        self._advance()
+        self.running = True
+
+    def stop(self):
+        self._advance()
+        self.running = False
+
+    def getCountsTotal(self):
+        self._advance()
+        self.tagger.n_count_reads += 1
+        return list(self.counts)
+
+    def getCaptureDuration(self):
+        return int(self.duration_ps)
+
+    def getData(self):
+        # The average since the start, which still includes the signal of long ago
+        self._advance()
+        return list(self.counts / max(self.duration_ps * 1e-12, 1e-12))
+
+
+class _FakeTagger:
+    def __init__(self):
+        self.registers = {}
+        self.writes = []
+        self.rates = {1: 1000, 2: 1000, 3: 1000, 4: 1000}
+        self.countrates = []
+        self.n_count_reads = 0
+        self.fail_at_write = None
+
+    def getChannelList(self):
+        return list(range(1, 9)) + list(range(-8, 0))
+
+    def getDeviceLicense(self):
+        return [{"fast feedback": True}]
+
+    def factoryAccess(self, key, address, data, mask, use_wb=False):
+        if self.fail_at_write is not None and len(self.writes) == self.fail_at_write:
+            self.fail_at_write = None
+            raise RuntimeError("factory access failed")
+        addr = (address - REGISTER_BASE) // 4
+        self.writes.append((addr, data))
+        self.registers[addr] = data
+
+
+@pytest.fixture
+def coincidences(monkeypatch):
+    timetagger = types.ModuleType("Swabian.TimeTagger")
+    timetagger.Countrate = _FakeCountrate
+    timetagger.TimeTagger = _FakeTagger
+    swabian = types.ModuleType("Swabian")
+    swabian.TimeTagger = timetagger
+    monkeypatch.setitem(sys.modules, "Swabian", swabian)
+    monkeypatch.setitem(sys.modules, "Swabian.TimeTagger", timetagger)
+    monkeypatch.delitem(sys.modules, MODULE, raising=False)
+    FastFeedbackCoincidences = importlib.import_module(MODULE).FastFeedbackCoincidences
+
+    tagger = _FakeTagger()
+    coincidences = FastFeedbackCoincidences(tagger, triggerChannel=1, outputChannel1=1, activeChannels1=[2, 3], coincidenceGroup1=[2])
+    tagger.writes.clear()
+    tagger.n_count_reads = 0
+    return coincidences
+
+
+def test_unchanged_and_repeated_writes_are_coalesced(coincidences):
+    tagger = coincidences.tagger
+
+    coincidences.setCoincidenceWindow(1000)
+    assert tagger.writes == []
+
+    with coincidences.transaction():
+        coincidences.setCoincidenceWindow(2000)
+        coincidences.setCoincidenceWindow(3000)
+    assert tagger.writes == [(0x11, 9000)]
+    assert coincidences.registerWrites == len(coincidences._registers) + 1
+
+
+def test_nested_transactions_commit_once_with_one_input_check(coincidences):
+    tagger = coincidences.tagger
+
+    with coincidences.transaction():
+        coincidences.setTriggerChannel(4)
+        with coincidences.transaction():
+            coincidences.setCoincidenceGroup(1, [2, 3], [2, 3], exclusive=True)
+        assert tagger.writes == []
+        assert tagger.n_count_reads == 0
+
+    assert tagger.n_count_reads > 0
+    assert [addr for addr, _ in tagger.writes] == sorted(addr for addr, _ in tagger.writes)
+    assert tagger.registers[0x10] == 3
+    assert tagger.registers[0x18] == (1 << 1) | (1 << 2) | (1 << 3)
+    assert coincidences.triggerChannel == 4 and coincidences.coincidenceGroup1 == [2, 3]
+
+
+def test_input_checks_do_not_block_with_the_default_integration_time(coincidences):
+    tagger = coincidences.tagger
+    assert coincidences.inputCheckTime == 0.1
+
+    start_s = time.monotonic()
+    coincidences.setCoincidenceGroup(1, [2, 3], [3])
+    with coincidences.transaction():
+        coincidences.setCoincidenceGroup(1, [2, 3], [2, 3], exclusive=True)
+        coincidences.setCoincidenceWindow(2000)
+    elapsed_s = time.monotonic() - start_s
+
+    assert elapsed_s < 0.05
+    assert len(tagger.countrates) == 1 and tagger.n_count_reads == 2
+
+
+def test_input_check_measures_the_recent_rates(coincidences):
+    tagger = coincidences.tagger
+    tagger.rates = {}
+    time.sleep(0.15)
+
+    # Same channels, so the running Countrate of the constructor is reused; its old average still shows the signal
+    assert all(coincidences.countrate.getData())
+    with pytest.raises(ValueError, match="No input signals"):
+        with coincidences.transaction():
+            coincidences.setCoincidenceGroup(1, [2, 3], [3])
+
+    assert len(tagger.countrates) == 1
+    assert tagger.writes == []
+    assert coincidences.coincidenceGroup1 == [2]
+    assert coincidences._registers[0x18] == (1 << 0) | (1 << 1)
+
+
+def test_transaction_without_validation_skips_the_input_check(coincidences):
+    tagger = coincidences.tagger
+    tagger.rates = {}
+    time.sleep(0.15)
+
+    with coincidences.transaction(validate=False):
+        coincidences.setCoincidenceGroup(1, [2, 3], [3])
+
+    assert tagger.n_count_reads == 0
+    assert tagger.registers[0x18] == (1 << 0) | (1 << 2)
+
+
+def test_failed_write_restores_the_hardware_and_the_cache(coincidences):
+    tagger = coincidences.tagger
+    before = dict(tagger.registers)
+    tagger.fail_at_write = 2
+
+    with pytest.raises(RuntimeError):
+        with coincidences.transaction():
+            coincidences.setTriggerChannel(4)
+            coincidences.setCoincidenceWindow(2000)
+            coincidences.setCoincidenceGroup(1, [2, 3], [2, 3], exclusive=True)
+
+    assert tagger.registers == before
+    assert coincidences.triggerChannel == 1 and coincidences.coincidenceWindow == 1000
+    assert all(tagger.registers[addr] == value for addr, value in coincidences._registers.items())
+    # The register whose write failed is written again, even though its value did not change
+    failed_addr = sorted(set(before) - set(coincidences._registers))
+    assert failed_addr == [0x14]
+    coincidences.setCoincidenceGroup(1, [2, 3], [2], exclusive=False)
+    assert tagger.writes[-1][0] == 0x14
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.Mocks.Swabian_TimeTagger_Driver_Mock import PoissonSource, PulsedSource, Swabian_TimeTagger_Driver_Mock
+from photonicdrivers.TimeTaggers.IncrementalReadout import IncrementalReadout
+
+
+def test_deltas_add_up_to_the_measurement():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=5e6), PoissonSource(2, rate_hz=5e5, sync_channel=1, lifetime_ps=3_000)], random_seed=0)
+    histogram = tagger.initialise_histogram(start_channel=1, click_channel=2, bin_width_ps=100, num_bins=200)
+    readout = IncrementalReadout(histogram)
+
+    accumulated = np.zeros(200, dtype=np.int64)
+    for _ in range(5):
+        tagger.run_for(10**8)
+        delta = readout.read()
+        assert not delta.reset
+        assert np.all(delta.counts > 0)
+        accumulated += delta.dense()
+
+    np.testing.assert_array_equal(accumulated, histogram.getData())
+    np.testing.assert_array_equal(readout.get_total(), histogram.getData())
+
+
+def test_clear_is_reported_as_reset_and_total_keeps_counting():
+    readout = IncrementalReadout()
+    readout.update(np.array([[1, 2], [0, 4]]), time_s=0.0)
+    readout.update(np.array([[1, 5], [0, 4]]), time_s=1.0)
+
+    delta = readout.update(np.array([[0, 1], [0, 0]]), time_s=2.0)
+
+    assert delta.reset
+    assert delta.changed_bins.tolist() == [1] and delta.total_counts == 1
+    np.testing.assert_array_equal(readout.get_total(), [[1, 6], [0, 4]])
+
+
+def test_a_reused_input_array_does_not_move_the_baseline():
+    readout = IncrementalReadout()
+    buffer = np.array([1, 2, 3], dtype=np.int64)
+    readout.update(buffer, time_s=0.0)
+
+    buffer += [0, 5, 0]
+    delta = readout.update(buffer, time_s=1.0)
+
+    assert not delta.reset
+    assert delta.changed_bins.tolist() == [1] and delta.total_counts == 5
+
+
+def test_weighted_sum_decays_with_the_time_constant():
+    readout = IncrementalReadout(time_constant_s=2.0)
+    readout.update(np.array([10, 0, 0]), time_s=0.0)
+    readout.update(np.array([10, 4, 0]), time_s=1.0)
+
+    readout.update(np.array([10, 4, 8]), time_s=3.0)
+
+    expected = np.array([10 * np.exp(-1.5), 4 * np.exp(-1.0), 8.0])
+    np.testing.assert_allclose(readout.get_weighted_sum(), expected)
+    # Many updates with a decay far below the float range still give the exact result
+    for k in range(4, 2004):
+        readout.update(np.array([10, 4, 8 + k]), time_s=float(k))
+    assert readout.get_weighted_sum()[2] == pytest.approx(1 / (1 - np.exp(-0.5)), rel=1e-9)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.Mocks.Swabian_TimeTagger_Driver_Mock import PoissonSource, PulsedSource, Swabian_TimeTagger_Driver_Mock
+from photonicdrivers.TimeTaggers.MeasurementGraph import MeasurementGraph
+
+
+def _simulated_tagger():
+    return Swabian_TimeTagger_Driver_Mock(
+        sources=[PulsedSource(1, frequency_hz=20e6), PoissonSource(2, rate_hz=4e6, sync_channel=1, delay_ps=2_000, lifetime_ps=5_000)],
+        random_seed=0,
+    )
+
+
+def test_gated_histograms_share_virtual_channels():
+    graph = MeasurementGraph()
+    for k in range(10):
+        graph.gated_histogram(f"window_{k}", trigger_channel=1, click_channel=2, gate_start_delay_ps=k * 4_000, gate_stop_delay_ps=(k + 1) * 4_000, bin_width_ps=100, num_bins=500)
+    graph.gated_histogram("window_0_again", 1, 2, 0, 4_000, bin_width_ps=100, num_bins=500)
+
+    cost = graph.cost()
+
+    assert (cost.delayed_channels, cost.gated_channels, cost.measurements) == (10, 10, 10)
+    assert (cost.declared_virtual_channels, cost.declared_measurements) == (33, 11)
+    assert cost.sharing_factor == pytest.approx(44 / 30)
+
+
+def test_built_graph_matches_individually_created_measurements():
+    tagger = _simulated_tagger()
+    graph = MeasurementGraph()
+    names = graph.check_probe("cp", trigger_channel=1, click_channel=2, check_gate_delay_ps=0, check_gate_width_ps=10_000, probe_gate_delay_ps=10_000, probe_gate_width_ps=20_000, bin_width_ps=100, num_bins=500)
+    graph.gated_histogram("late", 1, 2, 10_000, 30_000, bin_width_ps=100, num_bins=500)
+
+    built = tagger.build_measurement_graph(graph)
+    reference = tagger.initialize_check_probe(1, 2, 0, 10_000, 10_000, 20_000, bin_width_ps=100, num_bins=500)
+    tagger.run_for(2 * 10**9)
+
+    for name, measurement in zip(names, reference[:4]):
+        np.testing.assert_array_equal(built[name].getData(), measurement.getData())
+    # The probe window and the "late" gate are identical, so they share one measurement
+    assert built["late"] is built["cp_probe"]
+    assert built["cp_probe"].getData().sum() > 0
+    assert graph.cost().gated_channels == 2
+
+
+def test_graph_rejects_foreign_channels_and_duplicate_names():
+    graph = MeasurementGraph()
+    other = MeasurementGraph()
+    graph.histogram("h", 1, 2, 10, 10)
+    with pytest.raises(ValueError, match="already declared"):
+        graph.histogram("h", 1, 3, 10, 10)
+    with pytest.raises(ValueError, match="declared on this graph"):
+        graph.histogram("g", other.delayed(1, 100), 2, 10, 10)
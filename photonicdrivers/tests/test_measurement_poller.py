@@ -0,0 +1,133 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from photonicdrivers.TimeTaggers.MeasurementPoller import MeasurementPoller
+
+
+class _SlowMeasurement:
+    def __init__(self, delay_s=0.0, shape=(4,)):
+        self.delay_s = delay_s
+        self.shape = shape
+        self.n_reads = 0
+        self.lock = threading.Lock()
+
+    def getData(self):
+        time.sleep(self.delay_s)
+        with self.lock:
+            self.n_reads += 1
+            return np.full(self.shape, self.n_reads)
+
+
+class _BrokenMeasurement:
+    def getData(self):
+        raise RuntimeError("connection lost")
+
+
+def test_measurements_refresh_at_independent_rates():
+    fast = _SlowMeasurement()
+    slow = _SlowMeasurement(delay_s=0.15, shape=(200, 200))
+    poller = MeasurementPoller(max_workers=2)
+    poller.add("fast", fast, interval_s=0.01)
+    poller.add("slow", slow, interval_s=0.05)
+
+    with poller:
+        time.sleep(0.5)
+
+    fast_statistics = poller.get_statistics("fast")
+    slow_statistics = poller.get_statistics("slow")
+    # The slow read does not hold back the fast one
+    assert fast_statistics.n_refreshes > 4 * slow_statistics.n_refreshes
+    assert slow_statistics.n_skipped > 0
+    assert slow_statistics.mean_latency_s >= 0.15
+    assert not poller.is_running()
+
+
+def test_snapshots_are_read_only_and_keep_the_previous_one():
+    measurement = _SlowMeasurement()
+    poller = MeasurementPoller()
+    poller.add("m", measurement, interval_s=1.0)
+
+    first = poller.poll_once("m")
+    second = poller.poll_once("m")
+
+    assert (first.sequence, second.sequence) == (1, 2)
+    assert poller.get_previous_snapshot("m") is first
+    assert first.data[0] == 1 and second.data[0] == 2
+    with pytest.raises(ValueError):
+        second.data[0] = 0
+
+
+def test_poll_once_waits_for_a_read_in_flight():
+    measurement = _SlowMeasurement(delay_s=0.1)
+    poller = MeasurementPoller()
+    poller.add("m", measurement, interval_s=1.0)
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(poller.poll_once("m"))) for _ in range(3)]
+
+    for reader in readers:
+        reader.start()
+        time.sleep(0.01)
+    for reader in readers:
+        reader.join()
+
+    assert measurement.n_reads == 1
+    assert [snapshot.sequence for snapshot in results] == [1, 1, 1]
+
+
+def test_remove_wakes_waiting_readers():
+    poller = MeasurementPoller()
+    poller.add("m", _SlowMeasurement(), interval_s=1.0)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(poller.wait_for_snapshot("m", timeout_s=5.0)))
+
+    waiter.start()
+    time.sleep(0.05)
+    poller.remove("m")
+    waiter.join(1.0)
+
+    assert not waiter.is_alive()
+    assert results == [None]
+
+
+def test_wait_for_snapshot_and_callbacks_on_worker_thread():
+    received = []
+    poller = MeasurementPoller()
+    poller.add("m", _SlowMeasurement(), interval_s=0.01, callback=received.append)
+
+    with poller:
+        snapshot = poller.wait_for_snapshot("m", after_sequence=2, timeout_s=2.0)
+
+    assert snapshot is not None and snapshot.sequence >= 3
+    assert received[0].sequence == 1
+
+
+def test_errors_are_counted_and_do_not_stop_polling():
+    poller = MeasurementPoller()
+    poller.add("broken", _BrokenMeasurement(), interval_s=0.01)
+
+    with poller:
+        time.sleep(0.1)
+
+    statistics = poller.get_statistics("broken")
+    assert statistics.n_errors > 1 and statistics.n_refreshes == 0
+    assert isinstance(statistics.last_error, RuntimeError)
+    assert poller.get_snapshot("broken") is None
+
+
+def test_callback_errors_are_recorded_and_do_not_stop_polling():
+    def callback(snapshot):
+        raise ValueError(f"cannot plot snapshot {snapshot.sequence}")
+
+    poller = MeasurementPoller()
+    poller.add("m", _SlowMeasurement(), interval_s=0.01, callback=callback)
+
+    with poller:
+        snapshot = poller.wait_for_snapshot("m", after_sequence=2, timeout_s=2.0)
+
+    assert snapshot is not None
+    statistics = poller.get_statistics("m")
+    assert statistics.n_errors >= 2 and statistics.n_refreshes >= 3
+    assert isinstance(statistics.last_error, ValueError)
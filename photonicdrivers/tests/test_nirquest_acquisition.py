@@ -0,0 +1,181 @@
+import time
+
+import numpy as np
+import pytest
+
+from photonicdrivers.Spectrometers.OceanOptics.NIRQuest.SpectrumAcquisition import SpectrumAcquisition, correct_spectra
+
+N_PIXELS = 16
+NONLINEARITY = [1.0, -1e-5]
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _FakeAdvanced:
+    def __init__(self, device, buffering):
+        self.device = device
+        self.buffering = buffering
+        self.backtoback = None
+        self.n_buffer_reads = 0
+        self.scans_ready_s = None
+
+    def get_nonlinearity_coeffs(self):
+        return NONLINEARITY
+
+    def set_data_buffer_enable(self, enable):
+        if not self.buffering:
+            raise _Unsupported("data buffer")
+
+    def set_number_of_backtoback_scans(self, n_scans):
+        self.backtoback = n_scans
+
+    def get_raw_spectrum_with_metadata(self, spectra, timestamps, buffer_size):
+        self.n_buffer_reads += 1
+        if self.scans_ready_s is not None and time.monotonic() < self.scans_ready_s:
+            return 0
+        n = min(buffer_size, 4)
+        for _ in range(n):
+            spectra.append(list(self.device.next_scan()))
+            timestamps.append(0)
+        return n
+
+
+class _FakeSpectrometer:
+    """OceanDirect Spectrometer stand-in; scan k has counts 100 + k on every pixel."""
+
+    device_id = 1
+
+    def __init__(self, onboard_averaging=True, buffering=False):
+        self.onboard_averaging = onboard_averaging
+        self.scans = 0
+        self.transfers = 0
+        self.scans_to_average = 1
+        self.settings = {}
+        self.Advanced = _FakeAdvanced(self, buffering)
+
+    def next_scan(self):
+        self.scans += 1
+        return np.full(N_PIXELS, 100.0 + self.scans)
+
+    def get_formatted_spectrum_length(self):
+        return N_PIXELS
+
+    def get_wavelengths(self):
+        return list(np.linspace(900, 1700, N_PIXELS))
+
+    def set_electric_dark_correction_usage(self, enabled):
+        self.settings["electric_dark"] = enabled
+
+    def set_nonlinearity_correction_usage(self, enabled):
+        self.settings["nonlinearity"] = enabled
+
+    def set_integration_time(self, integration_time_us):
+        self.settings["integration_time_us"] = integration_time_us
+
+    def set_scans_to_average(self, n_scans):
+        if not self.onboard_averaging:
+            raise _Unsupported("scans to average")
+        self.settings.setdefault("scans_to_average_calls", 0)
+        self.settings["scans_to_average_calls"] += 1
+        self.scans_to_average = n_scans
+
+    def get_formatted_spectrum(self):
+        self.transfers += 1
+        return list(np.mean([self.next_scan() for _ in range(self.scans_to_average)], axis=0))
+
+
+def _corrected(raw, dark=0.0):
+    counts = np.asarray(raw, dtype=float) - dark
+    return counts / (NONLINEARITY[0] + NONLINEARITY[1] * counts)
+
+
+def test_averages_on_the_device_in_one_transfer():
+    device = _FakeSpectrometer()
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01)
+
+    first = acquisition.get_average_spectrum(10)
+    acquisition.get_average_spectrum(10)
+
+    assert device.settings["integration_time_us"] == 10_000
+    assert device.settings["nonlinearity"] is False
+    assert device.transfers == 2
+    assert device.settings["scans_to_average_calls"] == 1
+    np.testing.assert_allclose(first, _corrected(np.full(N_PIXELS, 105.5)))
+
+
+def test_averages_in_software_when_the_device_cannot(monkeypatch):
+    monkeypatch.setattr("photonicdrivers.Spectrometers.OceanOptics.NIRQuest.SpectrumAcquisition.OceanDirectError", _Unsupported)
+    device = _FakeSpectrometer(onboard_averaging=False)
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01)
+    out = np.empty(N_PIXELS)
+
+    result = acquisition.get_average_spectrum(4, out=out)
+
+    assert result is out
+    assert device.transfers == 4
+    np.testing.assert_allclose(result, _corrected(np.full(N_PIXELS, 102.5)))
+
+
+def test_blocks_come_from_the_data_buffer_when_available(monkeypatch):
+    monkeypatch.setattr("photonicdrivers.Spectrometers.OceanOptics.NIRQuest.SpectrumAcquisition.OceanDirectError", _Unsupported)
+    device = _FakeSpectrometer(buffering=True)
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01)
+
+    block = acquisition.acquire_block(10, corrected=False)
+
+    assert device.transfers == 0
+    assert device.Advanced.backtoback == 10
+    np.testing.assert_array_equal(block[:, 0], 101.0 + np.arange(10))
+
+
+def test_empty_data_buffer_reads_wait_for_the_next_scan(monkeypatch):
+    monkeypatch.setattr("photonicdrivers.Spectrometers.OceanOptics.NIRQuest.SpectrumAcquisition.OceanDirectError", _Unsupported)
+    device = _FakeSpectrometer(buffering=True)
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01)
+    device.Advanced.scans_ready_s = time.monotonic() + 0.1
+
+    block = acquisition.acquire_block(4, corrected=False)
+
+    assert block.shape == (4, N_PIXELS)
+    # About one read per half integration time while the buffer is empty, not a busy loop
+    assert device.Advanced.n_buffer_reads <= 25
+
+
+def test_dark_is_measured_raw_and_subtracted_before_the_nonlinearity_correction():
+    device = _FakeSpectrometer()
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01)
+
+    dark = acquisition.measure_dark(n_averages=3)
+    spectrum = acquisition.get_spectrum()
+
+    np.testing.assert_allclose(dark, np.full(N_PIXELS, 102.0))
+    np.testing.assert_allclose(spectrum, _corrected(np.full(N_PIXELS, 104.0), dark=102.0))
+
+
+def test_stream_yields_views_into_a_preallocated_ring():
+    device = _FakeSpectrometer()
+    acquisition = SpectrumAcquisition(device, integration_time_s=0.01, correct_nonlinearity=False, capacity=4)
+
+    spectra = list(acquisition.stream(n_spectra=6))
+
+    assert len(spectra) == 6
+    assert spectra[0].base is spectra[4].base
+    # The first spectra were overwritten by the ring wrapping around
+    np.testing.assert_array_equal([spectrum[0] for spectrum in spectra], [105, 106, 103, 104, 105, 106])
+
+
+def test_correct_spectra_works_in_place_on_blocks():
+    block = np.array([[110.0, 120.0], [130.0, 140.0]])
+    dark = np.array([10.0, 20.0])
+
+    result = correct_spectra(block, dark, np.array(NONLINEARITY), out=block)
+
+    assert result is block
+    np.testing.assert_allclose(block, _corrected([[100.0, 100.0], [120.0, 120.0]]))
+
+
+def test_integration_time_must_be_positive():
+    with pytest.raises(ValueError):
+        SpectrumAcquisition(_FakeSpectrometer(), integration_time_s=0.0)
@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+
+from photonicdrivers.Mocks.Piezo_AttocubeAMC_Driver_Mock import Piezo_AttocubeAMC_Driver_Mock
+from photonicdrivers.Piezo_AttocubeAMC.PositionStream import PositionStream
+
+
+def test_stream_waits_for_target_without_caller_polling():
+    piezo = Piezo_AttocubeAMC_Driver_Mock(movement_speed_nm_per_s=1_000_000.0)
+
+    with PositionStream(piezo, rate_hz=1000, capacity=50) as stream:
+        piezo.set_position(x_nm=100_000, move_x=True)
+        sample = stream.wait_until_reached((100_000, 0, 0), tolerance_nm=1.0, axes=(True, False, False), require_stopped=True, timeout_s=2.0)
+        timeout = stream.wait_until_reached((200_000, 0, 0), tolerance_nm=1.0, timeout_s=0.05)
+
+    assert sample is not None
+    time_s, position_nm, moving = sample
+    assert position_nm[0] == 100_000 and not moving.any()
+    assert timeout is None
+    assert not stream.is_running()
+
+    times_s, positions_nm, moving = stream.get_samples()
+    assert stream.n_samples > 50 and len(times_s) == 50
+    assert np.all(np.diff(times_s) > 0)
+    assert positions_nm.shape == (50, 3) and moving.shape == (50, 3)
+
+
+def test_samples_since_and_latest():
+    piezo = Piezo_AttocubeAMC_Driver_Mock(initial_position_nm=(1.0, 2.0, 3.0))
+    stream = PositionStream(piezo, capacity=4)
+    assert stream.get_latest() is None
+
+    for _ in range(3):
+        stream.sample_once()
+    cutoff_s = time.monotonic()
+    piezo.set_position(z_nm=5, move_z=True)
+    stream.sample_once()
+
+    times_s, positions_nm, _ = stream.get_samples(since_s=cutoff_s)
+    assert len(times_s) == 1 and positions_nm[0].tolist() == [1.0, 2.0, 5.0]
+    assert stream.get_latest()[1].tolist() == [1.0, 2.0, 5.0]
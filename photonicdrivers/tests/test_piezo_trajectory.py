@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.Mocks.Piezo_AttocubeAMC_Driver_Mock import Piezo_AttocubeAMC_Driver_Mock
+from photonicdrivers.Piezo_AttocubeAMC.PositionStream import PositionStream
+from photonicdrivers.Piezo_AttocubeAMC.Trajectory import (
+    TrajectoryExecutor,
+    raster_waypoints,
+    serpentine_waypoints,
+    spiral_waypoints,
+)
+
+
+def test_waypoint_patterns():
+    x_nm = np.array([0.0, 10.0, 20.0])
+    y_nm = np.array([0.0, 5.0])
+
+    raster = raster_waypoints(x_nm, y_nm, z_nm=7.0)
+    serpentine = serpentine_waypoints(x_nm, y_nm, z_nm=7.0)
+    spiral = spiral_waypoints((100.0, 200.0, 3.0), max_radius_nm=1000.0, pitch_nm=100.0, step_nm=10.0)
+
+    assert raster[:, 0].tolist() == [0, 10, 20, 0, 10, 20]
+    assert serpentine[:, 0].tolist() == [0, 10, 20, 20, 10, 0]
+    assert serpentine[:, 1].tolist() == [0, 0, 0, 5, 5, 5]
+    assert np.all(serpentine[:, 2] == 7.0)
+    steps = np.linalg.norm(np.diff(spiral[:, :2], axis=0), axis=1)
+    assert spiral[0].tolist() == [100.0, 200.0, 3.0]
+    assert np.hypot(spiral[:, 0] - 100, spiral[:, 1] - 200).max() <= 1000.0
+    assert np.median(steps) == pytest.approx(10.0, rel=0.05)
+
+
+def test_serpentine_scan_with_acquisition_on_mock():
+    piezo = Piezo_AttocubeAMC_Driver_Mock(movement_speed_nm_per_s=5_000_000.0, x_position_error_std_nm=2.0, random_seed=1)
+    waypoints = serpentine_waypoints(np.linspace(0, 9_000, 10), np.linspace(0, 9_000, 10), z_nm=500.0)
+    executor = TrajectoryExecutor(piezo, tolerance_nm=20.0)
+
+    result = executor.run(waypoints, on_point=lambda index, position: (index, position[0]))
+
+    assert result.reached.all()
+    assert result.achieved_nm.shape == (100, 3)
+    assert np.abs(result.errors_nm[:, :2]).max() <= 20.0
+    assert [acquisition[0] for acquisition in result.acquisitions] == list(range(100))
+    assert np.all(np.diff(result.command_s) > 0) and np.all(result.settle_durations_s >= 0)
+    assert piezo.control_move_enabled == [True, True, False]
+    # z was not moved
+    assert np.all(result.achieved_nm[:, 2] == 0.0)
+
+
+def test_fly_through_with_stream_and_limit_check():
+    piezo = Piezo_AttocubeAMC_Driver_Mock(x_max_nm=100_000, movement_speed_nm_per_s=20_000_000.0)
+    waypoints = raster_waypoints(np.linspace(0, 90_000, 10), [0.0])
+    stream = PositionStream(piezo, rate_hz=2000)
+    executor = TrajectoryExecutor(piezo, tolerance_nm=1.0, lookahead_nm=500.0, stream=stream)
+
+    result = executor.run(waypoints, axes=(True, False, False))
+
+    assert result.reached.all()
+    assert not stream.is_running()
+    assert abs(result.errors_nm[-1, 0]) <= 1.0
+    assert np.abs(result.errors_nm[:, 0]).max() <= 500.0
+
+    with pytest.raises(ValueError, match="Waypoint 1"):
+        executor.run([[0, 0, 0], [200_000, 0, 0]], axes=(True, False, False))
+    assert len(piezo.command_history) == 10
+
+
+def test_stage_stopping_outside_tolerance_is_reported():
+    piezo = Piezo_AttocubeAMC_Driver_Mock(movement_speed_nm_per_s=1_000_000.0, x_position_error_std_nm=1_000.0, random_seed=3)
+    executor = TrajectoryExecutor(piezo, tolerance_nm=0.001, settle_timeout_s=0.5)
+
+    result = executor.run([[10_000, 0, 0], [20_000, 0, 0]], axes=(True, False, False))
+
+    assert not result.reached.any()
+    assert result.duration_s < 0.5
@@ -0,0 +1,92 @@
+import socket
+import threading
+
+from photonicdrivers.QDAC.QDAC2_Driver import QDAC2_Driver
+
+
+class _FakeQDAC2:
+    """Keeps channel voltages and an error queue, and counts the commands and writes it receives."""
+
+    def __init__(self):
+        self.voltages = {str(channel): "0" for channel in range(1, 11)}
+        self.errors = []
+        self.commands = []
+        self.n_writes = 0
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _reply(self, command):
+        if command == "syst:err:coun?":
+            return str(len(self.errors))
+        if command == "syst:err:all?":
+            errors, self.errors = ",".join(self.errors), []
+            return errors
+        channel = command[4:command.index(":")]
+        if command.endswith(":volt?"):
+            return self.voltages[channel]
+        if ":volt " in command:
+            voltage = command.split(" ")[1]
+            if abs(float(voltage)) > 10:
+                self.errors.append('-222,"Data out of range"')
+            else:
+                self.voltages[channel] = voltage
+            return None
+        return "LOW" if ":rang?" in command else "FIX"
+
+    def _serve(self):
+        connection, _ = self.listener.accept()
+        buffer = b""
+        with connection:
+            while chunk := connection.recv(4096):
+                self.n_writes += 1
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    self.commands.append(line.decode())
+                    reply = self._reply(line.decode())
+                    if reply is not None:
+                        connection.sendall((reply + "\n").encode())
+
+
+def _connected_driver(**kwargs):
+    server = _FakeQDAC2()
+    qdac = QDAC2_Driver("127.0.0.1", server.port, **kwargs)
+    qdac.connect()
+    return server, qdac
+
+
+def test_sweep_checks_errors_once(capsys):
+    server, qdac = _connected_driver()
+    voltages = [f"{v / 100:.2f}" for v in range(200)] + ["12"]
+
+    read_back = qdac.sweep_voltage("3", voltages, on_point=lambda _: qdac.get_voltage("3"))
+
+    error_queries = [command for command in server.commands if command.startswith("syst:err")]
+    # One count and one readout of the error queue after the sweep; the readbacks inside are not checked either
+    assert error_queries == ["syst:err:coun?", "syst:err:all?"]
+    assert read_back[:3] == ["0.00", "0.01", "0.02"] and read_back[-1] == "1.99"
+    assert "Data out of range" in capsys.readouterr().out
+    assert qdac.error_check_mode == "command"
+    qdac.disconnect()
+
+
+def test_command_mode_checks_every_command_and_replies_are_framed():
+    server, qdac = _connected_driver()
+
+    qdac.set_voltage("1", "0.5")
+
+    assert qdac.get_voltage("1") == "0.5"
+    assert server.commands == ["sour1:volt 0.5", "syst:err:coun?", "sour1:volt?", "syst:err:coun?"]
+    qdac.disconnect()
+
+
+def test_settings_are_pipelined():
+    server, qdac = _connected_driver(error_check_mode="deferred")
+
+    settings = qdac.get_settings()
+
+    assert server.n_writes == 1
+    assert settings["channels"]["10"] == {"voltage": "0", "range": "LOW", "mode": "FIX"}
+    assert qdac.check_errors() == ""
+    qdac.disconnect()
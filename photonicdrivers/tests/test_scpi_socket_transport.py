@@ -0,0 +1,99 @@
+import socket
+import threading
+
+import pytest
+
+from photonicdrivers.Abstract.ScpiSocketTransport import ScpiSocketTransport, split_response_units
+from photonicdrivers.Magnets.AMI430_PS_Driver import AMI430_PS_Driver
+
+
+class _FakeScpiServer:
+    """Answers "X?" with the value in replies[X] and counts the writes it receives."""
+
+    def __init__(self, replies, greeting=b"", compound=True):
+        self.replies = replies
+        self.greeting = greeting
+        self.compound = compound
+        self.n_writes = 0
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        connection, _ = self.listener.accept()
+        connection.sendall(self.greeting)
+        buffer = b""
+        with connection:
+            while True:
+                chunk = connection.recv(4096)
+                if not chunk:
+                    return
+                self.n_writes += 1
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    commands = line.decode().split(";") if self.compound else [line.decode()]
+                    answers = [self.replies[command[:-1]] for command in commands if command.endswith("?")]
+                    if answers:
+                        # Deliberately split the reply over two packets
+                        reply = (";".join(answers) + "\r\n").encode()
+                        connection.sendall(reply[:3])
+                        connection.sendall(reply[3:])
+
+
+def test_batched_and_pipelined_queries_take_one_write():
+    server = _FakeScpiServer({"A": "1.5", "B": '"x;y"', "C": "7"})
+    transport = ScpiSocketTransport("127.0.0.1", server.port)
+    transport.connect()
+
+    assert transport.query_batch(["A?", "SET 3", "B?", "C?"]) == ["1.5", None, '"x;y"', "7"]
+    assert transport.query_pipelined(["C?", "A?", "B?"]) == ["7", "1.5", '"x;y"']
+    assert transport.round_trips == 2
+    transport.close()
+    server.thread.join(1.0)
+    assert server.n_writes == 2
+
+
+def test_pipelining_respects_max_outstanding():
+    server = _FakeScpiServer({str(n): str(n) for n in range(10)}, compound=False)
+    transport = ScpiSocketTransport("127.0.0.1", server.port, max_outstanding=4)
+    transport.connect()
+
+    assert transport.query_pipelined([f"{n}?" for n in range(10)]) == [str(n) for n in range(10)]
+    assert transport.round_trips == 3
+    transport.close()
+
+
+def test_batch_reply_count_mismatch_raises():
+    server = _FakeScpiServer({"A": "1;2"})
+    transport = ScpiSocketTransport("127.0.0.1", server.port)
+    transport.connect()
+    with pytest.raises(ValueError):
+        transport.query_batch(["A?"])
+    transport.close()
+
+
+def test_split_response_units_keeps_quoted_separators():
+    assert split_response_units('1; "a;b" ;\'c;\'') == ["1", '"a;b"', "'c;'"]
+
+
+def test_ami430_settings_snapshot_is_one_round_trip():
+    replies = {
+        "*IDN": "AMI,430,123,2.0", "FIELD:UNITS": "1", "RAMP:RATE:UNITS": "0", "CURRent:LIMit": "50.0",
+        "CURRent:MAGnet": "1.25", "CURRent:TARGet": "2.0", "FIELD:MAGnet": "0.125", "FIELD:TARGet": "0.2",
+        "VOLTage:MAGnet": "0.01", "VOLTage:SUPPly": "0.5", "COILconst": "0.1", "PSwitch": "0", "QUench": "0",
+        "STATE": "2", "RAMP:RATE:CURRent:1": "0.1,50.0", "RAMP:RATE:FIELD:1": "0.01,5.0",
+    }
+    server = _FakeScpiServer(replies, greeting=b"American Magnetics Model 430 IP Interface\r\nHello.\r\n", compound=False)
+    magnet = AMI430_PS_Driver("127.0.0.1", server.port)
+    magnet.connect()
+    n_writes = server.n_writes
+
+    settings = magnet.get_all_settings()
+
+    assert server.n_writes - n_writes == 1
+    assert settings["Unit"] == "T" and settings["Field"] == 0.125
+    assert settings["Sweep_Mode"] == ("HOLDING at target", "2")
+    assert settings["RampRate_Field_Segment1"] == "0.01,5.0"
+    magnet.disconnect()
@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pytest
+
+from photonicdrivers.SNSPDs.BiasSweep import find_operating_points, load_bias_sweep, read_websq_sweep_file
+from photonicdrivers.SNSPDs.SNSPD_SQ_Driver import SNSPD_SQ_Driver
+
+SWEEP_FILE = os.path.join(os.path.dirname(__file__), "..", "SNSPDs", "Driver1CurrentSweep.txt")
+
+
+class _FakeWebSQ:
+    """Detectors under illumination: a sigmoid onto a plateau, dark counts rising towards Ic and latching above it."""
+
+    knee_uA = np.array([10.0, 12.0, 14.0, 16.0])
+    switching_uA = np.array([24.0, 26.0, 28.0, 30.0])
+    plateau_counts = np.array([1000.0, 2000.0, 3000.0, 4000.0])
+
+    def __init__(self):
+        self.bias_uA = np.array([5.0, 5.0, 5.0, 5.0])
+        self.bias_history = []
+        self.n_acquisitions = 0
+
+    def get_number_of_detectors(self):
+        return 4
+
+    def get_bias_current(self):
+        return list(self.bias_uA)
+
+    def set_bias_current(self, current_in_uA):
+        self.bias_uA = np.array(current_in_uA)
+        self.bias_history.append(list(current_in_uA))
+
+    def get_measurement_periode(self):
+        return 10.0
+
+    def acquire_cnts(self, n):
+        self.n_acquisitions += 1
+        bias = self.bias_uA
+        counts = self.plateau_counts / (1 + np.exp(-(bias - self.knee_uA) / 0.5))
+        counts = counts + 50 * np.exp((bias - self.switching_uA) / 0.5)
+        counts = np.where(bias > self.switching_uA, 0.0, counts)
+        rows = np.zeros((n, 5))
+        rows[:, 0] = np.arange(n)
+        rows[:, 1:] = counts
+        return rows
+
+
+def _driver():
+    driver = SNSPD_SQ_Driver.__new__(SNSPD_SQ_Driver)
+    driver.ip_address = "127.0.0.1"
+    driver.websq = _FakeWebSQ()
+    return driver
+
+
+def test_sweep_steps_all_detectors_and_picks_bias_on_plateau(tmp_path):
+    driver = _driver()
+    bias_uA = np.arange(5.0, 32.0, 0.25)
+
+    points = driver.optimize_bias(bias_uA, path=str(tmp_path / "sweep.npz"), n_measurements=3)
+
+    assert driver.websq.n_acquisitions == len(bias_uA)
+    assert all(len(set(step)) == 1 for step in driver.websq.bias_history[:len(bias_uA)])
+    assert points.has_plateau.all()
+    assert np.allclose(points.switching_current_uA, _FakeWebSQ.switching_uA, atol=0.25)
+    assert np.all(points.knee_uA > _FakeWebSQ.knee_uA) and np.all(points.knee_uA < _FakeWebSQ.knee_uA + 3)
+    assert np.all(points.optimal_bias_uA > points.knee_uA)
+    assert np.all(points.optimal_bias_uA < 0.95 * points.switching_current_uA + 1e-9)
+    assert np.allclose(points.plateau_counts, _FakeWebSQ.plateau_counts, rtol=0.05)
+    assert driver.websq.bias_history[-1] == list(points.optimal_bias_uA)
+
+    stored = load_bias_sweep(str(tmp_path / "sweep.npz"))
+    assert stored.counts.shape == (len(bias_uA), 4)
+    assert stored.integration_time_ms == 10.0
+    assert stored.metadata["n_measurements"] == 3
+    assert np.allclose(find_operating_points(stored).optimal_bias_uA, points.optimal_bias_uA, atol=0.25)
+
+
+def test_sweep_restores_bias_and_checks_shape():
+    driver = _driver()
+
+    driver.sweep_bias(np.linspace(5, 10, 4))
+    assert driver.websq.bias_history[-1] == [5.0, 5.0, 5.0, 5.0]
+    with pytest.raises(ValueError):
+        driver.sweep_bias(np.zeros((4, 3)))
+
+
+def test_dark_sweep_from_websq_export_falls_back_to_switching_current():
+    sweep = read_websq_sweep_file(SWEEP_FILE)
+
+    points = find_operating_points(sweep)
+
+    assert sweep.counts.shape == (351, 4) and sweep.integration_time_ms == 200.0
+    assert not points.has_plateau.any()
+    assert np.all(points.switching_current_uA > 20) and np.all(points.switching_current_uA < 35)
+    assert np.allclose(points.optimal_bias_uA, 0.9 * points.switching_current_uA)
@@ -0,0 +1,92 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from photonicdrivers.SNSPDs.FilesFromManufacturer.WebSQControl import SQCounts
+
+
+class _FakeCountsServer:
+    """Sends whatever is put in chunks, as separate TCP writes."""
+
+    def __init__(self):
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.connection = None
+        self.connected = threading.Event()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        self.connection, _ = self.listener.accept()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connected.set()
+
+    def send(self, data):
+        self.connected.wait(1.0)
+        self.connection.sendall(data)
+
+
+def _lines(start, stop):
+    return b"".join(f"{1700000000 + n / 100:.2f},{n},{2 * n},{3 * n},{4 * n}\n".encode() for n in range(start, stop))
+
+
+def _counts(server, buffer=100):
+    counts = SQCounts(TCP_IP_ADR="127.0.0.1", TCP_IP_PORT=server.port, CNTS_BUFFER=buffer, TIME_OUT=0.2)
+    counts.daemon = True
+    counts.start()
+    return counts
+
+
+def test_every_line_is_kept_across_reads():
+    server = _FakeCountsServer()
+    counts = _counts(server)
+
+    data = _lines(0, 50)
+    # Several lines per read and lines split over reads
+    for cut_start, cut_stop in [(0, 7), (7, 200), (200, 201), (201, len(data))]:
+        server.send(data[cut_start:cut_stop])
+        time.sleep(0.01)
+
+    received = []
+    while sum(len(chunk) for chunk in received) < 50:
+        received.append(counts.read_new(timeout=1.0))
+    received = np.concatenate(received)
+
+    assert received.shape == (50, 5)
+    assert received[:, 1].tolist() == list(range(50))
+    assert received[:, 4].tolist() == [4 * n for n in range(50)]
+    assert counts.n_dropped == 0 and counts.n_malformed == 0
+    counts.close()
+    counts.join(1.0)
+    assert not counts.is_alive()
+
+
+def test_get_n_blocks_until_new_samples_and_overflow_is_counted():
+    server = _FakeCountsServer()
+    counts = _counts(server, buffer=10)
+    server.send(_lines(0, 3))
+    while counts.n < 3:
+        time.sleep(0.005)
+
+    threading.Timer(0.05, server.send, args=(_lines(3, 6) + b"garbage\n1,2\n",)).start()
+    start_s = time.monotonic()
+    latest = counts.get_n(3, timeout=1.0)
+
+    assert time.monotonic() - start_s >= 0.04
+    assert latest[:, 1].tolist() == [3, 4, 5]
+    with pytest.raises(IOError):
+        counts.get_n(1, timeout=0.05)
+
+    server.send(_lines(6, 30))
+    time.sleep(0.1)
+    newest = counts.read_new(timeout=1.0)
+    assert newest[:, 1].tolist() == list(range(20, 30))
+    assert counts.n_dropped == 20
+    assert counts.n_malformed == 2
+
+    server.connection.close()
+    with pytest.raises(IOError):
+        counts.get_n(1, timeout=1.0)
+    counts.close()
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from photonicdrivers.Spectrometers.CalibrationCache import CalibrationCache, CalibrationKey
+
+COEFFICIENTS = (700.0, 0.05, 1e-6, -2e-10)
+
+
+def _key(center_wavelength_nm=780.0, grating=1):
+    return CalibrationKey("KY-328i", grating, center_wavelength_nm, 1024, 26.0)
+
+
+def test_wavelength_axis_is_computed_once_from_the_coefficients():
+    cache = CalibrationCache(path=None)
+    assert cache.get_wavelengths(_key()) is None
+
+    cache.put_coefficients(_key(), COEFFICIENTS)
+    wavelengths = cache.get_wavelengths(_key())
+
+    pixels = np.arange(1024)
+    expected = COEFFICIENTS[0] + COEFFICIENTS[1] * pixels + COEFFICIENTS[2] * pixels ** 2 + COEFFICIENTS[3] * pixels ** 3
+    np.testing.assert_allclose(wavelengths, expected)
+    assert cache.get_wavelengths(_key()) is wavelengths
+    with pytest.raises(ValueError):
+        wavelengths[0] = 0.0
+
+
+def test_keys_differ_by_setting_and_ignore_float_noise():
+    cache = CalibrationCache(path=None)
+    cache.put_coefficients(_key(780.0), COEFFICIENTS)
+
+    assert _key(780.0 + 1e-9) in cache
+    assert _key(780.1) not in cache
+    assert _key(780.0, grating=2) not in cache
+
+
+def test_calibrations_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache" / "calibration.json")
+    cache = CalibrationCache(path)
+    cache.put_coefficients(_key(780.0), COEFFICIENTS)
+    cache.put_coefficients(_key(830.0), (750.0, 0.05, 0.0, 0.0))
+
+    reloaded = CalibrationCache(path)
+
+    assert len(reloaded) == 2
+    assert reloaded.get_coefficients(_key(780.0)) == COEFFICIENTS
+    np.testing.assert_allclose(reloaded.get_wavelengths(_key(830.0)), cache.get_wavelengths(_key(830.0)))
+
+    reloaded.clear()
+    assert len(CalibrationCache(path)) == 0
+
+
+def test_unknown_format_version_is_rejected(tmp_path):
+    path = tmp_path / "calibration.json"
+    path.write_text(json.dumps({"format_version": 99, "calibrations": []}))
+
+    with pytest.raises(ValueError):
+        CalibrationCache(str(path))
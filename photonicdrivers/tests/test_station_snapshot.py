@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from photonicdrivers.Abstract.StationSnapshot import StationSnapshotService
+
+
+class _FakeDriver:
+    def __init__(self, delay_s=0.0, error=None):
+        self.delay_s = delay_s
+        self.error = error
+        self.commands = []
+        self.n_concurrent = 0
+        self.max_concurrent = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def get_settings(self):
+        with self.lock:
+            self.n_concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.n_concurrent)
+        for command in ("a?", "b?", "c?"):
+            time.sleep(self.delay_s / 3)
+            self.commands.append(command)
+        with self.lock:
+            self.n_concurrent -= 1
+        if self.error is not None:
+            raise self.error
+        return {"delay_s": self.delay_s}
+
+
+class _AllSettingsDriver(_FakeDriver):
+    def get_all_settings(self):
+        return {"all": True}
+
+
+def test_instruments_are_queried_concurrently():
+    drivers = {f"instrument_{n}": _FakeDriver(delay_s=0.2) for n in range(15)}
+    with StationSnapshotService() as service:
+        for name, driver in drivers.items():
+            service.add(name, driver)
+        service.add("magnet", _AllSettingsDriver())
+
+        snapshot = service.snapshot()
+
+    assert snapshot.ok
+    assert snapshot.duration_s < 0.6
+    assert snapshot["magnet"] == {"all": True}
+    assert list(snapshot.instruments) == list(drivers) + ["magnet"]
+    assert all(driver.commands == ["a?", "b?", "c?"] for driver in drivers.values())
+    assert snapshot.to_dict()["instruments"]["instrument_0"]["status"] == "ok"
+
+
+def test_timeouts_errors_and_busy_instruments_are_reported():
+    slow = _FakeDriver(delay_s=0.3)
+    with StationSnapshotService(default_timeout_s=1.0) as service:
+        service.add("slow", slow, timeout_s=0.05)
+        service.add("broken", _FakeDriver(error=RuntimeError("no reply")))
+        service.add("fine", _FakeDriver())
+
+        first = service.snapshot()
+        second = service.snapshot()
+        time.sleep(0.35)
+        third = service.snapshot(["slow"])
+
+    assert first.instruments["slow"].status == "timeout" and first.duration_s < 0.2
+    assert first.instruments["broken"].status == "error"
+    assert isinstance(first.instruments["broken"].error, RuntimeError)
+    assert first.instruments["fine"].ok and not first.ok
+    # The timed-out call is still running, so the instrument is not queried a second time
+    assert second.instruments["slow"].status == "busy"
+    assert slow.max_concurrent == 1
+    assert list(third.instruments) == ["slow"]
+
+
+def test_driver_without_settings_method_needs_a_method():
+    service = StationSnapshotService()
+    with pytest.raises(ValueError):
+        service.add("bare", object())
+    service.add("bare", object(), method=lambda driver: {"type": type(driver).__name__})
+    assert service.snapshot()["bare"] == {"type": "object"}
+    service.close()
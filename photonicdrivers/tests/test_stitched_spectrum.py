@@ -0,0 +1,163 @@
+import time
+
+import numpy as np
+import pytest
+
+from photonicdrivers.Spectrometers.StitchedSpectrum import StitchedAcquisition, plan_center_wavelengths, stitch_spectra
+
+N_PIXELS = 200
+SPAN_NM = 50.0
+
+
+def _true_spectrum(wavelengths_nm):
+    return 100 + 1000 * np.exp(-0.5 * ((wavelengths_nm - 700) / 15) ** 2)
+
+
+def _calibration(center_nm):
+    """Wavelength of every SDK pixel, slightly non-linear like a real grating."""
+    pixels = np.arange(N_PIXELS)
+    return center_nm - SPAN_NM / 2 + SPAN_NM * pixels / (N_PIXELS - 1) + 1e-5 * pixels * (pixels - N_PIXELS + 1)
+
+
+class _FakeSpectrograph:
+    def __init__(self, move_s=0.05):
+        self.move_s = move_s
+        self.center_nm = None
+        self.moving = False
+        self.events = []
+        self.camera = None
+        self.moves_during_exposure = 0
+
+    def set_center_wavelength(self, center_nm):
+        if self.camera is not None and self.camera.is_acquiring():
+            self.moves_during_exposure += 1
+        self.moving = True
+        self.events.append(("move", float(center_nm)))
+        time.sleep(self.move_s)
+        self.center_nm = float(center_nm)
+        self.moving = False
+
+    def get_calibration_array(self, n_pixels, pixel_width_um):
+        assert not self.moving
+        return _calibration(self.center_nm)
+
+
+class _FakeCamera:
+    num_pixel_x = N_PIXELS
+    size_pixel_x = 26.0
+
+    def __init__(self, spectrograph, read_s=0.05, n_scans=1, scan_s=0.0):
+        self.spectrograph = spectrograph
+        self.read_s = read_s
+        self.n_scans = n_scans
+        self.scan_s = scan_s
+        self.scans_left = 0
+        self.reads_during_move = 0
+        self.exposed_nm = None
+        spectrograph.camera = self
+
+    def start_acquisition(self):
+        assert not self.spectrograph.moving
+        self.exposed_nm = self.spectrograph.center_nm
+        self.spectrograph.events.append(("expose", self.exposed_nm))
+        self.scans_left = self.n_scans
+
+    def wait_for_acquisition(self, timeout_ms):
+        # Like WaitForAcquisitionTimeOut, signalled after every scan of an accumulation
+        if self.scans_left == 0:
+            return False
+        time.sleep(self.scan_s)
+        self.scans_left -= 1
+        return True
+
+    def is_acquiring(self):
+        return self.scans_left > 0
+
+    def read_spectrum(self):
+        time.sleep(self.read_s)
+        if self.spectrograph.moving:
+            self.reads_during_move += 1
+        # Columns reversed with respect to the SDK pixels, like get_image
+        return _true_spectrum(_calibration(self.exposed_nm)[::-1]).reshape(1, -1)
+
+
+def test_plan_covers_the_range_with_the_requested_overlap():
+    centers = plan_center_wavelengths(600.0, 900.0, SPAN_NM, overlap=0.2)
+
+    assert centers[0] - SPAN_NM / 2 == pytest.approx(600.0)
+    assert centers[-1] + SPAN_NM / 2 == pytest.approx(900.0)
+    assert np.all(np.diff(centers) <= SPAN_NM * 0.8 + 1e-9)
+    assert len(plan_center_wavelengths(600.0, 900.0, SPAN_NM, overlap=0.0)) == 6
+    np.testing.assert_allclose(plan_center_wavelengths(600.0, 620.0, SPAN_NM), [610.0])
+
+
+def test_stitching_reconstructs_a_smooth_spectrum_from_descending_segments():
+    centers = plan_center_wavelengths(640.0, 760.0, SPAN_NM, overlap=0.25)
+    segment_wavelengths = np.stack([_calibration(center)[::-1] for center in centers])
+    segment_counts = _true_spectrum(segment_wavelengths)[:, None, :]
+
+    axis_nm, counts = stitch_spectra(segment_wavelengths, segment_counts)
+
+    assert counts.shape == (1, len(axis_nm))
+    assert axis_nm[0] == pytest.approx(640.0) and axis_nm[-1] == pytest.approx(760.0, abs=0.3)
+    np.testing.assert_allclose(counts[0], _true_spectrum(axis_nm), rtol=1e-3)
+
+
+def test_overlap_regions_cross_fade_between_segments():
+    wavelengths = np.stack([np.linspace(600, 650, 51), np.linspace(640, 690, 51)])
+    counts = np.stack([np.full(51, 100.0), np.full(51, 200.0)])
+
+    axis_nm, merged = stitch_spectra(wavelengths, counts, axis_nm=np.array([620.0, 640.0, 645.0, 650.0, 680.0]))
+
+    np.testing.assert_allclose(merged, [100.0, 100.0, 150.0, 200.0, 200.0], atol=1e-6)
+
+
+def test_acquisition_moves_the_grating_while_reading_out():
+    spectrograph = _FakeSpectrograph(move_s=0.1)
+    camera = _FakeCamera(spectrograph, read_s=0.02)
+    centers = [650.0, 690.0, 730.0]
+
+    result = StitchedAcquisition(spectrograph, camera).run(center_wavelengths_nm=centers)
+
+    assert spectrograph.events == [
+        ("move", 650.0), ("expose", 650.0), ("move", 690.0), ("expose", 690.0), ("move", 730.0), ("expose", 730.0)
+    ]
+    assert camera.reads_during_move == 2
+    assert result.segment_counts.shape == (3, 1, N_PIXELS)
+    np.testing.assert_allclose(result.counts[0], _true_spectrum(result.wavelengths_nm), rtol=1e-3)
+
+
+def test_acquisition_can_wait_for_the_grating_before_reading_out():
+    spectrograph = _FakeSpectrograph(move_s=0.02)
+    camera = _FakeCamera(spectrograph, read_s=0.0)
+
+    StitchedAcquisition(spectrograph, camera, overlap_moves=False).run(center_wavelengths_nm=[650.0, 690.0])
+
+    assert camera.reads_during_move == 0
+
+
+def test_grating_waits_for_all_accumulated_scans():
+    spectrograph = _FakeSpectrograph(move_s=0.0)
+    camera = _FakeCamera(spectrograph, read_s=0.0, n_scans=3, scan_s=0.01)
+
+    StitchedAcquisition(spectrograph, camera).run(center_wavelengths_nm=[650.0, 690.0, 730.0])
+
+    assert spectrograph.moves_during_exposure == 0
+    assert camera.scans_left == 0
+
+
+def test_acquisition_reports_errors_of_the_grating_move():
+    spectrograph = _FakeSpectrograph(move_s=0.0)
+    camera = _FakeCamera(spectrograph, read_s=0.0)
+    moves = []
+
+    def failing_move(center_nm):
+        moves.append(center_nm)
+        if len(moves) > 1:
+            raise RuntimeError("grating stuck")
+        _FakeSpectrograph.set_center_wavelength(spectrograph, center_nm)
+
+    spectrograph.set_center_wavelength = failing_move
+
+    with pytest.raises(RuntimeError, match="grating stuck"):
+        StitchedAcquisition(spectrograph, camera).run(center_wavelengths_nm=[650.0, 690.0])
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.Mocks.Swabian_TimeTagger_Driver_Mock import (
+    PoissonSource,
+    PulsedSource,
+    Swabian_TimeTagger_Driver_Mock,
+    _dead_time_mask,
+)
+
+
+def _reference_dead_time(timestamps, dead_time_ps):
+    keep, last = [], None
+    for t in timestamps.tolist():
+        keep.append(last is None or t - last >= dead_time_ps)
+        if keep[-1]:
+            last = t
+    return np.array(keep)
+
+
+def test_pulsed_and_poisson_sources_produce_the_configured_rates():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=1e6), PoissonSource(2, rate_hz=2e5)], random_seed=0)
+
+    data = tagger.get_time_tag_data([1, 2], acquisition_time_ps=1e11)
+
+    timestamps, channels = data.getTimestamps(), data.getChannels()
+    assert np.all(np.diff(timestamps) >= 0)
+    assert np.all(np.diff(timestamps[channels == 1]) == 1_000_000)
+    assert int(np.sum(channels == 1)) == 100_000
+    assert abs(int(np.sum(channels == 2)) - 20_000) < 5 * np.sqrt(20_000)
+    assert tagger.time_ps == 100_000_000_000
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_dead_time_mask_matches_sequential_reference(seed):
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.integers(0, 100_000, size=2_000))
+
+    np.testing.assert_array_equal(_dead_time_mask(timestamps, 300, None), _reference_dead_time(timestamps, 300))
+    # Periodic input faster than the dead time: every third event survives
+    np.testing.assert_array_equal(np.flatnonzero(_dead_time_mask(np.arange(0, 3000, 100), 250, None)), np.arange(0, 30, 3))
+
+
+def test_dead_time_and_event_divider_carry_over_between_blocks():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PoissonSource(3, rate_hz=5e8)], block_duration_ps=7_000, random_seed=2)
+    reference = Swabian_TimeTagger_Driver_Mock(sources=[PoissonSource(3, rate_hz=5e8)], block_duration_ps=7_000, random_seed=2)
+    raw = reference.get_time_tag_data([3], acquisition_time_ps=2_000_000).getTimestamps()
+
+    tagger.set_dead_time(3, 4_000)
+    tagger.set_event_divider(3, 2)
+    filtered = tagger.get_time_tag_data([3], acquisition_time_ps=2_000_000).getTimestamps()
+
+    np.testing.assert_array_equal(filtered, raw[_reference_dead_time(raw, 4_000)][::2])
+
+
+def test_conditional_filter_passes_one_filtered_event_per_trigger():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=1e6), PoissonSource(2, rate_hz=5e6)], block_duration_ps=3_000_000, random_seed=3)
+    tagger.set_conditional_channel(1, [2])
+
+    data = tagger.get_time_tag_data([1, 2], acquisition_time_ps=1e9)
+
+    channels = data.getChannels()
+    assert tagger.get_conditional_filter_trigger() == [1]
+    # Never two filtered events without a trigger in between
+    assert not np.any((channels[1:] == 2) & (channels[:-1] == 2))
+    assert 0 < np.sum(channels == 2) <= np.sum(channels == 1)
+
+
+def test_histogram_of_synchronised_source_shows_the_lifetime_decay():
+    tagger = Swabian_TimeTagger_Driver_Mock(
+        sources=[PulsedSource(1, frequency_hz=10e6), PoissonSource(2, rate_hz=2e6, sync_channel=1, delay_ps=5_000, lifetime_ps=2_000)],
+        random_seed=4,
+    )
+    histogram = tagger.initialise_histogram(start_channel=1, click_channel=2, bin_width_ps=1_000, num_bins=100)
+    counter = tagger.initialise_counter([1, 2], bin_width_ps=10**9, num_bins=10)
+
+    tagger.run_for(10**10)
+
+    data = histogram.getData()
+    assert data[:5].sum() == 0
+    assert data[5] > data[7] > data[9] > 0
+    assert counter.getData()[0].sum() == pytest.approx(1e5, rel=1e-3)
+    assert counter.getData()[1].sum() == pytest.approx(2e4, rel=0.05)
+
+
+def test_iterate_time_tag_data_uses_the_streaming_ring_buffer():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=1e9)], block_duration_ps=10**6, random_seed=5)
+
+    chunks = [chunk.copy() for chunk in tagger.iterate_time_tag_data([1], acquisition_time_ps=5 * 10**6, chunk_events=300)]
+
+    assert sum(chunk.size for chunk in chunks) == 5_000
+    assert max(chunk.size for chunk in chunks) == 300
+    assert not any(chunk.buffer_filled for chunk in chunks)
+
+
+def test_iterate_time_tag_data_starts_the_stream_on_first_use():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=1e9)], block_duration_ps=10**6, random_seed=5)
+
+    chunks = tagger.iterate_time_tag_data([1], chunk_events=300)
+    assert tagger._streams == []
+
+    next(chunks)
+    assert len(tagger._streams) == 1
+    chunks.close()
+    assert tagger._streams == []
+
+
+def test_frequency_measurements_of_a_jittered_clock():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=10e6, jitter_ps=20)], block_duration_ps=10**8, random_seed=6)
+    counter = tagger.initialise_frequency_counter([1], sampling_interval_ps=10**7, fitting_window_ps=10**6)
+    stability = tagger.initialise_frequency_stability(1, steps=[1, 10], average=10)
+
+    tagger.run_for(10**10)
+
+    data = counter.getDataObject()
+    assert data.size >= 990
+    assert np.nanmean(data.getFrequency()) == pytest.approx(10e6, rel=1e-6)
+    np.testing.assert_allclose(np.diff(data.getPeriodsCount()[0]), 100, atol=0.5)
+    result = stability.getDataObject()
+    np.testing.assert_allclose(result.getTau(), [1e-6, 1e-5], rtol=1e-6)
+    # White phase noise: ADEV = sqrt(3) * sigma_x / tau for phase samples averaged over 10 edges
+    np.testing.assert_allclose(result.getADEV(), np.sqrt(3) * 20e-12 / np.sqrt(10) / result.getTau(), rtol=0.1)
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError, match="sync"):
+        Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=1e6), PoissonSource(2, rate_hz=2e6, sync_channel=1)])
+    tagger = Swabian_TimeTagger_Driver_Mock()
+    with pytest.raises(ValueError, match="channel"):
+        tagger.set_dead_time(9, 1000)
+
+
+def test_iterate_time_tag_data_rejects_a_stream_buffer_larger_than_the_ring():
+    tagger = Swabian_TimeTagger_Driver_Mock(sources=[PulsedSource(1, frequency_hz=1e9)])
+    with pytest.raises(ValueError, match="buffer_events"):
+        tagger.iterate_time_tag_data([1], acquisition_time_ps=10**6, chunk_events=100, n_chunks=2, buffer_events=300)
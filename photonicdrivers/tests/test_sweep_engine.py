@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+import pytest
+
+from photonicdrivers.Power_Meters.MPM220.SweepEngine import SweepEngine, SweepSettings
+
+
+class _FakeLaser:
+    """Sweeps for the sweep duration of the power meter after :WAV:SWE 1, unless it ignores the start."""
+
+    def __init__(self, power_meter, ignores_start=False):
+        self.power_meter = power_meter
+        self.ignores_start = ignores_start
+        self.sweep_started_s = None
+        self.n_sweeps = 0
+        self.commands = []
+
+    def write(self, command):
+        self.commands.append(command)
+        if command == ":WAV:SWE 1" and not self.ignores_start:
+            self.sweep_started_s = time.monotonic()
+            self.power_meter.sweep_started_s = self.sweep_started_s
+        if command == ":WAV:SWE 0":
+            self._update()
+            self.sweep_started_s = None
+
+    def query(self, command):
+        self._update()
+        if command == ":WAV:SWE?":
+            return "1" if self.sweep_started_s is not None else "0"
+        assert command == ":WAV:SWE:COUN?"
+        return str(self.n_sweeps)
+
+    def _update(self):
+        if self.sweep_started_s is not None and time.monotonic() - self.sweep_started_s >= self.power_meter.sweep_duration_s:
+            self.sweep_started_s = None
+            self.n_sweeps += 1
+
+
+class _FakePowerMeter:
+    """Logs n_points samples per port, finishing sweep_duration_s after the laser starts; downloads take download_s."""
+
+    def __init__(self, sweep_duration_s, download_s=0.0):
+        self.sweep_duration_s = sweep_duration_s
+        self.download_s = download_s
+        self.sweep_started_s = None
+        self.n_points = 0
+        self.n_status_queries = 0
+        self.n_sweeps = 0
+        self.commands = []
+        self.events = []
+
+    def write(self, command):
+        self.commands.append(command)
+        if command.startswith("LOGN"):
+            self.n_points = int(command.split()[1])
+        if command == "MEAS":
+            self.n_sweeps += 1
+            self.sweep_started_s = None
+
+    def query(self, command):
+        assert command == "STAT?"
+        self.n_status_queries += 1
+        done = self.sweep_started_s is not None and time.monotonic() - self.sweep_started_s >= self.sweep_duration_s
+        return f"1,{self.n_points}" if done else "0,0"
+
+    def get_active_ports(self):
+        return [(0, 1), (0, 2), (1, 1)]
+
+    def get_logging_data_all(self, ports):
+        self.events.append(("download start", time.monotonic()))
+        time.sleep(self.download_s)
+        sweep = self.n_sweeps
+        self.events.append(("download end", time.monotonic()))
+        return np.stack([np.full(self.n_points, 10 * sweep + row, dtype=np.float32) for row in range(len(ports))])
+
+
+def test_single_sweep_returns_matched_wavelength_axis():
+    power_meter = _FakePowerMeter(sweep_duration_s=0.05)
+    laser = _FakeLaser(power_meter)
+    engine = SweepEngine(laser, power_meter)
+    settings = SweepSettings(start_nm=1500, stop_nm=1501, step_nm=0.01, speed_nm_per_s=20)
+
+    result = engine.run(settings)
+
+    assert result.power.shape == (3, 101)
+    assert result.wavelength_nm.shape == (101,)
+    assert result.wavelength_nm[0] == 1500 and result.wavelength_nm[-1] == pytest.approx(1501)
+    assert result.get_port(1, 1)[0] == 12
+    # Most of the sweep is slept through instead of polled
+    assert power_meter.n_status_queries < 6
+    assert laser.commands[-2:] == [":WAV:SWE 1", ":WAV:SWE 0"]
+    assert laser.n_sweeps == 1
+
+
+def test_laser_that_does_not_start_is_reported_and_stopped():
+    power_meter = _FakePowerMeter(sweep_duration_s=0.05)
+    laser = _FakeLaser(power_meter, ignores_start=True)
+    engine = SweepEngine(laser, power_meter, timeout_margin_s=0.1)
+
+    with pytest.raises(RuntimeError, match="did not start"):
+        engine.run(SweepSettings(start_nm=1500, stop_nm=1501, step_nm=0.01, speed_nm_per_s=20))
+
+    assert laser.commands[-1] == ":WAV:SWE 0"
+    assert power_meter.commands[-1] == "STOP"
+    assert power_meter.n_status_queries == 0
+
+
+def test_sequence_overlaps_download_with_preparation():
+    power_meter = _FakePowerMeter(sweep_duration_s=0.0, download_s=0.1)
+    laser = _FakeLaser(power_meter)
+    engine = SweepEngine(laser, power_meter)
+    settings = SweepSettings(start_nm=1500, stop_nm=1500.5, step_nm=0.1, speed_nm_per_s=200)
+    prepared = []
+
+    def prepare(index):
+        prepared.append((index, time.monotonic()))
+        time.sleep(0.1)
+
+    start_s = time.monotonic()
+    results = engine.run_sequence([settings] * 3, prepare=prepare)
+    elapsed_s = time.monotonic() - start_s
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert [result.power[0, 0] for result in results] == [10, 20, 30]
+    # Preparing sweep 1 started before the download of sweep 0 had finished
+    first_download_end = [t for event, t in power_meter.events if event == "download end"][0]
+    assert prepared[1][1] < first_download_end
+    assert elapsed_s < 0.55
+    # Identical settings configure the instruments only once
+    assert sum(command.startswith("WSET") for command in power_meter.commands) == 1
+    assert sum(command.startswith("WAV:SWE:STAR") for command in laser.commands) == 1
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import numpy as np
+
+from photonicdrivers.Cameras.Thorlabs.FramePipeline import CameraFramePipeline
+from photonicdrivers.Cameras.Thorlabs.thorlabs_tsi_sdk import tl_mono_to_color_processor
+from photonicdrivers.Cameras.Thorlabs.thorlabs_tsi_sdk.tl_camera_enums import SENSOR_TYPE
+
+
+class _FakeFrame:
+    def __init__(self, image_buffer, frame_count, time_stamp_relative_ns_or_null):
+        self.image_buffer = image_buffer
+        self.frame_count = frame_count
+        self.time_stamp_relative_ns_or_null = time_stamp_relative_ns_or_null
+
+
+class _FakeTLCamera:
+    """Produces a frame every period_s into one reused buffer, like the SDK; skip lists camera frame counts that are lost."""
+
+    def __init__(self, period_s=0.002, shape=(8, 6), skip=()):
+        self.period_s = period_s
+        self.image_poll_timeout_ms = 0
+        self.buffer = np.zeros(shape, dtype=np.uint16)
+        self.skip = set(skip)
+        self.frame_count = 0
+        self.n_polls = 0
+        self.next_frame_s = time.monotonic()
+
+    def get_pending_frame_or_null(self):
+        self.n_polls += 1
+        wait_s = self.next_frame_s - time.monotonic()
+        if wait_s > self.image_poll_timeout_ms / 1000:
+            time.sleep(self.image_poll_timeout_ms / 1000)
+            return None
+        time.sleep(max(wait_s, 0.0))
+        self.next_frame_s += self.period_s
+        self.frame_count += 1
+        while self.frame_count in self.skip:
+            self.frame_count += 1
+        self.buffer[:] = self.frame_count
+        return _FakeFrame(self.buffer, self.frame_count, self.frame_count * 1000)
+
+
+def test_reader_gets_every_frame_while_live_view_subsamples():
+    camera = _FakeTLCamera(skip=(5, 6))
+    converted = []
+
+    def to_rgb(frame):
+        converted.append(int(frame[0, 0]))
+        return np.repeat(frame[:, :, None], 3, axis=2)
+
+    pipeline = CameraFramePipeline(camera, capacity=64, poll_timeout_ms=50, color_converter=to_rgb)
+    reader = pipeline.create_reader()
+    with pipeline:
+        recorded = []
+        live = []
+        while len(recorded) < 40:
+            frame, info = reader.read(timeout_s=1.0)
+            assert np.all(frame == info.frame_count)
+            recorded.append(info)
+            if info.sequence % 10 == 0:
+                live.append(pipeline.get_latest_color())
+                pipeline.get_latest_color()
+
+    assert camera.image_poll_timeout_ms == 50
+    assert [info.sequence for info in recorded] == list(range(40))
+    assert [info.frame_count for info in recorded][:6] == [1, 2, 3, 4, 7, 8]
+    assert all(info.timestamp_ns == info.frame_count * 1000 for info in recorded)
+    assert pipeline.n_dropped == 2 and reader.n_dropped == 0
+    assert live[0][0].shape == (8, 6, 3)
+    assert len(converted) == len(set(converted)) <= len(live)
+    assert 200 < pipeline.get_frame_rate_hz() < 700
+
+
+def test_slow_reader_skips_overwritten_frames_and_views_are_read_only():
+    camera = _FakeTLCamera(period_s=0.001)
+    pipeline = CameraFramePipeline(camera, capacity=4, poll_timeout_ms=10)
+    reader = pipeline.create_reader()
+    pipeline.start()
+    while pipeline.n_frames < 20:
+        time.sleep(0.005)
+    pipeline.stop()
+
+    frame, info = reader.read(timeout_s=0.1)
+    assert reader.n_dropped == pipeline.n_frames - 4
+    assert info.sequence == pipeline.n_frames - 4
+    assert not frame.flags.writeable
+    assert pipeline.is_valid(info.sequence) and not pipeline.is_valid(0)
+    latest, latest_info = pipeline.get_latest()
+    assert latest.flags.writeable and latest_info.sequence == pipeline.n_frames - 1
+    # Idle polls block in the SDK instead of spinning
+    assert camera.n_polls < 200
+
+
+class _FakeMonoToColorSDK:
+    """MonoToColorProcessorSDK stand-in; its processors refuse to convert once disposed."""
+
+    processors = []
+
+    def __init__(self):
+        self.disposed = False
+
+    def create_mono_to_color_processor(self, sensor_type, phase, color_correction, white_balance, bit_depth):
+        processor = _FakeMonoToColorProcessor()
+        self.processors.append(processor)
+        return processor
+
+    def dispose(self):
+        self.disposed = True
+
+
+class _FakeMonoToColorProcessor:
+    def __init__(self):
+        self.disposed = False
+
+    def transform_to_24(self, frame, width, height):
+        assert not self.disposed, "transform_to_24 on a disposed processor"
+        return np.repeat(frame.ravel(), 3)
+
+    def dispose(self):
+        self.disposed = True
+
+
+def test_stop_releases_the_colour_processor_and_a_new_one_is_created_on_demand(monkeypatch):
+    monkeypatch.setattr(tl_mono_to_color_processor, "MonoToColorProcessorSDK", _FakeMonoToColorSDK)
+    monkeypatch.setattr(_FakeMonoToColorSDK, "processors", [])
+    camera = _FakeTLCamera()
+    camera.camera_sensor_type = SENSOR_TYPE.BAYER
+    camera.color_filter_array_phase = 0
+    camera.bit_depth = 12
+    camera.get_color_correction_matrix = lambda: np.eye(3)
+    camera.get_default_white_balance_matrix = lambda: np.eye(3)
+    pipeline = CameraFramePipeline(camera, poll_timeout_ms=50)
+
+    with pipeline:
+        pipeline.create_reader().read(timeout_s=1.0)
+        image, _ = pipeline.get_latest_color()
+    first = _FakeMonoToColorSDK.processors[0]
+
+    assert first.disposed
+    assert image.shape == (8, 6, 3)
+    image, info = pipeline.get_latest_color()
+    assert np.all(image == info.frame_count)
+    assert len(_FakeMonoToColorSDK.processors) == 2 and not _FakeMonoToColorSDK.processors[1].disposed
+    pipeline.stop()
+    assert _FakeMonoToColorSDK.processors[1].disposed
@@ -0,0 +1,173 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.TimeTaggers.TimeTagAnalysis import (
+    ConditionalHistogram,
+    Correlation,
+    Counter,
+    DelayedChannel,
+    FrequencyCounter,
+    GatedChannel,
+    Histogram,
+    Histogram2D,
+    OfflineTagger,
+    check_probe,
+)
+
+
+def _random_stream(seed, n_events=3_000, channels=(1, 2, 3), t_max=200_000):
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.integers(0, t_max, size=n_events))
+    return timestamps, rng.choice(channels, size=n_events).astype(np.int32)
+
+
+def _chunks(timestamps, channels, n_chunks):
+    return list(zip(np.array_split(timestamps, n_chunks), np.array_split(channels, n_chunks)))
+
+
+def _reference_histogram(timestamps, channels, start, click, binwidth, n_bins):
+    data = np.zeros(n_bins, dtype=np.int64)
+    last_start = None
+    for t, c in zip(timestamps.tolist(), channels.tolist()):
+        if c == start:
+            last_start = t
+        elif c == click and last_start is not None and (t - last_start) // binwidth < n_bins:
+            data[(t - last_start) // binwidth] += 1
+    return data
+
+
+def _reference_correlation(t1, t2, binwidth, n_bins):
+    half = n_bins * binwidth // 2
+    delays = (t2[np.newaxis, :] - t1[:, np.newaxis]).ravel()
+    delays = delays[(delays >= -half) & (delays < n_bins * binwidth - half)]
+    return np.bincount((delays + half) // binwidth, minlength=n_bins)
+
+
+@pytest.mark.parametrize("n_chunks", [1, 7])
+def test_histogram_matches_reference_for_any_chunking(n_chunks):
+    timestamps, channels = _random_stream(0)
+    tagger = OfflineTagger()
+    histogram = Histogram(tagger, click_channel=2, start_channel=1, binwidth=50, n_bins=40)
+
+    tagger.run(_chunks(timestamps, channels, n_chunks))
+
+    np.testing.assert_array_equal(histogram.getData(), _reference_histogram(timestamps, channels, 1, 2, 50, 40))
+    assert histogram.getIndex()[1] == 50
+
+
+@pytest.mark.parametrize("n_chunks", [1, 9])
+def test_correlation_matches_reference_for_any_chunking(n_chunks):
+    timestamps, channels = _random_stream(1)
+    tagger = OfflineTagger()
+    correlation = Correlation(tagger, channel_1=1, channel_2=3, binwidth=100, n_bins=30)
+
+    tagger.run(_chunks(timestamps, channels, n_chunks))
+
+    expected = _reference_correlation(timestamps[channels == 1], timestamps[channels == 3], 100, 30)
+    np.testing.assert_array_equal(correlation.getData(), expected)
+    assert correlation.getIndex()[0] == -1500
+
+
+def test_delayed_and_gated_channels_match_reference():
+    timestamps, channels = _random_stream(2, t_max=2_000_000_000)
+    tagger = OfflineTagger()
+    gate_start = DelayedChannel(tagger, input_channel=1, delay=1_000_000)
+    gate_stop = DelayedChannel(tagger, input_channel=1, delay=1_500_000)
+    gated = GatedChannel(tagger, 2, gate_start.getChannel(), gate_stop.getChannel())
+    histogram = Histogram(tagger, click_channel=gated.getChannel(), start_channel=1, binwidth=10_000, n_bins=200)
+
+    tagger.run(_chunks(timestamps, channels, 11))
+
+    triggers = timestamps[channels == 1]
+    gate_events = sorted([(t + 1_000_000, True) for t in triggers] + [(t + 1_500_000, False) for t in triggers])
+    gate_times = np.array([t for t, _ in gate_events])
+    gate_opens = np.array([is_open for _, is_open in gate_events])
+    passed = []
+    for t, c in zip(timestamps, channels):
+        last_gate = np.searchsorted(gate_times, t, side="right") - 1
+        if c == 2 and last_gate >= 0 and gate_opens[last_gate]:
+            passed.append(t)
+    passed_channels = np.full(len(passed), 99)
+    merged = np.concatenate((timestamps, passed))
+    order = np.argsort(merged, kind="stable")
+    merged_channels = np.concatenate((channels, passed_channels))[order]
+    expected = _reference_histogram(merged[order], merged_channels, 1, 99, 10_000, 200)
+    np.testing.assert_array_equal(histogram.getData(), expected)
+    assert histogram.getData().sum() > 0
+
+
+def test_histogram_2d_counts_stop_combinations_of_the_same_start():
+    timestamps = np.array([0, 10, 20, 25, 100, 130, 135, 140])
+    channels = np.array([1, 2, 3, 3, 1, 2, 2, 3])
+    tagger = OfflineTagger()
+    histogram = Histogram2D(tagger, start_channel=1, stop_channel_1=2, stop_channel_2=3, binwidth_1=10, binwidth_2=10, n_bins_1=5, n_bins_2=5)
+
+    tagger.run(_chunks(timestamps, channels, 4))
+
+    expected = np.zeros((5, 5), dtype=np.int64)
+    expected[1, 2] = 2
+    expected[3, 4] = 2
+    np.testing.assert_array_equal(histogram.getData(), expected)
+
+
+def test_conditional_histogram_only_counts_heralded_cycles():
+    # Trigger on 1, herald on 3, clicks on 2. Only the second and last cycles are heralded.
+    timestamps = np.array([0, 15, 100, 105, 120, 200, 230, 300, 310, 340])
+    channels = np.array([1, 2, 1, 3, 2, 1, 2, 1, 2, 3])
+    tagger = OfflineTagger()
+    histogram = ConditionalHistogram(tagger, click_channel=2, start_channel=1, condition_channel=3, binwidth=10, n_bins=5)
+
+    tagger.run(_chunks(timestamps, channels, 3))
+
+    np.testing.assert_array_equal(histogram.getData(), [0, 1, 1, 0, 0])
+
+
+def test_counter_keeps_the_most_recent_bins_per_channel():
+    tagger = OfflineTagger()
+    counter = Counter(tagger, channels=[2, 1], binwidth=10, n_values=3)
+
+    tagger.run(_chunks(np.array([0, 5, 12, 25, 31, 33]), np.array([1, 1, 2, 1, 2, 2]), 2))
+
+    np.testing.assert_array_equal(counter.getData(), [[1, 0, 2], [0, 1, 0]])
+
+
+@pytest.mark.parametrize("n_chunks", [1, 7])
+def test_frequency_counter_interpolates_periods_for_any_chunking(n_chunks):
+    # 1 GHz clock starting at 250 ps on channel 1, noise on channel 2
+    clock = 250 + 1000 * np.arange(2_000)
+    noise = np.sort(np.random.default_rng(7).integers(0, 2_000_000, size=500))
+    timestamps = np.concatenate((clock, noise))
+    order = np.argsort(timestamps, kind="stable")
+    channels = np.concatenate((np.ones(clock.shape[0]), np.full(noise.shape[0], 2)))[order].astype(np.int32)
+    tagger = OfflineTagger()
+    counter = FrequencyCounter(tagger, [1, 2], sampling_interval=10_000, fitting_window=4_000, n_values=100)
+
+    tagger.run(_chunks(timestamps[order], channels, n_chunks))
+
+    data = counter.getDataObject()
+    assert data.size == 100
+    assert data.getIndex()[-1] == 199
+    np.testing.assert_allclose(data.getPeriodsCount()[0], (data.getTime() - 250) / 1000)
+    np.testing.assert_allclose(data.getFrequency()[0, 1:], 1e9)
+    assert counter.getDataObject(remove=True).size == 100 and counter.getDataObject().size == 0
+
+
+def test_check_probe_splits_raw_histogram_into_gate_windows():
+    rng = np.random.default_rng(3)
+    triggers = np.arange(0, 1_000_000, 1000)
+    clicks = 2 * rng.integers(0, 500_000, size=3_000) + 1
+    timestamps = np.concatenate((triggers, clicks))
+    order = np.argsort(timestamps, kind="stable")
+    channels = np.concatenate((np.ones_like(triggers), np.full_like(clicks, 2)))[order]
+
+    check, probe, correlation, raw, conditional = check_probe(
+        _chunks(timestamps[order], channels, 5), trigger_channel_number=1, click_channel_number=2,
+        check_gate_delay_ps=0, check_gate_width_ps=200, probe_gate_delay_ps=200, probe_gate_width_ps=300,
+        bin_width_ps=10, num_bins=100,
+    )
+
+    np.testing.assert_array_equal(check.getData()[:20], raw.getData()[:20])
+    np.testing.assert_array_equal(probe.getData()[20:50], raw.getData()[20:50])
+    assert check.getData()[20:].sum() == 0 and probe.getData()[:20].sum() == 0
+    assert correlation.getData().shape == (5000,)
+    assert 0 < conditional.getData().sum() < probe.getData().sum()
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.TimeTaggers.TimeTagArchive import TimeTagArchiveReader, TimeTagArchiveWriter
+from photonicdrivers.TimeTaggers.TimeTagStreaming import TimeTagRingBuffer
+
+
+def _write_archive(path, timestamps, channels, n_writes=3, block_duration_ps=100):
+    with TimeTagArchiveWriter(str(path), block_duration_ps=block_duration_ps, metadata={"sample": "A"}) as writer:
+        for piece_t, piece_c in zip(np.array_split(timestamps, n_writes), np.array_split(channels, n_writes)):
+            writer.write(piece_t, piece_c)
+    return TimeTagArchiveReader(str(path))
+
+
+def test_archive_round_trip_and_index_counts(tmp_path):
+    rng = np.random.default_rng(1)
+    timestamps = np.sort(rng.integers(0, 10_000, size=2_000))
+    channels = rng.choice([1, 2, -3], size=2_000).astype(np.int32)
+
+    reader = _write_archive(tmp_path / "run", timestamps, channels)
+
+    assert isinstance(reader.timestamps, np.memmap)
+    np.testing.assert_array_equal(reader.timestamps, timestamps)
+    np.testing.assert_array_equal(reader.channels, channels)
+    assert reader.get_channel_counts() == {channel: int(np.sum(channels == channel)) for channel in (-3, 1, 2)}
+    assert reader.block_channel_counts.sum() == timestamps.shape[0]
+    assert reader.metadata["user"] == {"sample": "A"}
+
+
+def test_archive_time_window_and_channel_queries(tmp_path):
+    rng = np.random.default_rng(2)
+    timestamps = np.sort(rng.integers(0, 10_000, size=3_000))
+    channels = rng.choice([1, 2], size=3_000).astype(np.int32)
+    reader = _write_archive(tmp_path / "run", timestamps, channels)
+
+    window_t, window_c = reader.time_window(2_345, 6_789)
+    mask = (timestamps >= 2_345) & (timestamps < 6_789)
+    np.testing.assert_array_equal(window_t, timestamps[mask])
+    np.testing.assert_array_equal(window_c, channels[mask])
+
+    np.testing.assert_array_equal(reader.channel_timestamps(2, 1_000, 5_000), timestamps[(channels == 2) & (timestamps >= 1_000) & (timestamps < 5_000)])
+    assert reader.channel_timestamps(7).shape == (0,)
+
+    chunks = list(reader.iter_chunks(chunk_events=1_000))
+    assert [chunk[0].shape[0] for chunk in chunks] == [1_000, 1_000, 1_000]
+
+
+def test_archive_writer_drops_overflow_markers_and_counts_missed_events(tmp_path):
+    ring = TimeTagRingBuffer(chunk_events=8)
+    chunk = next(ring.write(
+        np.array([10, 20, 30, 40]),
+        np.array([1, 1, 2, 1]),
+        event_types=np.array([0, 2, 4, 0]),
+        missed_events=np.array([0, 0, 5, 0]),
+    ))
+
+    with TimeTagArchiveWriter(str(tmp_path / "run")) as writer:
+        writer.write_chunk(chunk)
+    reader = TimeTagArchiveReader(str(tmp_path / "run"))
+
+    assert reader.timestamps.tolist() == [10, 40]
+    assert reader.metadata["missed_events"] == 5
+
+
+def test_archive_writer_rejects_unsorted_timestamps_and_existing_archive(tmp_path):
+    with TimeTagArchiveWriter(str(tmp_path / "run")) as writer:
+        writer.write(np.array([5, 6]), np.array([1, 1]))
+        with pytest.raises(ValueError, match="monotonically"):
+            writer.write(np.array([4]), np.array([1]))
+
+    with pytest.raises(FileExistsError):
+        TimeTagArchiveWriter(str(tmp_path / "run"))
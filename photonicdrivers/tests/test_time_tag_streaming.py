@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from photonicdrivers.TimeTaggers.TimeTagStreaming import TimeTagRingBuffer, iterate_time_tag_stream
+
+
+class _FakeBuffer:
+    def __init__(self, timestamps, channels):
+        self.size = len(timestamps)
+        self._timestamps = np.asarray(timestamps, dtype=np.int64)
+        self._channels = np.asarray(channels, dtype=np.int32)
+
+    def getTimestamps(self):
+        return self._timestamps
+
+    def getChannels(self):
+        return self._channels
+
+    def getEventTypes(self):
+        return np.zeros(self.size, dtype=np.uint8)
+
+    def getMissedEvents(self):
+        return np.zeros(self.size, dtype=np.uint16)
+
+
+class _FakeStream:
+    def __init__(self, buffers):
+        self._buffers = list(buffers)
+        self.stopped = False
+
+    def isRunning(self):
+        return len(self._buffers) > 0
+
+    def getData(self):
+        if self._buffers:
+            return self._buffers.pop(0)
+        return _FakeBuffer([], [])
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_ring_buffer_splits_large_writes_and_reuses_slots():
+    ring = TimeTagRingBuffer(chunk_events=4, n_slots=2)
+
+    chunks = list(ring.write(np.arange(10), np.ones(10)))
+
+    assert [chunk.size for chunk in chunks] == [4, 4, 2]
+    assert chunks[2].timestamps.tolist() == [8, 9]
+    # The third chunk reuses the first slot
+    assert np.shares_memory(chunks[0].timestamps, chunks[2].timestamps)
+    assert ring.events_written == 10
+
+
+def test_ring_buffer_rejects_invalid_sizes():
+    with pytest.raises(ValueError, match="chunk_events"):
+        TimeTagRingBuffer(chunk_events=0)
+    with pytest.raises(ValueError, match="n_slots"):
+        TimeTagRingBuffer(n_slots=1)
+
+
+def test_iterate_time_tag_stream_yields_every_event_and_stops_stream():
+    stream = _FakeStream([
+        _FakeBuffer([1, 2, 3], [1, 2, 1]),
+        _FakeBuffer([], []),
+        _FakeBuffer([4, 5, 6, 7, 8], [2, 2, 1, 1, 2]),
+    ])
+    ring = TimeTagRingBuffer(chunk_events=4, n_slots=3)
+
+    collected = [chunk.copy() for chunk in iterate_time_tag_stream(stream, ring, buffer_events=5, poll_interval_s=0.0)]
+
+    assert np.concatenate([chunk.timestamps for chunk in collected]).tolist() == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert np.concatenate([chunk.channels for chunk in collected]).tolist() == [1, 2, 1, 2, 2, 1, 1, 2]
+    assert [chunk.buffer_filled for chunk in collected] == [False, False, True]
+    assert stream.stopped
+
+
+def test_iterate_time_tag_stream_does_not_overwrite_unconsumed_chunks_of_a_batch_larger_than_the_ring():
+    stream = _FakeStream([_FakeBuffer(np.arange(10), np.ones(10))])
+    ring = TimeTagRingBuffer(chunk_events=2, n_slots=2)
+
+    timestamps = [chunk.timestamps.tolist() for chunk in iterate_time_tag_stream(stream, ring, poll_interval_s=0.0)]
+
+    assert timestamps == [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]]
+
+
+def test_chunks_stay_valid_until_the_ring_wraps():
+    ring = TimeTagRingBuffer(chunk_events=2, n_slots=2)
+    chunks = ring.write(np.arange(6), np.ones(6))
+
+    first = next(chunks)
+    second = next(chunks)
+
+    assert first.timestamps.tolist() == [0, 1]
+    assert second.timestamps.tolist() == [2, 3]
+    next(chunks)
+    assert second.timestamps.tolist() == [2, 3]